@@ -1,8 +1,13 @@
 # standard modules
 import datetime
+import hashlib
+import logging
+import multiprocessing
 import ntpath
 import os
+import Queue
 import sys
+import time
 import traceback
 # 3rd party modules
 from configobj import ConfigObj
@@ -23,16 +28,23 @@ now = datetime.datetime.now()
 log_file_name = "batch_" + now.strftime("%Y%m%d%H%M") + ".log"
 logger = pfp_log.init_logger("pfp_log", log_file_name, to_file=True, to_screen=True)
 
-def do_L1_batch(cf_level):
+def do_L1_batch(cf_level, force=False):
     for i in cf_level.keys():
         cf_file_name = os.path.split(cf_level[i])
         logger.info("Starting L1 processing with %s", cf_file_name[1])
         try:
             cf = pfp_io.get_controlfilecontents(cf_level[i])
-            ds1 = pfp_levels.l1qc(cf)
             outfilename = pfp_io.get_outfilenamefromcf(cf)
+            if pfp_io.manifest_is_current(cf, outfilename, force=force):
+                msg = "Skipping L1 processing with " + cf_file_name[1] + ", output is up to date"
+                logger.info(msg)
+                logger.info("")
+                continue
+            ds1 = pfp_levels.l1qc(cf)
             ncFile = pfp_io.nc_open_write(outfilename)
-            pfp_io.nc_write_series(ncFile, ds1)
+            pfp_io.nc_write_series(ncFile, ds1,
+                                   write_options=pfp_io.nc_write_options(cf))
+            pfp_io.manifest_write(cf, outfilename)
             msg = "Finished L1 processing with " + cf_file_name[1]
             logger.info(msg)
             logger.info("")
@@ -43,19 +55,26 @@ def do_L1_batch(cf_level):
             logger.error(error_message)
             continue
     return
-def do_L2_batch(cf_level):
+def do_L2_batch(cf_level, force=False):
     for i in cf_level.keys():
         cf_file_name = os.path.split(cf_level[i])
         msg = "Starting L2 processing with " + cf_file_name[1]
         logger.info(msg)
         try:
             cf = pfp_io.get_controlfilecontents(cf_level[i])
+            if pfp_io.manifest_is_current(cf, pfp_io.get_outfilenamefromcf(cf), force=force):
+                msg = "Skipping L2 processing with " + cf_file_name[1] + ", output is up to date"
+                logger.info(msg)
+                logger.info("")
+                continue
             infilename = pfp_io.get_infilenamefromcf(cf)
             ds1 = pfp_io.nc_read_series(infilename)
             ds2 = pfp_levels.l2qc(cf, ds1)
             outfilename = pfp_io.get_outfilenamefromcf(cf)
             ncFile = pfp_io.nc_open_write(outfilename)
-            pfp_io.nc_write_series(ncFile, ds2)
+            pfp_io.nc_write_series(ncFile, ds2,
+                                   write_options=pfp_io.nc_write_options(cf))
+            pfp_io.manifest_write(cf, outfilename)
             msg = "Finished L2 processing with " + cf_file_name[1]
             logger.info(msg)
             logger.info("")
@@ -66,20 +85,27 @@ def do_L2_batch(cf_level):
             logger.error(error_message)
             continue
     return
-def do_L3_batch(cf_level):
+def do_L3_batch(cf_level, force=False):
     for i in cf_level.keys():
         cf_file_name = os.path.split(cf_level[i])
         msg = "Starting L3 processing with " + cf_file_name[1]
         logger.info(msg)
         try:
             cf = pfp_io.get_controlfilecontents(cf_level[i])
+            if pfp_io.manifest_is_current(cf, pfp_io.get_outfilenamefromcf(cf), force=force):
+                msg = "Skipping L3 processing with " + cf_file_name[1] + ", output is up to date"
+                logger.info(msg)
+                logger.info("")
+                continue
             infilename = pfp_io.get_infilenamefromcf(cf)
             ds2 = pfp_io.nc_read_series(infilename)
             ds3 = pfp_levels.l3qc(cf, ds2)
             outfilename = pfp_io.get_outfilenamefromcf(cf)
             outputlist = pfp_io.get_outputlistfromcf(cf, "nc")
             ncFile = pfp_io.nc_open_write(outfilename)
-            pfp_io.nc_write_series(ncFile, ds3, outputlist=outputlist)
+            pfp_io.nc_write_series(ncFile, ds3, outputlist=outputlist,
+                                   write_options=pfp_io.nc_write_options(cf))
+            pfp_io.manifest_write(cf, outfilename)
             msg = "Finished L3 processing with " + cf_file_name[1]
             logger.info(msg)
             logger.info("")
@@ -239,7 +265,7 @@ def do_mpt_batch(cf_level):
             logger.error(error_message)
             continue
     return
-def do_L4_batch(cf_level):
+def do_L4_batch(cf_level, force=False):
     for i in cf_level.keys():
         if not os.path.isfile(cf_level[i]):
             msg = " Control file " + cf_level[i] + " not found"
@@ -254,13 +280,20 @@ def do_L4_batch(cf_level):
                 cf_l4["Options"] = {}
             cf_l4["Options"]["call_mode"] = "batch"
             cf_l4["Options"]["show_plots"] = "No"
+            if pfp_io.manifest_is_current(cf_l4, pfp_io.get_outfilenamefromcf(cf_l4), force=force):
+                msg = "Skipping L4 processing with " + cf_file_name[1] + ", output is up to date"
+                logger.info(msg)
+                logger.info("")
+                continue
             infilename = pfp_io.get_infilenamefromcf(cf_l4)
             ds3 = pfp_io.nc_read_series(infilename)
             ds4 = pfp_levels.l4qc(None, cf_l4, ds3)
             outfilename = pfp_io.get_outfilenamefromcf(cf_l4)
             outputlist = pfp_io.get_outputlistfromcf(cf_l4, "nc")
             ncFile = pfp_io.nc_open_write(outfilename)
-            pfp_io.nc_write_series(ncFile, ds4, outputlist=outputlist)
+            pfp_io.nc_write_series(ncFile, ds4, outputlist=outputlist,
+                                   write_options=pfp_io.nc_write_options(cf_l4))
+            pfp_io.manifest_write(cf_l4, outfilename)
             msg = "Finished L4 processing with " + cf_file_name[1]
             logger.info(msg)
             # now plot the fingerprints for the L4 files
@@ -291,7 +324,7 @@ def do_L4_batch(cf_level):
             logger.error(error_message)
             continue
     return
-def do_L5_batch(cf_level):
+def do_L5_batch(cf_level, force=False):
     for i in cf_level.keys():
         if not os.path.isfile(cf_level[i]):
             msg = " Control file " + cf_level[i] + " not found"
@@ -306,13 +339,20 @@ def do_L5_batch(cf_level):
                 cf_l5["Options"] = {}
             cf_l5["Options"]["call_mode"] = "batch"
             cf_l5["Options"]["show_plots"] = "No"
+            if pfp_io.manifest_is_current(cf_l5, pfp_io.get_outfilenamefromcf(cf_l5), force=force):
+                msg = "Skipping L5 processing with " + cf_file_name[1] + ", output is up to date"
+                logger.info(msg)
+                logger.info("")
+                continue
             infilename = pfp_io.get_infilenamefromcf(cf_l5)
             ds4 = pfp_io.nc_read_series(infilename)
             ds5 = pfp_levels.l5qc(None, cf_l5, ds4)
             outfilename = pfp_io.get_outfilenamefromcf(cf_l5)
             outputlist = pfp_io.get_outputlistfromcf(cf_l5, "nc")
             ncFile = pfp_io.nc_open_write(outfilename)
-            pfp_io.nc_write_series(ncFile, ds5, outputlist=outputlist)
+            pfp_io.nc_write_series(ncFile, ds5, outputlist=outputlist,
+                                   write_options=pfp_io.nc_write_options(cf_l5))
+            pfp_io.manifest_write(cf_l5, outfilename)
             msg = "Finished L5 processing with " + cf_file_name[1]
             logger.info(msg)
             # now plot the fingerprints for the L5 files
@@ -344,7 +384,7 @@ def do_L5_batch(cf_level):
             logger.error(error_message)
             continue
     return
-def do_L6_batch(cf_level):
+def do_L6_batch(cf_level, force=False):
     for i in cf_level.keys():
         if not os.path.isfile(cf_level[i]):
             msg = " Control file " + cf_level[i] + " not found"
@@ -359,13 +399,20 @@ def do_L6_batch(cf_level):
                 cf["Options"] = {}
             cf["Options"]["call_mode"] = "batch"
             cf["Options"]["show_plots"] = "No"
+            if pfp_io.manifest_is_current(cf, pfp_io.get_outfilenamefromcf(cf), force=force):
+                msg = "Skipping L6 processing with " + cf_file_name[1] + ", output is up to date"
+                logger.info(msg)
+                logger.info("")
+                continue
             infilename = pfp_io.get_infilenamefromcf(cf)
             ds5 = pfp_io.nc_read_series(infilename)
             ds6 = pfp_levels.l6qc(None, cf, ds5)
             outfilename = pfp_io.get_outfilenamefromcf(cf)
             outputlist = pfp_io.get_outputlistfromcf(cf, "nc")
             ncFile = pfp_io.nc_open_write(outfilename)
-            pfp_io.nc_write_series(ncFile, ds6, outputlist=outputlist)
+            pfp_io.nc_write_series(ncFile, ds6, outputlist=outputlist,
+                                   write_options=pfp_io.nc_write_options(cf))
+            pfp_io.manifest_write(cf, outfilename)
             msg = "Finished L6 processing with " + cf_file_name[1]
             logger.info(msg)
             logger.info("")
@@ -376,6 +423,271 @@ def do_L6_batch(cf_level):
             logger.error(error_message)
             continue
     return
+class ErrorCounter(logging.Handler):
+    """ Counts the ERROR (and above) messages sent to a logger."""
+    def __init__(self):
+        super(ErrorCounter, self).__init__(level=logging.ERROR)
+        self.count = 0
+
+    def emit(self, record):
+        self.count += 1
+
+def do_batch_job(job, results_queue):
+    """
+    Purpose:
+     Run a single batch job (one control file at one level) in a worker
+     process.  The messages for the job are written to a separate log file
+     and the outcome is put on the results queue.
+    Usage:
+     Called as the target of a multiprocessing.Process by do_parallel_batch.
+    Author: PRI
+    Date: October 2026
+    """
+    start = time.time()
+    # the worker inherits the batch log handlers, replace these with the
+    # handlers for this job's log file
+    job_logger = logging.getLogger("pfp_log")
+    for handler in list(job_logger.handlers):
+        job_logger.removeHandler(handler)
+    pfp_log.init_logger("pfp_log", job["log_file_name"], to_file=True, to_screen=False)
+    error_counter = ErrorCounter()
+    job_logger.addHandler(error_counter)
+    try:
+        if job["level"] in ["l1", "l2", "l3", "l4", "l5", "l6"]:
+            batch_functions[job["level"]]({"0": job["cf_file_path"]}, force=job["force"])
+        else:
+            batch_functions[job["level"]]({"0": job["cf_file_path"]})
+        if error_counter.count == 0:
+            status = "success"
+        else:
+            status = "failed"
+    except Exception:
+        job_logger.error(traceback.format_exc())
+        status = "failed"
+    results_queue.put((job["name"], status, time.time() - start))
+    return
+
+def run_batch_jobs(jobs, workers, timeout):
+    """
+    Purpose:
+     Run a list of batch jobs concurrently with at most "workers" jobs
+     running at any one time.  A job is started once all of the jobs in its
+     "depends_on" list have succeeded and is skipped if any of them did not.
+     Jobs that run for longer than "timeout" seconds are terminated, a
+     timeout of 0 means no limit.
+    Usage:
+     results = run_batch_jobs(jobs, workers, timeout)
+     where jobs is a list of job dictionaries (see do_parallel_batch)
+           workers is the maximum number of concurrent jobs
+           timeout is the per-job timeout in seconds
+           results is a dictionary of {"status": ..., "wall_time": ...} keyed
+           by job name
+    Author: PRI
+    Date: October 2026
+    """
+    results_queue = multiprocessing.Queue()
+    pending = list(jobs)
+    running = {}
+    results = {}
+    while len(pending) > 0 or len(running) > 0:
+        # skip jobs that depend on a job that did not succeed
+        for job in list(pending):
+            failed = [name for name in job["depends_on"]
+                      if name in results and results[name]["status"] != "success"]
+            if len(failed) > 0:
+                pending.remove(job)
+                results[job["name"]] = {"status": "skipped", "wall_time": 0.0}
+                msg = "Skipping " + job["name"] + ", " + ",".join(failed) + " did not succeed"
+                logger.error(msg)
+        # start jobs whose inputs are ready until all of the workers are busy
+        ready = [job for job in pending
+                 if all([name in results for name in job["depends_on"]])]
+        while len(ready) > 0 and len(running) < workers:
+            job = ready.pop(0)
+            pending.remove(job)
+            msg = "Starting " + job["name"] + ", log file is " + job["log_file_name"]
+            logger.info(msg)
+            process = multiprocessing.Process(target=do_batch_job, args=(job, results_queue))
+            process.start()
+            running[job["name"]] = {"process": process, "start": time.time()}
+        # collect the results from any jobs that have finished
+        try:
+            name, status, wall_time = results_queue.get(timeout=1)
+            if name in running:
+                running[name]["process"].join()
+                del running[name]
+                results[name] = {"status": status, "wall_time": wall_time}
+                msg = "Finished " + name + " (" + status + ")"
+                logger.info(msg)
+        except Queue.Empty:
+            pass
+        # terminate jobs that have timed out and tidy up any that died
+        for name in list(running.keys()):
+            process = running[name]["process"]
+            wall_time = time.time() - running[name]["start"]
+            if timeout > 0 and wall_time > timeout and process.is_alive():
+                process.terminate()
+                process.join()
+                del running[name]
+                results[name] = {"status": "timeout", "wall_time": wall_time}
+                msg = name + " terminated after " + str(int(wall_time)) + " seconds"
+                logger.error(msg)
+            elif not process.is_alive() and process.exitcode != 0:
+                process.join()
+                del running[name]
+                results[name] = {"status": "failed", "wall_time": wall_time}
+                msg = name + " exited with code " + str(process.exitcode)
+                logger.error(msg)
+    return results
+
+def do_parallel_batch(level, cf_level, workers, timeout, force=False):
+    """
+    Purpose:
+     Process the control files for a single level concurrently using a pool
+     of worker processes.
+    Usage:
+     results = do_parallel_batch(level, cf_level, workers, timeout)
+     where level is the processing level (eg "L3")
+           cf_level is the [Levels][level] section of the batch control file
+           workers is the maximum number of concurrent jobs
+           timeout is the per-job timeout in seconds (0 for no limit)
+           force is True to ignore the output file manifests
+    Author: PRI
+    Date: October 2026
+    """
+    jobs = [make_batch_job(level, cf_level[i], force=force) for i in cf_level.keys()]
+    msg = "Starting " + level + " processing of " + str(len(jobs)) + " control files with "
+    msg += str(workers) + " workers"
+    logger.info(msg)
+    return run_batch_jobs(jobs, workers, timeout)
+
+def make_batch_job(level, cf_file_path, force=False):
+    """ Return the job dictionary for a control file at a processing level."""
+    cf_file_name = os.path.split(cf_file_path)[1]
+    # control files with the same name in different directories get different
+    # log files, the short hash of the full path keeps the log file names unique
+    path_hash = hashlib.sha1(normalise_job_file(cf_file_path)).hexdigest()[:8]
+    job_log_name = log_file_name.replace(".log", "_" + level + "_" + os.path.splitext(cf_file_name)[0] +
+                                         "_" + path_hash + ".log")
+    job = {"name": level + " " + cf_file_path, "level": level.lower(),
+           "cf_file_path": cf_file_path, "log_file_name": job_log_name,
+           "depends_on": [], "force": force}
+    return job
+
+def get_job_files(job):
+    """
+    Purpose:
+     Get the input and output file names for a batch job from its control
+     file.  The inputs are all of the file names in the [Files] section, the
+     outputs are the files written by the job at its processing level.
+    Usage:
+     inputs, outputs = get_job_files(job)
+    Author: PRI
+    Date: October 2026
+    """
+    inputs = []
+    outputs = []
+    if not os.path.isfile(job["cf_file_path"]):
+        return inputs, outputs
+    cf = pfp_io.get_controlfilecontents(job["cf_file_path"], mode="quiet")
+    if "Files" not in cf:
+        return inputs, outputs
+    file_path = str(pfp_utils.get_keyvaluefromcf(cf, ["Files"], "file_path", default=""))
+    names = [cf["Files"][key] for key in cf["Files"].scalars
+             if key not in ["file_path", "plot_path", "out_filename"]]
+    if "In" in cf["Files"]:
+        names += [cf["Files"]["In"][key] for key in cf["Files"]["In"].keys()]
+    # file names can be given relative to file_path or in full
+    for name in names:
+        inputs += [normalise_job_file(name), normalise_job_file(os.path.join(file_path, str(name)))]
+    in_filename = pfp_io.get_infilenamefromcf(cf)
+    if job["level"] in ["l1", "l2", "l3", "l4", "l5", "l6"]:
+        outputs.append(pfp_io.get_outfilenamefromcf(cf))
+    elif job["level"] == "concatenate":
+        outputs.append(cf["Files"]["Out"]["ncFileName"])
+    elif job["level"] == "cpd":
+        if "out_filename" in cf["Files"]:
+            outputs.append(os.path.join(file_path, cf["Files"]["out_filename"]))
+        else:
+            outputs.append(in_filename.replace(".nc", "_CPD.xls"))
+    elif job["level"] == "mpt":
+        outputs.append(in_filename.replace(".nc", "_MPT.xls"))
+    elif job["level"] == "climatology":
+        outputs.append(in_filename.replace(".nc", "_Climatology.xls"))
+    outputs = [normalise_job_file(output) for output in outputs]
+    return inputs, outputs
+
+def normalise_job_file(file_name):
+    """
+    Purpose:
+     Return a file name in a form that can be compared with other file names,
+     an absolute path with the case normalised on Windows, so that inputs and
+     outputs given relative to different directories or with different case
+     match in the batch dependency graph.
+    Usage:
+     file_name = normalise_job_file(file_name)
+    Author: PRI
+    Date: October 2026
+    """
+    return os.path.normcase(os.path.abspath(str(file_name)))
+
+def do_dag_batch(cf_batch, levels, workers, timeout, force=False):
+    """
+    Purpose:
+     Process all levels in the batch control file as a dependency graph.  A
+     job depends on the jobs at earlier levels that write any of its input
+     files (eg L3 depends on L2 for the same site, L5 depends on L4 and on
+     the CPD results) and is started as soon as these have finished, so a
+     fast site can run ahead of a slow one.
+    Usage:
+     results = do_dag_batch(cf_batch, levels, workers, timeout, force=force)
+    Author: PRI
+    Date: October 2026
+    """
+    jobs = []
+    producers = {}
+    for level in levels:
+        cf_level = cf_batch["Levels"][level]
+        level_producers = {}
+        for i in cf_level.keys():
+            job = make_batch_job(level, cf_level[i], force=force)
+            inputs, outputs = get_job_files(job)
+            # only jobs at earlier levels can be dependencies, this keeps the
+            # graph acyclic and jobs at the same level independent
+            for input_file in inputs:
+                if input_file in producers and producers[input_file] not in job["depends_on"]:
+                    job["depends_on"].append(producers[input_file])
+            # warn when earlier levels are in the batch but none of them writes the inputs
+            if (level.lower() in ["l2", "l3", "l4", "l5", "l6"] and len(producers) > 0 and
+                len(job["depends_on"]) == 0):
+                msg = " " + job["name"] + ": no job in this batch writes its input files,"
+                msg += " it will start without waiting for the other levels"
+                logger.warning(msg)
+            for output_file in outputs:
+                level_producers[output_file] = job["name"]
+            jobs.append(job)
+        producers.update(level_producers)
+    msg = "Starting dependency scheduled processing of " + str(len(jobs)) + " jobs with "
+    msg += str(workers) + " workers"
+    logger.info(msg)
+    return run_batch_jobs(jobs, workers, timeout)
+
+def log_batch_summary(results, start):
+    """ Write the wall time and status of each batch job to the log."""
+    logger.info("Batch summary")
+    for name in sorted(results.keys()):
+        msg = " " + name + ": " + results[name]["status"]
+        msg += " (" + str(round(results[name]["wall_time"], 1)) + " s)"
+        if results[name]["status"] == "success":
+            logger.info(msg)
+        else:
+            logger.error(msg)
+    nsuccess = len([name for name in results if results[name]["status"] == "success"])
+    msg = " " + str(nsuccess) + " of " + str(len(results)) + " jobs succeeded, total wall time "
+    msg += str(round(time.time() - start, 1)) + " s"
+    logger.info(msg)
+    return
+
 def do_levels_batch(cf_batch):
     if "Options" in cf_batch:
         if "levels" in cf_batch["Options"]:
@@ -393,20 +705,46 @@ def do_levels_batch(cf_batch):
                          "concatenate", "climatology",
                          "cpd", "mpt",
                          "l4", "l5", "l6"]
+    # number of worker processes and the per-job timeout (seconds), 1 worker
+    # gives the original serial processing
+    workers = int(pfp_utils.get_keyvaluefromcf(cf_batch, ["Options"], "workers", default=1))
+    timeout = float(pfp_utils.get_keyvaluefromcf(cf_batch, ["Options"], "job_timeout", default=0))
+    # "levels" runs each level to completion before starting the next, "dag"
+    # starts each job as soon as the jobs that write its input files finish
+    scheduler = str(pfp_utils.get_keyvaluefromcf(cf_batch, ["Options"], "scheduler", default="levels"))
+    # L1 to L6 are skipped if the manifest next to the output file shows the
+    # inputs have not changed, "force = Yes" re-runs everything
+    opt = pfp_utils.get_keyvaluefromcf(cf_batch, ["Options"], "force", default="No")
+    force = (str(opt).lower() == "yes")
+    start = time.time()
+    results = {}
+    if workers > 1 and scheduler.lower() == "dag":
+        dag_levels = []
+        for level in levels:
+            if level.lower() not in processing_levels:
+                msg = "Unrecognised level " + level
+                logger.warning(msg)
+                continue
+            dag_levels.append(level)
+        results = do_dag_batch(cf_batch, dag_levels, workers, timeout, force=force)
+        log_batch_summary(results, start)
+        return
     for level in levels:
         if level.lower() not in processing_levels:
             msg = "Unrecognised level " + level
             logger.warning(msg)
             continue
-        if level.lower() == "l1":
+        if workers > 1:
+            results.update(do_parallel_batch(level, cf_batch["Levels"][level], workers, timeout, force=force))
+        elif level.lower() == "l1":
             # L1 processing
-            do_L1_batch(cf_batch["Levels"][level])
+            do_L1_batch(cf_batch["Levels"][level], force=force)
         elif level.lower() == "l2":
             # L2 processing
-            do_L2_batch(cf_batch["Levels"][level])
+            do_L2_batch(cf_batch["Levels"][level], force=force)
         elif level.lower() == "l3":
             # L3 processing
-            do_L3_batch(cf_batch["Levels"][level])
+            do_L3_batch(cf_batch["Levels"][level], force=force)
         elif level.lower() == "ecostress":
             # convert netCDF files to ECOSTRESS CSV files
             do_ecostress_batch(cf_batch["Levels"][level])
@@ -430,15 +768,25 @@ def do_levels_batch(cf_batch):
             do_mpt_batch(cf_batch["Levels"][level])
         elif level.lower() == "l4":
             # L4 processing
-            do_L4_batch(cf_batch["Levels"][level])
+            do_L4_batch(cf_batch["Levels"][level], force=force)
         elif level.lower() == "l5":
             # L5 processing
-            do_L5_batch(cf_batch["Levels"][level])
+            do_L5_batch(cf_batch["Levels"][level], force=force)
         elif level.lower() == "l6":
             # L6 processing
-            do_L6_batch(cf_batch["Levels"][level])
+            do_L6_batch(cf_batch["Levels"][level], force=force)
+    if workers > 1:
+        log_batch_summary(results, start)
     return
 
+# the batch function for each processing level, used by the worker processes
+batch_functions = {"l1": do_L1_batch, "l2": do_L2_batch, "l3": do_L3_batch,
+                   "ecostress": do_ecostress_batch, "fluxnet": do_fluxnet_batch,
+                   "reddyproc": do_reddyproc_batch, "concatenate": do_concatenate_batch,
+                   "climatology": do_climatology_batch, "cpd": do_cpd_batch,
+                   "mpt": do_mpt_batch, "l4": do_L4_batch, "l5": do_L5_batch,
+                   "l6": do_L6_batch}
+
 if (__name__ == '__main__'):
     # get the control file name
     if len(sys.argv) == 1:
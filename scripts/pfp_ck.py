@@ -472,35 +472,25 @@ def do_diurnalcheck(cf, ds, section, series, code=5):
     if "NumSd" not in cf[section][series]["DiurnalCheck"].keys():
         return
     ts = float(ds.globalattributes['time_step'])
-    n = int((60./ts) + 0.5)             #Number of timesteps per hour
     nInts = int((1440.0/ts)+0.5)        #Number of timesteps per day
-    Av = numpy.array([c.missing_value]*nInts, dtype=numpy.float64)
-    Sd = numpy.array([c.missing_value]*nInts, dtype=numpy.float64)
     NSd = numpy.array(parse_rangecheck_limit(cf[section][series]['DiurnalCheck']['NumSd']))
-    ldt = pfp_utils.GetVariable(ds, "DateTime")
-    month = numpy.array([d.month for d in ldt["Data"]])
-    Hdh = numpy.array([(d.hour + d.minute/float(60)) for d in ldt["Data"]])
-    for m in range(1, 13):
-        mindex = numpy.where(month == m)[0]
-        if len(mindex) != 0:
-            lHdh = Hdh[mindex]
-            l2ds = ds.series[series]["Data"][mindex]
-            for i in range(nInts):
-                li = numpy.where((abs(lHdh-(float(i)/float(n)))<c.eps)&(l2ds!=float(c.missing_value)))
-                if numpy.size(li)!=0:
-                    Av[i] = numpy.mean(l2ds[li])
-                    Sd[i] = numpy.std(l2ds[li])
-                else:
-                    Av[i] = float(c.missing_value)
-                    Sd[i] = float(c.missing_value)
-            Lwr = Av - NSd[m-1]*Sd
-            Upr = Av + NSd[m-1]*Sd
-            hindex = numpy.array(n*lHdh,int)
-            index = numpy.where(((l2ds!=float(c.missing_value))&(l2ds<Lwr[hindex]))|
-                                ((l2ds!=float(c.missing_value))&(l2ds>Upr[hindex])))[0] + mindex[0]
-            ds.series[series]["Data"][index] = numpy.float64(c.missing_value)
-            ds.series[series]["Flag"][index] = numpy.int32(code)
-            ds.series[series]["Attr"]["diurnalcheck_numsd"] = cf[section][series]["DiurnalCheck"]["NumSd"]
+    ti = pfp_utils.get_time_index(ds)
+    month = ti["Month"]
+    # group the data by month and time of day and get the statistics for all groups at once
+    group = pfp_utils.get_diurnalgroups(ti["Hdh"], ts, Month=month)
+    data = ds.series[series]["Data"]
+    stats = pfp_utils.get_groupedstats(group, data, 12*nInts)
+    # records not on a time step use the statistics for the preceding time step
+    idx = (month-1)*nInts + numpy.minimum(ti["Slot"], nInts-1)
+    Lwr = stats["Av"][idx] - NSd[month-1]*stats["Sd"][idx]
+    Upr = stats["Av"][idx] + NSd[month-1]*stats["Sd"][idx]
+    # mask any points that lie outside the average +/- NumSd*standard deviation
+    values = numpy.ma.filled(data, float(c.missing_value))
+    outside = numpy.ma.filled((values < Lwr) | (values > Upr), False)
+    index = numpy.where((values != float(c.missing_value)) & outside)[0]
+    ds.series[series]["Data"][index] = numpy.float64(c.missing_value)
+    ds.series[series]["Flag"][index] = numpy.int32(code)
+    ds.series[series]["Attr"]["diurnalcheck_numsd"] = cf[section][series]["DiurnalCheck"]["NumSd"]
     return
 
 def do_EC155check(cf,ds):
@@ -633,8 +623,9 @@ def do_excludehours(cf,ds,section,series,code=7):
     ldt = ds.series['DateTime']['Data']
     ExcludeList = cf[section][series]['ExcludeHours'].keys()
     NumExclude = len(ExcludeList)
-    Hour = numpy.array([d.hour for d in ldt])
-    Minute = numpy.array([d.minute for d in ldt])
+    ti = pfp_utils.get_time_index(ds)
+    Hour = ti["Hour"]
+    Minute = ti["Minute"]
     for i in range(NumExclude):
         exclude_hours_string = cf[section][series]['ExcludeHours'][str(i)]
         ExcludeHourList = exclude_hours_string.split(",")
@@ -899,8 +890,7 @@ def do_rangecheck(cf, ds, section, series, code=2):
         logger.warning(msg)
         return
     # get the month from the datetime series
-    ldt = pfp_utils.GetVariable(ds, "DateTime")
-    month = numpy.array([d.month for d in ldt["Data"]])
+    month = pfp_utils.get_time_index(ds)["Month"]
     # get the upper and lower limits
     upper = cf[section][series]['RangeCheck']['Upper']
     upr = numpy.array(parse_rangecheck_limit(upper))
@@ -1041,7 +1031,7 @@ def do_lowercheck(cf,ds,section,series,code=2):
         return
 
     ldt = ds.series["DateTime"]["Data"]
-    ts = ds.globalattributes["time_step"]
+    di = pfp_utils.get_date_index(ds)
     data, flag, attr = pfp_utils.GetSeriesasMA(ds, series)
 
     lc_list = list(cf[section][series]["LowerCheck"].keys())
@@ -1055,8 +1045,8 @@ def do_lowercheck(cf,ds,section,series,code=2):
         end_date = dateutil.parser.parse(lwr_list[2])
         eu = float(lwr_list[3])
         # get the start and end indices
-        si = pfp_utils.GetDateIndex(ldt, start_date, ts=ts, default=0, match="exact")
-        ei = pfp_utils.GetDateIndex(ldt, end_date, ts=ts, default=len(ldt)-1, match="exact")
+        si = di.find(start_date, default=0, match="exact")
+        ei = di.find(end_date, default=len(ldt)-1, match="exact")
         # get the segment of data between this start and end date
         seg_data = data[si:ei+1]
         seg_flag = flag[si:ei+1]
@@ -1088,7 +1078,7 @@ def do_uppercheck(cf,ds,section,series,code=2):
         return
 
     ldt = ds.series["DateTime"]["Data"]
-    ts = ds.globalattributes["time_step"]
+    di = pfp_utils.get_date_index(ds)
     data, flag, attr = pfp_utils.GetSeriesasMA(ds, series)
 
     lc_list = list(cf[section][series]["UpperCheck"].keys())
@@ -1101,8 +1091,8 @@ def do_uppercheck(cf,ds,section,series,code=2):
         end_date = dateutil.parser.parse(upr_info[2])
         eu = float(upr_info[3])
         # get the start and end indices
-        si = pfp_utils.GetDateIndex(ldt, start_date, ts=ts, default=0, match="exact")
-        ei = pfp_utils.GetDateIndex(ldt, end_date, ts=ts, default=len(ldt)-1, match="exact")
+        si = di.find(start_date, default=0, match="exact")
+        ei = di.find(end_date, default=len(ldt)-1, match="exact")
         seg_data = data[si:ei+1]
         seg_flag = flag[si:ei+1]
         x = numpy.arange(si, ei+1, 1)
@@ -126,21 +126,20 @@ def write_data_1columnpertimestep(xlSheet, data, ts, startdate=None, format_stri
 def do_diurnalstats(Month, Hdh, data, xlSheet, format_string='',ts=30):
     xlCol = 0
     nInts = 24*int((60/ts)+0.5)
-    Av_all = numpy.ma.zeros([nInts,12]) + float(c.missing_value)
     if len(format_string)!=0:
         d_xf = xlwt.easyxf(num_format_str=format_string)
     else:
         d_xf = xlwt.easyxf()
+    # get the diurnal statistics for all months at once
+    stats = get_monthlydiurnalstats(Month, Hdh, data, ts)
+    Av_all = stats["Av"]
+    Hr = numpy.arange(nInts)*ts/60.
     for m in range(1,13):
-        mi = numpy.where(Month==m)[0]
-        Num,Hr,Av,Sd,Mx,Mn = get_diurnalstats(Hdh[mi],data[mi],ts)
-        Av_all[:,m-1] = Av[:]
-        Num = numpy.ma.filled(Num,float(c.missing_value))
-        Hr = numpy.ma.filled(Hr,float(c.missing_value))
-        Av = numpy.ma.filled(Av,float(c.missing_value))
-        Sd = numpy.ma.filled(Sd,float(c.missing_value))
-        Mx = numpy.ma.filled(Mx,float(c.missing_value))
-        Mn = numpy.ma.filled(Mn,float(c.missing_value))
+        Num = stats["Num"][:,m-1]
+        Av = numpy.ma.filled(stats["Av"][:,m-1],float(c.missing_value))
+        Sd = numpy.ma.filled(stats["Sd"][:,m-1],float(c.missing_value))
+        Mx = numpy.ma.filled(stats["Mx"][:,m-1],float(c.missing_value))
+        Mn = numpy.ma.filled(stats["Mn"][:,m-1],float(c.missing_value))
         if m==1:
             xlSheet.write(1,xlCol,'Hour')
             for j in range(len(Hr)):
@@ -161,26 +160,23 @@ def do_diurnalstats(Month, Hdh, data, xlSheet, format_string='',ts=30):
         xlCol = xlCol + 5
     return Av_all
 
-def get_diurnalstats(DecHour,Data,ts):
+def get_monthlydiurnalstats(Month, Hdh, data, ts):
+    """
+    Purpose:
+     Return the diurnal statistics for each month as a dictionary of arrays
+     with shape [number of time steps per day, 12].  The statistics for all
+     months are calculated in a single pass by pfp_utils.get_groupedstats().
+    Usage:
+     stats = get_monthlydiurnalstats(Month, Hdh, data, ts)
+    Author: PRI
+    Date: October 2026
+    """
     nInts = 24*int((60/ts)+0.5)
-    Num = numpy.ma.zeros(nInts,dtype=int)
-    Hr = numpy.ma.zeros(nInts,dtype=float)
-    for i in range(nInts):
-        Hr[i] = float(i)*ts/60.
-    Av = numpy.ma.masked_all(nInts)
-    Sd = numpy.ma.masked_all(nInts)
-    Mx = numpy.ma.masked_all(nInts)
-    Mn = numpy.ma.masked_all(nInts)
-    if numpy.size(Data)!=0:
-        for i in range(nInts):
-            li = numpy.ma.where((abs(DecHour-Hr[i])<c.eps)&(abs(Data-float(c.missing_value))>c.eps))
-            Num[i] = numpy.size(li)
-            if Num[i]!=0:
-                Av[i] = numpy.ma.mean(Data[li])
-                Sd[i] = numpy.ma.std(Data[li])
-                Mx[i] = numpy.ma.maximum.reduce(Data[li])
-                Mn[i] = numpy.ma.minimum.reduce(Data[li])
-    return Num, Hr, Av, Sd, Mx, Mn
+    group = pfp_utils.get_diurnalgroups(Hdh, ts, Month=Month)
+    stats = pfp_utils.get_groupedstats(group, data, 12*nInts)
+    for item in stats.keys():
+        stats[item] = stats[item].reshape(12, nInts).T
+    return stats
 
 def get_rangecheck_limit(cf,label,upr_def=1E10,lwr_def=-1E10):
     upper = float(upr_def)
@@ -220,8 +216,9 @@ def climatology(cf):
     SiteName = ds.globalattributes['site_name']
     # get the datetime series
     dt = ds.series['DateTime']['Data']
-    Hdh = numpy.array([(d.hour + d.minute/float(60)) for d in dt])
-    Month = numpy.array([d.month for d in dt])
+    ti = pfp_utils.get_time_index(ds)
+    Hdh = ti["Hdh"]
+    Month = ti["Month"]
     # get the initial start and end dates
     StartDate = str(dt[0])
     EndDate = str(dt[-1])
@@ -280,16 +277,14 @@ def climatology(cf):
             write_data_1columnpertimestep(xlSheet, data_daily_i, ts, startdate=sdate, format_string=fmt_str)
         elif ThisOne=="EF" and got_Fa:
             logger.info(" Doing evaporative fraction")
-            EF = numpy.ma.zeros([48,12]) + float(c.missing_value)
+            EF = numpy.ma.zeros([ntsInDay,12]) + float(c.missing_value)
             Hdh,f,a = pfp_utils.GetSeriesasMA(ds,'Hdh',si=si,ei=ei)
             Fa,f,a = pfp_utils.GetSeriesasMA(ds,'Fa',si=si,ei=ei)
             Fe,f,a = pfp_utils.GetSeriesasMA(ds,'Fe',si=si,ei=ei)
-            for m in range(1,13):
-                mi = numpy.where(Month==m)[0]
-                Fa_Num,Hr,Fa_Av,Sd,Mx,Mn = get_diurnalstats(Hdh[mi],Fa[mi],ts)
-                Fe_Num,Hr,Fe_Av,Sd,Mx,Mn = get_diurnalstats(Hdh[mi],Fe[mi],ts)
-                index = numpy.ma.where((Fa_Num>4)&(Fe_Num>4))
-                EF[:,m-1][index] = Fe_Av[index]/Fa_Av[index]
+            Fa_stats = get_monthlydiurnalstats(Month,Hdh,Fa,ts)
+            Fe_stats = get_monthlydiurnalstats(Month,Hdh,Fe,ts)
+            index = numpy.where((Fa_stats["Num"]>4)&(Fe_stats["Num"]>4))
+            EF[index] = Fe_stats["Av"][index]/Fa_stats["Av"][index]
             # reject EF values greater than upper limit or less than lower limit
             upr, lwr = get_rangecheck_limit(cf,'EF')
             EF = numpy.ma.filled(numpy.ma.masked_where((EF>upr)|(EF<lwr),EF),float(c.missing_value))
@@ -313,15 +308,13 @@ def climatology(cf):
             write_data_1columnpertimestep(xlSheet, EFi, ts, startdate=ldt[0], format_string='0.00')
         elif ThisOne=="BR":
             logger.info(" Doing Bowen ratio")
-            BR = numpy.ma.zeros([48,12]) + float(c.missing_value)
+            BR = numpy.ma.zeros([ntsInDay,12]) + float(c.missing_value)
             Fe,f,a = pfp_utils.GetSeriesasMA(ds,'Fe',si=si,ei=ei)
             Fh,f,a = pfp_utils.GetSeriesasMA(ds,'Fh',si=si,ei=ei)
-            for m in range(1,13):
-                mi = numpy.where(Month==m)[0]
-                Fh_Num,Hr,Fh_Av,Sd,Mx,Mn = get_diurnalstats(Hdh[mi],Fh[mi],ts)
-                Fe_Num,Hr,Fe_Av,Sd,Mx,Mn = get_diurnalstats(Hdh[mi],Fe[mi],ts)
-                index = numpy.ma.where((Fh_Num>4)&(Fe_Num>4))
-                BR[:,m-1][index] = Fh_Av[index]/Fe_Av[index]
+            Fh_stats = get_monthlydiurnalstats(Month,Hdh,Fh,ts)
+            Fe_stats = get_monthlydiurnalstats(Month,Hdh,Fe,ts)
+            index = numpy.where((Fh_stats["Num"]>4)&(Fe_stats["Num"]>4))
+            BR[index] = Fh_stats["Av"][index]/Fe_stats["Av"][index]
             # reject BR values greater than upper limit or less than lower limit
             upr,lwr = get_rangecheck_limit(cf,'BR')
             BR = numpy.ma.filled(numpy.ma.masked_where((BR>upr)|(BR<lwr),BR),float(c.missing_value))
@@ -345,15 +338,13 @@ def climatology(cf):
             write_data_1columnpertimestep(xlSheet, BRi, ts, startdate=ldt[0], format_string='0.00')
         elif ThisOne=="WUE":
             logger.info(" Doing ecosystem WUE")
-            WUE = numpy.ma.zeros([48,12]) + float(c.missing_value)
+            WUE = numpy.ma.zeros([ntsInDay,12]) + float(c.missing_value)
             Fe,f,a = pfp_utils.GetSeriesasMA(ds,'Fe',si=si,ei=ei)
             Fc,f,a = pfp_utils.GetSeriesasMA(ds,'Fc',si=si,ei=ei)
-            for m in range(1,13):
-                mi = numpy.where(Month==m)[0]
-                Fc_Num,Hr,Fc_Av,Sd,Mx,Mn = get_diurnalstats(Hdh[mi],Fc[mi],ts)
-                Fe_Num,Hr,Fe_Av,Sd,Mx,Mn = get_diurnalstats(Hdh[mi],Fe[mi],ts)
-                index = numpy.ma.where((Fc_Num>4)&(Fe_Num>4))
-                WUE[:,m-1][index] = Fc_Av[index]/Fe_Av[index]
+            Fc_stats = get_monthlydiurnalstats(Month,Hdh,Fc,ts)
+            Fe_stats = get_monthlydiurnalstats(Month,Hdh,Fe,ts)
+            index = numpy.where((Fc_stats["Num"]>4)&(Fe_stats["Num"]>4))
+            WUE[index] = Fc_stats["Av"][index]/Fe_stats["Av"][index]
             # reject WUE values greater than upper limit or less than lower limit
             upr,lwr = get_rangecheck_limit(cf,'WUE')
             WUE = numpy.ma.filled(numpy.ma.masked_where((WUE>upr)|(WUE<lwr),WUE),float(c.missing_value))
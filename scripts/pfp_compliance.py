@@ -37,7 +37,7 @@ def check_executables():
     else:
         executable_extension = ""
     executable_names = ["solo/bin/sofm", "solo/bin/solo", "solo/bin/seqsolo",
-                        "mds/bin/gf_mds", "mpt/bin/ustar_mp"]
+                        "mpt/bin/ustar_mp"]
     missing_executable = False
     for executable_name in executable_names:
         executable_name = executable_name + executable_extension
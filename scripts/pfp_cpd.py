@@ -4,6 +4,7 @@
 import ast
 import datetime
 import logging
+import multiprocessing
 import os
 import pdb
 import sys
@@ -31,12 +32,12 @@ logger = logging.getLogger("pfp_log")
 
 #------------------------------------------------------------------------------
 # Return a bootstrapped sample of the passed dataframe
-def bootstrap(df):
+def bootstrap(df, rs=np.random):
     #return df.iloc[np.random.random_integers(0, len(df)-1, len(df))]
     if len(df) <= 1:
         return df
     else:
-        return df.iloc[np.random.randint(0, len(df)-1, len(df))]
+        return df.iloc[rs.randint(0, len(df)-1, len(df))]
 #------------------------------------------------------------------------------
 
 #------------------------------------------------------------------------------
@@ -125,6 +126,198 @@ def fit(temp_df):
 
 #------------------------------------------------------------------------------
 
+#------------------------------------------------------------------------------
+# Batched version of fit(), all strata and change points at once
+def fit_batch(ustar, Fc):
+    """
+    Purpose:
+     Fit the operational (b) and diagnostic (a) change point models to
+     a batch of strata at once.  This gives the same results as calling
+     fit() for each stratum but the sums of squared errors for all of the
+     candidate change points are calculated from cumulative sums instead
+     of doing a linear regression for each one.
+    Usage:
+     results = pfp_cpd.fit_batch(ustar, Fc)
+     where ustar and Fc are arrays with one row per stratum, each row
+           sorted by ustar
+           results is an array with one row per stratum, the columns are
+           the same as the list returned by fit()
+    Author: PRI
+    Date: October 2026
+    """
+    x = np.array(ustar, dtype=np.float64, ndmin=2)
+    y = np.array(Fc, dtype=np.float64, ndmin=2)
+    ns, n = x.shape
+    rows = np.arange(ns)
+    ### Null model SSE for operational (b) and diagnostic (a) model
+    X, Y = x.sum(axis=1), y.sum(axis=1)
+    XX, XY, YY = (x*x).sum(axis=1), (x*y).sum(axis=1), (y*y).sum(axis=1)
+    Sxx_null = XX - X*X/n
+    Sxy_null = XY - X*Y/n
+    Syy = YY - Y*Y/n
+    SSE_null_b = ((y - y.mean(axis=1)[:, None])**2).sum(axis=1)
+    slope = Sxy_null/Sxx_null
+    intercept = Y/n - slope*X/n
+    SSE_null_a = ((y - (x*slope[:, None] + intercept[:, None]))**2).sum(axis=1)
+    ### SSE for all change points (1 to n-2) from cumulative sums
+    cp = np.arange(1, n-1)
+    xi = x[:, cp]
+    m = (n - cp - 1)[None, :]
+    cx = np.cumsum(x, axis=1)[:, cp]
+    cxx = np.cumsum(x*x, axis=1)[:, cp]
+    cxy = np.cumsum(x*y, axis=1)[:, cp]
+    cy = np.cumsum(y, axis=1)[:, cp]
+    # ustar held constant above the change point
+    S1 = cx + m*xi
+    S11 = cxx + m*xi*xi
+    S1y = cxy + xi*(Y[:, None] - cy)
+    C11 = S11 - S1*S1/n
+    C1y = S1y - S1*Y[:, None]/n
+    # strata with tied ustar values give change points where the modified
+    # ustar is constant (C11 is 0) or the two ustar terms are collinear (det
+    # is 0), these are fitted with the remaining terms as lstsq does in fit()
+    tol = 1E-12
+    b_ok = C11 > tol*S11
+    C11_safe = np.where(b_ok, C11, 1.0)
+    # operational (b) model, the null model where the modified ustar is constant
+    SSE_b = np.where(b_ok, Syy[:, None] - C1y*C1y/C11_safe, SSE_null_b[:, None])
+    # diagnostic (a) model, second term is ustar above the change point
+    S2 = (X[:, None] - cx) - m*xi
+    S22 = (XX[:, None] - cxx) - 2*xi*(X[:, None] - cx) + m*xi*xi
+    S2y = (XY[:, None] - cxy) - xi*(Y[:, None] - cy)
+    C22 = S22 - S2*S2/n
+    C12 = xi*S2 - S1*S2/n
+    C2y = S2y - S2*Y[:, None]/n
+    det = C11*C22 - C12*C12
+    a_ok = b_ok & (C22 > tol*S22) & (det > tol*C11*C22)
+    det_safe = np.where(a_ok, det, 1.0)
+    C22_safe = np.where(C22 > tol*S22, C22, 1.0)
+    SSE_a = Syy[:, None] - (C22*C1y*C1y - 2*C12*C1y*C2y + C11*C2y*C2y)/det_safe
+    # degenerate diagnostic (a) model, fit with whichever ustar term is left
+    SSE_a1 = np.where(b_ok, SSE_b, Syy[:, None])
+    SSE_a2 = np.where(C22 > tol*S22, Syy[:, None] - C2y*C2y/C22_safe, Syy[:, None])
+    SSE_a = np.where(a_ok, SSE_a, np.minimum(SSE_a1, SSE_a2))
+    ### F scores, the end points are set to the minimum as in fit()
+    f_b_array = np.empty((ns, n))
+    f_a_array = np.empty((ns, n))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        f_b_array[:, 1:n-1] = (SSE_null_b[:, None] - SSE_b)/(SSE_b/(n-2))
+        f_a_array[:, 1:n-1] = (SSE_null_a[:, None] - SSE_a)/(SSE_a/(n-2))
+    # change points within a run of tied ustar values give the same model,
+    # use the F score of the first in the run so argmax picks it as fit() does
+    k = np.arange(n)
+    first = np.maximum.accumulate(np.where(np.diff(x, axis=1) == 0, 0, k[1:]), axis=1)
+    first = np.concatenate([np.zeros((ns, 1), dtype=first.dtype), first], axis=1)
+    for f_array in [f_b_array, f_a_array]:
+        f_array[:, 1:n-1] = f_array[rows[:, None], np.maximum(first[:, 1:n-1], 1)]
+        # a perfect fit gives 0/0, these are ignored and a stratum with
+        # constant Fc has F set to 0 for all change points
+        f_array[np.all(np.isnan(f_array[:, 1:n-1]), axis=1), 1:n-1] = 0.0
+        f_min = np.nanmin(f_array[:, 1:n-1], axis=1)
+        f_array[:, 0], f_array[:, -1] = f_min, f_min
+    change_point_b = np.nanargmax(f_b_array, axis=1)
+    change_point_a = np.nanargmax(f_a_array, axis=1)
+    ustar_threshold_b = x[rows, change_point_b]
+    ustar_threshold_a = x[rows, change_point_a]
+    ### Regression parameters at the change points
+    k = np.arange(n)[None, :]
+    above_b = k > change_point_b[:, None]
+    above_a = k > change_point_a[:, None]
+    # b model
+    ustar_alt = np.where(above_b, ustar_threshold_b[:, None], x)
+    Xb = np.stack([np.ones((ns, n)), ustar_alt], axis=-1)
+    params_b = np.matmul(np.linalg.pinv(Xb), y[:, :, None])[:, :, 0]
+    yHat = params_b[:, 0][:, None] + params_b[:, 1][:, None]*ustar_alt
+    SSE_full_b = ((y - yHat)**2).sum(axis=1)
+    f_b_max = (SSE_null_b - SSE_full_b)/(SSE_full_b/(n-2))
+    # a model, parameters and p values calculated the same way as statsmodels OLS
+    ustar_alt1 = np.where(above_a, ustar_threshold_a[:, None], x)
+    ustar_alt2 = np.where(above_a, x - ustar_threshold_a[:, None], 0.0)
+    Xa = np.stack([np.ones((ns, n)), ustar_alt1, ustar_alt2], axis=-1)
+    pinv_a = np.linalg.pinv(Xa)
+    params_a = np.matmul(pinv_a, y[:, :, None])[:, :, 0]
+    yHat = np.matmul(Xa, params_a[:, :, None])[:, :, 0]
+    SSE_full_a = ((y - yHat)**2).sum(axis=1)
+    f_a_max = (SSE_null_a - SSE_full_a)/(SSE_full_a/(n-2))
+    df_resid = n - 3
+    scale = SSE_full_a/df_resid
+    cov = np.matmul(pinv_a, np.transpose(pinv_a, (0, 2, 1)))*scale[:, None, None]
+    bse = np.sqrt(np.diagonal(cov, axis1=1, axis2=2))
+    pvalues = stats.t.sf(np.abs(params_a/bse), df_resid)*2
+    a0, a1, a2 = params_a[:, 0], params_a[:, 1], params_a[:, 2]
+    norm_a1 = a1*(ustar_threshold_a/(a0+a1*ustar_threshold_a))
+    norm_a2 = a2*(ustar_threshold_a/(a0+a1*ustar_threshold_a))
+    # Return results
+    return np.column_stack([ustar_threshold_b, f_b_max, params_b[:, 0], params_b[:, 1], change_point_b,
+                            ustar_threshold_a, f_a_max, a0, a1, a2, norm_a1, norm_a2, change_point_a,
+                            pvalues[:, 1], pvalues[:, 2]])
+#------------------------------------------------------------------------------
+
+#------------------------------------------------------------------------------
+# Run the CPD algorithm on the observations (i=0) or a bootstrap of them (i>0)
+def cpd_pass(master_df, d, years_index, i, seed):
+    """
+    Purpose:
+     Do one pass of the CPD analysis.  The first pass (i=0) uses the observations,
+     later passes use a bootstrap of the observations drawn with a random number
+     generator seeded with seed.
+    Usage:
+     years_df, seasons_df, results_df = pfp_cpd.cpd_pass(master_df, d, years_index, i, seed)
+    Author: PRI
+    Date: October 2026
+    """
+    # Bootstrap the data for each year
+    if i == 0:
+        df = master_df
+    else:
+        rs = np.random.RandomState(seed)
+        df = pd.concat([bootstrap(master_df.loc[str(j)], rs) for j in years_index])
+
+    # Create nocturnal dataframe (drop all records where any one of the variables is NaN)
+    temp_df = df[['Fc','Ta','ustar','Year']][df['Fsd'] < d['radiation_threshold']].dropna(how = 'any',axis=0)
+
+    # Arrange data into seasons
+    # try: may be insufficient data, needs to be handled; if insufficient on first pass then return empty,otherwise next pass
+    # this will be a marginal case, will almost always be enough data in bootstraps if enough in obs data
+    years_df, seasons_df, results_df = sort(temp_df, d['flux_period'], years_index, i)
+
+    # Run the CPD algorithm on all of the year/season/temperature strata at once
+    cols = ['bMod_threshold','bMod_f_max','b0','b1','bMod_CP',
+            'aMod_threshold','aMod_f_max','a0','a1','a2','norm_a1','norm_a2','aMod_CP','a1p','a2p']
+    # seasons_df and results_df are both sorted by year, season and T class
+    nbins = len(seasons_df)/len(results_df)
+    ustar = seasons_df['ustar'].values.reshape(len(results_df), nbins)
+    Fc = seasons_df['Fc'].values.reshape(len(results_df), nbins)
+    stats_df = pd.DataFrame(fit_batch(ustar, Fc), columns = cols, index = results_df.index)
+    results_df = results_df.join(stats_df)
+
+    results_df['bMod_CP'] = results_df['bMod_CP'].astype(int)
+    results_df['aMod_CP'] = results_df['aMod_CP'].astype(int)
+
+    # QC the results
+    results_df = QC1(results_df)
+
+    return years_df, seasons_df, results_df
+#------------------------------------------------------------------------------
+
+#------------------------------------------------------------------------------
+# Data shared by the bootstrap worker processes, set by cpd_worker_init
+cpd_worker_data = {}
+
+def cpd_worker_init(master_df, d, years_index):
+    """ Store the data used by all bootstraps once in each worker process."""
+    cpd_worker_data["master_df"] = master_df
+    cpd_worker_data["d"] = d
+    cpd_worker_data["years_index"] = years_index
+
+def cpd_worker(args):
+    """ Run a single bootstrap in a worker process, seasons_df is not returned."""
+    i, seed = args
+    years_df, _, results_df = cpd_pass(cpd_worker_data["master_df"], cpd_worker_data["d"],
+                                       cpd_worker_data["years_index"], i, seed)
+    return years_df, None, results_df
+#------------------------------------------------------------------------------
+
 #------------------------------------------------------------------------------
 # Coordinate steps in CPD process
 def cpd_main(cf):
@@ -159,43 +352,11 @@ def cpd_main(cf):
     msg = " Starting CPD analysis for " + str(years_index)
     logger.info(msg)
 
-    # Bootstrap the data and run the CPD algorithm
+    # Bootstrap the data and run the CPD algorithm, the passes are returned
+    # in bootstrap order whether or not they are run in parallel
     #for i in xrange(d['num_bootstraps']):
-    for i in range(d['num_bootstraps']):
-        # Bootstrap the data for each year
+    for i, (years_df, seasons_df, results_df) in enumerate(run_bootstraps(master_df, d, years_index)):
         bootstrap_flag = (False if i == 0 else True)
-        if bootstrap_flag == False:
-            df = master_df
-            logger.info(' Analysing observational data for first pass')
-        else:
-            df = pd.concat([bootstrap(master_df.loc[str(j)]) for j in years_index])
-            if i==1: logger.info(' Analysing '+str(d['num_bootstraps'])+' bootstraps')
-
-        # Create nocturnal dataframe (drop all records where any one of the variables is NaN)
-        temp_df = df[['Fc','Ta','ustar','Year']][df['Fsd'] < d['radiation_threshold']].dropna(how = 'any',axis=0)
-
-        # Arrange data into seasons
-        # try: may be insufficient data, needs to be handled; if insufficient on first pass then return empty,otherwise next pass
-        # this will be a marginal case, will almost always be enough data in bootstraps if enough in obs data
-        years_df, seasons_df, results_df = sort(temp_df, d['flux_period'], years_index, i)
-
-        # Use the results df index as an iterator to run the CPD algorithm on the year/season/temperature strata
-        #if i==1: logger.info(' Finding change points...')
-        cols = ['bMod_threshold','bMod_f_max','b0','b1','bMod_CP',
-                'aMod_threshold','aMod_f_max','a0','a1','a2','norm_a1','norm_a2','aMod_CP','a1p','a2p']
-        lst = []
-        for j in results_df.index:
-            temp_df = seasons_df.loc[j].copy()
-            lst.append(fit(temp_df))
-        stats_df = pd.DataFrame(np.vstack(lst), columns = cols, index = results_df.index)
-        results_df = results_df.join(stats_df)
-
-        results_df['bMod_CP'] = results_df['bMod_CP'].astype(int)
-        results_df['aMod_CP'] = results_df['aMod_CP'].astype(int)
-
-        # QC the results
-        #if i==1: logger.info(' Doing within-sample QC...')
-        results_df = QC1(results_df)
 
         # Output results and plots (if user has set output flags in config file to true)
         if bootstrap_flag == False:
@@ -314,7 +475,7 @@ def CPD_run(cf):
             names[item] = item
     # read the netcdf file
     logger.info(' Reading netCDF file '+file_in)
-    ds = pfp_io.nc_read_series(file_in)
+    ds = pfp_io.nc_read_series(file_in, lazy=True, variable_list=names.values())
     nrecs = int(ds.globalattributes["nc_nrecs"])
     ts = int(ds.globalattributes["time_step"])
     # get the datetime
@@ -329,6 +490,7 @@ def CPD_run(cf):
         data,flag,attr = pfp_utils.GetSeries(ds,names[item])
         d[item] = np.where(data==c.missing_value,np.nan,data)
         f[item] = flag
+    pfp_io.nc_close_lazy(ds)
     # set all data to NaNs if any flag not 0 or 10
     for item in f.keys():
         for f_OK in [0,10]:
@@ -344,6 +506,9 @@ def CPD_run(cf):
     d={}
     d['radiation_threshold']=int(cf['Options']['Fsd_threshold'])
     d['num_bootstraps']=int(cf['Options']['Num_bootstraps'])
+    d['workers']=int(pfp_utils.get_keyvaluefromcf(cf,["Options"],"workers",default=1))
+    d['random_seed']=pfp_utils.get_keyvaluefromcf(cf,["Options"],"Random_seed",default=None)
+    if d['random_seed'] is not None: d['random_seed']=int(d['random_seed'])
     d['flux_period']=int(ds.globalattributes["time_step"])
     d['site_name']=ds.globalattributes["site_name"]
     d["call_mode"]=pfp_utils.get_keyvaluefromcf(cf,["Options"],"call_mode",default="interactive",mode="quiet")
@@ -359,6 +524,44 @@ def CPD_run(cf):
     return df,d
 #------------------------------------------------------------------------------
 
+#------------------------------------------------------------------------------
+# Run the observational pass and the bootstraps
+def run_bootstraps(master_df, d, years_index):
+    """
+    Purpose:
+     Generator that returns the results of the observational pass followed by
+     those of each bootstrap, in order.  The bootstraps are run in a pool of
+     d["workers"] processes if d["workers"] is greater than 1.  Each bootstrap
+     has its own random seed, drawn from d["random_seed"], so the results do
+     not depend on the number of workers.
+    Usage:
+     for i, (years_df, seasons_df, results_df) in enumerate(run_bootstraps(master_df, d, years_index)):
+    Author: PRI
+    Date: October 2026
+    """
+    num_bootstraps = d['num_bootstraps']
+    seeds = np.random.RandomState(d['random_seed']).randint(0, 2**31-1, size=num_bootstraps)
+    logger.info(' Analysing observational data for first pass')
+    yield cpd_pass(master_df, d, years_index, 0, None)
+    if num_bootstraps <= 1:
+        return
+    logger.info(' Analysing '+str(num_bootstraps)+' bootstraps')
+    tasks = [(i, seeds[i]) for i in range(1, num_bootstraps)]
+    if d['workers'] > 1:
+        logger.info(' Using '+str(d['workers'])+' workers')
+        pool = multiprocessing.Pool(processes=d['workers'], initializer=cpd_worker_init,
+                                    initargs=(master_df, d, years_index))
+        try:
+            for result in pool.imap(cpd_worker, tasks):
+                yield result
+        finally:
+            pool.terminate()
+            pool.join()
+    else:
+        for i, seed in tasks:
+            yield cpd_pass(master_df, d, years_index, i, seed)
+#------------------------------------------------------------------------------
+
 #------------------------------------------------------------------------------
 # Plot identified change points in observed (i.e. not bootstrapped) data and
 # write to specified folder
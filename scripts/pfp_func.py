@@ -188,17 +188,22 @@ def DateTimeFromTimeStamp(ds, dt_out, TimeStamp_in, fmt=""):
         logger.error(" Required series "+TimeStamp_in+" not found")
         return 0
     TimeStamp = ds.series[TimeStamp_in]["Data"]
-    # guard against empty fields in what we assume is the datetime
-    idx = [i for i in range(len(TimeStamp)) if len(str(TimeStamp[i]))>0]
-    if len(fmt)==0:
-        dt = [dateutil.parser.parse(str(TimeStamp[i])) for i in idx]
+    if isinstance(TimeStamp, numpy.ndarray) and numpy.issubdtype(TimeStamp.dtype, numpy.datetime64):
+        # time stamps already parsed by pfp_io.csv_read_series, empty fields are NaT
+        idx = numpy.where(~numpy.isnat(TimeStamp))[0]
+        dt = TimeStamp[idx].astype("datetime64[us]").tolist()
     else:
-        yearfirst = False
-        dayfirst = False
-        if fmt.index("Y") < fmt.index("D"): yearfirst = True
-        if fmt.index("D") < fmt.index("M"): dayfirst = True
-        dt = [dateutil.parser.parse(str(TimeStamp[i]),dayfirst=dayfirst,yearfirst=yearfirst)
-              for i in idx]
+        # guard against empty fields in what we assume is the datetime
+        idx = [i for i in range(len(TimeStamp)) if len(str(TimeStamp[i]))>0]
+        if len(fmt)==0:
+            dt = [dateutil.parser.parse(str(TimeStamp[i])) for i in idx]
+        else:
+            yearfirst = False
+            dayfirst = False
+            if fmt.index("Y") < fmt.index("D"): yearfirst = True
+            if fmt.index("D") < fmt.index("M"): dayfirst = True
+            dt = [dateutil.parser.parse(str(TimeStamp[i]),dayfirst=dayfirst,yearfirst=yearfirst)
+                  for i in idx]
     # we have finished with the timestamp so delete it from the data structure
     del ds.series[TimeStamp_in]
     nRecs = len(dt)
@@ -4,6 +4,7 @@ import copy
 import datetime
 import os
 import logging
+import platform
 import sys
 import traceback
 # 3rd party modules
@@ -139,6 +140,7 @@ def CheckGapLengths(cf, ds, l5_info):
     Side effects:
     Author: PRI
     Date: June 2019
+          October 2026 - use pfp_utils.get_gap_index
     """
     ds.returncodes["value"] = 0
     l5_info["CheckGapLengths"] = {}
@@ -149,6 +151,7 @@ def CheckGapLengths(cf, ds, l5_info):
     ts = int(ds.globalattributes["time_step"])
     nperday = 24 * 60/ts
     max_short_gap_records = max_short_gap_days * nperday
+    nrecs = int(ds.globalattributes["nc_nrecs"])
     # get a list of variables being gap filled
     targets = cf["Fluxes"].keys()
     targets_with_long_gaps = []
@@ -162,21 +165,18 @@ def CheckGapLengths(cf, ds, l5_info):
             if long_gap_method in cf["Fluxes"][target].keys():
                 # set logical true if long gap filling method present
                 l5_info["CheckGapLengths"][target]["got_long_gap_method"] = True
-        # get the data
-        variable = pfp_utils.GetVariable(ds, target)
-        # get the mask
-        mask = numpy.ma.getmaskarray(variable["Data"])
         # get the gaps
-        gap_start_end = pfp_utils.contiguous_regions(mask)
-        # loop over the gaps
-        for start, end in gap_start_end:
-            gap_length = end - start
-            # check to see if any gaps are longer than the max
-            if gap_length > max_short_gap_records:
-                # set logical if long gaps present
-                l5_info["CheckGapLengths"][target]["got_long_gaps"] = True
-                targets_with_long_gaps.append(target)
-                break
+        if target in ds.series.keys():
+            gap_index = pfp_utils.get_gap_index(ds, target)
+        else:
+            msg = " CheckGapLengths: " + target + " not found in data structure"
+            logger.warning(msg)
+            gap_index = pfp_utils.GapIndex(numpy.ones(nrecs, dtype=bool))
+        # check to see if any gaps are longer than the max
+        if len(gap_index.longer_than(max_short_gap_records)) != 0:
+            # set logical if long gaps present
+            l5_info["CheckGapLengths"][target]["got_long_gaps"] = True
+            targets_with_long_gaps.append(target)
     # write an info message to the log window
     if len(targets_with_long_gaps) != 0:
         msg = " Series " + ",".join(targets_with_long_gaps) + " have gaps longer than "
@@ -268,15 +268,31 @@ def ParseL5ControlFile(cf, ds):
     return l5_info
 
 def ReadAlternateFiles(ds, l4_info):
+    """
+    Purpose:
+     Read the alternate data files and match them to the period of the tower data.
+     The files are read through the pfp_io dataset cache so a file used by more
+     than one site or level is only read once.
+    Usage:
+     ds_alt = pfp_gf.ReadAlternateFiles(ds, l4_info)
+    Author: PRI
+    Date: Back in the day
+          October 2026 - use pfp_io.nc_read_series_cached, only the tower period is copied
+    """
     ds_alt = {}
     l4ao = l4_info["GapFillFromAlternate"]["outputs"]
     # get a list of file names
     files = [l4ao[output]["file_name"] for output in l4ao.keys()]
+    ldt = ds.series["DateTime"]["Data"]
     # read the alternate files
     for f in files:
         # if the file has not already been read, do it now
         if f not in ds_alt:
-            ds_alternate = pfp_io.nc_read_series(f, fixtimestepmethod="round")
+            ds_alternate = pfp_io.nc_read_series_cached(f, start=ldt[0], end=ldt[-1],
+                                                        fixtimestepmethod="round")
+            if int(ds_alternate.globalattributes["nc_nrecs"]) == 0:
+                # no overlap, gfalternate_matchstartendtimes creates dummy series
+                ds_alternate = pfp_io.nc_read_series_cached(f, fixtimestepmethod="round")
             gfalternate_matchstartendtimes(ds, ds_alternate)
             ds_alt[f] = ds_alternate
     return ds_alt
@@ -700,6 +716,9 @@ def gfMDS_createdict(cf, ds, l5_info, label, called_by, flag_code):
     ts = int(ds.globalattributes["time_step"])
     nperday = 24 * 60/ts
     l5_info[called_by]["info"]["MaxShortGapRecords"] = max_short_gap_days * nperday
+    # number of targets to gap fill in parallel
+    opt = pfp_utils.get_keyvaluefromcf(cf, ["Options"], "workers", default=1)
+    l5_info[called_by]["info"]["workers"] = int(opt)
     # name of MDS output series in ds
     outputs = cf["Fluxes"][label]["GapFillUsingMDS"].keys()
     # loop over the outputs listed in the control file
@@ -960,6 +979,27 @@ def gfSOLO_createdict_info(cf, ds, l5_info, called_by):
     # check to see if this is a batch or an interactive run
     call_mode = pfp_utils.get_keyvaluefromcf(cf, ["Options"], "call_mode", default="interactive")
     l5s["info"]["call_mode"] = call_mode
+    # use the compiled sofm, solo and seqsolo programs ("binary") or the
+    # experimental native SOLO ("native"), "binary" is the default when the
+    # programs are present
+    extension = ".exe" if platform.system() == "Windows" else ""
+    binaries = all([os.path.isfile(os.path.join("solo", "bin", name + extension))
+                    for name in ["sofm", "solo", "seqsolo"]])
+    default = "binary" if binaries else "native"
+    opt = pfp_utils.get_keyvaluefromcf(cf, ["Options"], "SOLOEngine", default=default)
+    l5s["info"]["engine"] = str(opt).lower()
+    if l5s["info"]["engine"] == "binary" and not binaries:
+        msg = " SOLO: SOLOEngine is binary but sofm, solo and seqsolo were not found in solo/bin"
+        logger.error(msg)
+        ds.returncodes["message"] = msg
+        ds.returncodes["value"] = 1
+        return
+    if l5s["info"]["engine"] == "native":
+        msg = " SOLO: using the experimental native SOLO engine"
+        logger.warning(msg)
+    # number of windows and outputs to run in parallel for the automated runs
+    opt = pfp_utils.get_keyvaluefromcf(cf, ["Options"], "workers", default=1)
+    l5s["info"]["workers"] = int(opt)
     # truncate to last date in Imports?
     truncate = pfp_utils.get_keyvaluefromcf(cf, ["Options"], "TruncateToImports", default="Yes")
     l5s["info"]["truncate_to_imports"] = truncate
@@ -1142,9 +1182,9 @@ def gfClimatology_interpolateddaily(ds, series, output, xlbook, flag_code):
 
 def gfClimatology_monthly(ds, series, output, xlbook):
     """ Gap fill using monthly climatology."""
-    ldt = pfp_utils.GetVariable(ds, "DateTime")
-    Hdh = numpy.array([(d.hour + d.minute/float(60)) for d in ldt["Data"]])
-    Month = numpy.array([d.month for d in ldt["Data"]])
+    ti = pfp_utils.get_time_index(ds)
+    Hdh = ti["Hdh"]
+    Month = ti["Month"]
     thissheet = xlbook.sheet_by_name(series)
     val1d = numpy.zeros_like(ds.series[series]['Data'])
     values = numpy.zeros([48, 12])
@@ -1173,6 +1213,7 @@ def GapFillUsingInterpolation(cf, ds):
            ds is a data structure
     Author: PRI
     Date: September 2016
+          October 2026 - all variables interpolated in one call
     """
     ts = int(ds.globalattributes["time_step"])
     # get list of variables from control file
@@ -1192,31 +1233,9 @@ def GapFillUsingInterpolation(cf, ds):
     # do the business
     # convert from max. gap length in hours to number of time steps
     max_length_points = int((max_length_hours*float(60)/float(ts))+0.5)
-    for label in label_list:
-        pfp_ts.InterpolateOverMissing(ds, series=label, maxlen=max_length_points, int_type=int_type)
+    pfp_ts.InterpolateOverMissingBatch(ds, label_list, maxlen=max_length_points, int_type=int_type)
 
 # miscellaneous L4 routines
-def gf_getdiurnalstats(DecHour,Data,ts):
-    nInts = 24*int((60/ts)+0.5)
-    Num = numpy.ma.zeros(nInts,dtype=int)
-    Hr = numpy.ma.zeros(nInts,dtype=float)
-    for i in range(nInts):
-        Hr[i] = float(i)*ts/60.
-    Av = numpy.ma.masked_all(nInts)
-    Sd = numpy.ma.masked_all(nInts)
-    Mx = numpy.ma.masked_all(nInts)
-    Mn = numpy.ma.masked_all(nInts)
-    if numpy.size(Data)!=0:
-        for i in range(nInts):
-            li = numpy.ma.where((abs(DecHour-Hr[i])<c.eps)&(abs(Data-float(c.missing_value))>c.eps))
-            Num[i] = numpy.size(li)
-            if Num[i]!=0:
-                Av[i] = numpy.ma.mean(Data[li])
-                Sd[i] = numpy.ma.std(Data[li])
-                Mx[i] = numpy.ma.maximum.reduce(Data[li])
-                Mn[i] = numpy.ma.minimum.reduce(Data[li])
-    return Num, Hr, Av, Sd, Mx, Mn
-
 def gf_getdateticks(start, end):
     from datetime import timedelta as td
     delta = end - start
@@ -1256,6 +1275,17 @@ def gf_getdateticks(start, end):
     return loc,fmt
 
 def ImportSeries(cf,ds):
+    """
+    Purpose:
+     Import series listed in the [Imports] section of the control file from
+     other netCDF files.  Each file is read once, through the pfp_io dataset
+     cache, with all of the variables imported from it.
+    Usage:
+     pfp_gf.ImportSeries(cf, ds)
+    Author: PRI
+    Date: Back in the day
+          October 2026 - read each import file once using pfp_io.nc_read_series_cached
+    """
     # check to see if there is an Imports section
     if "Imports" not in cf.keys():
         return
@@ -1265,7 +1295,8 @@ def ImportSeries(cf,ds):
     ldt = ds.series["DateTime"]["Data"]
     start_date = ldt[0]
     end_date = ldt[-1]
-    # loop over the series in the Imports section
+    # get the file and variable names from the Imports section
+    imports = []
     for label in cf["Imports"].keys():
         import_filename = pfp_utils.get_keyvaluefromcf(cf, ["Imports", label], "file_name", default="")
         if import_filename == "":
@@ -1277,11 +1308,19 @@ def ImportSeries(cf,ds):
             msg = " ImportSeries: variable name not found in control file, skipping ..."
             logger.warning(msg)
             continue
-        ds_import = pfp_io.nc_read_series(import_filename)
-        ts_import = ds_import.globalattributes["time_step"]
-        ldt_import = ds_import.series["DateTime"]["Data"]
-        si = pfp_utils.GetDateIndex(ldt_import, str(start_date), ts=ts_import, default=0, match="exact")
-        ei = pfp_utils.GetDateIndex(ldt_import, str(end_date), ts=ts_import, default=len(ldt_import)-1, match="exact")
+        imports.append([label, import_filename, var_name])
+    # loop over the series in the Imports section
+    ds_imports = {}
+    for label, import_filename, var_name in imports:
+        if import_filename not in ds_imports:
+            var_names = [item[2] for item in imports if item[1] == import_filename]
+            ds_imports[import_filename] = pfp_io.nc_read_series_cached(import_filename,
+                                                                      variable_list=var_names)
+        ds_import = ds_imports[import_filename]
+        ldt_import = pfp_utils.get_series_view(ds_import, "DateTime")
+        di_import = pfp_utils.get_date_index(ds_import)
+        si = di_import.find(start_date, default=0, match="exact")
+        ei = di_import.find(end_date, default=len(ldt_import)-1, match="exact")
         data = numpy.ma.ones(nRecs)*float(c.missing_value)
         flag = numpy.ma.ones(nRecs)
         data_import, flag_import, attr_import = pfp_utils.GetSeriesasMA(ds_import, var_name, si=si, ei=ei)
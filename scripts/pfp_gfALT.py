@@ -86,9 +86,9 @@ def gfalternate_autocomplete(ds_tower, ds_alt, l4_info, called_by, mode="verbose
         return
     dt_tower = ds_tower.series["DateTime"]["Data"]
     nRecs = len(dt_tower)
-    ts = int(ds_tower.globalattributes["time_step"])
-    si_tower = pfp_utils.GetDateIndex(dt_tower, l4a["gui"]["startdate"], ts=ts, default=0)
-    ei_tower = pfp_utils.GetDateIndex(dt_tower, l4a["gui"]["enddate"], ts=ts, default=nRecs-1)
+    di_tower = pfp_utils.get_date_index(ds_tower)
+    si_tower = di_tower.find(l4a["gui"]["startdate"], default=0)
+    ei_tower = di_tower.find(l4a["gui"]["enddate"], default=nRecs-1)
     ldt_tower = dt_tower[si_tower: ei_tower + 1]
     nRecs_gui = len(ldt_tower)
     label_tower_list = l4a["gui"]["series_list"]
@@ -99,86 +99,81 @@ def gfalternate_autocomplete(ds_tower, ds_alt, l4_info, called_by, mode="verbose
         data_composite, _, _ = pfp_utils.GetSeriesasMA(ds_tower, label_composite, si=si_tower, ei=ei_tower)
         data_tower, _, _ = pfp_utils.GetSeriesasMA(ds_tower, label_tower, si=si_tower, ei=ei_tower)
         mask_composite = numpy.ma.getmaskarray(data_composite)
-        gapstartend = pfp_utils.contiguous_regions(mask_composite)
-        if len(gapstartend) == 0:
+        gap_index = pfp_utils.GapIndex(mask_composite)
+        if len(gap_index.starts) == 0:
             if mode.lower() != "quiet":
                 msg = " autocomplete: composite " + label_composite + " has no gaps to fill, skipping ..."
                 logger.info(msg)
             continue
+        gap_starts, gap_ends = gap_index.starts, gap_index.ends
+        # minimum number of points for each gap
+        min_points_gap = numpy.maximum((((gap_ends - gap_starts) + 1)*l4a["gui"]["min_percent"]/100).astype(int),
+                                       3*l4a["gui"]["nperhr"])
         # now check all of the alternate data sources to see if they have anything to contribute
-        gotdataforgap = [False]*len(gapstartend)
+        mask_tower = numpy.ma.getmaskarray(data_tower)
         label_output_list = gfalternate_getlabeloutputlist(l4_info, label_tower)
         for label_output in label_output_list:
             alt_filename = l4a["outputs"][label_output]["file_name"]
             ds_alternate = ds_alt[alt_filename]
-            dt_alternate = ds_alternate.series["DateTime"]["Data"]
-            si_alternate = pfp_utils.GetDateIndex(dt_alternate, l4a["gui"]["startdate"], ts=ts, default=0)
-            ei_alternate = pfp_utils.GetDateIndex(dt_alternate, l4a["gui"]["enddate"], ts=ts, default=nRecs-1)
+            di_alternate = pfp_utils.get_date_index(ds_alternate)
+            si_alternate = di_alternate.find(l4a["gui"]["startdate"], default=0)
+            ei_alternate = di_alternate.find(l4a["gui"]["enddate"], default=nRecs-1)
             alt_series_list = [item for item in ds_alternate.series.keys() if "_QCFlag" not in item]
             alt_series_list = [item for item in alt_series_list if l4a["outputs"][label_output]["target"] in item]
             for label_alternate in alt_series_list:
                 data_alt, _, _ = pfp_utils.GetSeriesasMA(ds_alternate, label_alternate, si=si_alternate, ei=ei_alternate)
-                data_all[label_alternate] = data_alt
-                for n, gap in enumerate(gapstartend):
-                    min_points = max([int(((gap[1]-gap[0])+1)*l4a["gui"]["min_percent"]/100),3*l4a["gui"]["nperhr"]])
-                    if numpy.ma.count(data_alt[gap[0]: gap[1]]) >= min_points:
-                        if mode.lower() != "quiet":
-                            msg = " autocomplete: " + label_tower + ldt_tower[gap[0]] + ldt_tower[gap[1]] + " got data to fill gap"
-                            logger.info(msg)
-                        gotdataforgap[n] = True
-                    if numpy.ma.count_masked(data_tower[gap[0]: gap[1]]) == 0:
-                        if mode.lower() != "quiet":
-                            msg = " autocomplete: "+label_tower + ldt_tower[gap[0]] + ldt_tower[gap[1]] + " no gap to fill"
-                            logger.info(msg)
-                        gotdataforgap[n] = False
-        # finished checking all alternate data sources for data to fill remaining gaps
+                # alternate files can use the same labels so key by file name as well
+                data_all[(alt_filename, label_alternate)] = data_alt
+        # cumulative counts of the good alternate points and of the points where both
+        # the tower and the alternate data are good, one row per alternate series
+        labels_alt = data_all.keys()
+        zeros = numpy.zeros((len(labels_alt), 1), dtype=numpy.int64)
+        mask_alt = numpy.array([numpy.ma.getmaskarray(data_all[key]) for key in labels_alt],
+                               dtype=bool).reshape(len(labels_alt), nRecs_gui)
+        good_alt = numpy.hstack((zeros, numpy.cumsum(~mask_alt, axis=1)))
+        good_both = numpy.hstack((zeros, numpy.cumsum(~mask_alt & ~mask_tower, axis=1)))
+        # alternate series with enough points in each gap
+        keep = (good_alt[:, gap_ends] - good_alt[:, gap_starts]) >= min_points_gap
+        # gaps with enough alternate data and some missing tower data
+        missing_tower = numpy.concatenate(([0], numpy.cumsum(mask_tower)))
+        gotdataforgap = numpy.any(keep, axis=0) & ((missing_tower[gap_ends] - missing_tower[gap_starts]) > 0)
         if mode.lower() != "quiet":
-            logger.info(" autocomplete: variable %s has %s gaps", label_tower, str(len(gapstartend)))
-        logger.info(" Auto-complete gap filling for %s (%s gaps)", label_tower, str(gotdataforgap.count(True)))
-        for n, gap in enumerate(gapstartend):
+            logger.info(" autocomplete: variable %s has %s gaps", label_tower, str(len(gap_starts)))
+        logger.info(" Auto-complete gap filling for %s (%s gaps)", label_tower, str(numpy.count_nonzero(gotdataforgap)))
+        # widen the period around each gap until there are enough good points
+        num_good = numpy.max(numpy.where(keep, good_both[:, gap_ends] - good_both[:, gap_starts], 0), axis=0) \
+            if len(labels_alt) > 0 else numpy.zeros(len(gap_starts), dtype=numpy.int64)
+        period_starts, period_ends, full = pfp_utils.expand_gap_windows(gap_starts, gap_ends, good_both,
+                                                                        l4a["gui"]["nperday"], nRecs_gui,
+                                                                        l4a["gui"]["min_percent"],
+                                                                        min_points=3*l4a["gui"]["nperhr"],
+                                                                        include_end=True, num_good=num_good,
+                                                                        keep=keep)
+        for n in range(len(gap_starts)):
             l4a["gui"]["autoforce"] = False
             if not gotdataforgap[n]:
                 if mode.lower() != "quiet":
-                    gap_startdate = ldt_tower[gap[0]].strftime("%Y-%m-%d %H:%M")
-                    gap_enddate = ldt_tower[gap[1]].strftime("%Y-%m-%d %H:%M")
+                    gap_startdate = ldt_tower[gap_starts[n]].strftime("%Y-%m-%d %H:%M")
+                    gap_enddate = ldt_tower[min(nRecs_gui - 1, gap_ends[n])].strftime("%Y-%m-%d %H:%M")
                     msg = " autocomplete: no alternate data for " + gap_startdate + " to " + gap_enddate
                     logger.info(msg)
                 continue
-            si = max([0, gap[0]])
-            ei = min([len(ldt_tower) - 1, gap[1]])
+            si = max([0, gap_starts[n]])
+            ei = min([len(ldt_tower) - 1, gap_ends[n]])
             gap_startdate = ldt_tower[si].strftime("%Y-%m-%d %H:%M")
             gap_enddate = ldt_tower[ei].strftime("%Y-%m-%d %H:%M")
             if mode.lower() != "quiet":
                 msg = " autocomplete: gap is " + gap_startdate + " to " + gap_enddate
                 logger.info(msg)
-            min_points = max([int(((gap[1]-gap[0])+1)*l4a["gui"]["min_percent"]/100), 3*l4a["gui"]["nperhr"]])
-            num_good_points = 0
-            num_points_list = data_all.keys()
-            for label in data_all.keys():
-                if numpy.ma.count(data_all[label][gap[0]:gap[1]]) < min_points:
-                    num_points_list.remove(label)
-                    continue
-                ngpts = gfalternate_getnumgoodpoints(data_tower[gap[0]:gap[1]], data_all[label][gap[0]:gap[1]])
-                #ngpts = int(len(data_tower[gap[0]:gap[1]+1])*l4a["gui"]["min_percent"]/100)
-                num_good_points = max([num_good_points, ngpts])
-            while num_good_points < min_points:
-                gap[0] = max(0, gap[0] - l4a["gui"]["nperday"])
-                gap[1] = min(nRecs_gui - 1, gap[1] + l4a["gui"]["nperday"])
-                if gap[0] == 0 and gap[1] == nRecs_gui - 1:
-                    msg = " Unable to find enough good points in data set for " + label_tower
-                    logger.error(msg)
-                    msg = " Replacing missing tower data with unmodified alternate data"
-                    logger.error(msg)
-                    gap[0] = 0; gap[1] = -1
-                    l4a["gui"]["autoforce"] = True
-                    not_enough_points = True
-                if not_enough_points: break
-                min_points = max([int(((gap[1]-gap[0])+1)*l4a["gui"]["min_percent"]/100), 3*l4a["gui"]["nperhr"]])
-                for label in num_points_list:
-                    ngpts = gfalternate_getnumgoodpoints(data_tower[gap[0]:gap[1]+1], data_all[label][gap[0]:gap[1]+1])
-                    #ngpts = int(len(data_tower[gap[0]:gap[1]+1])*l4a["gui"]["min_percent"]/100)
-                    if ngpts > num_good_points:
-                        num_good_points = ngpts
+            gap = [period_starts[n], period_ends[n]]
+            if full[n]:
+                msg = " Unable to find enough good points in data set for " + label_tower
+                logger.error(msg)
+                msg = " Replacing missing tower data with unmodified alternate data"
+                logger.error(msg)
+                gap = [0, -1]
+                l4a["gui"]["autoforce"] = True
+                not_enough_points = True
             gapfillperiod_startdate = ldt_tower[gap[0]].strftime("%Y-%m-%d %H:%M")
             gapfillperiod_enddate = ldt_tower[gap[1]].strftime("%Y-%m-%d %H:%M")
             if mode.lower() != "quiet":
@@ -260,15 +255,14 @@ def gfalternate_getalternatevaratmaxr(ds_tower, ds_alternate, l4a, mode="verbose
     label_output = l4a["run"]["label_output"]
     startdate = l4a["run"]["startdate"]
     enddate = l4a["run"]["enddate"]
-    ts = int(ds_tower.globalattributes["time_step"])
-    ldt_tower = ds_tower.series["DateTime"]["Data"]
-    si_tower = pfp_utils.GetDateIndex(ldt_tower, startdate, ts=ts)
-    ei_tower = pfp_utils.GetDateIndex(ldt_tower, enddate, ts=ts)
+    di_tower = pfp_utils.get_date_index(ds_tower)
+    si_tower = di_tower.find(startdate)
+    ei_tower = di_tower.find(enddate)
     data_tower, _, _ = pfp_utils.GetSeriesasMA(ds_tower, label_tower, si=si_tower, ei=ei_tower)
     # local pointers to the start and end indices
-    ldt_alternate = ds_alternate.series["DateTime"]["Data"]
-    si_alternate = pfp_utils.GetDateIndex(ldt_alternate, startdate, ts=ts)
-    ei_alternate = pfp_utils.GetDateIndex(ldt_alternate, enddate, ts=ts)
+    di_alternate = pfp_utils.get_date_index(ds_alternate)
+    si_alternate = di_alternate.find(startdate)
+    ei_alternate = di_alternate.find(enddate)
     # create an array for the correlations and a list for the alternate variables in order of decreasing correlation
     if "usevars" not in l4a["outputs"][label_output]:
         altvar_list = gfalternate_getalternatevarlist(ds_alternate, l4a["run"]["label_tower"])
@@ -429,12 +423,11 @@ def gfalternate_getlagcorrecteddata(ds_alternate, data_dict, stat_dict, l4a):
     label_alternate = l4a["run"]["label_alternate"]
     data_tower = data_dict[label_tower]["data"]
     data_alternate = data_dict[label_output][label_alternate]["data"]
-    ldt_alternate = ds_alternate.series["DateTime"]["Data"]
     startdate = l4a["run"]["startdate"]
     enddate = l4a["run"]["enddate"]
-    ts = l4a["info"]["time_step"]
-    si_alternate = pfp_utils.GetDateIndex(ldt_alternate, startdate, ts=ts)
-    ei_alternate = pfp_utils.GetDateIndex(ldt_alternate, enddate, ts=ts)
+    di_alternate = pfp_utils.get_date_index(ds_alternate)
+    si_alternate = di_alternate.find(startdate)
+    ei_alternate = di_alternate.find(enddate)
     if l4a["run"]["lag"].lower() == "yes":
         maxlags = l4a["gui"]["max_lags"]
         _, corr = pfp_ts.get_laggedcorrelation(data_tower, data_alternate, maxlags)
@@ -745,9 +738,9 @@ def gfalternate_loadoutputdata(ds_tower, data_dict, l4a):
     flag_code = l4a["outputs"][label_output]["flag_code"]
     label_composite = l4a["run"]["label_composite"]
     label_alternate = l4a["run"]["label_alternate"]
-    ts = l4a["info"]["time_step"]
-    si = pfp_utils.GetDateIndex(ldt_tower, l4a["run"]["startdate"], ts=ts, default=0)
-    ei = pfp_utils.GetDateIndex(ldt_tower, l4a["run"]["enddate"], ts=ts, default=len(ldt_tower))
+    di_tower = pfp_utils.get_date_index(ds_tower)
+    si = di_tower.find(l4a["run"]["startdate"], default=0)
+    ei = di_tower.find(l4a["run"]["enddate"], default=len(ldt_tower))
     if l4a["gui"]["overwrite"]:
         ind1 = numpy.where(numpy.ma.getmaskarray(data_dict[label_output][label_alternate]["data"]) == False)[0]
     else:
@@ -793,14 +786,14 @@ def gfalternate_main(ds_tower, ds_alt, l4_info, called_by, label_tower_list=None
     """
     l4a = l4_info[called_by]
     mode = "quiet" #"quiet"  #"verbose"
-    ts = int(ds_tower.globalattributes["time_step"])
     startdate = l4a["run"]["startdate"]
     enddate = l4a["run"]["enddate"]
     logger.info(" Gap fill with alternate: " + startdate + " to " + enddate)
     # get local pointer to the datetime series
     dt_tower = ds_tower.series["DateTime"]["Data"]
-    si_tower = pfp_utils.GetDateIndex(dt_tower, startdate, ts=ts, default=0)
-    ei_tower = pfp_utils.GetDateIndex(dt_tower, enddate, ts=ts, default=len(dt_tower)-1)
+    di_tower = pfp_utils.get_date_index(ds_tower)
+    si_tower = di_tower.find(startdate, default=0)
+    ei_tower = di_tower.find(enddate, default=len(dt_tower)-1)
     ldt_tower = dt_tower[si_tower:ei_tower + 1]
     # now loop over the variables to be gap filled using the alternate data
     if label_tower_list == None:
@@ -837,8 +830,9 @@ def gfalternate_main(ds_tower, ds_alt, l4_info, called_by, label_tower_list=None
             ds_alternate = ds_alt[l4a["outputs"][label_output]["file_name"]]
             ldt_alternate = ds_alternate.series["DateTime"]["Data"]
             # start and end idices for this time range in the alternate data
-            si_alternate = pfp_utils.GetDateIndex(ldt_alternate, startdate, ts=ts, default=0)
-            ei_alternate = pfp_utils.GetDateIndex(ldt_alternate, enddate, ts=ts, default=len(ldt_alternate)-1)
+            di_alternate = pfp_utils.get_date_index(ds_alternate)
+            si_alternate = di_alternate.find(startdate, default=0)
+            ei_alternate = di_alternate.find(enddate, default=len(ldt_alternate)-1)
             # get the alternate series that has the highest correlation with the tower data
             label_alternate_list = gfalternate_getalternatevaratmaxr(ds_tower, ds_alternate, l4a, mode=mode)
             # loop over alternate variables
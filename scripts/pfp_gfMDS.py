@@ -1,13 +1,11 @@
 # standard Python modules
 import copy
 import datetime
-import glob
 import logging
+import multiprocessing
 import os
-import subprocess
 import time
 # 3rd party modules
-import dateutil
 import numpy
 import matplotlib
 import matplotlib.pyplot as plt
@@ -20,69 +18,45 @@ logger = logging.getLogger("pfp_log")
 def GapFillUsingMDS(ds, l5_info, called_by):
     """
     Purpose:
-     Run the FluxNet C code to implement the MDS gap filling method.
+     Gap fill using the MDS (marginal distribution sampling) method.
+     This is a native version of the FluxNet MDS C code that works directly
+     on the data structure, no files are written and no subprocess is used.
+     Targets are filled in parallel if the "workers" option is greater than 1.
     Usage:
+     pfp_gfMDS.GapFillUsingMDS(ds, l5_info, called_by)
     Side effects:
+     Creates the gap filled series and the MDS QC series in the data structure.
     Author: PRI
     Date: May 2018
     """
     l5im = l5_info[called_by]
-    # get the file name
-    file_path = l5_info[called_by]["info"]["file_path"]
-    file_name = l5_info[called_by]["info"]["in_filename"]
-    nc_full_path = os.path.join(file_path, file_name)
-    nc_name = os.path.split(nc_full_path)[1]
     # get some useful metadata
-    ts = int(ds.globalattributes["nc_nrecs"])
+    ts = int(ds.globalattributes["time_step"])
     site_name = ds.globalattributes["site_name"]
-    level = ds.globalattributes["nc_level"]
-    # define the MDS input file location
-    in_base_path = os.path.join("mds", "input")
-    # get a list of CSV files in the input directory
-    in_path_files = glob.glob(os.path.join(in_base_path, "*.csv"))
-    # and clean them out
-    for in_file in in_path_files:
-        if os.path.exists(in_file):
-            os.remove(in_file)
-    # define the MDS output file location
-    out_base_path = os.path.join("mds", "output", "")
-    # get a list of CSV files in the output directory
-    out_path_files = glob.glob(os.path.join(out_base_path, "*.csv"))
-    # and clean them out
-    for out_file in out_path_files:
-        if os.path.exists(out_file):
-            os.remove(out_file)
-    # get some useful odds and ends
-    ldt = pfp_utils.GetVariable(ds, "DateTime")
-    first_year = ldt["Data"][0].year
-    last_year = ldt["Data"][-1].year
-    # now loop over the series to be gap filled using MDS
-    # open a log file for the MDS C code output
-    log_file_path = os.path.join("mds", "log", "mds.log")
-    mdslogfile = open(log_file_path, "wb")
-    for fig_num, mds_label in enumerate(l5im["outputs"].keys()):
-        logger.info(" Doing MDS gap filling for %s", l5im["outputs"][mds_label]["target"])
-        l5im["outputs"][mds_label]["out_base_path"] = out_base_path
+    workers = int(l5im["info"].get("workers", 1))
+    # build the input arrays for each target
+    mds_labels = list(l5im["outputs"].keys())
+    jobs = []
+    for mds_label in mds_labels:
         l5im["outputs"][mds_label]["time_step"] = ts
-        # make the output file name
-        out_name = site_name+"_"+level+"_"+mds_label+"_mds.csv"
-        out_file_path = os.path.join(out_base_path, out_name)
-        # first, we write the yearly CSV input files
-        l5im["outputs"][mds_label]["in_file_paths"] = []
-        for current_year in range(first_year, last_year+1):
-            in_name = nc_name.replace(".nc","_"+str(current_year)+"_MDS.csv")
-            #in_name = str(current_year)+".csv"
-            in_file_path = os.path.join(in_base_path, in_name)
-            data, header, fmt = gfMDS_make_data_array(ds, current_year, l5im["outputs"][mds_label])
-            numpy.savetxt(in_file_path, data, header=header, delimiter=",", comments="", fmt=fmt)
-            l5im["outputs"][mds_label]["in_file_paths"].append(in_file_path)
-        # then we construct the MDS C code command options list
-        cmd = gfMDS_make_cmd_string(l5im["outputs"][mds_label])
-        # then we spawn a subprocess for the MDS C code
-        subprocess.call(cmd, stdout=mdslogfile)
-        mds_out_file = os.path.join("mds", "output", "mds.csv")
-        os.rename(mds_out_file, out_file_path)
-        gfMDS_get_mds_output(ds, mds_label, out_file_path, l5_info, called_by)
+        data, idx = gfMDS_make_data_array(ds, l5im["outputs"][mds_label])
+        tolerances = gfMDS_get_tolerances(l5im["outputs"][mds_label])
+        jobs.append((data, (ts == 60), tolerances))
+    # now do the gap filling, in parallel if requested
+    for mds_label in mds_labels:
+        logger.info(" Doing MDS gap filling for %s", l5im["outputs"][mds_label]["target"])
+    if workers > 1 and len(jobs) > 1:
+        pool = multiprocessing.Pool(processes=min(workers, len(jobs)))
+        try:
+            results = pool.map(gfMDS_mds_worker, jobs)
+        finally:
+            pool.close()
+            pool.join()
+    else:
+        results = [gfMDS_mds(*job) for job in jobs]
+    # put the results into the data structure, mask long gaps and plot
+    for fig_num, mds_label in enumerate(mds_labels):
+        gfMDS_get_mds_output(ds, mds_label, results[fig_num], idx, l5_info, called_by)
         # mask long gaps, if requested
         gfMDS_mask_long_gaps(ds, mds_label, l5_info, called_by)
         # plot the MDS results
@@ -92,70 +66,177 @@ def GapFillUsingMDS(ds, l5_info, called_by):
         pd = gfMDS_initplot(site_name=site_name, label=target, fig_num=fig_num,
                             title=title, nDrivers=len(drivers), show_plots=True)
         gfMDS_plot(pd, ds, mds_label, l5_info, called_by)
-
-    # close the log file
-    mdslogfile.close()
     return
 
-def gfMDS_get_mds_output(ds, mds_label, out_file_path, l5_info, called_by):
+def gfMDS_gapfill(data, valid, rows, start, end, step, method, hourly, tolerances):
     """
     Purpose:
-     Reads the CSV file output by the MDS C code and puts the contents into
-     the data structure.
+     Do one step of the MDS look-up table cascade for a set of rows.  This is
+     a vectorised version of gapfill() in the MDS C code, all rows are done
+     together for each window size.
+     The methods are:
+      0 - look-up table using SW_IN, TA and VPD
+      1 - look-up table using SW_IN only
+      2 - mean diurnal course of the target
     Usage:
-     gfMDS_get_mds_output(ds, out_file_path, first_date, last_date, include_qc=False)
+     result = pfp_gfMDS.gfMDS_gapfill(data, valid, rows, start, end, step, method,
+                                      hourly, tolerances)
+     where data is the MDS data array (target, SW_IN, TA, VPD)
+           valid is a boolean array, True where data is not missing
+           rows is an array of the rows to be filled
+           start, end and step define the window sizes to try (days)
+           method is the method number (see above)
+           hourly is True for hourly data
+           tolerances is [SW_IN minimum, SW_IN maximum, TA, VPD]
+           result is a dictionary of arrays for the rows that were filled
+    Author: PRI
+    Date: October 2026
+    """
+    nrows = data.shape[0]
+    tofill = data[:, 0]
+    if method == 0:
+        use = numpy.all(valid, axis=1)
+    elif method == 1:
+        use = valid[:, 0] & valid[:, 1]
+    else:
+        use = valid[:, 0]
+    # SW_IN tolerance depends on SW_IN at the row being filled
+    sw_min, sw_max = tolerances[0], tolerances[1]
+    if int(sw_min) == c.missing_value:
+        tol1 = numpy.full(len(rows), sw_max)
+    elif int(sw_max) == c.missing_value:
+        tol1 = numpy.full(len(rows), sw_min)
+    else:
+        sw = data[rows, 1]
+        tol1 = numpy.where(sw < sw_min, sw_min, numpy.where(sw > sw_max, sw_max, sw))
+    result = {"rows": [], "filled": [], "stddev": [], "method": [],
+              "time_window": [], "samples": []}
+    todo = numpy.arange(len(rows))
+    i = start
+    while (i <= end) and (len(todo) > 0):
+        window = 48*i
+        if hourly:
+            window = window/2
+        if method == 2:
+            # same time of day on days either side, +/- 1 hour
+            lo, hi, z, j = (1, 2, 24, 3) if hourly else (2, 3, 48, 5)
+            starts = numpy.arange(-window-lo, window+hi, z)
+            offsets = (starts[:, None] + numpy.arange(j)[None, :]).ravel()
+        else:
+            offsets = numpy.arange(-window+1, window)
+        # do the rows in chunks to limit the memory used
+        nchunk = max(1, 2**20/len(offsets))
+        done = numpy.zeros(len(todo), dtype=bool)
+        for cs in range(0, len(todo), nchunk):
+            pos = todo[cs:cs+nchunk]
+            r = rows[pos]
+            k = r[:, None] + offsets[None, :]
+            ok = (k >= 0) & (k < nrows)
+            k = numpy.clip(k, 0, nrows-1)
+            ok &= use[k]
+            if method != 2:
+                ok &= numpy.abs(data[k, 1] - data[r, 1][:, None]) < tol1[pos][:, None]
+            if method == 0:
+                ok &= numpy.abs(data[k, 2] - data[r, 2][:, None]) < tolerances[2]
+                ok &= numpy.abs(data[k, 3] - data[r, 3][:, None]) < tolerances[3]
+            n = numpy.sum(ok, axis=1)
+            got = n > 1
+            if not numpy.any(got):
+                continue
+            done[cs:cs+nchunk] = got
+            ok, k, n = ok[got], k[got], n[got]
+            values = numpy.where(ok, tofill[k], 0.0)
+            mean = numpy.sum(values, axis=1)/n
+            dev = numpy.where(ok, values - mean[:, None], 0.0)
+            stddev = numpy.sqrt(numpy.sum(dev*dev, axis=1)/(n-1))
+            time_window = 2*i + 1 if method == 2 else 2*i
+            result["rows"].append(r[got])
+            result["filled"].append(mean)
+            result["stddev"].append(stddev)
+            result["method"].append(numpy.full(len(n), method+1, dtype=numpy.int32))
+            result["time_window"].append(numpy.full(len(n), time_window, dtype=numpy.int32))
+            result["samples"].append(n.astype(numpy.int32))
+        todo = todo[~done]
+        i = i + step
+        if method == 2:
+            # stop when the window covers all of the data
+            r = rows[todo]
+            todo = todo[~((r - window - lo < 0) & (r + window + hi > nrows))]
+    for item in list(result.keys()):
+        if len(result[item]) > 0:
+            result[item] = numpy.concatenate(result[item])
+        else:
+            result[item] = numpy.array([], dtype=numpy.int32)
+    return result
+
+def gfMDS_get_mds_output(ds, mds_label, mds_output, idx, l5_info, called_by):
+    """
+    Purpose:
+     Put the MDS output into the data structure.
+    Usage:
+     gfMDS_get_mds_output(ds, mds_label, mds_output, idx, l5_info, called_by)
      where ds is a data structure
-           out_file_path is the full path to the MDS output file
+           mds_label is the label of the gap filled series
+           mds_output is the dictionary returned by gfMDS_mds
+           idx maps records in ds to rows in the MDS output (-1 for no match)
     Side effects:
      New series are created in the data structure to hold the MDS data.
     Author: PRI
     Date: May 2018
     """
-    ldt = pfp_utils.GetVariable(ds, "DateTime")
-    first_date = ldt["Data"][0]
-    last_date = ldt["Data"][-1]
-    data_mds = numpy.genfromtxt(out_file_path, delimiter=",", names=True, autostrip=True, dtype=None)
-    dt_mds = numpy.array([dateutil.parser.parse(str(dt)) for dt in data_mds["TIMESTAMP"]])
-    si_mds = pfp_utils.GetDateIndex(dt_mds, first_date)
-    ei_mds = pfp_utils.GetDateIndex(dt_mds, last_date)
-    # get a list of the names in the data array
-    mds_output_names = list(data_mds.dtype.names)
-    # strip out the timestamp and the original data
-    for item in ["TIMESTAMP", l5_info[called_by]["outputs"][mds_label]["target_mds"]]:
-        if item in mds_output_names:
-            mds_output_names.remove(item)
-    # and now loop over the MDS output series
-    for mds_output_name in mds_output_names:
+    nrecs = int(ds.globalattributes["nc_nrecs"])
+    ok = idx >= 0
+    target = l5_info[called_by]["outputs"][mds_label]["target"]
+    # loop over the MDS output series
+    for mds_output_name in ["FILLED", "QC", "HAT", "SAMPLE", "STDDEV", "METHOD", "QC_HAT", "TIMEWINDOW"]:
+        data = numpy.full(nrecs, float(c.missing_value))
+        data[ok] = mds_output[mds_output_name][idx[ok]]
         if mds_output_name == "FILLED":
             # get the gap filled target and write it to the data structure
-            var_in = pfp_utils.GetVariable(ds, l5_info[called_by]["outputs"][mds_label]["target"])
-            data = data_mds[mds_output_name][si_mds:ei_mds+1]
-            idx = numpy.where((numpy.ma.getmaskarray(var_in["Data"]) == True) &
-                              (abs(data - c.missing_value) > c.eps))[0]
+            var_in = pfp_utils.GetVariable(ds, target)
+            idx_gf = numpy.where((numpy.ma.getmaskarray(var_in["Data"]) == True) &
+                                 (abs(data - c.missing_value) > c.eps))[0]
             flag = numpy.array(var_in["Flag"])
-            flag[idx] = numpy.int32(40)
+            flag[idx_gf] = numpy.int32(40)
             attr = copy.deepcopy(var_in["Attr"])
             attr["long_name"] = attr["long_name"]+", gap filled using MDS"
             var_out = {"Label":mds_label, "Data":data, "Flag":flag, "Attr":attr}
             pfp_utils.CreateVariable(ds, var_out)
         elif mds_output_name == "TIMEWINDOW":
             # make the series name for the data structure
-            mds_qc_label = "MDS"+"_"+l5_info[called_by]["outputs"][mds_label]["target"]+"_"+mds_output_name
-            data = data_mds[mds_output_name][si_mds:ei_mds+1]
+            mds_qc_label = "MDS"+"_"+target+"_"+mds_output_name
             flag = numpy.zeros(len(data))
-            attr = {"long_name":"TIMEWINDOW from MDS gap filling for "+l5_info[called_by]["outputs"][mds_label]["target"]}
+            attr = {"long_name":"TIMEWINDOW from MDS gap filling for "+target}
             var_out = {"Label":mds_qc_label, "Data":data, "Flag":flag, "Attr":attr}
             pfp_utils.CreateVariable(ds, var_out)
         else:
             # make the series name for the data structure
-            mds_qc_label = "MDS"+"_"+l5_info[called_by]["outputs"][mds_label]["target"]+"_"+mds_output_name
-            data = data_mds[mds_output_name][si_mds:ei_mds+1]
+            mds_qc_label = "MDS"+"_"+target+"_"+mds_output_name
             flag = numpy.zeros(len(data))
-            attr = {"long_name":"QC field from MDS gap filling for "+l5_info[called_by]["outputs"][mds_label]["target"]}
+            attr = {"long_name":"QC field from MDS gap filling for "+target}
             var_out = {"Label":mds_qc_label, "Data":data, "Flag":flag, "Attr":attr}
             pfp_utils.CreateVariable(ds, var_out)
     return
 
+def gfMDS_get_tolerances(info):
+    """
+    Purpose:
+     Get the MDS tolerances as a list of floats, [SW_IN minimum, SW_IN maximum, TA, VPD].
+     Tolerances that are not specified are returned as missing and the MDS
+     defaults are used.
+    Usage:
+     tolerances = pfp_gfMDS.gfMDS_get_tolerances(info)
+    Author: PRI
+    Date: October 2026
+    """
+    tolerances = [float(c.missing_value)]*4
+    if "tolerances" in info:
+        tolerances[0] = float(info["tolerances"][0][0])
+        tolerances[1] = float(info["tolerances"][0][1])
+        tolerances[2] = float(info["tolerances"][1])
+        tolerances[3] = float(info["tolerances"][2])
+    return tolerances
+
 def gfMDS_initplot(**kwargs):
     # set the margins, heights, widths etc
     pd = {"margin_bottom":0.075, "margin_top":0.075, "margin_left":0.05, "margin_right":0.05,
@@ -168,88 +249,42 @@ def gfMDS_initplot(**kwargs):
     pd["ts_height"] = (1.0 - pd["margin_top"] - pd["ts_bottom"])/float(pd["nDrivers"]+1)
     return pd
 
-def gfMDS_make_cmd_string(info):
+def gfMDS_make_data_array(ds, info):
     """
     Purpose:
-     Construct the command line options string passed to the MDS C code.
-    Usage:
-    Author: PRI
-    Date: May 2018
-    """
-    # create the input files string
-    in_files = info["in_file_paths"][0]
-    for in_file in info["in_file_paths"][1:]:
-        in_files = in_files + "+" + in_file
-    # get the output base path
-    out_base_path = info["out_base_path"]
-    # start creating the command list of MDS options
-    cmd = ['./mds/bin/gf_mds', '-input='+in_files, '-output='+out_base_path,
-           '-date=TIMESTAMP', '-rows_min=0']
-    # create the target label string
-    tofill = info["target_mds"]
-    cmd.append('-tofill='+tofill)
-    # create the driver label and tolerance strings
-    sw_in = info["drivers_mds"][0]
-    cmd.append('-sw_in='+sw_in)
-    sw_int = str(info["tolerances"][0][0]) + ","
-    sw_int = sw_int + str(info["tolerances"][0][1])
-    cmd.append('-sw_int='+sw_int)
-    if len(info["drivers_mds"][1]) > 0:
-        ta = info["drivers_mds"][1]
-        cmd.append('-ta='+ta)
-        tat = str(info["tolerances"][1])
-        cmd.append('-tat='+tat)
-    if len(info["drivers_mds"][2]):
-        vpd = info["drivers_mds"][2]
-        cmd.append('-vpd='+vpd)
-        vpdt = str(info["tolerances"][2])
-        cmd.append('-vpdt='+vpdt)
-    if info["time_step"] == 60:
-        cmd.append('-hourly')
-    return cmd
-
-def gfMDS_make_data_array(ds, current_year, info):
-    """
-    Purpose:
-     Create a data array for the MDS gap filling routine.  The array constructed
-     here will be written to a CSV file that is read by the MDS C code.
+     Create the data array for the MDS gap filling routine.
     Usage:
+     data, idx = gfMDS_make_data_array(ds, info)
+     where data is an array with columns target, SW_IN, TA and VPD
+           idx maps records in ds to rows in data (-1 for no match)
     Side Effects:
-     The constructed data arrays are full years.  That is they run from YYYY-01-01 00:30
-     to YYYY+1-01-01 00:00.  Missing data is represented as -9999.
+     The constructed data array is made of full years.  That is it runs from
+     one time step after YYYY-01-01 00:00 of the first year to YYYY+1-01-01 00:00
+     of the last year, the same as the yearly files used by the MDS C code.  Missing data is
+     represented as -9999.
     Author: PRI
     Date: May 2018
     """
-    ldt = pfp_utils.GetVariable(ds, "DateTime")
-    nrecs = ds.globalattributes["nc_nrecs"]
     ts = int(ds.globalattributes["time_step"])
-    start = datetime.datetime(current_year,1,1,0,30,0)
-    end = datetime.datetime(current_year+1,1,1,0,0,0)
-    cdt = numpy.array([dt for dt in pfp_utils.perdelta(start, end, datetime.timedelta(minutes=ts))])
-    mt = numpy.ones(len(cdt))*float(-9999)
-    # need entry for the timestamp and the target ...
-    array_list = [cdt, mt]
-    # ... and entries for the drivers
-    for driver in info["drivers"]:
-        array_list.append(mt)
-    # now we can create the data array
-    data = numpy.stack(array_list, axis=-1)
-    si = pfp_utils.GetDateIndex(ldt["Data"], start, default=0)
-    ei = pfp_utils.GetDateIndex(ldt["Data"], end, default=nrecs)
-    dt = pfp_utils.GetVariable(ds, "DateTime", start=si, end=ei)
-    idx1, _ = pfp_utils.FindMatchingIndices(cdt, dt["Data"])
-    pfp_label_list = [info["target"]]+info["drivers"]
-    mds_label_list = [info["target_mds"]]+info["drivers_mds"]
-    header = "TIMESTAMP"
-    fmt = "%12i"
-    for n, label in enumerate(pfp_label_list):
-        var = pfp_utils.GetVariable(ds, label, start=si, end=ei)
-        data[idx1,n+1] = var["Data"]
-        header = header+","+mds_label_list[n]
-        fmt = fmt+","+"%f"
-    # convert datetime to ISO dates
-    data[:,0] = numpy.array([int(xdt.strftime("%Y%m%d%H%M")) for xdt in cdt])
-    return data, header, fmt
+    ti = pfp_utils.get_time_index(ds)
+    first_year = int(ti["Year"][0])
+    last_year = int(ti["Year"][-1])
+    start = numpy.datetime64(datetime.datetime(first_year, 1, 1), "s") + numpy.timedelta64(ts, "m")
+    end = numpy.datetime64(datetime.datetime(last_year+1, 1, 1), "s")
+    step = 60*ts
+    nrows = int((end - start).astype(numpy.int64))/step + 1
+    # index of each record in the data array
+    seconds = (ti["DateTime64"].astype("datetime64[s]") - start).astype(numpy.int64)
+    idx = numpy.where(seconds % step == 0, seconds/step, -1)
+    idx[(idx < 0) | (idx >= nrows)] = -1
+    ok = idx >= 0
+    # target in the first column, drivers in the rest
+    data = numpy.full((nrows, 4), float(c.missing_value))
+    for n, label in enumerate([info["target"]]+info["drivers"][:3]):
+        var = pfp_utils.GetVariable(ds, label)
+        values = numpy.ma.filled(var["Data"], float(c.missing_value))
+        data[idx[ok], n] = values[ok]
+    return data, idx
 
 def gfMDS_mask_long_gaps(ds, mds_label, l5_info, called_by):
     """
@@ -259,6 +294,7 @@ def gfMDS_mask_long_gaps(ds, mds_label, l5_info, called_by):
     Side effects:
     Author: PRI
     Date: June 2019
+          October 2026 - use pfp_utils.get_gap_index
     """
     if "MaxShortGapRecords" not in l5_info[called_by]["info"]:
         return
@@ -266,21 +302,92 @@ def gfMDS_mask_long_gaps(ds, mds_label, l5_info, called_by):
     msg = "  Masking gaps longer than " + str(max_short_gap_days) + " days"
     logger.info(msg)
     label = l5_info[called_by]["outputs"][mds_label]["target"]
-    target = pfp_utils.GetVariable(ds, label)
+    target = pfp_utils.GetVariable(ds, label, view=True)
     variable = pfp_utils.GetVariable(ds, mds_label)
-    mask = numpy.ma.getmaskarray(target["Data"])
-    # start and stop indices of contiguous blocks
+    # records in the long gaps
     max_short_gap_records = l5_info[called_by]["info"]["MaxShortGapRecords"]
-    gap_start_end = pfp_utils.contiguous_regions(mask)
-    for start, stop in gap_start_end:
-        gap_length = stop - start
-        if gap_length > max_short_gap_records:
-            variable["Data"][start: stop] = target["Data"][start: stop]
-            variable["Flag"][start: stop] = target["Flag"][start: stop]
+    index = pfp_utils.get_gap_index(ds, label).mask_longer_than(max_short_gap_records)
+    variable["Data"][index] = target["Data"][index]
+    variable["Flag"][index] = target["Flag"][index]
     # put data_int back into the data structure
     pfp_utils.CreateVariable(ds, variable)
     return
 
+def gfMDS_mds(data, hourly, tolerances):
+    """
+    Purpose:
+     Gap fill the target in the MDS data array using the MDS cascade of
+     look-up tables and mean diurnal course.  This replicates gf_mds() in
+     the MDS C code with compute_hat on, so every row gets a HAT value.
+    Usage:
+     mds_output = pfp_gfMDS.gfMDS_mds(data, hourly, tolerances)
+     where data is the MDS data array (target, SW_IN, TA, VPD)
+           hourly is True for hourly data
+           tolerances is [SW_IN minimum, SW_IN maximum, TA, VPD]
+           mds_output is a dictionary of arrays with the same names as the
+           columns in the MDS C code output file
+    Author: PRI
+    Date: October 2026
+    """
+    data = numpy.where(numpy.isfinite(data), data, float(c.missing_value))
+    nrows = data.shape[0]
+    # same test for missing data as the MDS C code
+    valid = (numpy.trunc(data) != c.missing_value)
+    # default tolerances
+    tolerances = list(tolerances)
+    if int(tolerances[0]) == c.missing_value and int(tolerances[1]) == c.missing_value:
+        tolerances[0], tolerances[1] = 20.0, 50.0
+    if int(tolerances[2]) == c.missing_value:
+        tolerances[2] = 2.5
+    if int(tolerances[3]) == c.missing_value:
+        tolerances[3] = 5.0
+    filled = numpy.array(data[:, 0])
+    stddev = numpy.full(nrows, float(c.missing_value))
+    method = numpy.zeros(nrows, dtype=numpy.int32)
+    time_window = numpy.zeros(nrows, dtype=numpy.int32)
+    samples = numpy.zeros(nrows, dtype=numpy.int32)
+    # the MDS cascade, (start, end, step, method)
+    cascade = [(7, 14, 7, 0), (7, 7, 7, 1), (0, 2, 1, 2),
+               (21, 77, 7, 0), (14, 77, 7, 1), (3, nrows+1, 3, 2)]
+    rows = numpy.arange(nrows)
+    for start, end, step, mds_method in cascade:
+        if len(rows) == 0:
+            break
+        result = gfMDS_gapfill(data, valid, rows, start, end, step, mds_method,
+                               hourly, tolerances)
+        r = result["rows"]
+        filled[r] = result["filled"]
+        stddev[r] = result["stddev"]
+        method[r] = result["method"]
+        time_window[r] = result["time_window"]
+        samples[r] = result["samples"]
+        rows = rows[method[rows] == 0]
+    if len(rows) > 0:
+        msg = "  MDS: unable to fill " + str(len(rows)) + " records"
+        logger.warning(msg)
+    # quality flag
+    quality = ((method > 0).astype(numpy.int32) +
+               (((method == 1) & (time_window > 14)) | ((method == 2) & (time_window > 14)) |
+                ((method == 3) & (time_window > 1))) +
+               (((method == 1) & (time_window > 56)) | ((method == 2) & (time_window > 28)) |
+                ((method == 3) & (time_window > 5))))
+    quality[method == 0] = c.missing_value
+    mds_output = {"FILLED": numpy.where(valid[:, 0], data[:, 0], filled),
+                  "QC": numpy.where(valid[:, 0], 0, quality),
+                  "HAT": filled, "SAMPLE": samples, "STDDEV": stddev,
+                  "METHOD": method, "QC_HAT": quality, "TIMEWINDOW": time_window}
+    return mds_output
+
+def gfMDS_mds_worker(args):
+    """
+    Purpose:
+     Wrapper for gfMDS_mds so it can be used with multiprocessing.Pool.map.
+    Usage:
+    Author: PRI
+    Date: October 2026
+    """
+    return gfMDS_mds(*args)
+
 def gfMDS_plot(pd, ds, mds_label, l5_info, called_by):
     """
     Purpose:
@@ -314,10 +421,10 @@ def gfMDS_plot(pd, ds, mds_label, l5_info, called_by):
     # get the diurnal stats of the observations
     mask = numpy.ma.mask_or(obs["Data"].mask, mds["Data"].mask)
     obs_mor = numpy.ma.array(obs["Data"], mask=mask)
-    _, Hr1, Av1, _, _, _ = gf_getdiurnalstats(Hdh["Data"], obs_mor, ts)
+    _, Hr1, Av1, _, _, _ = pfp_utils.get_diurnalstats_decimalhour(Hdh["Data"], obs_mor, ts)
     ax1.plot(Hr1, Av1, 'b-', label="Obs")
     # get the diurnal stats of all SOLO predictions
-    _, Hr2, Av2, _, _, _ = gf_getdiurnalstats(Hdh["Data"], mds["Data"], ts)
+    _, Hr2, Av2, _, _, _ = pfp_utils.get_diurnalstats_decimalhour(Hdh["Data"], mds["Data"], ts)
     ax1.plot(Hr2, Av2, 'r-', label="MDS")
     plt.xlim(0, 24)
     plt.xticks([0, 6, 12, 18, 24])
@@ -407,24 +514,3 @@ def mypause(interval):
                 canvas.draw()
             canvas.start_event_loop(interval)
             return
-
-def gf_getdiurnalstats(DecHour, Data, ts):
-    nInts = 24*int((60/ts)+0.5)
-    Num = numpy.ma.zeros(nInts, dtype=int)
-    Hr = numpy.ma.zeros(nInts, dtype=float)
-    for i in range(nInts):
-        Hr[i] = float(i)*ts/60.
-    Av = numpy.ma.masked_all(nInts)
-    Sd = numpy.ma.masked_all(nInts)
-    Mx = numpy.ma.masked_all(nInts)
-    Mn = numpy.ma.masked_all(nInts)
-    if numpy.size(Data)!=0:
-        for i in range(nInts):
-            li = numpy.ma.where((abs(DecHour-Hr[i])<c.eps)&(abs(Data-float(c.missing_value))>c.eps))
-            Num[i] = numpy.size(li)
-            if Num[i]!=0:
-                Av[i] = numpy.ma.mean(Data[li])
-                Sd[i] = numpy.ma.std(Data[li])
-                Mx[i] = numpy.ma.maximum.reduce(Data[li])
-                Mn[i] = numpy.ma.minimum.reduce(Data[li])
-    return Num, Hr, Av, Sd, Mx, Mn
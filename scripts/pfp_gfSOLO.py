@@ -1,7 +1,9 @@
 # standard modules
+import copy
 import csv
 import datetime
 import logging
+import multiprocessing
 import os
 import platform
 import subprocess
@@ -103,23 +105,17 @@ def gfSOLO_autocomplete(ds, l5_info, called_by):
         if numpy.ma.count(data_solo) == 0:
             continue
         mask_solo = numpy.ma.getmaskarray(data_solo)
-        gapstartend = pfp_utils.contiguous_regions(mask_solo)
-        data_obs, _, _ = pfp_utils.GetSeriesasMA(ds, target)
-        for si_gap, ei_gap in gapstartend:
-            min_points = int((ei_gap-si_gap)*l5s["gui"]["min_percent"]/100)
-            num_good_points = numpy.ma.count(data_obs[si_gap: ei_gap])
-            while num_good_points < min_points:
-                si_gap = max([0, si_gap - l5s["info"]["nperday"]])
-                ei_gap = min([nRecs-1, ei_gap + l5s["info"]["nperday"]])
-                if si_gap == 0 and ei_gap == nRecs-1:
-                    msg = " Unable to find enough good points in target " + target
-                    logger.error(msg)
-                    not_enough_points = True
-                if not_enough_points:
-                    break
-                min_points = int((ei_gap-si_gap)*l5s["gui"]["min_percent"]/100)
-                num_good_points = numpy.ma.count(data_obs[si_gap: ei_gap])
+        gap_index = pfp_utils.GapIndex(mask_solo)
+        # widen the period around each gap until there are enough good target points
+        obs_index = pfp_utils.get_gap_index(ds, target)
+        num_good = obs_index.count_good(gap_index.starts, gap_index.ends)
+        starts, ends, full = pfp_utils.expand_gap_windows(gap_index.starts, gap_index.ends, obs_index.good,
+                                                          l5s["info"]["nperday"], nRecs,
+                                                          l5s["gui"]["min_percent"], num_good=num_good)
+        for si_gap, ei_gap, not_enough_points in zip(starts, ends, full):
             if not_enough_points:
+                msg = " Unable to find enough good points in target " + target
+                logger.error(msg)
                 break
             si = max([0, si_gap])
             ei = min([len(ldt)-1, ei_gap])
@@ -129,6 +125,26 @@ def gfSOLO_autocomplete(ds, l5_info, called_by):
             if l5s["info"]["call_mode"] == "interactive":
                 gfSOLO_plotcoveragelines(ds, l5_info, called_by)
 
+def gfSOLO_bmu(x, W, last=False):
+    """
+    Purpose:
+     Find the best matching SOFM node for each row of a normalised data array.
+    Usage:
+     bmu = pfp_gfSOLO.gfSOLO_bmu(x, W, last=False)
+     where x is the normalised data, shape (nrows, nvars)
+           W is the SOFM weights, shape (nnodes, nvars)
+           last is True to break ties in favour of the last node (as SOLO and
+           SEQSOLO do), False to use the first node (as SOFM does)
+    Author: PRI
+    Date: October 2026
+    """
+    # squared distance from each row to each node, only the ranking matters
+    d2 = (numpy.sum(W*W, axis=1)[numpy.newaxis, :] - 2*numpy.dot(x, W.T))
+    if last:
+        nnodes = W.shape[0]
+        return nnodes - 1 - numpy.argmin(d2[:, ::-1], axis=1)
+    return numpy.argmin(d2, axis=1)
+
 def gfSOLO_done(solo_gui):
     ds = solo_gui.ds
     l5_info = solo_gui.l5_info
@@ -147,6 +163,45 @@ def gfSOLO_done(solo_gui):
     ds.returncodes["value"] = 0
     ds.returncodes["message"] = "normal"
 
+def gfSOLO_executable(name):
+    """
+    Purpose:
+     Return the absolute path of one of the compiled SOLO programs so that it
+     can be run from a working directory.
+    Usage:
+     exe = pfp_gfSOLO.gfSOLO_executable("sofm")
+    Author: PRI
+    Date: October 2026
+    """
+    if platform.system() == "Windows":
+        name = name + ".exe"
+    return os.path.abspath(os.path.join("solo", "bin", name))
+
+def gfSOLO_get_windows(l5s, window):
+    """
+    Purpose:
+     Return a list of [startdate, enddate] strings for the windows used by the
+     automated runs.  The first window starts at l5s["run"]["startdate"], each
+     window is "window" long and the last window is clipped to the end of the
+     data.
+    Usage:
+     windows = pfp_gfSOLO.gfSOLO_get_windows(l5s, window)
+     where window is a dateutil.relativedelta.relativedelta
+    Author: PRI
+    Date: October 2026
+    """
+    file_enddate = dateutil.parser.parse(l5s["info"]["enddate"])
+    windows = []
+    run_startdate = l5s["run"]["startdate"]
+    startdate = dateutil.parser.parse(run_startdate)
+    enddate = min([file_enddate, startdate + window])
+    while startdate < enddate:
+        windows.append([run_startdate, enddate.strftime("%Y-%m-%d %H:%M")])
+        startdate = enddate
+        run_startdate = startdate.strftime("%Y-%m-%d %H:%M")
+        enddate = min([file_enddate, startdate + window])
+    return windows
+
 def gfSOLO_getserieslist(cf):
     series_list = []
     if "Drivers" in cf.keys():
@@ -181,15 +236,13 @@ def gfSOLO_main(ds, l5_info, called_by, outputs=None):
     This is the main routine for running SOLO, an artifical neural network for gap filling fluxes.
     '''
     l5s = l5_info[called_by]
-    ts = int(ds.globalattributes["time_step"])
     startdate = l5s["run"]["startdate"]
     enddate = l5s["run"]["enddate"]
     logger.info(" Gap filling using SOLO: " + startdate + " to " + enddate)
     # get some useful things
     ldt = ds.series["DateTime"]["Data"]
     # get the start and end datetime indices
-    si = pfp_utils.GetDateIndex(ldt, startdate, ts=ts, default=0, match="exact")
-    ei = pfp_utils.GetDateIndex(ldt, enddate, ts=ts, default=len(ldt)-1, match="exact")
+    si, ei = gfSOLO_window_indices(ds, startdate, enddate)
     # get the minimum number of points from the minimum percentage
     l5s["gui"]["min_points"] = int((ei-si)*l5s["gui"]["min_percent"]/100)
     # loop over the series to be gap filled using solo
@@ -230,25 +283,59 @@ def gfSOLO_main(ds, l5_info, called_by, outputs=None):
             l5s["gui"]["nda_factor"] = l5s["outputs"][output]["solo_settings"]["nda_factor"]
             l5s["gui"]["learning_rate"] = l5s["outputs"][output]["solo_settings"]["learning_rate"]
             l5s["gui"]["iterations"] = l5s["outputs"][output]["solo_settings"]["iterations"]
-        # write the inf files for sofm, solo and seqsolo
-        gfSOLO_writeinffiles(l5s)
-        # run SOFM
-        result = gfSOLO_runsofm(ds, drivers, target, nRecs, si=si, ei=ei)
-        if result != 1:
-            return
-        # run SOLO
-        result = gfSOLO_runsolo(ds, drivers, target, nRecs, si=si, ei=ei)
-        if result != 1:
-            return
-        # run seqsolo and put the solo_modelled data into the ds series
-        result = gfSOLO_runseqsolo(ds, drivers, target, output, nRecs,
-                                   flag_code, si=si, ei=ei)
-        if result != 1:
-            return
+        if l5s["info"].get("engine", "binary") == "native":
+            # run SOFM, SOLO and SEQSOLO in-process and put the solo_modelled data into the ds series
+            result = gfSOLO_runnative(ds, drivers, target, output, nRecs,
+                                      flag_code, l5s["gui"], si=si, ei=ei)
+            if result != 1:
+                return
+        else:
+            # the compiled programs run in their own working directory so that
+            # SOLO runs for other targets, windows or sites do not interfere
+            work_dir = pfp_utils.make_work_directory("solo_", subdirectories=["inf", "input", "output", "log"])
+            try:
+                # write the inf files for sofm, solo and seqsolo
+                gfSOLO_writeinffiles(l5s, work_dir)
+                # run SOFM
+                result = gfSOLO_runsofm(ds, drivers, target, nRecs, work_dir, si=si, ei=ei)
+                # run SOLO
+                if result == 1:
+                    result = gfSOLO_runsolo(ds, drivers, target, nRecs, work_dir, si=si, ei=ei)
+                # run seqsolo and put the solo_modelled data into the ds series
+                if result == 1:
+                    result = gfSOLO_runseqsolo(ds, drivers, target, output, nRecs,
+                                               flag_code, work_dir, si=si, ei=ei)
+                if result != 1:
+                    # the working directory is removed so copy the end of the logs to the PFP log
+                    for log_name in sorted(os.listdir(os.path.join(work_dir, "log"))):
+                        with open(os.path.join(work_dir, "log", log_name)) as log_file:
+                            lines = log_file.readlines()[-10:]
+                        logger.error(" " + log_name + ":")
+                        for line in lines:
+                            logger.error("  " + line.rstrip())
+                    return
+            finally:
+                pfp_utils.remove_work_directory(work_dir)
         # plot the results
         pd = gfSOLO_initplot(len(drivers))
         gfSOLO_plot(pd, ds, drivers, target, output, l5s, si=si, ei=ei)
 
+def gfSOLO_normalise(x):
+    """
+    Purpose:
+     Normalise each column of a data array to the range 0 to 1 using the
+     minimum and maximum of that column, as done by the SOLO programs.
+    Usage:
+     xn = pfp_gfSOLO.gfSOLO_normalise(x)
+    Author: PRI
+    Date: October 2026
+    """
+    xmin = numpy.min(x, axis=0)
+    xrange = numpy.max(x, axis=0) - xmin
+    # avoid dividing by zero when a driver is constant over the window
+    xrange[xrange == 0] = 1.0
+    return (x - xmin)/xrange
+
 def gfSOLO_plot(pd, ds, drivers, target, output, l5s, si=0, ei=-1):
     """ Plot the results of the SOLO run. """
     # get the time step
@@ -280,17 +367,17 @@ def gfSOLO_plot(pd, ds, drivers, target, output, l5s, si=0, ei=-1):
     # get the diurnal stats of the observations
     mask = numpy.ma.mask_or(obs.mask, mod.mask)
     obs_mor = numpy.ma.array(obs, mask=mask)
-    _, Hr1, Av1, _, _, _ = gf_getdiurnalstats(Hdh, obs_mor, ts)
+    _, Hr1, Av1, _, _, _ = pfp_utils.get_diurnalstats_decimalhour(Hdh, obs_mor, ts)
     ax1.plot(Hr1, Av1, 'b-', label="Obs")
     # get the diurnal stats of all SOLO predictions
-    _, Hr2, Av2, _, _, _ = gf_getdiurnalstats(Hdh, mod, ts)
+    _, Hr2, Av2, _, _, _ = pfp_utils.get_diurnalstats_decimalhour(Hdh, mod, ts)
     ax1.plot(Hr2, Av2, 'r-', label="SOLO(all)")
     # get the diurnal stats of SOLO predictions when the obs are present
     mod_mor = numpy.ma.array(mod, mask=mask)
     if numpy.ma.count_masked(obs) != 0:
         index = numpy.where(numpy.ma.getmaskarray(obs) == False)[0]
         # get the diurnal stats of SOLO predictions when observations are present
-        _, Hr3, Av3, _, _, _ = gf_getdiurnalstats(Hdh[index], mod_mor[index], ts)
+        _, Hr3, Av3, _, _, _ = pfp_utils.get_diurnalstats_decimalhour(Hdh[index], mod_mor[index], ts)
         ax1.plot(Hr3, Av3, 'g-', label="SOLO(obs)")
     plt.xlim(0, 24)
     plt.xticks([0, 6, 12, 18, 24])
@@ -594,6 +681,52 @@ def gfSOLO_quit(solo_gui):
     # destroy the GUI
     solo_gui.close()
 
+def gfSOLO_rand(seed, n):
+    """
+    Purpose:
+     Return the first n values from the C library rand() after srand(seed),
+     used by gfSOLO_sofm for the same initial weights as the compiled sofm.
+     The generator depends on the C library the sofm program is compiled
+     with, Microsoft's on Windows, the BSD generator on macOS and glibc's
+     everywhere else.
+    Usage:
+     values, rand_max = pfp_gfSOLO.gfSOLO_rand(seed, n)
+     where values is a list of n integers
+           rand_max is RAND_MAX for the C library
+    Author: PRI
+    Date: October 2026
+    """
+    values = []
+    if platform.system() == "Windows":
+        state = seed & 0xffffffff
+        for i in range(n):
+            state = (state*214013 + 2531011) & 0xffffffff
+            values.append((state >> 16) & 0x7fff)
+        return values, 32767
+    if platform.system() == "Darwin":
+        state = seed if seed != 0 else 123459876
+        for i in range(n):
+            hi, lo = divmod(state, 127773)
+            state = 16807*lo - 2836*hi
+            if state < 0:
+                state += 0x7fffffff
+            values.append(state)
+        return values, 0x7fffffff
+    # glibc, additive feedback generator seeded by the minimal standard generator
+    r = [seed if seed != 0 else 1]
+    for i in range(1, 31):
+        hi, lo = divmod(r[i-1], 127773)
+        word = 16807*lo - 2836*hi
+        if word < 0:
+            word += 2147483647
+        r.append(word)
+    for i in range(31, 34):
+        r.append(r[i-31])
+    for i in range(34, 344 + n):
+        r.append((r[i-31] + r[i-3]) & 0xffffffff)
+    values = [v >> 1 for v in r[344:]]
+    return values, 2147483647
+
 def gfSOLO_run_interactive(solo_gui):
     """
     Purpose:
@@ -681,20 +814,8 @@ def gfSOLO_run(ds, l5_info, called_by):
     elif l5s["gui"]["period_option"] == 2:
         # automated run with window length in months
         logger.info(" Starting auto (months) run ...")
-        startdate = dateutil.parser.parse(l5s["run"]["startdate"])
-        enddate = startdate + dateutil.relativedelta.relativedelta(months=l5s["gui"]["number_months"])
-        enddate = min([dateutil.parser.parse(l5s["info"]["enddate"]), enddate])
-        l5s["run"]["enddate"] = enddate.strftime("%Y-%m-%d %H:%M")
-        while startdate < enddate:
-            gfSOLO_main(ds, l5_info, called_by)
-            if (l5s["info"]["called_by"] in ["GapFillUsingSOLO", "GapFillLongSOLO"] and
-                l5s["info"]["call_mode"] == "interactive"):
-                gfSOLO_plotcoveragelines(ds, l5_info, called_by)
-            startdate = enddate
-            l5s["run"]["startdate"] = startdate.strftime("%Y-%m-%d %H:%M")
-            enddate = startdate + dateutil.relativedelta.relativedelta(months=l5s["gui"]["number_months"])
-            enddate = min([dateutil.parser.parse(l5s["info"]["enddate"]), enddate])
-            l5s["run"]["enddate"] = enddate.strftime("%Y-%m-%d %H:%M")
+        window = dateutil.relativedelta.relativedelta(months=l5s["gui"]["number_months"])
+        gfSOLO_run_windows(ds, l5_info, called_by, gfSOLO_get_windows(l5s, window))
         # now fill any remaining gaps
         gfSOLO_autocomplete(ds, l5_info, called_by)
         if l5s["info"]["called_by"] in ["GapFillUsingSOLO", "GapFillLongSOLO"]:
@@ -707,23 +828,8 @@ def gfSOLO_run(ds, l5_info, called_by):
     elif l5s["gui"]["period_option"] == 3:
         # automated run with window length in days
         logger.info(" Starting auto (days) run ...")
-        # get the start datetime entered in the SOLO GUI
-        startdate = dateutil.parser.parse(l5s["run"]["startdate"])
-        # get the end datetime from the start datetime
-        enddate = startdate + dateutil.relativedelta.relativedelta(days=l5s["gui"]["number_days"])
-        # clip end datetime to last datetime in tower file
-        enddate = min([dateutil.parser.parse(l5s["info"]["enddate"]), enddate])
-        l5s["run"]["enddate"] = enddate.strftime("%Y-%m-%d %H:%M")
-        while startdate < enddate:
-            gfSOLO_main(ds, l5_info, called_by)
-            if (l5s["info"]["called_by"] in ["GapFillUsingSOLO", "GapFillLongSOLO"] and
-                l5s["info"]["call_mode"] == "interactive"):
-                gfSOLO_plotcoveragelines(ds, l5_info, called_by)
-            startdate = enddate
-            l5s["run"]["startdate"] = startdate.strftime("%Y-%m-%d %H:%M")
-            enddate = startdate + dateutil.relativedelta.relativedelta(days=l5s["gui"]["number_days"])
-            enddate = min([dateutil.parser.parse(l5s["info"]["enddate"]), enddate])
-            l5s["run"]["enddate"] = enddate.strftime("%Y-%m-%d %H:%M")
+        window = dateutil.relativedelta.relativedelta(days=l5s["gui"]["number_days"])
+        gfSOLO_run_windows(ds, l5_info, called_by, gfSOLO_get_windows(l5s, window))
         # now fill any remaining gaps
         gfSOLO_autocomplete(ds, l5_info, called_by)
         if l5s["info"]["called_by"] in ["GapFillUsingSOLO", "GapFillLongSOLO"]:
@@ -734,10 +840,137 @@ def gfSOLO_run(ds, l5_info, called_by):
                 gfSOLO_plotsummary(ds, l5s)
         logger.info(" Finished auto (days) run ...")
 
+def gfSOLO_run_windows(ds, l5_info, called_by, windows):
+    """
+    Purpose:
+     Run SOLO for each window in turn or, if the "workers" option is greater
+     than 1, run all windows and all outputs in a pool of worker processes.
+     The results from the workers are put back in the same order as the
+     serial run, so the gap filled series and the statistics in
+     l5s["outputs"][output]["results"] are the same either way.
+    Usage:
+     pfp_gfSOLO.gfSOLO_run_windows(ds, l5_info, called_by, windows)
+     where windows is a list of [startdate, enddate] from gfSOLO_get_windows
+    Author: PRI
+    Date: October 2026
+    """
+    l5s = l5_info[called_by]
+    plot_coverage = (l5s["info"]["called_by"] in ["GapFillUsingSOLO", "GapFillLongSOLO"] and
+                     l5s["info"]["call_mode"] == "interactive")
+    workers = l5s["info"].get("workers", 1)
+    if workers <= 1 or len(windows) == 0:
+        for startdate, enddate in windows:
+            l5s["run"]["startdate"] = startdate
+            l5s["run"]["enddate"] = enddate
+            gfSOLO_main(ds, l5_info, called_by)
+            if plot_coverage:
+                gfSOLO_plotcoveragelines(ds, l5_info, called_by)
+        return
+    # gfSOLO_main leaves the SOLO settings for an output in the GUI dictionary
+    # and these are used by the following outputs, so work out the GUI settings
+    # each job would see in the serial run
+    outputs = l5s["outputs"].keys()
+    gui = copy.deepcopy(l5s["gui"])
+    jobs = []
+    for startdate, enddate in windows:
+        si, ei = gfSOLO_window_indices(ds, startdate, enddate)
+        min_points = int((ei-si)*gui["min_percent"]/100)
+        for output in outputs:
+            jobs.append([startdate, enddate, output, copy.deepcopy(gui)])
+            target = l5s["outputs"][output]["target"]
+            d, _, _ = pfp_utils.GetSeriesasMA(ds, target, si=si, ei=ei)
+            if numpy.ma.count(d) >= min_points and "solo_settings" in l5s["outputs"][output]:
+                gui.update(l5s["outputs"][output]["solo_settings"])
+    msg = " SOLO: running " + str(len(jobs)) + " windows and outputs using " + str(workers) + " workers"
+    logger.info(msg)
+    pool = multiprocessing.Pool(processes=min(workers, len(jobs)), initializer=gfSOLO_worker_init,
+                                initargs=(ds, l5s, called_by))
+    try:
+        results = pool.map(gfSOLO_worker, jobs)
+    finally:
+        pool.close()
+        pool.join()
+    # put the results back in the same order as the serial run
+    for job, result in zip(jobs, results):
+        output = job[2]
+        si, index, data, flag, job_results, job_gui = result
+        ds.series[output]["Data"][si + index] = data
+        ds.series[output]["Flag"][si + index] = flag
+        for item in job_results:
+            l5s["outputs"][output]["results"][item].extend(job_results[item])
+    # leave the GUI settings and the run dates as the serial run would
+    for item in ["min_points", "nodes_target", "training", "nda_factor", "learning_rate", "iterations"]:
+        if item in job_gui:
+            l5s["gui"][item] = job_gui[item]
+    l5s["run"]["startdate"] = windows[-1][0]
+    l5s["run"]["enddate"] = windows[-1][1]
+    if plot_coverage:
+        gfSOLO_plotcoveragelines(ds, l5_info, called_by)
+    return
+
+def gfSOLO_runnative(dsb, drivers, targetlabel, outputlabel, nRecs,
+                     flag_code, gui, si=0, ei=-1):
+    """
+    Purpose:
+     Run SOFM, SOLO and SEQSOLO in-process and put the modelled data into
+     the output series.  This replaces writing the driver and target data to
+     files and running the compiled sofm, solo and seqsolo programs.
+     Experimental, the results have not been checked against the compiled
+     programs on site data.
+    Usage:
+     result = pfp_gfSOLO.gfSOLO_runnative(dsb, drivers, targetlabel, outputlabel, nRecs,
+                                          flag_code, gui, si=si, ei=ei)
+     where gui is the l5_info[called_by]["gui"] dictionary
+     Returns 1 on success, 0 on failure (same as gfSOLO_runsofm etc).
+    Author: PRI
+    Date: October 2026
+    """
+    # get the driver data
+    ndrivers = len(drivers)
+    x = numpy.zeros((nRecs, ndrivers))
+    for i, label in enumerate(drivers):
+        driver, _, _ = pfp_utils.GetSeries(dsb, label, si=si, ei=ei)
+        x[:, i] = driver[:]
+    # get the target data
+    z, _, _ = pfp_utils.GetSeries(dsb, targetlabel, si=si, ei=ei)
+    z = numpy.array(z, dtype=numpy.float64)
+    # rows with all drivers present are used by SOFM and SEQSOLO
+    goodindex = numpy.where(numpy.all(abs(x - float(c.missing_value)) > c.eps, axis=1))[0]
+    if len(goodindex) == 0:
+        msg = " SOFM: no driver data available for " + targetlabel
+        logger.error(msg)
+        return 0
+    # rows with the target present as well are used by SOLO
+    target_ok = abs(z[goodindex] - float(c.missing_value)) > c.eps
+    if numpy.count_nonzero(target_ok) < 2:
+        msg = " SOLO: not enough target data available for " + targetlabel
+        logger.error(msg)
+        return 0
+    # get the settings, these are strings when they come from the GUI
+    nodes = int(gui["nodes_target"])
+    training = int(gui["training"])
+    nda_factor = int(float(gui["nda_factor"]))
+    learning_rate = float(gui["learning_rate"])
+    iterations = int(gui["iterations"])
+    # run SOFM, SOLO and SEQSOLO
+    Wi = gfSOLO_sofm(x[goodindex], nodes, training)
+    xs = x[goodindex][target_ok]
+    Wo, eVector = gfSOLO_solo(gfSOLO_normalise(xs), z[goodindex][target_ok], Wi, nodes, nda_factor)
+    zout = gfSOLO_seqsolo(gfSOLO_normalise(x[goodindex]), z[goodindex], target_ok,
+                          Wi, Wo, eVector, learning_rate, iterations)
+    # put the SOLO modelled data back into the data series
+    if ei == -1:
+        dsb.series[outputlabel]['Data'][si:][goodindex] = zout
+        dsb.series[outputlabel]['Flag'][si:][goodindex] = numpy.int32(flag_code)
+    else:
+        dsb.series[outputlabel]['Data'][si:ei+1][goodindex] = zout
+        dsb.series[outputlabel]['Flag'][si:ei+1][goodindex] = numpy.int32(flag_code)
+    return 1
+
 def gfSOLO_runseqsolo(dsb, drivers, targetlabel, outputlabel, nRecs,
-                      flag_code, si=0, ei=-1):
+                      flag_code, work_dir, si=0, ei=-1):
     '''
-    Run SEQSOLO.
+    Run SEQSOLO in the working directory work_dir.
     '''
     # get the number of drivers
     ndrivers = len(drivers)
@@ -770,26 +1003,24 @@ def gfSOLO_runseqsolo(dsb, drivers, targetlabel, outputlabel, nRecs,
     # keep track of the good data indices
     goodindex = iind[index]
     # and then write the seqsolo input file
-    seqsolofile = open('solo/input/seqsolo_input.csv', 'wb')
+    seqsolofile = open(os.path.join(work_dir, 'input', 'seqsolo_input.csv'), 'wb')
     wr = csv.writer(seqsolofile, delimiter=',')
     for i in range(gooddata.shape[0]):
         wr.writerow(gooddata[i, 0:ndrivers + 1])
     seqsolofile.close()
     # if the output file from a previous run exists, delete it
-    if os.path.exists('solo/output/seqOut2.out'):
-        os.remove('solo/output/seqOut2.out')
+    if os.path.exists(os.path.join(work_dir, 'output', 'seqOut2.out')):
+        os.remove(os.path.join(work_dir, 'output', 'seqOut2.out'))
     # now run SEQSOLO
-    seqsolologfile = open('solo/log/seqsolo.log', 'wb')
-    if platform.system() == "Windows":
-        subprocess.call(['./solo/bin/seqsolo.exe', 'solo/inf/seqsolo.inf'], stdout=seqsolologfile)
-    else:
-        subprocess.call(['./solo/bin/seqsolo', 'solo/inf/seqsolo.inf'], stdout=seqsolologfile)
+    seqsolologfile = open(os.path.join(work_dir, 'log', 'seqsolo.log'), 'wb')
+    subprocess.call([gfSOLO_executable('seqsolo'), os.path.join('inf', 'seqsolo.inf')],
+                    stdout=seqsolologfile, cwd=work_dir)
     seqsolologfile.close()
     # check to see if the solo output file exists, this is used to indicate that solo ran correctly
-    if os.path.exists('solo/output/seqOut2.out'):
+    if os.path.exists(os.path.join(work_dir, 'output', 'seqOut2.out')):
         # now read in the seqsolo results, use the seqOut2 file so that the learning capability of
         # seqsolo can be used via the "learning rate" and "Iterations" GUI options
-        seqdata = numpy.genfromtxt('solo/output/seqOut2.out')
+        seqdata = numpy.genfromtxt(os.path.join(work_dir, 'output', 'seqOut2.out'))
         # put the SOLO modelled data back into the data series
         if ei == -1:
             dsb.series[outputlabel]['Data'][si:][goodindex] = seqdata[:, 1]
@@ -803,9 +1034,9 @@ def gfSOLO_runseqsolo(dsb, drivers, targetlabel, outputlabel, nRecs,
         logger.error(msg)
         return 0
 
-def gfSOLO_runsofm(dsb, drivers, targetlabel, nRecs, si=0, ei=-1):
+def gfSOLO_runsofm(dsb, drivers, targetlabel, nRecs, work_dir, si=0, ei=-1):
     '''
-    Run SOFM, the pre-processor for SOLO.
+    Run SOFM, the pre-processor for SOLO, in the working directory work_dir.
     '''
     # get the number of drivers
     ndrivers = len(drivers)
@@ -840,32 +1071,30 @@ def gfSOLO_runsofm(dsb, drivers, targetlabel, nRecs, si=0, ei=-1):
         logger.info(msg)
         nRecs = len(goodlines)
     # now write the drivers to the SOFM input file
-    sofmfile = open('solo/input/sofm_input.csv', 'wb')
+    sofmfile = open(os.path.join(work_dir, 'input', 'sofm_input.csv'), 'wb')
     wr = csv.writer(sofmfile, delimiter=',')
     for i in range(sofminputdata.shape[0]):
         wr.writerow(sofminputdata[i, 0:ndrivers])
     sofmfile.close()
     # if the output file from a previous run exists, delete it
-    if os.path.exists('solo/output/sofm_4.out'):
-        os.remove('solo/output/sofm_4.out')
+    if os.path.exists(os.path.join(work_dir, 'output', 'sofm_4.out')):
+        os.remove(os.path.join(work_dir, 'output', 'sofm_4.out'))
     # now run SOFM
-    sofmlogfile = open('solo/log/sofm.log', 'wb')
-    if platform.system() == "Windows":
-        subprocess.call(['./solo/bin/sofm.exe', 'solo/inf/sofm.inf'], stdout=sofmlogfile)
-    else:
-        subprocess.call(['./solo/bin/sofm', 'solo/inf/sofm.inf'], stdout=sofmlogfile)
+    sofmlogfile = open(os.path.join(work_dir, 'log', 'sofm.log'), 'wb')
+    subprocess.call([gfSOLO_executable('sofm'), os.path.join('inf', 'sofm.inf')],
+                    stdout=sofmlogfile, cwd=work_dir)
     sofmlogfile.close()
     # check to see if the sofm output file exists, this is used to indicate that sofm ran correctly
-    if os.path.exists('solo/output/sofm_4.out'):
+    if os.path.exists(os.path.join(work_dir, 'output', 'sofm_4.out')):
         return 1
     else:
         msg = " SOFM did not run correctly, check the GUI and the log files"
         logger.error(msg)
         return 0
 
-def gfSOLO_runsolo(dsb, drivers, targetlabel, nRecs, si=0, ei=-1):
+def gfSOLO_runsolo(dsb, drivers, targetlabel, nRecs, work_dir, si=0, ei=-1):
     '''
-    Run SOLO.
+    Run SOLO in the working directory work_dir.
     '''
     ndrivers = len(drivers)
     # add an extra column for the target data
@@ -892,42 +1121,301 @@ def gfSOLO_runsolo(dsb, drivers, targetlabel, nRecs, si=0, ei=-1):
     for i in range(ndrivers + 1):
         gooddata[:, i] = soloinputdata[:, i][index]
     # and then write the solo input file, the name is assumed by the solo.inf control file
-    solofile = open('solo/input/solo_input.csv', 'wb')
+    solofile = open(os.path.join(work_dir, 'input', 'solo_input.csv'), 'wb')
     wr = csv.writer(solofile, delimiter=',')
     for i in range(gooddata.shape[0]):
         wr.writerow(gooddata[i, 0:ndrivers + 1])
     solofile.close()
     # if the output file from a previous run exists, delete it
-    if os.path.exists('solo/output/eigenValue.out'):
-        os.remove('solo/output/eigenValue.out')
+    if os.path.exists(os.path.join(work_dir, 'output', 'eigenValue.out')):
+        os.remove(os.path.join(work_dir, 'output', 'eigenValue.out'))
     # now run SOLO
-    solologfile = open('solo/log/solo.log', 'wb')
-    if platform.system() == "Windows":
-        subprocess.call(['./solo/bin/solo.exe', 'solo/inf/solo.inf'], stdout=solologfile)
-    else:
-        subprocess.call(['./solo/bin/solo', 'solo/inf/solo.inf'], stdout=solologfile)
+    solologfile = open(os.path.join(work_dir, 'log', 'solo.log'), 'wb')
+    subprocess.call([gfSOLO_executable('solo'), os.path.join('inf', 'solo.inf')],
+                    stdout=solologfile, cwd=work_dir)
     solologfile.close()
     # check to see if the solo output file exists, this is used to indicate that solo ran correctly
-    if os.path.exists('solo/output/eigenValue.out'):
+    if os.path.exists(os.path.join(work_dir, 'output', 'eigenValue.out')):
         return 1
     else:
         msg = " SOLO did not run correctly, check the GUI and the log files"
         logger.error(msg)
         return 0
 
-def gfSOLO_writeinffiles(solo):
+def gfSOLO_seqsolo(x, z, z_ok, Wi, Wo, eVector, learning_rate, iterations):
+    """
+    Purpose:
+     Native version of SEQSOLO.  Each row is assigned to its SOFM node and
+     the output is calculated from the principal components at that node.
+     If the learning rate is greater than 0 and there is more than 1 iteration,
+     the hidden-output weights are trained sequentially (LMS) on the rows with
+     target data before the final adaptive pass that produces the output.
+    Usage:
+     zout = pfp_gfSOLO.gfSOLO_seqsolo(x, z, z_ok, Wi, Wo, eVector, learning_rate, iterations)
+     where x is the normalised driver data, shape (nrows, nvars)
+           z is the target data and z_ok is True where z is present
+           Wi, Wo and eVector are from gfSOLO_sofm and gfSOLO_solo
+    Side effects:
+     None, Wo is copied before training.
+    Author: PRI
+    Date: October 2026
+    """
+    nrows, nvars = x.shape
+    nnodes = Wi.shape[0]
+    m = nvars + 1
+    bmu = gfSOLO_bmu(x, Wi, last=True)
+    # principal components with a constant column for the bias weight
+    P = numpy.ones((nrows, m))
+    P[:, :nvars] = numpy.einsum("nk,nkl->nl", x, eVector[bmu])
+    W = numpy.array(Wo, dtype=numpy.float64)
+    # the nodes do not interact, so the rows are processed in rounds where
+    # round r holds the r'th row (in time order) assigned to each node
+    order = numpy.argsort(bmu, kind="mergesort")
+    counts = numpy.bincount(bmu, minlength=nnodes)
+    starts = numpy.cumsum(counts) - counts
+    rank = numpy.empty(nrows, dtype=numpy.int64)
+    rank[order] = numpy.arange(nrows) - starts[bmu[order]]
+    rounds = numpy.lexsort((bmu, rank))
+    bounds = numpy.searchsorted(rank[rounds], numpy.arange(numpy.max(rank)+2))
+    lr = learning_rate
+    if learning_rate > 0.0 and iterations > 1:
+        # one sequential training pass over a node is an affine map of the
+        # weights at that node, W -> A.W + b, so build A and b once and
+        # apply them for each iteration
+        A = numpy.tile(numpy.eye(m), (nnodes, 1, 1))
+        b = numpy.zeros((nnodes, m))
+        for r in range(len(bounds)-1):
+            rows = rounds[bounds[r]:bounds[r+1]]
+            rows = rows[z_ok[rows]]
+            if len(rows) == 0:
+                continue
+            nodes = bmu[rows]
+            p = P[rows]
+            pA = numpy.einsum("nm,nmk->nk", p, A[nodes])
+            A[nodes] -= lr*p[:, :, numpy.newaxis]*pA[:, numpy.newaxis, :]
+            b[nodes] += lr*p*(z[rows] - numpy.sum(p*b[nodes], axis=1))[:, numpy.newaxis]
+        for k in range(iterations):
+            W = numpy.einsum("nmk,nk->nm", A, W) + b
+    # final pass, output with the current weights then update them
+    zout = numpy.zeros(nrows)
+    for r in range(len(bounds)-1):
+        rows = rounds[bounds[r]:bounds[r+1]]
+        nodes = bmu[rows]
+        zout[rows] = numpy.sum(P[rows]*W[nodes], axis=1)
+        ok = z_ok[rows]
+        rows, nodes = rows[ok], nodes[ok]
+        err = z[rows] - zout[rows]
+        W[nodes] += lr*err[:, numpy.newaxis]*P[rows]
+    return zout
+
+def gfSOLO_sofm(x, nodes, training, seed=1234, width=0.01):
+    """
+    Purpose:
+     Native version of SOFM, a port of solo/sofm/sofm.cc.  Trains a square
+     self-organising feature map with nodes x nodes nodes on the driver data.
+     As in sofm.cc, the drivers are normalised to the range 0 to 1, the
+     initial weights come from the C library rand() seeded with srand(seed)
+     (see gfSOLO_rand), the weights are updated after every row (learning
+     rate falls from 0.5 to a minimum of 0.02, neighbourhood falls from
+     nodes/2 to 0, neighbours are weighted by 1/(distance+1)) and all of the
+     arithmetic is done in single precision.  The weights are returned to 5
+     decimal places, as written by sofm to the file read by solo.
+    Usage:
+     Wi = pfp_gfSOLO.gfSOLO_sofm(x, nodes, training, seed=1234, width=0.01)
+     where x is the driver data, shape (nrows, nvars)
+           nodes is the number of nodes along each side of the map
+           training is the number of training epochs
+           seed is the seed for the random initial weights
+           width is the spread of the initial weights around 0.5
+     Wi is returned with shape (nodes*nodes, nvars), row-major node order.
+    Author: PRI
+    Date: October 2026
+    """
+    f32 = numpy.float32
+    x = numpy.array(x, dtype=f32)
+    nrows, nvars = x.shape
+    # normalise the drivers, avoid dividing by zero when a driver is constant
+    xmin = numpy.min(x, axis=0)
+    xrange = numpy.max(x, axis=0) - xmin
+    xrange[xrange == 0] = f32(1.0)
+    x = (x - xmin)/xrange
+    # initial weights, in the order sofm.cc draws them
+    width = f32(width)
+    values, rand_max = gfSOLO_rand(seed, nvars*nodes*nodes)
+    tmp = (numpy.array(values, dtype=numpy.float64)/float(rand_max)*float(width)).astype(f32)
+    W = (0.5 + (tmp.astype(numpy.float64) - float(width)/2.0)).astype(f32)
+    W = W.reshape(nvars, nodes, nodes)
+    Nc0 = nodes//2
+    for i1 in range(training):
+        coef = f32(0.5*(1.0 - float(i1)/float(training)))
+        if coef < 0.02:
+            coef = f32(0.02)
+        Nc = int(Nc0*(1.0 - float(i1)/float(training)))
+        # weighting factor times learning rate for the neighbours of the best node
+        offset = abs(numpy.arange(-Nc, Nc+1))
+        mxy = numpy.maximum(offset[:, numpy.newaxis], offset[numpy.newaxis, :])
+        factor = (1.0/(mxy + 1.0)).astype(f32)*coef
+        for i2 in range(nrows):
+            xi = x[i2][:, numpy.newaxis, numpy.newaxis]
+            # distance to each node, summed over the drivers in order as sofm.cc does,
+            # the first node with the minimum distance is the best node
+            t = xi - W
+            t *= t
+            indX, indY = divmod(int(numpy.sqrt(numpy.add.reduce(t, axis=0)).argmin()), nodes)
+            lbX, ubX = max(indX - Nc, 0), min(indX + Nc, nodes - 1)
+            lbY, ubY = max(indY - Nc, 0), min(indY + Nc, nodes - 1)
+            Wr = W[:, lbX:ubX+1, lbY:ubY+1]
+            Wr += factor[lbX-indX+Nc:ubX-indX+Nc+1, lbY-indY+Nc:ubY-indY+Nc+1]*(xi - Wr)
+    # sofm writes the weights with 5 decimal places
+    W = numpy.array([float("%8.5f" % w) for w in W.ravel()]).reshape(nvars, nodes*nodes)
+    return numpy.ascontiguousarray(W.T)
+
+def gfSOLO_solo(x, z, Wi, nodes, nda_factor):
+    """
+    Purpose:
+     Native version of SOLO, fits a principal component regression of the
+     target on the drivers at each SOFM node using the data at that node
+     and, if there are not enough, its neighbours.
+    Usage:
+     Wo, eVector = pfp_gfSOLO.gfSOLO_solo(x, z, Wi, nodes, nda_factor)
+     where x is the normalised driver data, shape (nrows, nvars)
+           z is the target data, shape (nrows)
+           Wi is the SOFM weights from gfSOLO_sofm
+           nodes is the number of nodes along each side of the map
+           nda_factor is the multiplier for the minimum number of points per node
+     Wo is the hidden-output weights, shape (nnodes, nvars+1), the last
+     column is the bias.  eVector holds the eigenvectors for each node,
+     shape (nnodes, nvars, nvars).  Nodes that can not be fitted keep
+     Wo = -1 and eVector = 0, the same as the compiled solo program.
+    Author: PRI
+    Date: October 2026
+    """
+    nrows, nvars = x.shape
+    nnodes = nodes*nodes
+    bmu = gfSOLO_bmu(x, Wi, last=True)
+    freq = numpy.bincount(bmu, minlength=nnodes).reshape(nodes, nodes)
+    Wo = numpy.full((nnodes, nvars+1), -1.0)
+    eVector = numpy.zeros((nnodes, nvars, nvars))
+    threshold = (nvars + 1)*nda_factor
+    bmu_x, bmu_y = numpy.divmod(bmu, nodes)
+    for n in range(nnodes):
+        i, j = divmod(n, nodes)
+        # grow the window around the node until there is enough data
+        nwn = -1
+        nd0 = 0
+        stop = False
+        while nd0 <= threshold and not stop:
+            nwn += 1
+            nd0 = numpy.sum(freq[max(i-nwn, 0):i+nwn+1, max(j-nwn, 0):j+nwn+1])
+            if nwn >= nodes:
+                stop = True
+        if stop:
+            continue
+        index = numpy.where((abs(bmu_x - i) <= nwn) & (abs(bmu_y - j) <= nwn))[0]
+        xn = x[index]
+        # eigenvalues and eigenvectors of the covariance matrix, largest first
+        xc = xn - numpy.mean(xn, axis=0)
+        evalue, evector = numpy.linalg.eigh(numpy.dot(xc.T, xc)/len(index))
+        evalue, evector = evalue[::-1], evector[:, ::-1]
+        # use enough principal components to explain 99% of the variance
+        total = numpy.sum(evalue)
+        if total <= 1.0e-6:
+            nls = 0
+        else:
+            nls = min(numpy.searchsorted(numpy.cumsum(evalue)/total, 0.99) + 1, nvars)
+        A = numpy.ones((len(index), nls+1))
+        A[:, :nls] = numpy.dot(xn, evector[:, :nls])
+        para = numpy.linalg.lstsq(A, z[index], rcond=None)[0]
+        Wo[n, :] = 0.0
+        Wo[n, :nls] = para[:nls]
+        Wo[n, nvars] = para[nls]
+        eVector[n] = evector
+    return Wo, eVector
+
+def gfSOLO_window_indices(ds, startdate, enddate):
+    """
+    Purpose:
+     Return the indices of the start and end datetimes of a SOLO window.
+    Usage:
+     si, ei = pfp_gfSOLO.gfSOLO_window_indices(ds, startdate, enddate)
+    Author: PRI
+    Date: October 2026
+    """
+    di = pfp_utils.get_date_index(ds)
+    si = di.find(startdate, default=0, match="exact")
+    ei = di.find(enddate, default=len(ds.series["DateTime"]["Data"])-1, match="exact")
+    return si, ei
+
+gfSOLO_worker_data = {}
+
+def gfSOLO_worker_init(ds, l5s, called_by):
+    """ Store the data structure and SOLO settings once in each worker process."""
+    # the workers save the plots to file but never draw them on the screen
+    plt.switch_backend("Agg")
+    gfSOLO_worker_data["ds"] = ds
+    gfSOLO_worker_data["l5s"] = l5s
+    gfSOLO_worker_data["called_by"] = called_by
+
+def gfSOLO_worker(args):
+    """
+    Purpose:
+     Run SOLO for one window and one output in a worker process.  Returns the
+     indices, relative to the window start, of the records written by SOLO,
+     their data and flag values, the statistics and the GUI settings.
+    Usage:
+    Author: PRI
+    Date: October 2026
+    """
+    startdate, enddate, output, gui = args
+    ds = gfSOLO_worker_data["ds"]
+    called_by = gfSOLO_worker_data["called_by"]
+    l5s = copy.copy(gfSOLO_worker_data["l5s"])
+    l5s["gui"] = gui
+    l5s["gui"]["show_plots"] = False
+    l5s["run"] = {"startdate": startdate, "enddate": enddate}
+    l5s["outputs"] = copy.deepcopy(l5s["outputs"])
+    results = l5s["outputs"][output]["results"]
+    for item in results:
+        results[item] = []
+    # mark the window so the records written by SOLO can be found, the output
+    # flag is not used by gfSOLO_main
+    si, ei = gfSOLO_window_indices(ds, startdate, enddate)
+    data = ds.series[output]["Data"][si:ei+1].copy()
+    flag = ds.series[output]["Flag"][si:ei+1].copy()
+    ds.series[output]["Flag"][si:ei+1] = numpy.int32(-1)
+    gfSOLO_main(ds, {called_by: l5s}, called_by, outputs=[output])
+    index = numpy.where(ds.series[output]["Flag"][si:ei+1] != -1)[0]
+    result = [si, index, ds.series[output]["Data"][si:ei+1][index].copy(),
+              ds.series[output]["Flag"][si:ei+1][index].copy(), results, l5s["gui"]]
+    # restore the window so the next job in this worker starts from the same data
+    ds.series[output]["Data"][si:ei+1] = data
+    ds.series[output]["Flag"][si:ei+1] = flag
+    return result
+
+def gfSOLO_writeinffiles(solo, work_dir):
+    """
+    Purpose:
+     Write the inf files for sofm, solo and seqsolo to work_dir/inf.  The file
+     names in the inf files are relative to work_dir, the compiled programs
+     are run with work_dir as their current directory.
+    Usage:
+     pfp_gfSOLO.gfSOLO_writeinffiles(solo, work_dir)
+    Author: PRI
+    Date: Back in the day
+          October 2026 - added work_dir
+    """
     # sofm inf file
-    f = open('solo/inf/sofm.inf','w')
+    f = open(os.path.join(work_dir, 'inf', 'sofm.inf'),'w')
     f.write(str(solo["gui"]["nodes_target"])+'\n')
     f.write(str(solo["gui"]["training"])+'\n')
     f.write(str(20)+'\n')
     f.write(str(0.01)+'\n')
     f.write(str(1234)+'\n')
-    f.write('solo/input/sofm_input.csv'+'\n')
-    f.write('solo/output/sofm_1.out'+'\n')
-    f.write('solo/output/sofm_2.out'+'\n')
-    f.write('solo/output/sofm_3.out'+'\n')
-    f.write('solo/output/sofm_4.out'+'\n')
+    f.write('input/sofm_input.csv'+'\n')
+    f.write('output/sofm_1.out'+'\n')
+    f.write('output/sofm_2.out'+'\n')
+    f.write('output/sofm_3.out'+'\n')
+    f.write('output/sofm_4.out'+'\n')
     f.write(str(50)+'\n')
     f.write('### Comment lines ###\n')
     f.write('Line 1: No. of nodes - default is the number of drivers plus 1 (changeable via GUI if used)\n')
@@ -935,66 +1423,66 @@ def gfSOLO_writeinffiles(solo):
     f.write('Line 3: No. of iterations per screen output - default is 20\n')
     f.write('Line 4: Spacing between initial weights - default is 0.01\n')
     f.write('Line 5: Seed for random number generator - default is 1234\n')
-    f.write('Line 6: input data filename with path relative to current directory\n')
-    f.write('Line 7: first output filename with path relative to current directory\n')
-    f.write('Line 8: second output filename with path relative to current directory\n')
-    f.write('Line 9: third output filename with path relative to current directory\n')
-    f.write('Line 10: fourth output filename with path relative to current directory (used by SOLO)\n')
+    f.write('Line 6: input data filename with path relative to the working directory\n')
+    f.write('Line 7: first output filename with path relative to the working directory\n')
+    f.write('Line 8: second output filename with path relative to the working directory\n')
+    f.write('Line 9: third output filename with path relative to the working directory\n')
+    f.write('Line 10: fourth output filename with path relative to the working directory (used by SOLO)\n')
     f.write('Line 11: No. iterations per write of weights to screen - default is 50\n')
     f.close()
     # solo inf file
-    f = open('solo/inf/solo.inf','w')
+    f = open(os.path.join(work_dir, 'inf', 'solo.inf'),'w')
     f.write(str(solo["gui"]["nodes_target"])+'\n')
     f.write(str(solo["gui"]["nda_factor"])+'\n')
-    f.write('solo/output/sofm_4.out'+'\n')
-    f.write('solo/input/solo_input.csv'+'\n')
+    f.write('output/sofm_4.out'+'\n')
+    f.write('input/solo_input.csv'+'\n')
     f.write('training'+'\n')
     f.write(str(5678)+'\n')
     f.write(str(0)+'\n')
-    f.write('solo/output/eigenValue.out'+'\n')
-    f.write('solo/output/eigenVector.out'+'\n')
-    f.write('solo/output/accumErr.out'+'\n')
-    f.write('solo/output/accumRR.out'+'\n')
-    f.write('solo/output/trainProcess.out'+'\n')
-    f.write('solo/output/freqTable.out'+'\n')
-    f.write('solo/output/hidOutputWt.out'+'\n')
-    f.write('solo/output/errorMap.out'+'\n')
-    f.write('solo/output/finResult.out'+'\n')
-    f.write('solo/output/trainWin.out'+'\n')
-    f.write('solo/output/trainWout.out'+'\n')
+    f.write('output/eigenValue.out'+'\n')
+    f.write('output/eigenVector.out'+'\n')
+    f.write('output/accumErr.out'+'\n')
+    f.write('output/accumRR.out'+'\n')
+    f.write('output/trainProcess.out'+'\n')
+    f.write('output/freqTable.out'+'\n')
+    f.write('output/hidOutputWt.out'+'\n')
+    f.write('output/errorMap.out'+'\n')
+    f.write('output/finResult.out'+'\n')
+    f.write('output/trainWin.out'+'\n')
+    f.write('output/trainWout.out'+'\n')
     f.write('### Comment lines ###\n')
     f.write('Line 1: No. of nodes - default is the number of drivers plus 1 (changeable via GUI if used)\n')
     f.write('Line 2: multiplier for minimum number of points per node (NdaFactor) - default is 5 (ie 5*(no. of drivers+1) (changeable via GUI if used)\n')
     f.write('Line 3: fourth output file from SOFM, used as input to SOLO\n')
-    f.write('Line 4: input data filename with path relative to current directory\n')
+    f.write('Line 4: input data filename with path relative to the working directory\n')
     f.write('Line 5: type of run ("training" or "simulation", always "training" for SOLO)\n')
     f.write('Line 6: seed for random number generator - default is 5678\n')
     f.write('Line 7: "calThreshold", not used by SOLO\n')
-    f.write('Lines 8 to 18: output files from SOLO with path relative to current directory\n')
+    f.write('Lines 8 to 18: output files from SOLO with path relative to the working directory\n')
     f.close()
     # seqsolo inf file
-    f = open('solo/inf/seqsolo.inf','w')
+    f = open(os.path.join(work_dir, 'inf', 'seqsolo.inf'),'w')
     f.write(str(solo["gui"]["nodes_target"])+'\n')
     f.write(str(0)+'\n')
     f.write(str(solo["gui"]["learning_rate"])+'\n')
     f.write(str(solo["gui"]["iterations"])+'\n')
-    f.write('solo/output/sofm_4.out'+'\n')
-    f.write('solo/input/seqsolo_input.csv'+'\n')
+    f.write('output/sofm_4.out'+'\n')
+    f.write('input/seqsolo_input.csv'+'\n')
     f.write('simulation'+'\n')
     f.write(str(9100)+'\n')
     f.write(str(0)+'\n')
-    f.write('solo/output/eigenValue.out'+'\n')
-    f.write('solo/output/eigenVector.out'+'\n')
-    f.write('solo/output/trainWout.out'+'\n')
-    f.write('solo/output/freqTable.out'+'\n')
-    f.write('solo/output/errorMap.out'+'\n')
-    f.write('solo/output/finResult.out'+'\n')
-    f.write('solo/output/trainingRMSE.out'+'\n')
-    f.write('solo/output/seqOut0.out'+'\n')
-    f.write('solo/output/seqOut1.out'+'\n')
-    f.write('solo/output/seqOut2.out'+'\n')
-    f.write('solo/output/seqHidOutW.out'+'\n')
-    f.write('solo/output/seqFreqMap.out'+'\n')
+    f.write('output/eigenValue.out'+'\n')
+    f.write('output/eigenVector.out'+'\n')
+    f.write('output/trainWout.out'+'\n')
+    f.write('output/freqTable.out'+'\n')
+    f.write('output/errorMap.out'+'\n')
+    f.write('output/finResult.out'+'\n')
+    f.write('output/trainingRMSE.out'+'\n')
+    f.write('output/seqOut0.out'+'\n')
+    f.write('output/seqOut1.out'+'\n')
+    f.write('output/seqOut2.out'+'\n')
+    f.write('output/seqHidOutW.out'+'\n')
+    f.write('output/seqFreqMap.out'+'\n')
     f.write(str(c.missing_value)+'\n')
     f.write('### Comment lines ###\n')
     f.write('Line 1: No. of nodes - default is the number of drivers plus 1 (changeable via GUI if used)\n')
@@ -1002,35 +1490,14 @@ def gfSOLO_writeinffiles(solo):
     f.write('Line 3: learning rate - default value 0.01 (must be between 0.0 1nd 1.0, changeable via GUI if used)\n')
     f.write('Line 4: number of iterations for sequential training, default value is 500 (changeable via GUI if used)\n')
     f.write('Line 5: fourth output file from SOFM, used as input file by SEQSOLO\n')
-    f.write('Line 6: input data filename with path relative to current directory\n')
+    f.write('Line 6: input data filename with path relative to the working directory\n')
     f.write('Line 7: type of run ("training" or "simulation", always "simulation" for SEQSOLO)\n')
     f.write('Line 8: seed for random number generator - default is 9100\n')
     f.write('Line 9: "calThreshold" - minimum number of data points for SOLO node to be used in simulation, default value is 0 (use all nodes)\n')
-    f.write('Lines 10 to 21: output files from SEQSOLO with path relative to current directory\n')
+    f.write('Lines 10 to 21: output files from SEQSOLO with path relative to the working directory\n')
     f.write('Line 22: missing data value, default value is c.missing_value.0\n')
     f.close()
 
-def gf_getdiurnalstats(DecHour,Data,ts):
-    nInts = 24*int((60/ts)+0.5)
-    Num = numpy.ma.zeros(nInts,dtype=int)
-    Hr = numpy.ma.zeros(nInts,dtype=float)
-    for i in range(nInts):
-        Hr[i] = float(i)*ts/60.
-    Av = numpy.ma.masked_all(nInts)
-    Sd = numpy.ma.masked_all(nInts)
-    Mx = numpy.ma.masked_all(nInts)
-    Mn = numpy.ma.masked_all(nInts)
-    if numpy.size(Data)!=0:
-        for i in range(nInts):
-            li = numpy.ma.where((abs(DecHour-Hr[i])<c.eps)&(abs(Data-float(c.missing_value))>c.eps))
-            Num[i] = numpy.size(li)
-            if Num[i]!=0:
-                Av[i] = numpy.ma.mean(Data[li])
-                Sd[i] = numpy.ma.std(Data[li])
-                Mx[i] = numpy.ma.maximum.reduce(Data[li])
-                Mn[i] = numpy.ma.minimum.reduce(Data[li])
-    return Num, Hr, Av, Sd, Mx, Mn
-
 def trap_masked_constant(num):
     if numpy.ma.is_masked(num):
         num = float(c.missing_value)
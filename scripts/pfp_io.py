@@ -6,13 +6,19 @@ import copy
 import csv
 import datetime
 import dateutil
+import glob
+import hashlib
+import json
 import logging
 import netCDF4
 import numpy
 import ntpath
 import os
+import pandas
 import platform
+import sys
 import time
+import weakref
 import xlrd
 import xlwt
 import xlsxwriter
@@ -35,6 +41,376 @@ class DataStructure(object):
         self.mergeserieslist = []
         self.averageserieslist = []
         self.returncodes = {"value":0,"message":"OK"}
+        # cache of datetime64 and date/time component arrays built from
+        # series["DateTime"]["Data"], see pfp_utils.get_time_index()
+        self.time_index = {}
+        # cache of gap indices for the series, see pfp_utils.get_gap_index()
+        self.gap_index = {}
+
+class LazyFile(object):
+    """
+    The open netCDF file shared by the LazySeries of one data structure.  The
+    file is closed when the last of these series has been read or when
+    close() is called, see nc_close_lazy().
+    """
+    def __init__(self, nc_file, count):
+        self.nc_file = nc_file
+        # number of series that have not been read yet
+        self.count = count
+        if self.count == 0:
+            self.close()
+
+    def read(self, label):
+        """ Read the data and QC flag for a series, close the file after the last one."""
+        data, flag, attr = nc_read_var(self.nc_file, label)
+        self.count -= 1
+        if self.count == 0:
+            self.close()
+        return data, flag
+
+    def close(self):
+        if self.nc_file is not None:
+            self.nc_file.close()
+            self.nc_file = None
+
+class LazySeries(dict):
+    """
+    A ds.series entry for nc_read_series(..., lazy=True).  The "Attr" entry is
+    read when the file is opened, the "Data" and "Flag" entries are read from
+    the open netCDF file (a LazyFile) the first time either of them is used.
+    Once read, the series behaves like the ordinary dictionary used everywhere
+    else.
+    """
+    def __init__(self, lazy_file, label, attr):
+        dict.__init__(self, Attr=attr)
+        self.lazy_file = lazy_file
+        self.label = label
+
+    def load(self):
+        """ Read the data and the QC flag if they have not been read yet."""
+        if self.lazy_file is not None:
+            data, flag = self.lazy_file.read(self.label)
+            dict.__setitem__(self, "Data", data)
+            dict.__setitem__(self, "Flag", flag)
+            self.lazy_file = None
+
+    def __missing__(self, key):
+        if key in ["Data", "Flag"] and self.lazy_file is not None:
+            self.load()
+            return dict.__getitem__(self, key)
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        # read the other entry before one of "Data" or "Flag" is replaced
+        if key in ["Data", "Flag"]:
+            self.load()
+        dict.__setitem__(self, key, value)
+
+    def __contains__(self, key):
+        if key in ["Data", "Flag"] and self.lazy_file is not None:
+            return True
+        return dict.__contains__(self, key)
+
+    def has_key(self, key):
+        return self.__contains__(key)
+
+    def get(self, key, default=None):
+        if self.__contains__(key):
+            return self[key]
+        return default
+
+    def keys(self):
+        self.load()
+        return dict.keys(self)
+
+    def values(self):
+        self.load()
+        return dict.values(self)
+
+    def items(self):
+        self.load()
+        return dict.items(self)
+
+    def iterkeys(self):
+        self.load()
+        return dict.iterkeys(self)
+
+    def itervalues(self):
+        self.load()
+        return dict.itervalues(self)
+
+    def iteritems(self):
+        self.load()
+        return dict.iteritems(self)
+
+    def __iter__(self):
+        self.load()
+        return dict.__iter__(self)
+
+    def __len__(self):
+        self.load()
+        return dict.__len__(self)
+
+    def pop(self, key, *default):
+        self.load()
+        return dict.pop(self, key, *default)
+
+    def copy(self):
+        self.load()
+        return dict(self)
+
+    def __deepcopy__(self, memo):
+        self.load()
+        return copy.deepcopy(dict(self), memo)
+
+    def __reduce__(self):
+        # pickle as an ordinary dictionary, the netCDF file can not be pickled
+        self.load()
+        return (dict, (dict(self),))
+
+class SharedArrays(object):
+    """
+    The "Data" and "Flag" arrays of a series shared by the SharedSeries
+    entries of two or more data structures, see share_datastructure().
+    """
+    def __init__(self, arrays):
+        self.arrays = arrays
+        self.users = []
+
+    def attach(self, series):
+        self.users.append(weakref.ref(series))
+
+    def detach(self, series):
+        """ Remove series from the users and return the number left."""
+        self.users = [u for u in self.users if u() is not None and u() is not series]
+        return len(self.users)
+
+class SharedSeries(dict):
+    """
+    A ds.series entry that shares the "Data" and "Flag" arrays with the same
+    series in other data structures (copy-on-write), see share_datastructure().
+    The "Attr" entry belongs to this series.  The shared arrays are copied the
+    first time "Data" or "Flag" is used through the dictionary interface, the
+    last user of the arrays takes them over without a copy.  view() returns
+    the shared arrays without copying them and must only be used for reading.
+    """
+    def __init__(self, shared, attr):
+        dict.__init__(self, Attr=attr)
+        self.shared = shared
+        shared.attach(self)
+
+    def own(self):
+        """ Replace the shared arrays with arrays belonging to this series."""
+        shared = self.shared
+        if shared is not None:
+            self.shared = None
+            users = shared.detach(self)
+            for key, value in shared.arrays.items():
+                if users > 0:
+                    value = copy.copy(value)
+                dict.__setitem__(self, key, value)
+
+    def view(self, key):
+        """ Return "Data" or "Flag" without copying the shared array."""
+        if self.shared is not None and key in self.shared.arrays:
+            return self.shared.arrays[key]
+        return dict.__getitem__(self, key)
+
+    def __missing__(self, key):
+        if self.shared is not None and key in self.shared.arrays:
+            self.own()
+            return dict.__getitem__(self, key)
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        if self.shared is not None and key in self.shared.arrays:
+            self.own()
+        dict.__setitem__(self, key, value)
+
+    def __contains__(self, key):
+        if self.shared is not None and key in self.shared.arrays:
+            return True
+        return dict.__contains__(self, key)
+
+    def has_key(self, key):
+        return self.__contains__(key)
+
+    def get(self, key, default=None):
+        if self.__contains__(key):
+            return self[key]
+        return default
+
+    def keys(self):
+        keys = dict.keys(self)
+        if self.shared is not None:
+            keys = keys + [key for key in self.shared.arrays if key not in keys]
+        return keys
+
+    def values(self):
+        self.own()
+        return dict.values(self)
+
+    def items(self):
+        self.own()
+        return dict.items(self)
+
+    def iterkeys(self):
+        return iter(self.keys())
+
+    def itervalues(self):
+        self.own()
+        return dict.itervalues(self)
+
+    def iteritems(self):
+        self.own()
+        return dict.iteritems(self)
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self.keys())
+
+    def pop(self, key, *default):
+        self.own()
+        return dict.pop(self, key, *default)
+
+    def copy(self):
+        self.own()
+        return dict(self)
+
+    def as_dict(self):
+        """ Return the series as an ordinary dictionary without copying the shared arrays."""
+        return dict([(key, self.view(key)) for key in self.keys()])
+
+    def __deepcopy__(self, memo):
+        return copy.deepcopy(self.as_dict(), memo)
+
+    def __reduce__(self):
+        # pickle as an ordinary dictionary, pickling copies the arrays anyway
+        return (dict, (self.as_dict(),))
+
+def share_datastructure(ds_in):
+    """
+    Purpose:
+     Return a copy of a data structure that shares the "Data" and "Flag" arrays
+     of each series with ds_in.  The shared arrays are copied the first time
+     either data structure uses them, series that are not changed are never
+     copied.  Everything else in ds_in (global attributes, variable attributes
+     etc) is copied as before.
+     The series in ds_in are replaced by SharedSeries entries so that changes
+     made to ds_in after the copy do not change the copy.
+    Usage:
+     ds3 = pfp_io.share_datastructure(ds2)
+    Side effects:
+     Replaces the series in ds_in with SharedSeries entries.
+    Author: PRI
+    Date: October 2026
+    """
+    ds_out = DataStructure()
+    for item in ds_in.__dict__:
+        if item not in ["series", "time_index", "gap_index"]:
+            setattr(ds_out, item, copy.deepcopy(getattr(ds_in, item)))
+    for label in ds_in.series.keys():
+        series = ds_in.series[label]
+        if isinstance(series, SharedSeries) and series.shared is not None:
+            # still sharing with the level before, add ds_out as another user
+            shared = series.shared
+        else:
+            if isinstance(series, LazySeries):
+                series.load()
+            arrays = {}
+            for key in ["Data", "Flag"]:
+                if dict.__contains__(series, key):
+                    arrays[key] = dict.__getitem__(series, key)
+            shared = SharedArrays(arrays)
+            series_in = SharedSeries(shared, series["Attr"])
+            for key in dict.keys(series):
+                if key not in ["Data", "Flag", "Attr"]:
+                    dict.__setitem__(series_in, key, dict.__getitem__(series, key))
+            ds_in.series[label] = series_in
+            series = series_in
+        ds_out.series[label] = SharedSeries(shared, copy.deepcopy(series["Attr"]))
+        for key in dict.keys(series):
+            if key != "Attr":
+                dict.__setitem__(ds_out.series[label], key,
+                                 copy.deepcopy(dict.__getitem__(series, key)))
+    return ds_out
+
+class DatasetCache(object):
+    """
+    Process-wide cache of the data structures read from netCDF files by
+    nc_read_series_cached(), used for the alternate and imported data so that
+    the same file is only read once when it is used by several levels or sites.
+     - entries are keyed by the file path and time step fix method, an entry
+       is discarded when the modification time of the file changes
+     - only the variables asked for are read, variables asked for later are
+       read and added to the entry
+     - when the size of the cached arrays goes above max_size (MB), the least
+       recently used entries are discarded
+    The data structures returned share the arrays in the cache (see
+    share_datastructure) so they can be changed without changing the cache.
+    """
+    def __init__(self, max_size=2000):
+        self.max_size = max_size
+        self.entries = OrderedDict()
+
+    def clear(self):
+        self.entries.clear()
+
+    def get(self, file_name, variable_list=None, fixtimestepmethod="round"):
+        """ Return the cache entry for file_name, reading any variables not yet cached."""
+        key = (os.path.abspath(file_name), fixtimestepmethod)
+        mtime = os.path.getmtime(file_name)
+        entry = self.entries.pop(key, None)
+        if entry is not None and entry["mtime"] != mtime:
+            entry = None
+        if entry is None:
+            ds = nc_read_series(file_name, fixtimestepmethod=fixtimestepmethod,
+                                variable_list=variable_list)
+            entry = {"mtime": mtime, "ds": ds, "complete": variable_list is None,
+                     "requested": set(variable_list or []), "DateIndex": None}
+        else:
+            missing = []
+            if variable_list is None and not entry["complete"]:
+                missing = None
+            elif variable_list is not None and not entry["complete"]:
+                # variables already asked for but not in the file are not read again
+                missing = [l for l in variable_list if l not in entry["requested"]]
+            if missing is None or len(missing) > 0:
+                ds = nc_read_series(file_name, fixtimestepmethod=fixtimestepmethod,
+                                    variable_list=missing)
+                for label in ds.series.keys():
+                    if label not in entry["ds"].series:
+                        entry["ds"].series[label] = ds.series[label]
+                entry["complete"] = entry["complete"] or missing is None
+                entry["requested"].update(missing or [])
+            else:
+                logger.info(" Using cached netCDF file "+ntpath.split(file_name)[1])
+        entry["size"] = self.get_size(entry["ds"])
+        # most recently used entries are at the end
+        self.entries[key] = entry
+        size = sum([e["size"] for e in self.entries.values()])
+        while size > self.max_size and len(self.entries) > 1:
+            _, oldest = self.entries.popitem(last=False)
+            size = size - oldest["size"]
+        return entry
+
+    def get_size(self, ds):
+        """ Return the approximate size of the arrays in a data structure in MB."""
+        size = 0
+        for label in ds.series.keys():
+            for key in ["Data", "Flag"]:
+                if key not in ds.series[label]:
+                    continue
+                array = numpy.asarray(pfp_utils.get_series_view(ds, label, key))
+                size += array.nbytes
+                if array.dtype == object and len(array) > 0:
+                    # datetimes etc are stored outside the array
+                    size += len(array)*sys.getsizeof(array[0])
+        return size/1.0E6
+
+dataset_cache = DatasetCache()
 
 def copy_datastructure(cf,ds_in):
     '''
@@ -42,6 +418,7 @@ def copy_datastructure(cf,ds_in):
      1) if the netCDF file at the "copy_to" level does not exist
         then copy the existing data structure at the "input" level
         to create a new data structure at the "output" level.
+    The copy shares unchanged series with ds_in, see share_datastructure().
     '''
     # assumptions that need to be checked are:
     #  - the start datetime of the two sets of data are the same
@@ -59,14 +436,14 @@ def copy_datastructure(cf,ds_in):
     # if the L4 file does not exist then create the L4 data structure as a copy
     # of the L3 data structure
     if not os.path.exists(ct_filename):
-        ds_out = copy.deepcopy(ds_in)
+        ds_out = share_datastructure(ds_in)
     # if the L4 file does exist ...
     if os.path.exists(ct_filename):
         # check to see if the user wants to use it
         if pfp_utils.get_keyvaluefromcf(cf,["Options"],"UseExistingOutFile",default="No")!='Yes':
             # if the user doesn't want to use the existing L4 data then create
             # the L4 data structure as a copy of the L3 data structure
-            ds_out = copy.deepcopy(ds_in)
+            ds_out = share_datastructure(ds_in)
         else:
             # the user wants to use the data from an existing L4 file
             # get the netCDF file name at the "input" level
@@ -77,7 +454,7 @@ def copy_datastructure(cf,ds_in):
             sd_file = str(dt_file[0])
             ed_file = str(dt_file[-1])
             # create a copy of the data
-            ds_out = copy.deepcopy(ds_in)
+            ds_out = share_datastructure(ds_in)
             dt_out = ds_out.series['DateTime']['Data']
             ts = ds_out.globalattributes['time_step']
             # get the start and end indices based on the start and end dates
@@ -196,6 +573,27 @@ def csv_read_parse_cf(cf):
     info["var_list"] = csv_varnames.keys()
     info["csv_list"] = [csv_varnames[x] for x in info["var_list"]]
     info["col_list"] = [info["header_list"].index(item) for item in info["csv_list"]]
+    # the type of each column, the time stamp used by DateTimeFromTimeStamp is
+    # read as datetime64, the date and time strings used by
+    # DateTimeFromDateAndTimeString are read as text and all other columns,
+    # including those used by DateTimeFromDoY and DateTimeFromExcelDateAndTime,
+    # are read as float64
+    info["dtypes"] = {}
+    for item in info["var_list"]:
+        info["dtypes"][item] = "float64"
+    info["timestamp_format"] = ""
+    function_string = cf["Variables"]["DateTime"]["Function"]["func"].replace('"','')
+    function_name = function_string.split("(")[0]
+    function_args = function_string.split("(")[1].replace(")","").replace(" ","").split(",")
+    if function_name == "DateTimeFromTimeStamp":
+        if function_args[0] in info["var_list"]:
+            info["dtypes"][function_args[0]] = "datetime64"
+        if len(function_args) > 1:
+            info["timestamp_format"] = function_args[1]
+    elif function_name == "DateTimeFromDateAndTimeString":
+        for item in function_args[0:2]:
+            if item in info["var_list"]:
+                info["dtypes"][item] = "str"
 
     # define the missing values and the value with which to fill them
     info["missing_values"] = "NA,N/A,NAN,NaN,nan,#NAME?,#VALUE!,#DIV/0!,#REF!,Infinity,-Infinity"
@@ -206,6 +604,111 @@ def csv_read_parse_cf(cf):
 
     return info
 
+def csv_read_chunked(info, chunk_size=17520):
+    """
+    Purpose:
+     Read the variables in info["var_list"] from a CSV file a chunk of lines
+     at a time.  The number of lines in the file is counted first so that the
+     data and QC flag arrays are only allocated once, each chunk is then
+     parsed and copied into these arrays so the memory used while reading
+     does not depend on the size of the file.
+     Variables are read with the types in info["dtypes"];
+      float64 - missing and non-numeric values are set to the missing value
+                and the QC flag is set to 1, as are values in the file that
+                are equal to the missing value
+      datetime64 - the time stamp is parsed as it is read, empty and missing
+                   time stamps are NaT and the QC flag is set to 1
+      str - missing values are empty strings
+    Usage:
+     variables = pfp_io.csv_read_chunked(info, chunk_size=17520)
+     where info is the dictionary returned by csv_read_parse_cf
+           chunk_size is the number of lines read at a time
+           variables is a dictionary of variables keyed by label, each
+           variable is a dictionary with "Data" and "Flag" entries
+    Author: PRI
+    Date: October 2026
+    """
+    # count the lines in the file
+    nlines = 0
+    last = "\n"
+    with open(info["csv_filename"], "rb") as csv_file:
+        for block in iter(lambda: csv_file.read(1048576), ""):
+            nlines += block.count("\n")
+            last = block[-1]
+    if last != "\n":
+        nlines += 1
+    nrecs = max([nlines - info["skip_header"], 0])
+    # get the columns and allocate the data and QC flag arrays
+    variables = OrderedDict()
+    columns = {}
+    dtypes = {}
+    fill_values = {}
+    for label in info["var_list"]:
+        col = info["header_list"].index(info["csv_varnames"][label])
+        columns[label] = col
+        if info["dtypes"][label] == "float64":
+            fill_values[label] = numpy.array(float(c.missing_value), dtype=numpy.float64)
+        elif info["dtypes"][label] == "datetime64":
+            fill_values[label] = numpy.array("NaT", dtype="datetime64[ns]")
+            dtypes[col] = str
+        else:
+            fill_values[label] = numpy.array("", dtype=object)
+            dtypes[col] = str
+        variables[label] = {"Data": numpy.full(nrecs, fill_values[label], dtype=fill_values[label].dtype),
+                            "Flag": numpy.ones(nrecs, dtype=numpy.int32)}
+    # the order of the day, month and year in the time stamp, see
+    # pfp_func.DateTimeFromTimeStamp
+    fmt = info["timestamp_format"]
+    dayfirst, yearfirst = False, False
+    if len(fmt) != 0:
+        if fmt.index("Y") < fmt.index("D"): yearfirst = True
+        if fmt.index("D") < fmt.index("M"): dayfirst = True
+    # read the file a chunk at a time, the "high" float precision gives the
+    # same values as float(), the default can differ in the last bit
+    reader = pandas.read_csv(info["csv_filename"], sep=info["dialect"].delimiter,
+                             quotechar=info["dialect"].quotechar, header=None,
+                             skiprows=info["skip_header"], usecols=sorted(set(columns.values())),
+                             dtype=dtypes, na_values=info["missing_values"].split(",")+[""],
+                             keep_default_na=False, float_precision="high",
+                             chunksize=chunk_size)
+    si = 0
+    for chunk in reader:
+        ei = si + len(chunk)
+        if ei > nrecs:
+            # more records than lines counted, eg lines ending with a carriage return only
+            for label in info["var_list"]:
+                fill = numpy.full(ei - nrecs, fill_values[label], dtype=fill_values[label].dtype)
+                variables[label]["Data"] = numpy.concatenate((variables[label]["Data"], fill))
+                variables[label]["Flag"] = numpy.concatenate((variables[label]["Flag"],
+                                                              numpy.ones(ei - nrecs, dtype=numpy.int32)))
+            nrecs = ei
+        for label in info["var_list"]:
+            values = chunk[columns[label]]
+            data = variables[label]["Data"][si:ei]
+            flag = variables[label]["Flag"][si:ei]
+            if info["dtypes"][label] == "float64":
+                values = pandas.to_numeric(values, errors="coerce").values.astype(numpy.float64)
+                idx = numpy.where(numpy.isfinite(values) & (values != c.missing_value))[0]
+                data[idx] = values[idx]
+                flag[idx] = numpy.int32(0)
+            elif info["dtypes"][label] == "datetime64":
+                values = pandas.to_datetime(values, dayfirst=dayfirst, yearfirst=yearfirst,
+                                            infer_datetime_format=True).values
+                data[:] = values
+                flag[:] = numpy.isnat(values).astype(numpy.int32)
+            else:
+                data[:] = values.fillna("").values
+                flag[:] = numpy.int32(0)
+        si = ei
+    # drop the records allocated for blank lines
+    for label in info["var_list"]:
+        for item in ["Data", "Flag"]:
+            if si < nrecs:
+                variables[label][item] = variables[label][item][:si].copy()
+        if info["dtypes"][label] == "str":
+            variables[label]["Data"] = variables[label]["Data"].astype(str)
+    return variables
+
 def csv_read_series(cf):
     """
     Purpose:
@@ -217,6 +720,8 @@ def csv_read_series(cf):
     Author: PRI
     Date: September 2015
     Mods: February 2018 (PRI) - rewrite
+          October 2026 (PRI) - read in chunks by csv_read_chunked, replaces
+                               numpy.genfromtxt
     """
     # get a data structure
     ds = DataStructure()
@@ -228,45 +733,23 @@ def csv_read_series(cf):
     # return with an empty data structure if parsing failed
     if not info["cf_ok"]:
         return ds
-    # read the csv file using numpy's genfromtxt
-    file_name = os.path.split(info["csv_filename"])
-    logger.info(" Reading "+file_name[1])
-    # read the CSV file
-    data_array = numpy.genfromtxt(info["csv_filename"], delimiter=info["dialect"].delimiter,
-                                  skip_header=info["skip_header"], names=info["header_line"],
-                                  usecols=info["col_list"], missing_values=info["missing_values"],
-                                  filling_values=info["filling_values"], deletechars=info["deletechars"],
-                                  usemask=True, dtype=None)
-    # get the variables and put them into the data structure
     # we'll deal with DateTime separately
     for item in ["DateTime"]:
         if item in info["var_list"]:
             info["var_list"].remove(item)
+    # read the CSV file
+    file_name = os.path.split(info["csv_filename"])
+    logger.info(" Reading "+file_name[1])
+    variables = csv_read_chunked(info)
     # put the data into the data structure
     for label in info["var_list"]:
-        csv_label = info["csv_varnames"][label]
-        variable = {"Label":label}
-        # make the flag
-        flag = numpy.zeros(len(data_array[csv_label]), dtype=numpy.int32)
-        # get the data
-        try:
-            data = numpy.array(data_array[info["csv_varnames"][label]], dtype=numpy.float64)
-            idx = numpy.where(numpy.isfinite(data) == False)[0]
-            data[idx] = numpy.float64(c.missing_value)
-            flag[idx] = numpy.int32(1)
-        except ValueError:
-            data = data_array[info["csv_varnames"][label]]
-        # set flag of missing data to 1
-        missing = numpy.full_like(data, c.missing_value)
-        idx = numpy.where(data == missing)[0]
-        flag[idx] = numpy.int32(1)
-        variable["Data"] = data
-        variable["Flag"] = flag
+        variable = variables.pop(label)
+        variable["Label"] = label
         # make the attribute dictionary ...
         variable["Attr"] = {}
         for attr in cf["Variables"][label]["Attr"].keys():
             variable["Attr"][attr] = cf["Variables"][label]["Attr"][attr]
-        pfp_utils.CreateVariable(ds, variable)
+        pfp_utils.CreateVariable(ds, variable, view=True)
     ## call the function given in the control file to convert the date/time string to a datetime object
     ## NOTE: the function being called needs to deal with missing date values and empty lines
     #function_string = cf["Variables"]["DateTime"]["Function"]["func"]
@@ -577,7 +1060,8 @@ def smap_write_csv(cf):
     dt = ds.series["DateTime"]["Data"]
     # get a list of years in the data file
     year_list = range(dt[0].year,dt[-1].year+1)
-    years = numpy.array([item.year for item in dt])
+    years = pfp_utils.get_time_index(ds)["Year"]
+    di = pfp_utils.get_date_index(ds)
     # loop over years in the data file
     data_dict = OrderedDict()
     for year in year_list:
@@ -592,8 +1076,8 @@ def smap_write_csv(cf):
         year_index = numpy.append(year_index,year_index[-1]+1)
         sdate = dt[max([0,year_index[0]])]
         edate = dt[min([year_index[-1],nRecs-1])]
-        si = pfp_utils.GetDateIndex(dt,str(sdate),ts=ts,default=0,match="startnextday")
-        ei = pfp_utils.GetDateIndex(dt,str(edate),ts=ts,default=nRecs-1,match="endpreviousday")
+        si = di.find(sdate, default=0, match="startnextday")
+        ei = di.find(edate, default=nRecs-1, match="endpreviousday")
         data_dict["DateTime"] = dt[si:ei+1]
         logger.info(" Writing "+str(data_dict["DateTime"][0])+" to "+ str(data_dict["DateTime"][-1]))
         ndays = len(data_dict["DateTime"])/nperday
@@ -1212,7 +1696,7 @@ def get_seriesstats(cf,ds):
     dsVarNames = ds.series.keys()
     dsVarNames.sort(key=unicode.lower)
     for ThisOne in dsVarNames:
-        data,flag,attr = pfp_utils.GetSeries(ds, ThisOne)
+        data,flag,attr = pfp_utils.GetSeries(ds, ThisOne, view=True)
         hist, bin_edges = numpy.histogram(flag, bins=bins)
         xlFlagSheet.write(xlRow,xlCol,ThisOne)
         xlCol = xlCol + 1
@@ -1239,6 +1723,141 @@ def load_controlfile(path='.', title='Choose a control file'):
     cf = get_controlfilecontents(name)
     return cf
 
+# control file entries that do not change the output of a processing level
+manifest_ignore_keys = ["controlfile_name", "call_mode", "show_plots", "ForceReprocess"]
+# directories, relative to the PyFluxPro directory, of the compiled programs
+# that can be run by a processing level
+manifest_level_programs = {"L5": [os.path.join("solo", "bin")]}
+# hash of the PFP source code and programs for each level, calculated once per
+# session by manifest_code_version
+manifest_code_hash = {}
+
+def manifest_code_version(level=None):
+    """
+    Purpose:
+     Returns a string identifying the version of the PFP code, this is the
+     version number from cfg.py and a hash of the contents of the PFP modules,
+     pfp_batch.py and the compiled programs that can be run at the processing
+     level (eg sofm, solo and seqsolo at L5).
+    Usage:
+     code_version = pfp_io.manifest_code_version(level="L5")
+    Author: PRI
+    Date: October 2026
+    """
+    level = str(level).upper()
+    if level not in manifest_code_hash:
+        sha = hashlib.sha1()
+        scripts_path = os.path.dirname(os.path.abspath(__file__))
+        file_paths = sorted(glob.glob(os.path.join(scripts_path, "*.py")))
+        file_paths.append(os.path.join(os.path.dirname(scripts_path), "pfp_batch.py"))
+        for bin_path in manifest_level_programs.get(level, []):
+            file_paths += sorted(glob.glob(os.path.join(bin_path, "*")))
+        for file_path in file_paths:
+            if os.path.isfile(file_path):
+                sha.update(os.path.basename(file_path))
+                sha.update(manifest_file_hash(file_path))
+        manifest_code_hash[level] = sha.hexdigest()
+    return str(cfg.version_name) + " " + str(cfg.version_number) + " " + manifest_code_hash[level]
+
+def manifest_file_hash(file_path):
+    """ Returns the SHA1 hash of the contents of a file."""
+    sha = hashlib.sha1()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024*1024), b""):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+def manifest_filename(out_filename):
+    """ Returns the name of the manifest file for an output file."""
+    return os.path.splitext(out_filename)[0] + "_manifest.json"
+
+def manifest_fingerprint(cf, out_filename):
+    """
+    Purpose:
+     Returns a fingerprint of the inputs to a processing level.  The fingerprint
+     is made from the contents of the control file (excluding entries that do
+     not change the output eg call_mode), the contents of every file named in
+     the control file (input netCDF or Excel file, alternate data, CPD results
+     etc) and the version of the PFP code and programs used at the level.
+    Usage:
+     fingerprint = pfp_io.manifest_fingerprint(cf, out_filename)
+     where cf is a control file object
+           out_filename is the output file name
+           fingerprint is a dictionary
+    Author: PRI
+    Date: October 2026
+    """
+    file_path = str(pfp_utils.get_keyvaluefromcf(cf, ["Files"], "file_path", default=""))
+    out_filename = os.path.normpath(out_filename)
+    cf_lines = []
+    inputs = {}
+    sections = [("", cf)]
+    while len(sections) > 0:
+        name, section = sections.pop(0)
+        for key in section.scalars:
+            if key in manifest_ignore_keys:
+                continue
+            value = str(section[key])
+            cf_lines.append(name + "/" + key + "=" + value)
+            # entries that name an existing file are treated as inputs
+            for candidate in [value, os.path.join(file_path, value)]:
+                candidate = os.path.normpath(candidate)
+                if (candidate != out_filename and candidate not in inputs and
+                    os.path.isfile(candidate)):
+                    inputs[candidate] = manifest_file_hash(candidate)
+        for key in section.sections:
+            sections.append((name + "/" + key, section[key]))
+    fingerprint = {"controlfile": hashlib.sha1("\n".join(cf_lines)).hexdigest(),
+                   "inputs": inputs,
+                   "code_version": manifest_code_version(level=cf.get("level"))}
+    return fingerprint
+
+def manifest_is_current(cf, out_filename, force=False):
+    """
+    Purpose:
+     Returns True if the output file exists and the fingerprint in its
+     manifest matches the current inputs, in which case the processing level
+     can be skipped.  Always returns False if force is True or ForceReprocess
+     is set in the [Options] section of the control file.  A manifest that is
+     not current is removed so that a failed run can not leave it next to a
+     partly written output file.
+    Usage:
+     if pfp_io.manifest_is_current(cf, out_filename, force=False): ...
+    Author: PRI
+    Date: October 2026
+    """
+    manifest_path = manifest_filename(out_filename)
+    opt = pfp_utils.get_keyvaluefromcf(cf, ["Options"], "ForceReprocess", default="No")
+    current = False
+    if (not force and str(opt).lower() != "yes" and
+        os.path.isfile(out_filename) and os.path.isfile(manifest_path)):
+        try:
+            with open(manifest_path) as f:
+                manifest = json.load(f)
+            current = (manifest.get("fingerprint") == manifest_fingerprint(cf, out_filename))
+        except ValueError:
+            current = False
+    if not current and os.path.isfile(manifest_path):
+        os.remove(manifest_path)
+    return current
+
+def manifest_write(cf, out_filename):
+    """
+    Purpose:
+     Write the manifest for an output file, called after the output file has
+     been written.
+    Usage:
+     pfp_io.manifest_write(cf, out_filename)
+    Author: PRI
+    Date: October 2026
+    """
+    manifest = {"output": out_filename,
+                "created": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                "fingerprint": manifest_fingerprint(cf, out_filename)}
+    with open(manifest_filename(out_filename), "w") as f:
+        json.dump(manifest, f, indent=4, sort_keys=True)
+    return
+
 def nc_concatenate(cf):
     # get an instance of the data structure
     ds = DataStructure()
@@ -1457,8 +2076,7 @@ def nc_concatenate(cf):
     if maxlen!=0:
         # now loop over the series and do the interpolation
         logger.info(" Interpolating over fixed time gaps ("+str(maxlen)+" hour max)")
-        for item in series_list:
-            pfp_ts.InterpolateOverMissing(ds,series=item,maxlen=maxlen)
+        pfp_ts.InterpolateOverMissingBatch(ds,series_list,maxlen=maxlen)
     # make sure we have all of the humidities
     pfp_ts.CalculateHumidities(ds)
     # and make sure we have all of the meteorological variables
@@ -1500,7 +2118,7 @@ def nc_concatenate(cf):
         # now the base file will not be overwritten
     ncFile = nc_open_write(outFileName)
     ndims = int(pfp_utils.get_keyvaluefromcf(cf,["Options"],"NumberOfDimensions", default=3))
-    nc_write_series(ncFile,ds,ndims=ndims)
+    nc_write_series(ncFile,ds,ndims=ndims,write_options=nc_write_options(cf))
 
 def ncsplit_run(split_gui):
     infilename = split_gui.info["input_file_path"]
@@ -1553,7 +2171,7 @@ def ncsplit_run(split_gui):
     msg = " Finished splitting " + os.path.basename(infilename)
     logger.info(msg)
 
-def nc_read_series(ncFullName,checktimestep=True,fixtimestepmethod="round"):
+def nc_read_series(ncFullName,checktimestep=True,fixtimestepmethod="round",lazy=False,variable_list=None):
     """
     Purpose:
      Reads a netCDF file and returns the meta-data and data in a DataStructure.
@@ -1576,6 +2194,13 @@ def nc_read_series(ncFullName,checktimestep=True,fixtimestepmethod="round"):
      ds = pfp_io.nc_read_series(nc_name)
      where nc_name is the full name of the netCDF file to be read
            ds is the returned data structure
+     ds = pfp_io.nc_read_series(nc_name, lazy=True, variable_list=["Fc", "ustar"])
+     where lazy is True to leave the netCDF file open and only read the data
+                and QC flag for a variable the first time they are used (see
+                LazySeries), the file is closed when all variables have been
+                read, call nc_close_lazy(ds) to close it before then
+           variable_list is an optional list of the variables to be read, the
+                time variable is always read
     Side effects:
      This routine checks the time step of the data read from the netCDF file
      against the value of the global attribute "time_step", see pfp_utils.CheckTimeStep.
@@ -1609,10 +2234,21 @@ def nc_read_series(ncFullName,checktimestep=True,fixtimestepmethod="round"):
             ds.globalattributes[gattr] = getattr(ncFile,gattr)
     # get a list of the variables in the netCDF file (not their QC flags)
     varlist = [x for x in ncFile.variables.keys() if "_QCFlag" not in x]
+    if variable_list is not None:
+        varlist = [x for x in varlist if x in variable_list or x == "time"]
+    # skip variables that do not have time as a dimension
+    varlist = [x for x in varlist if "time" in [y.lower() for y in ncFile.variables[x].dimensions]]
+    if lazy:
+        # the file is shared by the lazy series and closed when they have all been read
+        lazy_file = LazyFile(ncFile, len(varlist))
     for ThisOne in varlist:
-        # skip variables that do not have time as a dimension
-        dimlist = [x.lower() for x in ncFile.variables[ThisOne].dimensions]
-        if "time" not in dimlist: continue
+        if lazy:
+            # only read the attributes now, the data and QC flag are read when used
+            attr = {}
+            for vattr in ncFile.variables[ThisOne].ncattrs():
+                attr[vattr] = getattr(ncFile.variables[ThisOne],vattr)
+            ds.series[unicode(ThisOne)] = LazySeries(lazy_file, ThisOne, attr)
+            continue
         # create the series in the data structure
         ds.series[unicode(ThisOne)] = {}
         # get the data and the QC flag
@@ -1620,7 +2256,10 @@ def nc_read_series(ncFullName,checktimestep=True,fixtimestepmethod="round"):
         ds.series[ThisOne]["Data"] = data
         ds.series[ThisOne]["Flag"] = flag
         ds.series[ThisOne]["Attr"] = attr
-    ncFile.close()
+    # when lazy, the netCDF file is closed by LazyFile once all of the lazy
+    # series have been read or when nc_close_lazy() is called
+    if not lazy:
+        ncFile.close()
     # get a series of Python datetime objects
     pfp_utils.get_datetime_from_nctime(ds)
     # round the Python datetime to the nearest second
@@ -1639,6 +2278,82 @@ def nc_read_series(ncFullName,checktimestep=True,fixtimestepmethod="round"):
     logger.info(msg)
     return ds
 
+def nc_close_lazy(ds):
+    """
+    Purpose:
+     Close the netCDF file left open by nc_read_series(..., lazy=True).  The
+     lazy series that have not been read are removed from the data structure.
+    Usage:
+     ds = pfp_io.nc_read_series(nc_name, lazy=True, variable_list=["Fc", "ustar"])
+     ... use the series ...
+     pfp_io.nc_close_lazy(ds)
+    Author: PRI
+    Date: October 2026
+    """
+    for label in ds.series.keys():
+        series = ds.series[label]
+        if isinstance(series, LazySeries) and series.lazy_file is not None:
+            series.lazy_file.close()
+            del ds.series[label]
+    return
+
+def nc_read_series_cached(ncFullName, variable_list=None, start=None, end=None,
+                          fixtimestepmethod="round"):
+    """
+    Purpose:
+     Returns a data structure read from a netCDF file using the process-wide
+     cache in pfp_io.dataset_cache.  The file is only read the first time it is
+     used or when it has changed, the variables are read the first time they
+     are asked for.
+    Usage:
+     ds = pfp_io.nc_read_series_cached(nc_name, variable_list=["Fsd", "Ta"],
+                                       start=ldt[0], end=ldt[-1])
+     where nc_name is the full name of the netCDF file to be read
+           variable_list is an optional list of the variables to be returned,
+                the time variable is always returned
+           start, end are optional datetimes, if given only the records from
+                start to end are returned
+           ds is the returned data structure
+    Side effects:
+     The returned data structure shares unchanged series with the cache,
+     when start or end are given the series in the returned data structure
+     are copies.
+    Author: PRI
+    Date: October 2026
+    """
+    if ncFullName[0:4] == "http" or not os.path.isfile(ncFullName):
+        # OPeNDAP URLs and missing files are passed straight on
+        return nc_read_series(ncFullName, fixtimestepmethod=fixtimestepmethod,
+                              variable_list=variable_list)
+    entry = dataset_cache.get(ncFullName, variable_list=variable_list,
+                              fixtimestepmethod=fixtimestepmethod)
+    ds = share_datastructure(entry["ds"])
+    if variable_list is not None:
+        for label in ds.series.keys():
+            if label not in variable_list and label not in ["DateTime", "time"]:
+                del ds.series[label]
+    if start is None and end is None:
+        return ds
+    # only return the records between start and end
+    if entry["DateIndex"] is None:
+        ldt = pfp_utils.get_series_view(entry["ds"], "DateTime")
+        entry["DateIndex"] = pfp_utils.DateIndex(ldt)
+    dt64 = entry["DateIndex"].dt64
+    si, ei = 0, len(dt64)
+    if start is not None:
+        si = numpy.searchsorted(dt64, numpy.datetime64(start, "us"), side="left")
+    if end is not None:
+        ei = numpy.searchsorted(dt64, numpy.datetime64(end, "us"), side="right")
+    ei = max(si, ei)
+    for label in ds.series.keys():
+        series = {"Attr": ds.series[label]["Attr"]}
+        for key in ["Data", "Flag"]:
+            if key in ds.series[label]:
+                series[key] = pfp_utils.get_series_view(ds, label, key)[si:ei].copy()
+        ds.series[label] = series
+    ds.globalattributes["nc_nrecs"] = ei - si
+    return ds
+
 def nc_read_var(ncFile,ThisOne):
     """ Reads a variable from a netCDF file and returns the data, the QC flag and the variable
         attribute dictionary.
@@ -1768,7 +2483,7 @@ def nc_write_data(nc_obj, data_dict):
     # write the variables to the netCDF file object
     for label in labels:
         nc_var = nc_obj.createVariable(label, "d", dims)
-        nc_var[:, 0, 0] = data_dict["variables"][label]["data"].tolist()
+        nc_var[:] = numpy.reshape(data_dict["variables"][label]["data"], (nrecs, 1, 1))
         for attr_key in data_dict["variables"][label]["attr"]:
             attr_value = data_dict["variables"][label]["attr"][attr_key]
             nc_var.setncattr(attr_key, attr_value)
@@ -1816,7 +2531,33 @@ def nc_write_globalattributes(nc_file, ds, flag_defs=True):
             setattr(nc_file,item,attr)
     return
 
-def nc_write_series(ncFile, ds, outputlist=None, ndims=3):
+def nc_write_options(cf):
+    """
+    Purpose:
+     Get the netCDF compression and chunking options from the [Options]
+     section of a control file.  The options are;
+      NetCDFCompression - Yes/No, use zlib compression (default No)
+      NetCDFCompressionLevel - 1 to 9 (default 4)
+      NetCDFShuffle - Yes/No, use the HDF5 shuffle filter (default Yes)
+      NetCDFChunkSize - chunk size along the time dimension in records, 0 uses
+                        the netCDF library default (default 0)
+    Usage:
+     write_options = pfp_io.nc_write_options(cf)
+     pfp_io.nc_write_series(nc_file, ds, write_options=write_options)
+    Author: PRI
+    Date: October 2026
+    """
+    opt = pfp_utils.get_keyvaluefromcf(cf, ["Options"], "NetCDFCompression", default="No")
+    zlib = (str(opt).lower() == "yes")
+    complevel = int(pfp_utils.get_keyvaluefromcf(cf, ["Options"], "NetCDFCompressionLevel", default=4))
+    opt = pfp_utils.get_keyvaluefromcf(cf, ["Options"], "NetCDFShuffle", default="Yes")
+    shuffle = (str(opt).lower() == "yes")
+    chunksize = int(pfp_utils.get_keyvaluefromcf(cf, ["Options"], "NetCDFChunkSize", default=0))
+    write_options = {"zlib": zlib, "complevel": complevel, "shuffle": shuffle,
+                     "chunksize": chunksize}
+    return write_options
+
+def nc_write_series(ncFile, ds, outputlist=None, ndims=3, write_options=None):
     """
     Purpose:
      Write the contents of a data structure to a netCDF file.
@@ -1825,9 +2566,13 @@ def nc_write_series(ncFile, ds, outputlist=None, ndims=3):
      pfp_io.nc_write_series(nc_file,ds)
      where nc_file is a netCDF file object returned by pfp_io.nc_open_write
            ds is a data structure
+           write_options (optional) is a dictionary of compression and
+           chunking options, see pfp_io.nc_write_options
     Author: PRI
     Date: Back in the day
     """
+    if write_options is None:
+        write_options = {"zlib": False, "complevel": 4, "shuffle": True, "chunksize": 0}
     # write the global attributes to the netCDF file
     nc_write_globalattributes(ncFile, ds)
     # we specify the size of the Time dimension because netCDF4 is slow to write files
@@ -1856,7 +2601,7 @@ def nc_write_series(ncFile, ds, outputlist=None, ndims=3):
     for ThisOne in ["DateTime","DateTime_UTC"]:
         if ThisOne in outputlist: outputlist.remove(ThisOne)
     # write the time variable
-    ldt = ds.series["DateTime"]["Data"]
+    ldt = pfp_utils.get_series_view(ds, "DateTime")
     nc_time = netCDF4.date2num(ldt,"days since 1800-01-01 00:00:00.0",calendar="gregorian")
     ncVar = ncFile.createVariable("time","d",("time",))
     ncVar[:] = nc_time
@@ -1885,11 +2630,11 @@ def nc_write_series(ncFile, ds, outputlist=None, ndims=3):
     datetimelist = ['xlDateTime','Year','Month','Day','Hour','Minute','Second','Hdh','Ddd']
     # and write them to the netCDF file
     for ThisOne in sorted(datetimelist):
-        if ThisOne in ds.series.keys(): nc_write_var(ncFile,ds,ThisOne,dims)
+        if ThisOne in ds.series.keys(): nc_write_var(ncFile,ds,ThisOne,dims,write_options=write_options)
         if ThisOne in outputlist: outputlist.remove(ThisOne)
     # write everything else to the netCDF file
     for ThisOne in sorted(outputlist):
-        nc_write_var(ncFile,ds,ThisOne,dims)
+        nc_write_var(ncFile,ds,ThisOne,dims,write_options=write_options)
     # write the coordinate reference system (crs) variable
     if "crs" not in outputlist:
         ncVar = ncFile.createVariable("crs","i",())
@@ -1900,40 +2645,55 @@ def nc_write_series(ncFile, ds, outputlist=None, ndims=3):
         setattr(ncVar,"inverse_flattening","298.257223563")
     ncFile.close()
 
-def nc_write_var(ncFile, ds, ThisOne, dim):
+def nc_write_var(ncFile, ds, ThisOne, dim, write_options=None):
     """
     Purpose:
      Function to write data from a series in the data structure to a netCDF variable.
+     The data and QC flag variables are created together and the numpy arrays
+     are passed directly to the netCDF library.
     Usage:
      nc_write_var(ncFile,ds,ThisOne,("time","latitude","longitude"))
       where ncFile is a netCDF file object
             ds is the data structure
             ThisOne is the label of a series in ds
             ("time","latitude","longitude") is the dimension tuple
+            write_options (optional) is a dictionary of compression and
+            chunking options, see pfp_io.nc_write_options
     Author: PRI
     Date: August 2014
     """
+    if len(dim) not in [1, 3]:
+        msg = "Unrecognised dimension request for netCDF variable: "+ThisOne
+        raise RuntimeError(msg)
+    data = pfp_utils.get_series_view(ds, ThisOne, "Data")
+    flag = pfp_utils.get_series_view(ds, ThisOne, "Flag")
     # get the data type of the series in ds
-    dt = get_ncdtype(ds.series[ThisOne]["Data"])
+    dt = get_ncdtype(data)
     # force data type to float64 or int32
     if dt not in ["d", "i"]:
         dt = "d"
         if ThisOne in ["Year", "Month", "Day", "Hour", "Minute", "Second"]:
             dt = "i"
-    # create the netCDF variable
+    # get the compression and chunking options
+    kwargs = {}
+    if write_options is not None:
+        kwargs["zlib"] = write_options["zlib"]
+        kwargs["complevel"] = write_options["complevel"]
+        kwargs["shuffle"] = write_options["shuffle"]
+        if write_options["chunksize"] > 0:
+            chunksize = min(write_options["chunksize"], len(data))
+            kwargs["chunksizes"] = (chunksize,) + (1,)*(len(dim)-1)
+    # create the netCDF variables for the data and the QC flag
     try:
-        ncVar = ncFile.createVariable(ThisOne, dt, dim)
+        ncVar = ncFile.createVariable(ThisOne, dt, dim, **kwargs)
+        ncFlag = ncFile.createVariable(ThisOne+"_QCFlag", get_ncdtype(flag), dim, **kwargs)
     except RuntimeError:
         msg = "Error writing variable to netCDF file: "+ThisOne
         raise Exception(msg)
-    # different writes to the variable depending on whether it is 1D or 3D
-    if len(dim)==1:
-        ncVar[:] = ds.series[ThisOne]["Data"].tolist()
-    elif len(dim)==3:
-        ncVar[:, 0, 0] = ds.series[ThisOne]["Data"].tolist()
-    else:
-        msg = "Unrecognised dimension request for netCDF variable: "+ThisOne
-        raise RuntimeError(msg)
+    # write the data and the QC flag, 3D variables are written as (time,1,1)
+    shape = (len(data),) + (1,)*(len(dim)-1)
+    ncVar[:] = numpy.reshape(data, shape)
+    ncFlag[:] = numpy.reshape(flag, shape)
     # write the attributes
     for item in ds.series[ThisOne]["Attr"]:
         if item != "_FillValue":
@@ -1942,21 +2702,9 @@ def nc_write_var(ncFile, ds, ThisOne, dim):
     # make sure the missing_value attribute is written
     if "missing_value" not in ds.series[ThisOne]["Attr"]:
         ncVar.setncattr("missing_value", c.missing_value)
-    # get the data type of the QC flag
-    dt = get_ncdtype(ds.series[ThisOne]["Flag"])
-    # create the variable
-    ncVar = ncFile.createVariable(ThisOne+"_QCFlag", dt, dim)
-    # write 1D or 3D
-    if len(dim)==1:
-        ncVar[:] = ds.series[ThisOne]["Flag"].tolist()
-    elif len(dim)==3:
-        ncVar[:, 0, 0] = ds.series[ThisOne]["Flag"].tolist()
-    else:
-        msg = "Unrecognised dimension request for netCDF variable: "+ThisOne
-        raise RuntimeError(msg)
     # set the attributes
-    ncVar.setncattr("long_name", ThisOne+"QC flag")
-    ncVar.setncattr("units", "none")
+    ncFlag.setncattr("long_name", ThisOne+"QC flag")
+    ncFlag.setncattr("units", "none")
 
 def xl_open_write(xl_name):
     xl_filename = os.path.basename(xl_name)
@@ -1998,7 +2746,8 @@ def xl_read_series(cf):
     # get the Excel workbook object.
     file_name = os.path.split(FileName)
     logger.info(" Reading Excel file "+file_name[1])
-    xl_book = xlrd.open_workbook(FileName)
+    # only the sheets used are parsed, when they are first asked for
+    xl_book = xlrd.open_workbook(FileName, on_demand=True)
     #log.info(" Opened and read Excel file "+FileName)
     ds.globalattributes['featureType'] = 'timeseries'
     ds.globalattributes['xl_filename'] = FileName
@@ -2012,39 +2761,41 @@ def xl_read_series(cf):
     ds.globalattributes['xl_moddatetime'] = str(datetime.datetime(t[0],t[1],t[2],t[3],t[4],t[5]))
     # Loop over the variables defined in the 'Variables' section of the configuration file.
     info = {}
-    for n, label in enumerate(label_list):
-        if xl_check_cf_section(cf, label):
-            xlsheet_name = cf["Variables"][label]["xl"]["sheet"]
-            if xlsheet_name.lower() in xlsheet_names:
-                xlsheet_index = xlsheet_names.index(xlsheet_name.lower())
-                active_sheet = xl_book.sheet_by_index(xlsheet_index)
-                header_list = [x.lower() for x in active_sheet.row_values(header_row)]
-                if cf["Variables"][label]["xl"]["name"].lower() in header_list:
-                    logger.info(" Getting "+label+" from sheet "+xlsheet_name)
-                    last_data_row = int(active_sheet.nrows)
-                    ds.series[unicode(label)] = {}
-                    xl_col = header_list.index(cf["Variables"][label]["xl"]["name"].lower())
-                    values = active_sheet.col_values(xl_col)[first_data_row:last_data_row]
-                    types = active_sheet.col_types(xl_col)[first_data_row:last_data_row]
-                    nrecs = len(values)
-                    ds.series[label]["Data"] = numpy.ones(nrecs,dtype=numpy.float64)*float(c.missing_value)
-                    ds.series[label]["Flag"] = numpy.ones(nrecs,dtype=numpy.int32)
-                    for i in range(nrecs):
-                        if (types[i]==3) or (types[i]==2) and (values[i]!=c.missing_value):
-                            ds.series[label]["Data"][i] = numpy.float64(values[i])
-                            ds.series[label]["Flag"][i] = numpy.int32(0)
-                    ds.series[label]["Attr"] = {"nrecs":nrecs}
-                    for attr in cf["Variables"][label]["Attr"].keys():
-                        ds.series[label]["Attr"][attr] = cf["Variables"][label]["Attr"][attr]
-                    if "missing_value" not in ds.series[label]["Attr"].keys():
-                        ds.series[label]["Attr"]["missing_value"] = numpy.int32(c.missing_value)
-                    info[label] = {"sheet":active_sheet, "nrecs":nrecs}
+    # the header row of each sheet is only read once
+    header_lists = {}
+    try:
+        for n, label in enumerate(label_list):
+            if xl_check_cf_section(cf, label):
+                xlsheet_name = cf["Variables"][label]["xl"]["sheet"]
+                if xlsheet_name.lower() in xlsheet_names:
+                    xlsheet_index = xlsheet_names.index(xlsheet_name.lower())
+                    active_sheet = xl_book.sheet_by_index(xlsheet_index)
+                    if xlsheet_index not in header_lists:
+                        header_lists[xlsheet_index] = [x.lower() for x in active_sheet.row_values(header_row)]
+                    header_list = header_lists[xlsheet_index]
+                    if cf["Variables"][label]["xl"]["name"].lower() in header_list:
+                        logger.info(" Getting "+label+" from sheet "+xlsheet_name)
+                        ds.series[unicode(label)] = {}
+                        xl_col = header_list.index(cf["Variables"][label]["xl"]["name"].lower())
+                        data, flag = xl_read_column(active_sheet, xl_col, first_data_row)
+                        nrecs = len(data)
+                        ds.series[label]["Data"] = data
+                        ds.series[label]["Flag"] = flag
+                        ds.series[label]["Attr"] = {"nrecs":nrecs}
+                        for attr in cf["Variables"][label]["Attr"].keys():
+                            ds.series[label]["Attr"][attr] = cf["Variables"][label]["Attr"][attr]
+                        if "missing_value" not in ds.series[label]["Attr"].keys():
+                            ds.series[label]["Attr"]["missing_value"] = numpy.int32(c.missing_value)
+                        info[label] = {"sheet":active_sheet, "nrecs":nrecs}
+                    else:
+                        if "Function" not in cf["Variables"][label]:
+                            logger.error("  "+label+" not found on sheet "+xlsheet_name)
                 else:
                     if "Function" not in cf["Variables"][label]:
-                        logger.error("  "+label+" not found on sheet "+xlsheet_name)
-            else:
-                if "Function" not in cf["Variables"][label]:
-                    logger.error("  Sheet "+xlsheet_name+" ("+label+") not found in Excel workbook")
+                        logger.error("  Sheet "+xlsheet_name+" ("+label+") not found in Excel workbook")
+    finally:
+        # with on_demand=True, xlrd keeps the file open until this is called
+        xl_book.release_resources()
     # check that all variables have the same length
     all_good = True
     label_list = info.keys()
@@ -2063,6 +2814,36 @@ def xl_read_series(cf):
         ds.returncodes = {"value":1, "message":msg}
     return ds
 
+def xl_read_column(xl_sheet, xl_col, first_data_row):
+    """
+    Purpose:
+     Read a column from an Excel worksheet into a float64 data array and an
+     int32 flag array.  Numeric cells that are not the missing value and date
+     cells are copied to the data array with a flag of 0, all other cells are
+     set to the missing value with a flag of 1.  The whole column is converted
+     in one step instead of one cell at a time.
+    Usage:
+     data, flag = pfp_io.xl_read_column(xl_sheet, xl_col, first_data_row)
+     where xl_sheet is an xlrd worksheet
+           xl_col is the column number
+           first_data_row is the xlrd row number of the first data row
+    Author: PRI
+    Date: October 2026
+    """
+    last_data_row = int(xl_sheet.nrows)
+    values = numpy.array(xl_sheet.col_values(xl_col)[first_data_row:last_data_row], dtype=object)
+    types = numpy.array(xl_sheet.col_types(xl_col)[first_data_row:last_data_row], dtype=numpy.int32)
+    nrecs = len(values)
+    data = numpy.ones(nrecs,dtype=numpy.float64)*float(c.missing_value)
+    flag = numpy.ones(nrecs,dtype=numpy.int32)
+    # numeric (2) and date (3) cells, numeric cells must not be the missing value
+    index = numpy.where((types == xlrd.XL_CELL_NUMBER) | (types == xlrd.XL_CELL_DATE))[0]
+    numbers = values[index].astype(numpy.float64)
+    ok = (types[index] == xlrd.XL_CELL_DATE) | (numbers != c.missing_value)
+    data[index[ok]] = numbers[ok]
+    flag[index[ok]] = numpy.int32(0)
+    return data, flag
+
 def xl_check_cf_section(cf, label):
     """
     Purpose:
@@ -1,5 +1,4 @@
 # standard modules
-import copy
 import logging
 import os
 # PFP modules
@@ -85,7 +84,7 @@ def l2qc(cf,ds1):
             pfp_ts.albedo
         """
     # make a copy of the L1 data
-    ds2 = copy.deepcopy(ds1)
+    ds2 = pfp_io.share_datastructure(ds1)
     # set some attributes for this level
     pfp_utils.UpdateGlobalAttributes(cf, ds2, "L2")
     # apply linear corrections to the data
@@ -109,7 +108,7 @@ def l3qc(cf, ds2):
     """
     """
     # make a copy of the L2 data
-    ds3 = copy.deepcopy(ds2)
+    ds3 = pfp_io.share_datastructure(ds2)
     # set some attributes for this level
     pfp_utils.UpdateGlobalAttributes(cf, ds3, "L3")
     # check to see if we have any imports
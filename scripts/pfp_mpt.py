@@ -1,7 +1,9 @@
 # standard Python modules
 import datetime
 import logging
+import multiprocessing
 import os
+import platform
 import subprocess
 # 3rd party
 import numpy
@@ -61,7 +63,6 @@ def get_bootstrap_results(contents):
     return bootstrap_results
 
 def make_data_array(ds, current_year):
-    ldt = pfp_utils.GetVariable(ds, "DateTime")
     nrecs = ds.globalattributes["nc_nrecs"]
     ts = int(ds.globalattributes["time_step"])
     start = datetime.datetime(current_year,1,1,0,30,0)
@@ -69,8 +70,9 @@ def make_data_array(ds, current_year):
     cdt = numpy.array([dt for dt in pfp_utils.perdelta(start, end, datetime.timedelta(minutes=ts))])
     mt = numpy.ones(len(cdt))*float(-9999)
     data = numpy.stack([cdt, mt, mt, mt, mt, mt, mt, mt], axis=-1)
-    si = pfp_utils.GetDateIndex(ldt["Data"], start, default=0)
-    ei = pfp_utils.GetDateIndex(ldt["Data"], end, default=nrecs)
+    di = pfp_utils.get_date_index(ds)
+    si = di.find(start, default=0)
+    ei = di.find(end, default=nrecs)
     dt = pfp_utils.GetVariable(ds, "DateTime", start=si, end=ei)
     idx1, idx2 = pfp_utils.FindMatchingIndices(cdt, dt["Data"])
     for n, label in enumerate(["Fc", "VPD", "ustar", "Ta", "Fsd", "Fh", "Fe"]):
@@ -84,33 +86,411 @@ def mpt_main(cf):
     base_file_path = cf["Files"]["file_path"]
     nc_file_name = cf["Files"]["in_filename"]
     nc_file_path = os.path.join(base_file_path, nc_file_name)
-    ds = pfp_io.nc_read_series(nc_file_path)
-    out_file_paths = run_mpt_code(ds, nc_file_name)
-    ustar_results = read_mpt_output(out_file_paths)
+    info = mpt_get_info(cf)
+    if info is None:
+        return
+    labels = ["Fc", "VPD", "ustar", "Ta", "Fsd", "Fh", "Fe"]
+    ds = pfp_io.nc_read_series(nc_file_path, lazy=True, variable_list=labels)
+    if info["engine"] == "native":
+        ustar_results = run_mpt_native(ds, info)
+    else:
+        # ustar_mp runs in its own working directory so that MPT runs for other
+        # sites do not interfere
+        work_dir = pfp_utils.make_work_directory("mpt_", subdirectories=["input", "output", "log"])
+        try:
+            out_file_paths = run_mpt_code(ds, nc_file_name, work_dir)
+            ustar_results = read_mpt_output(out_file_paths)
+        finally:
+            pfp_utils.remove_work_directory(work_dir)
+    pfp_io.nc_close_lazy(ds)
     mpt_file_path = nc_file_path.replace(".nc", "_MPT.xls")
     xl_write_mpt(mpt_file_path, ustar_results)
     return
 
-def run_mpt_code(ds, nc_file_name):
+def mpt_bootstrap(year_data, info, seed):
+    """
+    Purpose:
+     Estimate the u* threshold for each season from a bootstrap of the data
+     for one year.  As in ustar_mp, the bootstrap draws as many records as
+     there are in the year, at random and with replacement, from all of the
+     records and keeps the valid night time records in time order.
+    Usage:
+     result = pfp_mpt.mpt_bootstrap(year_data, info, seed)
+     where year_data is the dictionary returned by pfp_mpt.mpt_year_data
+           info is the dictionary returned by pfp_mpt.mpt_get_info
+           seed is the seed for the random number generator
+     and result is [values, counts] with the u* threshold and the number
+     of records for each season or None if the thresholds could not be
+     estimated.
+    Author: PRI
+    Date: October 2026
+    """
+    rs = numpy.random.RandomState(seed)
+    nrecs = len(year_data["nee"])
+    index = numpy.repeat(numpy.arange(nrecs), numpy.bincount(rs.randint(0, nrecs, size=nrecs), minlength=nrecs))
+    days = numpy.count_nonzero(~year_data["night"][index])
+    index = index[year_data["valid"][index] & year_data["night"][index]]
+    if len(index) == 0:
+        return None
+    # records after the end of the last season are counted in the first
+    # season, as ustar_mp does
+    number_seasons = year_data["number_seasons"]
+    season = numpy.searchsorted(year_data["season_ends"][:number_seasons], index, side="right")
+    season[season == number_seasons] = 0
+    counts = numpy.bincount(season, minlength=number_seasons)
+    thresholds, counts = mpt_ustar_threshold(year_data["nee"][index], year_data["ta"][index],
+                                             year_data["ustar"][index], counts, days, info)
+    if thresholds is None:
+        return None
+    values = numpy.array([mpt_median_threshold(t) for t in thresholds])
+    return [values, counts]
+
+def mpt_class_windows(values, offsets, totals, number_classes, extend_empty=False):
+    """
+    Purpose:
+     Split each segment of the values into number_classes classes with the
+     same number of values, extending each class to include any following
+     values that are equal to the last value in the class.  This is a port
+     of the window logic in ustar_mp, including its quirks, done for all
+     segments at once.  Classes that could not be formed have a start index
+     of -1.  If extend_empty is True, a class that would be empty is extended
+     over the run of equal values at its start, as ustar_mp does for the u*
+     classes.
+    Usage:
+     starts, ends = pfp_mpt.mpt_class_windows(values, offsets, totals, number_classes, extend_empty=False)
+     where values is a 1D array, sorted within each segment
+           offsets, totals are the start index and length of each segment
+     and starts, ends are arrays (segments, classes) of the first and last
+     indices of each class, relative to the start of the segment.
+    Author: PRI
+    Date: October 2026
+    """
+    number_values = len(values)
+    # the index, relative to the start of its segment, of the value after
+    # the run of equal values containing each value
+    last = numpy.ones(number_values, dtype=bool)
+    last[:-1] = values[1:] != values[:-1]
+    last[offsets + totals - 1] = True
+    run_end = numpy.where(last, numpy.arange(number_values), number_values)
+    run_end = numpy.minimum.accumulate(run_end[::-1])[::-1] + 1
+    run_end = run_end - numpy.repeat(offsets, totals)
+    sizes = totals/number_classes
+    starts = numpy.full((len(totals), number_classes), -1, dtype=numpy.int64)
+    ends = numpy.full((len(totals), number_classes), -1, dtype=numpy.int64)
+    end = numpy.zeros(len(totals), dtype=numpy.int64)
+    for i in range(number_classes - 1):
+        start = end
+        formed = start < totals
+        end = numpy.minimum(sizes*(i+1) - 1, totals - 1)
+        end = numpy.maximum(end + 1, run_end[offsets + end])
+        if extend_empty:
+            empty = (end == start) & (end < totals)
+            extended = numpy.maximum(end + 1, run_end[offsets + numpy.minimum(end, totals - 1)])
+            end = numpy.where(empty, extended, end)
+        starts[formed, i] = start[formed]
+        ends[formed, i] = end[formed] - 1
+        end = numpy.where(formed, end, start)
+    tail = end < totals
+    starts[tail, -1] = end[tail]
+    ends[tail, -1] = totals[tail] - 1
+    return starts, ends
+
+def mpt_forward_mode(ustar_mean, fx_mean, window_size, threshold_check, n):
+    """
+    Purpose:
+     Apply the plateau test used by the ustar_mp forward mode n to the mean u*
+     and mean NEE in the u* classes of each temperature class.  The threshold
+     is the mean u* of the first class where the mean NEE in that class and
+     the following n-1 classes is greater than or equal to the mean NEE in
+     the window_size classes that follow each of them.
+    Usage:
+     thresholds = pfp_mpt.mpt_forward_mode(ustar_mean, fx_mean, window_size, threshold_check, n)
+     where ustar_mean, fx_mean are arrays (temperature classes, u* classes)
+     and thresholds is 10.0 for temperature classes where no plateau is found.
+    Author: PRI
+    Date: October 2026
+    """
+    number_strata, number_classes = fx_mean.shape
+    if n < 1 or number_classes - n <= 0:
+        return numpy.full(number_strata, float(-9999))
+    # mean of up to window_size classes starting at each class, the means
+    # starting at and after the end of the array are invalid
+    csum = numpy.zeros((number_strata, number_classes + 1))
+    csum[:, 1:] = numpy.cumsum(fx_mean, axis=1)
+    first = numpy.arange(number_classes + 1)
+    last = numpy.minimum(first + window_size, number_classes)
+    with numpy.errstate(divide="ignore", invalid="ignore"):
+        means = (csum[:, last] - csum[:, first])/(last - first)
+    invalid = numpy.zeros((number_strata, number_classes + 1), dtype=numpy.int64)
+    invalid[:, 1:] = numpy.cumsum(mpt_is_invalid(fx_mean), axis=1)
+    means[invalid[:, last] - invalid[:, first] > 0] = numpy.nan
+    means[mpt_is_invalid(numpy.nan_to_num(means))] = numpy.nan
+    # classes i where fx_mean[i+y] >= means[i+1+y] for y = 0 to n-1, the
+    # ustar_mp programs are built with -ffast-math and this lets the test
+    # pass against the empty window after the last class
+    i = numpy.arange(number_classes - n + 1)
+    ok = numpy.ones((number_strata, len(i)), dtype=bool)
+    for y in range(n):
+        with numpy.errstate(invalid="ignore"):
+            test = fx_mean[:, i+y] >= means[:, i+1+y]*threshold_check
+        ok = ok & (test | (i+1+y == number_classes))
+    found = numpy.argmax(ok, axis=1)
+    thresholds = ustar_mean[numpy.arange(number_strata), found]
+    thresholds[~numpy.any(ok, axis=1)] = 10.0
+    return thresholds
+
+def mpt_get_info(cf):
+    """
+    Purpose:
+     Get the MPT options from the control file.  The u* threshold is estimated
+     by the compiled ustar_mp program if the [Options] key MPTEngine is
+     "binary" or in-process if it is "native".  "binary" is the default when
+     ustar_mp is present in mpt/bin.  The bootstraps used by the native engine
+     are run in a pool of processes if the [Options] key workers is greater
+     than 1.
+    Usage:
+     info = pfp_mpt.mpt_get_info(cf)
+     where info is None if MPTEngine is "binary" and ustar_mp is not found
+    Author: PRI
+    Date: October 2026
+    """
+    info = {"engine": "native", "workers": 1, "random_seed": None,
+            "bootstraps": 100, "ta_classes": 7, "ustar_classes": 20,
+            "window_size": 10, "threshold_check": 1.0}
+    extension = ".exe" if platform.system() == "Windows" else ""
+    binary = os.path.isfile(os.path.join("mpt", "bin", "ustar_mp" + extension))
+    default = "binary" if binary else "native"
+    opt = pfp_utils.get_keyvaluefromcf(cf, ["Options"], "MPTEngine", default=default)
+    info["engine"] = str(opt).lower()
+    if info["engine"] == "binary" and not binary:
+        msg = " MPT: MPTEngine is binary but ustar_mp was not found in mpt/bin"
+        logger.error(msg)
+        return None
+    opt = pfp_utils.get_keyvaluefromcf(cf, ["Options"], "workers", default=1)
+    info["workers"] = int(opt)
+    opt = pfp_utils.get_keyvaluefromcf(cf, ["Options"], "Random_seed", default=None)
+    if opt is not None:
+        info["random_seed"] = int(opt)
+    return info
+
+def mpt_is_invalid(data):
+    """ Return True where the data is the missing value, tested as ustar_mp does."""
+    with numpy.errstate(invalid="ignore"):
+        return numpy.fix(data) == -9999
+
+def mpt_median_threshold(values):
+    """
+    Purpose:
+     Return the median of the u* thresholds for the temperature classes in
+     a season, ignoring missing values and thresholds that were not found.
+    Usage:
+     median = pfp_mpt.mpt_median_threshold(values)
+     where median is -9999 if there are no valid thresholds.
+    Author: PRI
+    Date: October 2026
+    """
+    values = values[~mpt_is_invalid(values) & (values != 10.0)]
+    if len(values) == 0:
+        return float(-9999)
+    return numpy.median(values)
+
+def mpt_segment_sort(values, offsets, totals):
+    """ Return the indices that sort the values within each contiguous segment."""
+    order = numpy.empty(len(values), dtype=numpy.int64)
+    for offset, total in zip(offsets, totals):
+        order[offset:offset+total] = offset + numpy.argsort(values[offset:offset+total])
+    return order
+
+def mpt_ustar_threshold(nee, ta, ustar, counts, days, info):
+    """
+    Purpose:
+     Estimate the u* threshold for each season and temperature class from the
+     valid night time records for one year.  This is a port of the
+     ustar_threshold routine in ustar_mp using the options ustar_mp uses by
+     default (forward mode 2, no percentile check), done for all seasons and
+     temperature classes at once.
+     The records for each season are sorted by air temperature and split into
+     temperature classes, classes where air temperature and u* are correlated
+     are skipped and the records in the remaining classes are sorted by u*,
+     split into u* classes and the threshold found using the plateau test.
+     If there are too few records to use seasons, all records are treated as
+     a single season.
+    Usage:
+     thresholds, counts = pfp_mpt.mpt_ustar_threshold(nee, ta, ustar, counts, days, info)
+     where nee, ta and ustar are the valid night time records in season order
+           counts is the number of records in each season
+           days is the number of day time records
+     and thresholds is an array (seasons, temperature classes) of thresholds
+     and counts is the number of records in each season.  None, None is
+     returned if there are too few records.
+    Author: PRI
+    Date: October 2026
+    """
+    number_ta = info["ta_classes"]
+    number_ustar = info["ustar_classes"]
+    number_records = len(nee)
+    counts = numpy.array(counts)
+    # ustar_mp uses seasons if there are at least 3000 records in the year
+    # and a single season if there are more than 160 night time records
+    if number_records < number_ta*number_ustar:
+        return None, None
+    elif number_records + days >= 3000:
+        number_seasons = len(counts)
+    elif number_records > 160:
+        number_seasons = 1
+        counts = numpy.array([numpy.sum(counts)])
+    else:
+        return None, None
+    # use a single season if no season has 100 records per temperature class
+    if number_seasons > 1 and numpy.all(counts < 100*number_ta):
+        number_seasons = 1
+        counts = numpy.array([numpy.sum(counts)])
+    thresholds = numpy.full((number_seasons, number_ta), float(-9999))
+    seasons = numpy.where(counts >= 100*number_ta)[0]
+    if len(seasons) == 0:
+        return thresholds, counts
+    # sort the records in each season by air temperature and split them into
+    # temperature classes
+    totals = counts[seasons]
+    offsets = numpy.concatenate(([0], numpy.cumsum(counts)))[seasons]
+    index = numpy.repeat(offsets - numpy.cumsum(totals) + totals, totals) + numpy.arange(numpy.sum(totals))
+    offsets = numpy.cumsum(totals) - totals
+    index = index[mpt_segment_sort(ta[index], offsets, totals)]
+    starts, ends = mpt_class_windows(ta[index], offsets, totals, number_ta)
+    # temperature classes with at least 100 records
+    number = ends - starts + 1
+    season, ta_class = numpy.nonzero((starts != -1) & (number >= 100))
+    first = offsets[season] + starts[season, ta_class]
+    number = number[season, ta_class]
+    index = index[numpy.repeat(first - numpy.cumsum(number) + number, number) + numpy.arange(numpy.sum(number))]
+    # skip temperature classes where Ta and u* are correlated, classes with a
+    # single value of Ta are kept as they are by the ustar_mp programs, which
+    # are built with -ffast-math
+    offsets = numpy.cumsum(number) - number
+    dta = ta[index] - numpy.repeat(numpy.add.reduceat(ta[index], offsets)/number, number)
+    dustar = ustar[index] - numpy.repeat(numpy.add.reduceat(ustar[index], offsets)/number, number)
+    with numpy.errstate(divide="ignore", invalid="ignore"):
+        corr = numpy.add.reduceat(dta*dustar, offsets)/(numpy.sqrt(numpy.add.reduceat(dta*dta, offsets))*
+                                                         numpy.sqrt(numpy.add.reduceat(dustar*dustar, offsets)))
+        keep = numpy.isnan(corr) | (numpy.abs(corr) <= 0.5)
+    if not numpy.any(keep):
+        return thresholds, counts
+    index = index[numpy.repeat(keep, number)]
+    season, ta_class, number = season[keep], ta_class[keep], number[keep]
+    # sort the records in each temperature class by u* and split them into
+    # u* classes
+    offsets = numpy.cumsum(number) - number
+    index = index[mpt_segment_sort(ustar[index], offsets, number)]
+    c_ustar, c_nee = ustar[index], nee[index]
+    starts, ends = mpt_class_windows(c_ustar, offsets, number, number_ustar, extend_empty=True)
+    # mean u* and NEE in each u* class, 0 for classes that were not formed
+    csum_ustar = numpy.concatenate(([0.0], numpy.cumsum(c_ustar)))
+    csum_nee = numpy.concatenate(([0.0], numpy.cumsum(c_nee)))
+    number = ends - starts + 1
+    summed = (starts != -1) & (number > 0)
+    first = numpy.where(summed, offsets[:, None] + starts, 0)
+    last = numpy.where(summed, offsets[:, None] + ends + 1, 0)
+    with numpy.errstate(divide="ignore", invalid="ignore"):
+        ustar_mean = (csum_ustar[last] - csum_ustar[first])/number
+        fx_mean = (csum_nee[last] - csum_nee[first])/number
+    ustar_mean[starts == -1] = 0.0
+    fx_mean[starts == -1] = 0.0
+    # skip temperature classes where the first u* class mean is above 0.2
+    keep = ustar_mean[:, 0] <= 0.2
+    thresholds[season[keep], ta_class[keep]] = mpt_forward_mode(ustar_mean[keep], fx_mean[keep],
+                                                                info["window_size"],
+                                                                info["threshold_check"], 2)
+    return thresholds, counts
+
+# Data shared by the bootstrap worker processes, set by mpt_worker_init
+mpt_worker_data = {}
+
+def mpt_worker_init(years_data, info):
+    """ Store the data used by all bootstraps once in each worker process."""
+    mpt_worker_data["years_data"] = years_data
+    mpt_worker_data["info"] = info
+
+def mpt_worker(args):
+    """ Run a single bootstrap for one year in a worker process."""
+    year, seed = args
+    return mpt_bootstrap(mpt_worker_data["years_data"][year], mpt_worker_data["info"], seed)
+
+def mpt_year_data(ds, current_year):
+    """
+    Purpose:
+     Get the NEE, air temperature, u* and the valid and night time masks for
+     a year, together with the index of the last record in each season, in
+     the form used by pfp_mpt.mpt_ustar_threshold and pfp_mpt.mpt_bootstrap.
+     The data are the same as those written for the ustar_mp program by
+     pfp_mpt.make_data_array.  As in ustar_mp, night time is when the
+     incoming shortwave is less than 10 W/m^2 and the seasons are
+     January-March, April-June, July-September and October-December.
+    Usage:
+     year_data = pfp_mpt.mpt_year_data(ds, current_year)
+    Author: PRI
+    Date: October 2026
+    """
+    data = make_data_array(ds, current_year)
+    timestamp = data[:, 0].astype(numpy.int64)
+    nee = data[:, 1].astype(numpy.float64)
+    ustar = data[:, 3].astype(numpy.float64)
+    ta = data[:, 4].astype(numpy.float64)
+    fsd = data[:, 5].astype(numpy.float64)
+    year_data = {"nee": nee, "ta": ta, "ustar": ustar}
+    for item in [nee, ta, ustar, fsd]:
+        item[numpy.isnan(item)] = float(-9999)
+    year_data["valid"] = ~(mpt_is_invalid(nee) | mpt_is_invalid(ta) | mpt_is_invalid(ustar))
+    year_data["night"] = ~mpt_is_invalid(fsd) & (fsd < 10.0)
+    # the time stamp is at the end of the period so 00:00 on the first day
+    # of the month belongs to the previous month
+    month = (timestamp/1000000) % 100 - 1
+    for i in numpy.where(((timestamp/10000) % 100 == 1) & (timestamp % 10000 == 0))[0]:
+        month[i] = month[i] - 1 if month[i] > 0 else month[i-1]
+    year_data["season"] = month/3
+    # the last record in each season, including the extra record ustar_mp
+    # adds for February in a leap year
+    records_per_day = 1440/int(ds.globalattributes["time_step"])
+    days_per_season = numpy.array([90, 91, 92, 92])
+    season_ends = numpy.cumsum(days_per_season*records_per_day)
+    if len(timestamp) == 366*records_per_day:
+        season_ends = season_ends + 1
+    year_data["season_ends"] = season_ends
+    year_data["number_seasons"] = len(season_ends)
+    return year_data
+
+def run_mpt_code(ds, nc_file_name, work_dir):
+    """
+    Purpose:
+     Write the data for each year to a CSV file in work_dir/input, run the
+     compiled ustar_mp program on it and return the paths of the output
+     files in work_dir/output.
+    Usage:
+     out_file_paths = pfp_mpt.run_mpt_code(ds, nc_file_name, work_dir)
+     where work_dir is a working directory with input, output and log
+           sub-directories (see pfp_utils.make_work_directory)
+    Author: PRI
+    Date: Back in the day
+          October 2026 - added work_dir
+    """
     ldt = pfp_utils.GetVariable(ds, "DateTime")
     out_file_paths = {}
     header = "TIMESTAMP,NEE,VPD,USTAR,TA,SW_IN,H,LE"
     fmt = "%12i,%f,%f,%f,%f,%f,%f,%f"
     first_year = ldt["Data"][0].year
     last_year = ldt["Data"][-1].year
-    log_file_path = os.path.join("mpt", "log", "mpt.log")
+    log_file_path = os.path.join(work_dir, "log", "mpt.log")
     mptlogfile = open(log_file_path, "wb")
-    in_base_path = os.path.join("mpt", "input", "")
-    out_base_path = os.path.join("mpt", "output", "")
+    in_base_path = os.path.join(work_dir, "input", "")
+    out_base_path = os.path.join(work_dir, "output", "")
+    ustar_mp_exe = os.path.abspath(os.path.join("mpt", "bin", "ustar_mp"))
     for current_year in range(first_year, last_year+1):
         msg = " MPT: processing year " + str(current_year)
         logger.info(msg)
-        in_name = nc_file_name.replace(".nc","_"+str(current_year)+"_MPT.csv")
+        in_name = os.path.basename(nc_file_name).replace(".nc","_"+str(current_year)+"_MPT.csv")
         in_full_path = os.path.join(in_base_path, in_name)
-        out_full_path = in_full_path.replace("input", "output").replace(".csv", "_ut.txt")
+        out_full_path = os.path.join(out_base_path, in_name.replace(".csv", "_ut.txt"))
         data = make_data_array(ds, current_year)
         numpy.savetxt(in_full_path, data, header=header, delimiter=",", comments="", fmt=fmt)
-        ustar_mp_exe = os.path.join(".", "mpt", "bin", "ustar_mp")
         cmd = [ustar_mp_exe, "-input_path="+in_full_path, "-output_path="+out_base_path]
         subprocess.call(cmd, stdout=mptlogfile)
         if os.path.isfile(out_full_path):
@@ -118,6 +498,97 @@ def run_mpt_code(ds, nc_file_name):
     mptlogfile.close()
     return out_file_paths
 
+def run_mpt_native(ds, info):
+    """
+    Purpose:
+     Estimate the u* threshold for each year in the data structure using the
+     in-process port of ustar_mp and return the results in the form returned
+     by pfp_mpt.read_mpt_output.  The bootstraps for all years are run in a
+     pool of info["workers"] processes if info["workers"] is greater than 1.
+     Each bootstrap has its own random seed, drawn from info["random_seed"],
+     so the results do not depend on the number of workers.
+    Usage:
+     ustar_results = pfp_mpt.run_mpt_native(ds, info)
+     where info is the dictionary returned by pfp_mpt.mpt_get_info
+    Author: PRI
+    Date: October 2026
+    """
+    ustar_results = {"Annual":{}, "Years":{}}
+    ury = ustar_results["Years"]
+    ts = int(ds.globalattributes["time_step"])
+    if ts not in [30, 60]:
+        msg = " MPT: time step must be 30 or 60 minutes, not " + str(ts)
+        logger.error(msg)
+        return ustar_results
+    ldt = pfp_utils.GetVariable(ds, "DateTime")
+    first_year = ldt["Data"][0].year
+    last_year = ldt["Data"][-1].year
+    rs = numpy.random.RandomState(info["random_seed"])
+    years_data = {}
+    tasks = []
+    for current_year in range(first_year, last_year+1):
+        msg = " MPT: processing year " + str(current_year)
+        logger.info(msg)
+        year_data = mpt_year_data(ds, current_year)
+        night = year_data["valid"] & year_data["night"]
+        index = numpy.where(night)[0]
+        # records in season order, the night time records are already in
+        # time order so this only matters if the seasons are not
+        index = index[numpy.argsort(year_data["season"][index], kind="mergesort")]
+        days = numpy.count_nonzero(~year_data["night"])
+        counts = numpy.bincount(year_data["season"][index], minlength=year_data["number_seasons"])
+        thresholds, counts = mpt_ustar_threshold(year_data["nee"][index], year_data["ta"][index],
+                                                 year_data["ustar"][index], counts, days, info)
+        seeds = rs.randint(0, 2**31-1, size=info["bootstraps"])
+        if thresholds is None:
+            msg = " MPT: not enough values to estimate u* threshold for " + str(current_year)
+            logger.warning(msg)
+            continue
+        # the bootstraps use a single season if the observations did
+        year_data["number_seasons"] = len(counts)
+        years_data[current_year] = year_data
+        tasks = tasks + [(current_year, seed) for seed in seeds]
+        values = numpy.array([mpt_median_threshold(t) for t in thresholds])
+        ury[current_year] = {}
+        ury[current_year]["seasonal"] = {"value": values, "count": counts}
+        ury[current_year]["annual"] = {"value": numpy.max(values), "count": numpy.sum(counts)}
+        ury[current_year]["temperature_classes"] = {}
+        for i in range(thresholds.shape[1]):
+            ury[current_year]["temperature_classes"][i] = {"values": thresholds[:, i],
+                                                           "counts": numpy.zeros(len(values))}
+    if len(tasks) == 0:
+        return ustar_results
+    msg = " MPT: running " + str(len(tasks)) + " bootstraps"
+    logger.info(msg)
+    if info["workers"] > 1:
+        msg = " MPT: using " + str(info["workers"]) + " workers"
+        logger.info(msg)
+        pool = multiprocessing.Pool(processes=info["workers"], initializer=mpt_worker_init,
+                                    initargs=(years_data, info))
+        try:
+            results = pool.map(mpt_worker, tasks)
+        finally:
+            pool.terminate()
+            pool.join()
+    else:
+        results = [mpt_bootstrap(years_data[year], info, seed) for year, seed in tasks]
+    for year in sorted(years_data.keys()):
+        number_seasons = years_data[year]["number_seasons"]
+        values = [[] for s in range(number_seasons)]
+        counts = [[] for s in range(number_seasons)]
+        for (task_year, seed), result in zip(tasks, results):
+            if task_year != year or result is None:
+                continue
+            # a bootstrap that used a single season only has a value for the first
+            for s in range(number_seasons):
+                values[s].append(result[0][s] if s < len(result[0]) else float(-9999))
+                counts[s].append(result[1][s] if s < len(result[1]) else 0)
+        ury[year]["bootstraps"] = {}
+        for s in range(number_seasons):
+            ury[year]["bootstraps"][s] = {"values": numpy.array(values[s], dtype=numpy.float64),
+                                          "counts": numpy.array(counts[s], dtype=numpy.float64)}
+    return ustar_results
+
 def read_mpt_output(out_file_paths):
     ustar_results = {"Annual":{}, "Years":{}}
     seasons = ["Summer", "Autumn", "Winter", "Spring"]
@@ -22,20 +22,12 @@ import pfp_utils
 logger = logging.getLogger("pfp_log")
 
 def get_diurnalstats(DecHour,Data,dt):
-    nInts = 24*int((60/dt)+0.5)
-    Hr = numpy.array([c.missing_value]*nInts,dtype=numpy.float64)
-    Av = numpy.array([c.missing_value]*nInts,dtype=numpy.float64)
-    Sd = numpy.array([c.missing_value]*nInts,dtype=numpy.float64)
-    Mx = numpy.array([c.missing_value]*nInts,dtype=numpy.float64)
-    Mn = numpy.array([c.missing_value]*nInts,dtype=numpy.float64)
-    for i in range(nInts):
-        Hr[i] = float(i)*dt/60.
-        li = numpy.where((abs(DecHour-Hr[i])<c.eps)&(abs(Data-float(c.missing_value))>c.eps))
-        if numpy.size(li)!=0:
-            Av[i] = numpy.mean(Data[li])
-            Sd[i] = numpy.std(Data[li])
-            Mx[i] = numpy.max(Data[li])
-            Mn[i] = numpy.min(Data[li])
+    _, Hr, Av, Sd, Mx, Mn = pfp_utils.get_diurnalstats_decimalhour(DecHour, Data, dt)
+    Hr = numpy.ma.filled(Hr, float(c.missing_value))
+    Av = numpy.ma.filled(Av, float(c.missing_value))
+    Sd = numpy.ma.filled(Sd, float(c.missing_value))
+    Mx = numpy.ma.filled(Mx, float(c.missing_value))
+    Mn = numpy.ma.filled(Mn, float(c.missing_value))
     return Hr, Av, Sd, Mx, Mn
 
 def get_ticks(start, end):
@@ -809,9 +801,10 @@ def plot_quickcheck(cf):
     logger.info(" Getting data from data structure")
     data = {"Month":{"Attr":{}}, "Hour":{"Attr":{}}, "Minute":{"Attr":{}}}
     # do the month, hour and minute separately
-    data["Month"]["Data"] = numpy.array([d.month for d in DateTime])
-    data["Hour"]["Data"] = numpy.array([d.hour for d in DateTime])
-    data["Minute"]["Data"] = numpy.array([d.minute for d in DateTime])
+    ti = pfp_utils.get_time_index(ds)
+    data["Month"]["Data"] = ti["Month"][si:ei+1]
+    data["Hour"]["Data"] = ti["Hour"][si:ei+1]
+    data["Minute"]["Data"] = ti["Minute"][si:ei+1]
     # now do the data we want to plot
     data_list = ["Fsd", "Fsu", "Fld", "Flu", "Fn",
                  "Fg", "Fa", "Fe", "Fh", "Fc", "ustar",
@@ -329,6 +329,7 @@ def ERUsingLloydTaylor(cf, ds, l6_info):
     Usage:
     Author: IMcH, PRI
     Date: October 2015
+    October 2026 - rb fitted for all windows in one pass
     """
     if "ERUsingLloydTaylor" not in l6_info:
         return
@@ -443,31 +444,25 @@ def ERUsingLloydTaylor(cf, ds, l6_info):
         # defaults for the free and one set of defaults for the fixed parameters
         params_dict = {'fixed_rb': pfp_rpLT.make_initial_guess_dict(data_dict),
                        'free_rb': pfp_rpLT.make_initial_guess_dict(data_dict)}
-        # Do nocturnal optimisation for each window
+        # Do nocturnal optimisation for all windows in one pass
         logger.info(" Optimising fit for rb using nocturnal data")
-        for date in step_date_array:
-            # Get Eo for the relevant year and write to the parameters dictionary
-            param_index = numpy.where(date_array == date)
-            params_dict['fixed_rb']['Eo_default'] = opt_params_dict['Eo'][param_index]
-            # Subset the data and check length
-            sub_dict = pfp_rpLT.subset_window(data_dict, step_date_index_dict[date])
-            noct_dict = pfp_rpLT.subset_window(data_dict, step_date_index_dict[date])
-            # Subset again to remove daytime and then nan
-            #noct_dict = pfp_rpLT.subset_daynight(sub_dict, noct_flag = True)
-            len_all_noct = len(noct_dict['NEE'])
-            noct_dict = pfp_rpLT.subset_nan(noct_dict)
-            len_valid_noct = len(noct_dict['NEE'])
-            # Do optimisation only if data passes minimum threshold
-            if round(float(len_valid_noct) / len_all_noct * 100) > \
-            configs_dict['minimum_pct_noct_window']:
-                params, error_state = pfp_rpLT.optimise_rb(noct_dict,params_dict['fixed_rb'])
-            else:
-                params, error_state = [numpy.nan], 10
-            # Send data to the results dict
-            opt_params_dict['rb_noct'][param_index] = params
-            opt_params_dict['Nocturnal rb error code'][param_index] = error_state
-            # Estimate time series and plot if requested
-            if error_state == 0 and configs_dict['output_plots']:
+        date_position = {date: i for i, date in enumerate(date_array)}
+        step_date_array = [date for date in step_date_array if date in date_position]
+        step_index = numpy.array([date_position[date] for date in step_date_array], dtype=numpy.int64)
+        window_list = [step_date_index_dict[date] for date in step_date_array]
+        rb_noct, rb_error_state = pfp_rpLT.optimise_rb_windows(data_dict, window_list,
+                                                               opt_params_dict['Eo'][step_index],
+                                                               params_dict['fixed_rb'],
+                                                               configs_dict['minimum_pct_noct_window'])
+        # Send data to the results dict
+        opt_params_dict['rb_noct'][step_index] = rb_noct
+        opt_params_dict['Nocturnal rb error code'][step_index] = rb_error_state
+        # Estimate time series and plot if requested
+        if configs_dict['output_plots']:
+            for date, param_index, error_state in zip(step_date_array, step_index, rb_error_state):
+                if error_state != 0:
+                    continue
+                sub_dict = pfp_rpLT.subset_window(data_dict, step_date_index_dict[date])
                 this_params_dict = {'Eo': opt_params_dict['Eo'][param_index],
                                     'rb': opt_params_dict['rb_noct'][param_index]}
                 est_series_dict = pfp_rpLT.estimate_Re_GPP(sub_dict, this_params_dict)
@@ -493,9 +488,10 @@ def ERUsingLloydTaylor(cf, ds, l6_info):
         # this section could be a separate routine
         E0 = numpy.zeros(len(ldt))
         rb = numpy.zeros(len(ldt))
-        ldt_year = numpy.array([dt.year for dt in ldt])
-        ldt_month = numpy.array([dt.month for dt in ldt])
-        ldt_day = numpy.array([dt.day for dt in ldt])
+        ti = pfp_utils.get_time_index(ds)
+        ldt_year = ti["Year"]
+        ldt_month = ti["Month"]
+        ldt_day = ti["Day"]
         for date,E0_val,rb_val in zip(opt_params_dict["date"],opt_params_dict["Eo"],opt_params_dict["rb_noct"]):
             param_year = date.year
             param_month = date.month
@@ -846,6 +842,7 @@ def get_turbulence_indicator_ustar(ldt, ustar, ustar_dict, ts):
     inds = turbulence_indicator["values"]
     attr = turbulence_indicator["attr"]
     attr["turbulence_filter"] = "ustar"
+    di = pfp_utils.DateIndex(ldt, ts=ts)
     for year in year_list:
         start_date = str(year)+"-01-01 00:30"
         if ts==60: start_date = str(year)+"-01-01 01:00"
@@ -854,8 +851,8 @@ def get_turbulence_indicator_ustar(ldt, ustar, ustar_dict, ts):
         ustar_threshold = float(ustar_dict[year]["ustar_mean"])
         attr["ustar_threshold_"+str(year)] = str(ustar_threshold)
         # get the start and end datetime indices
-        si = pfp_utils.GetDateIndex(ldt,start_date,ts=ts,default=0,match='exact')
-        ei = pfp_utils.GetDateIndex(ldt,end_date,ts=ts,default=len(ldt),match='exact')
+        si = di.find(start_date, default=0, match="exact")
+        ei = di.find(end_date, default=len(ldt), match="exact")
         # set the QC flag
         idx = numpy.ma.where(ustar[si:ei]>=ustar_threshold)[0]
         inds[si:ei][idx] = numpy.int32(1)
@@ -1020,6 +1017,7 @@ def L6_summary(cf, ds):
     Usage:
     Author: PRI
     Date: June 2015
+          October 2026 - data and periods got once by L6_summary_groups
     """
     logger.info("Doing the L6 summary")
     # set up a dictionary of lists
@@ -1042,8 +1040,10 @@ def L6_summary(cf, ds):
         msg = " L6_summary: error opening netCDF file " + nc_name
         logger.error(msg)
         return 0
+    # read the data and get the days, months and years once for all summaries
+    groups = L6_summary_groups(ds, series_dict)
     # daily averages and totals
-    daily_dict = L6_summary_daily(ds, series_dict)
+    daily_dict = L6_summary_daily(ds, series_dict, groups)
     L6_summary_write_xlfile(xl_file, "Daily (all)", daily_dict)
     L6_summary_write_ncfile(nc_file, "Daily_all", daily_dict)
     #flag_dict = L6_summary_daily_flag(ds,series_dict)
@@ -1051,15 +1051,15 @@ def L6_summary(cf, ds):
     L6_summary_write_xlfile(xl_file, "Daily (CO2,H2O)", fluxes_dict)
     L6_summary_write_ncfile(nc_file, "Daily_CO2_H2O", fluxes_dict)
     # monthly averages and totals
-    monthly_dict = L6_summary_monthly(ds, series_dict)
+    monthly_dict = L6_summary_monthly(ds, series_dict, groups)
     L6_summary_write_xlfile(xl_file, "Monthly", monthly_dict)
     L6_summary_write_ncfile(nc_file, "Monthly", monthly_dict)
     # annual averages and totals
-    annual_dict = L6_summary_annual(ds, series_dict)
+    annual_dict = L6_summary_annual(ds, series_dict, groups)
     L6_summary_write_xlfile(xl_file, "Annual", annual_dict)
     L6_summary_write_ncfile(nc_file, "Annual", annual_dict)
     # cumulative totals
-    cumulative_dict = L6_summary_cumulative(ds, series_dict)
+    cumulative_dict = L6_summary_cumulative(ds, series_dict, groups)
     for year in cumulative_dict.keys():
         L6_summary_write_xlfile(xl_file, "Cummulative("+str(year)+")", cumulative_dict[str(year)])
         L6_summary_write_ncfile(nc_file, "Cummulative_"+str(year), cumulative_dict[str(year)])
@@ -1339,29 +1339,154 @@ def L6_summary_createseriesdict(cf,ds):
     series_dict["monthly"] = series_dict["daily"]
     return series_dict
 
-def L6_summary_daily(ds, series_dict):
+def L6_summary_groups(ds, series_dict):
+    """
+    Purpose:
+     Read the data and find the days, months and years used by the L6
+     summaries, once for all of the summaries.  Each variable in series_dict
+     is read once and the CO2 fluxes are converted to gC/m2 once for the whole
+     record.  The start and end indices of each day, month and year are found
+     once and turned into an integer group code for each record so that the
+     sums and averages for all periods are done in one pass per variable.
+    Usage:
+     groups = L6_summary_groups(ds, series_dict)
+     where ds is an OzFluxQC data structure
+           series_dict is a dictionary of various variable lists
+           groups is a dictionary containing the variables and the "daily",
+           "monthly" and "annual" periods
+    Author: PRI
+    Date: October 2026
+    """
+    dt = ds.series["DateTime"]["Data"]
+    nrecs = len(dt)
+    ts = int(ds.globalattributes["time_step"])
+    di = pfp_utils.get_date_index(ds)
+    groups = {"variables": {}}
+    # read the variables and convert the CO2 fluxes to gC/m2
+    labels = sorted(set(series_dict["daily"].keys() + series_dict["cumulative"].keys()))
+    for label in labels:
+        if label not in ds.series.keys(): continue
+        variable = pfp_utils.GetVariable(ds, label)
+        if label in series_dict["lists"]["co2"]:
+            variable = pfp_utils.convert_units_func(ds, variable, "gC/m2")
+        groups["variables"][label] = variable
+    # whole days from the start of the first day to the end of the last day
+    si = di.find(dt[0], default=0, match="startnextday")
+    ei = di.find(dt[-1], default=nrecs-1, match="endpreviousday")
+    ntsInDay = int(24.0*60.0/float(ts))
+    nDays = int(ei-si+1)/ntsInDay
+    day_si = si + ntsInDay*numpy.arange(nDays)
+    groups["daily"] = L6_summary_period(nrecs, day_si, day_si+ntsInDay-1)
+    groups["daily"]["DateTime"] = [dt[si]+datetime.timedelta(days=i) for i in range(0,nDays)]
+    # years from the start of the first day to the end of the last day
+    year_list = range(dt[si].year, dt[ei].year+1, 1)
+    year_si, year_ei = [], []
+    for year in year_list:
+        if ts==30:
+            start_date = str(year)+"-01-01 00:30"
+        elif ts==60:
+            start_date = str(year)+"-01-01 01:00"
+        end_date = str(year+1)+"-01-01 00:00"
+        year_si.append(di.find(start_date, default=0))
+        year_ei.append(di.find(end_date, default=nrecs-1))
+    groups["annual"] = L6_summary_period(nrecs, year_si, year_ei)
+    groups["annual"]["years"] = year_list
+    # months from the start of the first whole month
+    si = di.find(dt[0], default=0, match="startnextmonth")
+    month_si, month_ei = [], []
+    start_date = dt[si]
+    end_date = start_date+dateutil.relativedelta.relativedelta(months=1)
+    end_date = end_date-dateutil.relativedelta.relativedelta(minutes=ts)
+    while start_date<=dt[-1]:
+        # *** The Elise Pendall bug fix ***
+        month_si.append(di.find(start_date, default=0))
+        month_ei.append(di.find(end_date, default=nrecs-1))
+        start_date = end_date+dateutil.relativedelta.relativedelta(minutes=ts)
+        end_date = start_date+dateutil.relativedelta.relativedelta(months=1)
+        end_date = end_date-dateutil.relativedelta.relativedelta(minutes=ts)
+    groups["monthly"] = L6_summary_period(nrecs, month_si, month_ei)
+    groups["monthly"]["DateTime"] = [dt[i] for i in month_si]
+    return groups
+
+def L6_summary_period(nrecs, si, ei):
+    """
+    Purpose:
+     Return a dictionary with the start and end indices of a set of periods
+     and the group code of each record, this is the number of the period the
+     record belongs to or -1 if it is not in any period.  The group codes are
+     set to None if the periods overlap.
+    Usage:
+     period = L6_summary_period(nrecs, si, ei)
+     where nrecs is the number of records
+           si, ei are the start and end indices of each period (inclusive)
+    Author: PRI
+    Date: October 2026
+    """
+    si = numpy.array(si, dtype=numpy.int64)
+    ei = numpy.array(ei, dtype=numpy.int64)
+    period = {"si": si, "ei": ei, "codes": None}
+    if numpy.all(ei >= si) and numpy.all(si[1:] > ei[:-1]):
+        codes = numpy.full(nrecs, -1, dtype=numpy.int64)
+        for n in range(len(si)):
+            codes[si[n]:ei[n]+1] = n
+        period["codes"] = codes
+    return period
+
+def L6_summary_reduce(data, period, operator):
+    """
+    Purpose:
+     Return the sum or the average of a masked array over each period as
+     a masked array, periods with no data are masked.  The sums and counts
+     for all periods are done in one pass using numpy.bincount unless the
+     periods overlap, in which case each period is done in turn.
+    Usage:
+     result = L6_summary_reduce(data, period, operator)
+     where data is a masked array for the whole record
+           period is a dictionary returned by L6_summary_period
+           operator is "sum" or "average"
+    Author: PRI
+    Date: October 2026
+    """
+    valid = ~numpy.ma.getmaskarray(data)
+    values = numpy.ma.getdata(data)
+    nperiods = len(period["si"])
+    if period["codes"] is not None:
+        use = valid & (period["codes"] >= 0)
+        codes = period["codes"][use]
+        count = numpy.bincount(codes, minlength=nperiods)
+        total = numpy.bincount(codes, weights=values[use], minlength=nperiods)
+    else:
+        count = numpy.zeros(nperiods, dtype=numpy.int64)
+        total = numpy.zeros(nperiods, dtype=numpy.float64)
+        for n in range(nperiods):
+            si, ei = period["si"][n], period["ei"][n]
+            count[n] = numpy.count_nonzero(valid[si:ei+1])
+            total[n] = numpy.sum(values[si:ei+1][valid[si:ei+1]])
+    if operator == "average":
+        total = total/numpy.maximum(count, 1)
+    return numpy.ma.masked_where(count == 0, total)
+
+def L6_summary_daily(ds, series_dict, groups):
     """
     Purpose:
      Calculate the daily averages or sums of various quantities and write
      them to a worksheet in an Excel workbook.
     Usage:
-     L6_summary_daily(ds, series_dict)
+     L6_summary_daily(ds, series_dict, groups)
      where ds is an OzFluxQC data structure
            series_dict is a dictionary of various variable lists
+           groups is the dictionary returned by L6_summary_groups
     Author: PRI
     Date: June 2015
+          October 2026 - use the groups from L6_summary_groups
     """
     logger.info(" Doing the daily summary (data) at L6")
-    dt = ds.series["DateTime"]["Data"]
-    ts = int(ds.globalattributes["time_step"])
-    si = pfp_utils.GetDateIndex(dt,str(dt[0]),ts=ts,default=0,match="startnextday")
-    ei = pfp_utils.GetDateIndex(dt,str(dt[-1]),ts=ts,default=len(dt)-1,match="endpreviousday")
-    ldt = dt[si:ei+1]
-    ntsInDay = int(24.0*60.0/float(ts))
-    nDays = int(len(ldt))/ntsInDay
+    period = groups["daily"]
+    ldt_daily = period["DateTime"]
+    nDays = len(ldt_daily)
+    ntsInDay = int(24.0*60.0/float(ds.globalattributes["time_step"]))
     # create an empty data array and an array of zeros for the flag
     f0 = numpy.zeros(nDays, dtype=numpy.int32)
-    ldt_daily = [ldt[0]+datetime.timedelta(days=i) for i in range(0,nDays)]
     # create a dictionary to hold the daily statistics
     daily_dict = {"globalattributes":{},"variables":{}}
     # copy the global attributes
@@ -1376,17 +1501,15 @@ def L6_summary_daily(ds, series_dict):
     for item in series_list:
         if item not in ds.series.keys(): continue
         daily_dict["variables"][item] = {"data":[],"attr":{}}
-        variable = pfp_utils.GetVariable(ds, item, start=si, end=ei)
+        variable = groups["variables"][item]
         if item in series_dict["lists"]["co2"]:
-            variable = pfp_utils.convert_units_func(ds, variable, "gC/m2")
             daily_dict["variables"][item]["attr"]["units"] = "gC/m2"
         else:
             daily_dict["variables"][item]["attr"]["units"] = variable["Attr"]["units"]
-        data_2d = variable["Data"].reshape(nDays, ntsInDay)
         if series_dict["daily"][item]["operator"].lower() == "average":
-            daily_dict["variables"][item]["data"] = numpy.ma.average(data_2d, axis=1)
+            daily_dict["variables"][item]["data"] = L6_summary_reduce(variable["Data"], period, "average")
         elif series_dict["daily"][item]["operator"].lower() == "sum":
-            daily_dict["variables"][item]["data"] = numpy.ma.sum(data_2d, axis=1)
+            daily_dict["variables"][item]["data"] = L6_summary_reduce(variable["Data"], period, "sum")
             daily_dict["variables"][item]["attr"]["units"] = daily_dict["variables"][item]["attr"]["units"]+"/day"
         else:
             msg = "Unrecognised operator ("+series_dict["daily"][item]["operator"]
@@ -1396,10 +1519,8 @@ def L6_summary_daily(ds, series_dict):
         # add the format to be used
         daily_dict["variables"][item]["attr"]["format"] = series_dict["daily"][item]["format"]
         # now do the flag, this is the fraction of data with QC flag = 0 in the day
-        daily_dict["variables"][item]["flag"] = numpy.zeros(nDays, dtype=numpy.float64)
-        flag_2d = variable["Flag"].reshape(nDays, ntsInDay)
-        for i in range(nDays):
-            daily_dict["variables"][item]["flag"][i] = 1-float(numpy.count_nonzero(flag_2d[i,:]))/float(ntsInDay)
+        flagged = numpy.ma.masked_array(numpy.where(variable["Flag"] != 0, 1.0, 0.0))
+        daily_dict["variables"][item]["flag"] = 1-L6_summary_reduce(flagged, period, "sum").filled(0)/float(ntsInDay)
     return daily_dict
 
 def L6_summary_co2andh2o_fluxes(ds, series_dict, daily_dict):
@@ -1446,27 +1567,26 @@ def L6_summary_write_xlfile(xl_file,sheet_name,data_dict):
     xl_sheet = xl_file.add_sheet(sheet_name)
     pfp_io.xl_write_data(xl_sheet,data_dict["variables"])
 
-def L6_summary_monthly(ds,series_dict):
+def L6_summary_monthly(ds, series_dict, groups):
     """
     Purpose:
      Calculate the monthly averages or sums of various quantities and write
      them to a worksheet in an Excel workbook.
     Usage:
-     L6_summary_monthly(ds,series_dict)
+     L6_summary_monthly(ds, series_dict, groups)
      where ds is an OzFluxQC data structure
            series_dict is a dictionary of various variable lists
+           groups is the dictionary returned by L6_summary_groups
     Author: PRI
     Date: July 2015
+          October 2026 - use the groups from L6_summary_groups
     """
     logger.info(" Doing the monthly summaries at L6")
-    dt = ds.series["DateTime"]["Data"]
-    ts = int(ds.globalattributes["time_step"])
-    si = pfp_utils.GetDateIndex(dt,str(dt[0]),ts=ts,default=0,match="startnextmonth")
-    ldt = dt[si:]
+    period = groups["monthly"]
     monthly_dict = {"globalattributes":{}, "variables":{}}
     # copy the global attributes
     monthly_dict["globalattributes"] = copy.deepcopy(ds.globalattributes)
-    monthly_dict["variables"]["DateTime"] = {"data":[],
+    monthly_dict["variables"]["DateTime"] = {"data":period["DateTime"],
                                              "flag":numpy.array([]),
                                              "attr":{"units":"Months", "format":"dd/mm/yyyy",
                                                      "time_step":"Monthly"}}
@@ -1478,62 +1598,44 @@ def L6_summary_monthly(ds,series_dict):
         monthly_dict["variables"][item] = {"data":numpy.ma.array([]),
                                            "flag":numpy.array([]),
                                            "attr":{"units":'',"format":''}}
-    # loop over the months in the data file
-    start_date = ldt[0]
-    end_date = start_date+dateutil.relativedelta.relativedelta(months=1)
-    end_date = end_date-dateutil.relativedelta.relativedelta(minutes=ts)
-    last_date = ldt[-1]
-    while start_date<=last_date:
-        # *** The Elise Pendall bug fix ***
-        si = pfp_utils.GetDateIndex(dt, str(start_date), ts=ts, default=0)
-        ei = pfp_utils.GetDateIndex(dt, str(end_date), ts=ts, default=len(dt)-1)
-        monthly_dict["variables"]["DateTime"]["data"].append(dt[si])
-        for item in series_list:
-            if item not in ds.series.keys(): continue
-            variable = pfp_utils.GetVariable(ds, item, start=si, end=ei)
-            if item in series_dict["lists"]["co2"]:
-                variable = pfp_utils.convert_units_func(ds, variable, "gC/m2")
-                monthly_dict["variables"][item]["attr"]["units"] = "gC/m2"
-            else:
-                monthly_dict["variables"][item]["attr"]["units"] = variable["Attr"]["units"]
-            if series_dict["monthly"][item]["operator"].lower()=="average":
-                monthly_dict["variables"][item]["data"] = numpy.append(monthly_dict["variables"][item]["data"],
-                                                                       numpy.ma.average(variable["Data"]))
-            elif series_dict["monthly"][item]["operator"].lower()=="sum":
-                monthly_dict["variables"][item]["data"] = numpy.append(monthly_dict["variables"][item]["data"],
-                                                                       numpy.ma.sum(variable["Data"]))
-                monthly_dict["variables"][item]["attr"]["units"] = monthly_dict["variables"][item]["attr"]["units"]+"/month"
-            else:
-                msg = "L6_summary_monthly: unrecognised operator"
-                logger.error(msg)
-            monthly_dict["variables"][item]["attr"]["format"] = series_dict["monthly"][item]["format"]
-        start_date = end_date+dateutil.relativedelta.relativedelta(minutes=ts)
-        end_date = start_date+dateutil.relativedelta.relativedelta(months=1)
-        end_date = end_date-dateutil.relativedelta.relativedelta(minutes=ts)
+    # sums and averages for all months in one pass for each series
+    for item in series_list:
+        if item not in ds.series.keys(): continue
+        variable = groups["variables"][item]
+        if item in series_dict["lists"]["co2"]:
+            monthly_dict["variables"][item]["attr"]["units"] = "gC/m2"
+        else:
+            monthly_dict["variables"][item]["attr"]["units"] = variable["Attr"]["units"]
+        if series_dict["monthly"][item]["operator"].lower()=="average":
+            monthly_dict["variables"][item]["data"] = L6_summary_reduce(variable["Data"], period, "average")
+        elif series_dict["monthly"][item]["operator"].lower()=="sum":
+            monthly_dict["variables"][item]["data"] = L6_summary_reduce(variable["Data"], period, "sum")
+            monthly_dict["variables"][item]["attr"]["units"] = monthly_dict["variables"][item]["attr"]["units"]+"/month"
+        else:
+            msg = "L6_summary_monthly: unrecognised operator"
+            logger.error(msg)
+        monthly_dict["variables"][item]["attr"]["format"] = series_dict["monthly"][item]["format"]
     return monthly_dict
 
-def L6_summary_annual(ds, series_dict):
+def L6_summary_annual(ds, series_dict, groups):
     """
     Purpose:
      Calculate the annual averages or sums of various quantities and write
      them to a worksheet in an Excel workbook.
     Usage:
-     L6_summary_annual(ds,series_dict)
+     L6_summary_annual(ds, series_dict, groups)
      where ds is an OzFluxQC data structure
            series_dict is a dictionary of various variable lists
+           groups is the dictionary returned by L6_summary_groups
     Author: PRI
     Date: June 2015
+          October 2026 - use the groups from L6_summary_groups
     """
     logger.info(" Doing the annual summaries at L6")
-    dt = ds.series["DateTime"]["Data"]
     ts = int(ds.globalattributes["time_step"])
     nperDay = int(24/(float(ts)/60.0)+0.5)
-    si = pfp_utils.GetDateIndex(dt, str(dt[0]), ts=ts, default=0, match="startnextday")
-    ei = pfp_utils.GetDateIndex(dt, str(dt[-1]), ts=ts, default=len(dt)-1, match="endpreviousday")
-    ldt = dt[si:ei+1]
-    start_year = ldt[0].year
-    end_year = ldt[-1].year
-    year_list = range(start_year, end_year+1, 1)
+    period = groups["annual"]
+    year_list = period["years"]
     nYears = len(year_list)
     annual_dict = {"globalattributes":{}, "variables":{}}
     # copy the global attributes
@@ -1545,6 +1647,7 @@ def L6_summary_annual(ds, series_dict):
     annual_dict["variables"]["nDays"] = {"data":numpy.full(nYears, c.missing_value, dtype=numpy.float64),
                                          "flag":numpy.zeros(nYears, dtype=numpy.int32),
                                          "attr":{"units":"Number of days","format":"0"}}
+    annual_dict["variables"]["nDays"]["data"][:] = ((period["ei"]-period["si"]+1)/nperDay+0.5).astype(numpy.int64)
     # create arrays in annual_dict
     series_list = series_dict["annual"].keys()
     series_list.sort()
@@ -1552,70 +1655,49 @@ def L6_summary_annual(ds, series_dict):
         annual_dict["variables"][item] = {"data":numpy.ma.array([float(-9999)]*len(year_list)),
                                           "flag":numpy.zeros(nYears, dtype=numpy.int32),
                                           "attr":{"units":"Number of days","format":"0"}}
-    for i,year in enumerate(year_list):
-        if ts==30:
-            start_date = str(year)+"-01-01 00:30"
-        elif ts==60:
-            start_date = str(year)+"-01-01 01:00"
-        end_date = str(year+1)+"-01-01 00:00"
-        si = pfp_utils.GetDateIndex(dt,start_date,ts=ts,default=0)
-        ei = pfp_utils.GetDateIndex(dt,end_date,ts=ts,default=len(dt)-1)
-        nDays = int((ei-si+1)/nperDay+0.5)
-        annual_dict["variables"]["nDays"]["data"][i] = nDays
-        for item in series_list:
-            if item not in ds.series.keys(): continue
-            variable = pfp_utils.GetVariable(ds, item, start=si, end=ei)
-            if item in series_dict["lists"]["co2"]:
-                variable = pfp_utils.convert_units_func(ds, variable, "gC/m2")
-                annual_dict["variables"][item]["attr"]["units"] = "gC/m2"
-            else:
-                annual_dict["variables"][item]["attr"]["units"] = variable["Attr"]["units"]
-            if series_dict["annual"][item]["operator"].lower()=="average":
-                annual_dict["variables"][item]["data"][i] = numpy.ma.average(variable["Data"])
-            elif series_dict["annual"][item]["operator"].lower()=="sum":
-                annual_dict["variables"][item]["data"][i] = numpy.ma.sum(variable["Data"])
-                annual_dict["variables"][item]["attr"]["units"] = annual_dict["variables"][item]["attr"]["units"]+"/year"
-            else:
-                msg = "L6_summary_annual: unrecognised operator"
-                logger.error(msg)
-            annual_dict["variables"][item]["attr"]["format"] = series_dict["annual"][item]["format"]
+    # sums and averages for all years in one pass for each series
+    for item in series_list:
+        if item not in ds.series.keys(): continue
+        variable = groups["variables"][item]
+        if item in series_dict["lists"]["co2"]:
+            annual_dict["variables"][item]["attr"]["units"] = "gC/m2"
+        else:
+            annual_dict["variables"][item]["attr"]["units"] = variable["Attr"]["units"]
+        if series_dict["annual"][item]["operator"].lower()=="average":
+            annual_dict["variables"][item]["data"][:] = L6_summary_reduce(variable["Data"], period, "average")
+        elif series_dict["annual"][item]["operator"].lower()=="sum":
+            annual_dict["variables"][item]["data"][:] = L6_summary_reduce(variable["Data"], period, "sum")
+            annual_dict["variables"][item]["attr"]["units"] = annual_dict["variables"][item]["attr"]["units"]+"/year"
+        else:
+            msg = "L6_summary_annual: unrecognised operator"
+            logger.error(msg)
+        annual_dict["variables"][item]["attr"]["format"] = series_dict["annual"][item]["format"]
     return annual_dict
 
-def L6_summary_cumulative(ds, series_dict):
+def L6_summary_cumulative(ds, series_dict, groups):
     """
     Purpose:
      Calculate the cumulative sums of various quantities and write
      them to a worksheet in an Excel workbook.
     Usage:
-     L6_summary_cumulative(xl_file,ds,series_dict)
-     where xl_file is an Excel file object
-           ds is an OzFluxQC data structure
+     L6_summary_cumulative(ds, series_dict, groups)
+     where ds is an OzFluxQC data structure
            series_dict is a dictionary of various variable lists
+           groups is the dictionary returned by L6_summary_groups
     Author: PRI
     Date: June 2015
+          October 2026 - use the groups from L6_summary_groups
     """
     logger.info(" Doing the cumulative summaries at L6")
     dt = ds.series["DateTime"]["Data"]
     ts = int(ds.globalattributes["time_step"])
-    si = pfp_utils.GetDateIndex(dt, str(dt[0]), ts=ts, default=0, match="startnextday")
-    ei = pfp_utils.GetDateIndex(dt, str(dt[-1]), ts=ts, default=len(dt)-1, match="endpreviousday")
-    ldt = dt[si:ei+1]
-    start_year = ldt[0].year
-    end_year = ldt[-1].year
-    year_list = range(start_year, end_year+1, 1)
+    period = groups["annual"]
     series_list = series_dict["cumulative"].keys()
     cumulative_dict = {}
-    for year in year_list:
+    for year, si, ei in zip(period["years"], period["si"], period["ei"]):
         cumulative_dict[str(year)] = cdyr = {"globalattributes":{}, "variables":{}}
         # copy the global attributes
         cdyr["globalattributes"] = copy.deepcopy(ds.globalattributes)
-        if ts==30:
-            start_date = str(year)+"-01-01 00:30"
-        elif ts==60:
-            start_date = str(year)+"-01-01 01:00"
-        end_date = str(year+1)+"-01-01 00:00"
-        si = pfp_utils.GetDateIndex(dt, start_date, ts=ts, default=0)
-        ei = pfp_utils.GetDateIndex(dt, end_date, ts=ts, default=len(dt)-1)
         ldt = dt[si:ei+1]
         f0 = numpy.zeros(len(ldt), dtype=numpy.int32)
         cdyr["variables"]["DateTime"] = {"data":ldt,"flag":f0,
@@ -1623,13 +1705,12 @@ def L6_summary_cumulative(ds, series_dict):
                                                  "time_step":str(ts)}}
         for item in series_list:
             cdyr["variables"][item] = {"data":[],"attr":{}}
-            variable = pfp_utils.GetVariable(ds, item, start=si, end=ei)
+            variable = groups["variables"][item]
             if item in series_dict["lists"]["co2"]:
-                variable = pfp_utils.convert_units_func(ds, variable, "gC/m2")
                 cdyr["variables"][item]["attr"]["units"] = "gC/m2"
             else:
                 cdyr["variables"][item]["attr"]["units"] = variable["Attr"]["units"]
-            cdyr["variables"][item]["data"] = numpy.ma.cumsum(variable["Data"])
+            cdyr["variables"][item]["data"] = numpy.ma.cumsum(variable["Data"][si:ei+1])
             cdyr["variables"][item]["attr"]["format"] = series_dict["cumulative"][item]["format"]
             cdyr["variables"][item]["attr"]["units"] = cdyr["variables"][item]["attr"]["units"]+"/year"
     return cumulative_dict
@@ -2,6 +2,7 @@
 # standard modules
 import datetime
 import logging
+import multiprocessing
 import os
 import warnings
 # 3rd party modules
@@ -67,149 +68,256 @@ def interp_params(param_rslt_array):
 
     return arr
 
+def get_windows(ldt, time_step, window_size_days, step_size_days):
+    """
+    Purpose:
+     Return the dates and the start and end indices of the windows used by
+     get_LT_params and get_LL_params.  The first window is window_size_days
+     long, each window starts window_size_days after the start of the one
+     before and the later windows are step_size_days long.  On a regular time
+     step the indices are calculated from the time step, otherwise they are
+     found using pfp_utils.DateIndex.
+    Usage:
+     windows = pfp_rpLL.get_windows(ldt, time_step, window_size_days, step_size_days)
+     where ldt is the datetime series
+           time_step is the time step in minutes
+           windows is a dictionary with "start_date", "mid_date" and "end_date"
+           arrays of datetimes and "si" and "ei" arrays of indices
+    Author: PRI
+    Date: October 2026
+    """
+    window = datetime.timedelta(days=window_size_days)
+    step = datetime.timedelta(days=step_size_days)
+    start_dates = []
+    end_dates = []
+    start_date = ldt[0]
+    end_date = start_date + window
+    while end_date <= ldt[-1]:
+        start_dates.append(start_date)
+        end_dates.append(end_date)
+        start_date = start_date + window
+        end_date = start_date + step
+    nwindows = len(start_dates)
+    windows = {"start_date": numpy.empty(nwindows, dtype=object),
+               "mid_date": numpy.empty(nwindows, dtype=object),
+               "end_date": numpy.empty(nwindows, dtype=object)}
+    windows["start_date"][:] = start_dates
+    windows["end_date"][:] = end_dates
+    windows["mid_date"][:] = [sd + (ed - sd)/2 for sd, ed in zip(start_dates, end_dates)]
+    di = pfp_utils.DateIndex(ldt, ts=time_step)
+    if di.regular:
+        for item, dates in zip(["si", "ei"], [start_dates, end_dates]):
+            us = numpy.array(dates, dtype="datetime64[us]").astype(numpy.int64)
+            windows[item] = ((us - di.us[0] + di.step//2)//di.step).astype(numpy.int64)
+    else:
+        windows["si"] = numpy.array([di.find(sd) for sd in start_dates], dtype=numpy.int64)
+        windows["ei"] = numpy.array([di.find(ed) for ed in end_dates], dtype=numpy.int64)
+    return windows
+
+def get_nearest_index(dates, values):
+    """
+    Purpose:
+     Return the index of the element of the sorted datetime array dates that
+     is nearest to each element of values.  Ties go to the earlier date.
+    Usage:
+     idx = pfp_rpLL.get_nearest_index(dates, values)
+    Author: PRI
+    Date: October 2026
+    """
+    dates = numpy.array(list(dates), dtype="datetime64[us]").astype(numpy.int64)
+    values = numpy.array(list(values), dtype="datetime64[us]").astype(numpy.int64)
+    right = numpy.searchsorted(dates, values, side="left")
+    left = numpy.clip(right - 1, 0, len(dates) - 1)
+    right = numpy.clip(right, 0, len(dates) - 1)
+    use_right = numpy.abs(dates[right] - values) < numpy.abs(dates[left] - values)
+    return numpy.where(use_right, right, left)
+
 def get_LL_params(ldt, Fsd, D, T, NEE, ER, LT_results, l6_info, output):
-    # Lasslop as it was written in Lasslop et al (2010), mostly ...
-    # Actually, the only intended difference is the window length and offset
-    # Lasslop et al used window_length=4, window_offset=2
+    """
+    Purpose:
+     Returns the Lasslop light response parameters for each window.
+     The window indices are calculated once and the result arrays are
+     allocated before the windows are fitted.  The fits for each window are
+     done by get_LL_params_window, in a pool of worker processes if the
+     "workers" option is greater than 1.
+     Lasslop as it was written in Lasslop et al (2010), mostly ...
+     Actually, the only intended difference is the window length and offset
+     Lasslop et al used window_length=4, window_offset=2
+    Usage:
+    Author: PRI
+    Date: Back in the day
+          October 2026 - preallocated results, windows fitted in parallel
+    """
     # local pointers to entries in the info dictionary
     iel = l6_info["ERUsingLasslop"]
     ielo = iel["outputs"]
     ieli = iel["info"]
-    # window and step sizes
-    window_size_days = ielo[output]["window_size_days"]
-    step_size_days = ielo[output]["step_size_days"]
-    # initialise results, missed dates and prior dictionaries
-    mta = numpy.array([])
-    LL_results = {"start_date": mta, "mid_date": mta, "end_date": mta,
-                  "alpha": mta, "beta": mta, "k": mta, "rb": mta,
-                  "alpha_low": mta, "rb_low": mta, "rb_prior": mta, "E0": mta}
-    LL_prior = {"rb":1.0, "alpha":0.01, "beta":10, "k":0}
-    LL_fixed = {"D0":1}
-    D0 = LL_fixed["D0"]
-    drivers = {}
-    start_date = ldt[0]
-    last_date = ldt[-1]
-    end_date = start_date+datetime.timedelta(days=window_size_days)
-    while end_date <= last_date:
-        sub_results = {"RMSE":[], "alpha":[], "beta":[], "k":[], "rb":[]}
-        si = pfp_utils.GetDateIndex(ldt, str(start_date), ts=ieli["time_step"])
-        ei = pfp_utils.GetDateIndex(ldt, str(end_date), ts=ieli["time_step"])
-        drivers["Fsd"] = numpy.ma.compressed(Fsd[si:ei+1])
-        drivers["D"] = numpy.ma.compressed(D[si:ei+1])
-        drivers["T"] = numpy.ma.compressed(T[si:ei+1])
+    workers = int(ieli.get("workers", 1))
+    # get the windows and initialise the results dictionary
+    windows = get_windows(ldt, ieli["time_step"], ielo[output]["window_size_days"],
+                          ielo[output]["step_size_days"])
+    nwindows = len(windows["start_date"])
+    LL_results = {"start_date": windows["start_date"], "mid_date": windows["mid_date"],
+                  "end_date": windows["end_date"]}
+    for item in ["alpha", "beta", "k", "rb", "alpha_low", "rb_low", "rb_prior"]:
+        LL_results[item] = numpy.full(nwindows, numpy.nan)
+    # get the value of E0 for the period closest to the mid-point of each window
+    idx = get_nearest_index(LT_results["mid_date"], LL_results["mid_date"])
+    LL_results["E0"] = numpy.array(LT_results["E0_int"], dtype=numpy.float64)[idx]
+    D0 = 1
+    # the prior for rb is carried forward from the last window with enough data
+    rb_prior = 1.0
+    jobs = []
+    previous_fitted = False
+    for n in range(nwindows):
+        si, ei = windows["si"][n], windows["ei"][n]
+        drivers = {"Fsd": numpy.ma.compressed(Fsd[si:ei+1]),
+                   "D": numpy.ma.compressed(D[si:ei+1]),
+                   "T": numpy.ma.compressed(T[si:ei+1])}
         NEEsub = numpy.ma.compressed(NEE[si:ei+1])
         ERsub = numpy.ma.compressed(ER[si:ei+1])
-        mid_date = start_date+(end_date-start_date)/2
-        # get the value of E0 for the period closest to the mid-point of this period
-        diffs = [abs(dt-mid_date) for dt in LT_results["mid_date"]]
-        val, idx = min((val, idx) for (idx, val) in enumerate(diffs))
-        LL_results["E0"] = numpy.append(LL_results["E0"], LT_results["E0_int"][idx])
-        LL_results["start_date"] = numpy.append(LL_results["start_date"], start_date)
-        LL_results["mid_date"] = numpy.append(LL_results["mid_date"], mid_date)
-        LL_results["end_date"] = numpy.append(LL_results["end_date"], end_date)
         if len(NEEsub) >= 10:
-            # alpha and rb from linear fit between NEE and Fsd at low light levels
-            idx = numpy.where(drivers["Fsd"] < 100)[0]
-            if len(idx) >= 2:
-                alpha_low, rb_low = numpy.polyfit(drivers["Fsd"][idx], NEEsub[idx], 1)
-            else:
-                alpha_low, rb_low = numpy.nan, numpy.nan
-            if len(ERsub) >= 10: LL_prior["rb"] = numpy.mean(ERsub)
-            for bm in [0.5, 1,2]:
-                LL_prior["beta"] = numpy.abs(numpy.percentile(NEEsub, 3)-numpy.percentile(NEEsub, 97))
-                LL_prior["beta"] = bm*LL_prior["beta"]
-                E0 = LL_results["E0"][-1]
-                p0 = [LL_prior["alpha"],LL_prior["beta"],LL_prior["k"],LL_prior["rb"]]
-                try:
-                    fopt = lambda x,alpha,beta,k,rb:NEE_RHLRC_D(x,alpha,beta,k,D0,rb,E0)
-                    popt,pcov = curve_fit(fopt,drivers,NEEsub,p0=p0)
-                    alpha,beta,k,rb = popt[0],popt[1],popt[2],popt[3]
-                    last_alpha_OK = True
-                except RuntimeError:
-                    alpha,beta,k,rb = numpy.nan,numpy.nan,numpy.nan,numpy.nan
-                    last_alpha_OK = False
-                # QC the parameters
-                # k first
-                if numpy.isnan(k) or k<0 or k>2:
-                    k = 0
-                    try:
-                        p0 = [LL_prior["alpha"],LL_prior["beta"],LL_prior["rb"]]
-                        fopt = lambda x,alpha,beta,rb:NEE_RHLRC_D(x,alpha,beta,k,D0,rb,E0)
-                        popt,pcov = curve_fit(fopt,drivers,NEEsub,p0=p0)
-                        alpha,beta,rb = popt[0],popt[1],popt[2]
-                        last_alpha_OK = True
-                    except RuntimeError:
-                        alpha,beta,k,rb = numpy.nan,numpy.nan,numpy.nan,numpy.nan
-                        last_alpha_OK = False
-                # then alpha
-                if numpy.isnan(alpha) or alpha<0 or alpha>0.22:
-                    if last_alpha_OK==True and len(LL_results["alpha"]) > 0:
-                        alpha = LL_results["alpha"][-1]
-                    else:
-                        alpha = 0
-                    try:
-                        p0 = [LL_prior["beta"],LL_prior["k"],LL_prior["rb"]]
-                        fopt = lambda x,beta,k,rb:NEE_RHLRC_D(x,alpha,beta,k,D0,rb,E0)
-                        popt,pcov = curve_fit(fopt,drivers,NEEsub,p0=p0)
-                        beta,k,rb = popt[0],popt[1],popt[2]
-                    except RuntimeError:
-                        alpha,beta,k,rb = numpy.nan,numpy.nan,numpy.nan,numpy.nan
-                # then beta
-                if beta<0:
-                    beta = 0
-                    try:
-                        p0 = [LL_prior["alpha"],LL_prior["k"],LL_prior["rb"]]
-                        fopt = lambda x,alpha,k,rb:NEE_RHLRC_D(x,alpha,beta,k,D0,rb,E0)
-                        popt,pcov = curve_fit(fopt,drivers,NEEsub,p0=p0)
-                        alpha,k,rb = popt[0],popt[1],popt[2]
-                    except RuntimeError:
-                        alpha,beta,k,rb = numpy.nan,numpy.nan,numpy.nan,numpy.nan
-                elif beta>250:
-                    alpha,beta,k,rb = numpy.nan,numpy.nan,numpy.nan,numpy.nan
-                # and finally rb
-                if rb<0:
-                    alpha,beta,k,rb = numpy.nan,numpy.nan,numpy.nan,numpy.nan
-                # now get the RMSE for this set of parameters
-                if not numpy.isnan(alpha) and not numpy.isnan(beta) and not numpy.isnan(k) and not numpy.isnan(rb):
-                    NEEest = NEE_RHLRC_D(drivers,alpha,beta,k,D0,rb,E0)
-                    sub_results["RMSE"].append(numpy.sqrt(numpy.mean((NEEsub-NEEest)**2)))
-                    sub_results["alpha"].append(alpha)
-                    sub_results["beta"].append(beta)
-                    sub_results["k"].append(k)
-                    sub_results["rb"].append(rb)
-            # now find the minimum RMSE and the set of parameters for the minimum
-            if len(sub_results["RMSE"])!=0:
-                min_RMSE = min(sub_results["RMSE"])
-                idx = sub_results["RMSE"].index(min_RMSE)
-                LL_results["alpha"] = numpy.append(LL_results["alpha"],sub_results["alpha"][idx])
-                LL_results["alpha_low"] = numpy.append(LL_results["alpha_low"],float(-1)*alpha_low)
-                LL_results["rb"] = numpy.append(LL_results["rb"],sub_results["rb"][idx])
-                LL_results["rb_low"] = numpy.append(LL_results["rb_low"],rb_low)
-                LL_results["rb_prior"] = numpy.append(LL_results["rb_prior"],LL_prior["rb"])
-                LL_results["beta"] = numpy.append(LL_results["beta"],sub_results["beta"][idx])
-                LL_results["k"] = numpy.append(LL_results["k"],sub_results["k"][idx])
+            if len(ERsub) >= 10: rb_prior = numpy.mean(ERsub)
+            # alpha from the previous window is 0 for the first window, NaN if
+            # the previous window was not fitted and otherwise not known yet
+            if n == 0:
+                previous_alpha = 0.0
+            elif not previous_fitted:
+                previous_alpha = numpy.nan
             else:
-                LL_results["alpha"] = numpy.append(LL_results["alpha"],numpy.nan)
-                LL_results["alpha_low"] = numpy.append(LL_results["alpha_low"],float(-1)*alpha_low)
-                LL_results["rb"] = numpy.append(LL_results["rb"],numpy.nan)
-                LL_results["rb_low"] = numpy.append(LL_results["rb_low"],rb_low)
-                LL_results["rb_prior"] = numpy.append(LL_results["rb_prior"],LL_prior["rb"])
-                LL_results["beta"] = numpy.append(LL_results["beta"],numpy.nan)
-                LL_results["k"] = numpy.append(LL_results["k"],numpy.nan)
-        else:
-            LL_results["alpha"] = numpy.append(LL_results["alpha"],numpy.nan)
-            LL_results["alpha_low"] = numpy.append(LL_results["alpha_low"],numpy.nan)
-            LL_results["rb"] = numpy.append(LL_results["rb"],numpy.nan)
-            LL_results["rb_low"] = numpy.append(LL_results["rb_low"],numpy.nan)
-            LL_results["rb_prior"] = numpy.append(LL_results["rb_prior"],LL_prior["rb"])
-            LL_results["beta"] = numpy.append(LL_results["beta"],numpy.nan)
-            LL_results["k"] = numpy.append(LL_results["k"],numpy.nan)
-        # update the start and end datetimes
-        start_date = start_date+datetime.timedelta(days=window_size_days)
-        end_date = start_date+datetime.timedelta(days=step_size_days)
+                previous_alpha = None
+            jobs.append([n, drivers, NEEsub, rb_prior, LL_results["E0"][n], D0, previous_alpha])
+        previous_fitted = (len(NEEsub) >= 10)
+        LL_results["rb_prior"][n] = rb_prior
+    # fit the windows, in parallel if requested
+    if workers > 1 and len(jobs) > 1:
+        msg = " Lasslop: fitting " + str(len(jobs)) + " windows using " + str(workers) + " workers"
+        logger.info(msg)
+        pool = multiprocessing.Pool(processes=min(workers, len(jobs)))
+        try:
+            results = pool.map(get_LL_params_window, jobs)
+        finally:
+            pool.close()
+            pool.join()
+    else:
+        results = [None]*len(jobs)
+    # put the results in the results dictionary in window order, the windows
+    # that need the alpha from the previous window are fitted here
+    for job, result in zip(jobs, results):
+        n = job[0]
+        if result is None:
+            if job[6] is None:
+                job[6] = LL_results["alpha"][n-1]
+            result = get_LL_params_window(job)
+        for item in ["alpha", "beta", "k", "rb", "alpha_low", "rb_low"]:
+            LL_results[item][n] = result[item]
     LL_results["D0"] = D0
     return LL_results
 
+def get_LL_params_window(args):
+    """
+    Purpose:
+     Fit the Lasslop light response function to the data for one window,
+     trying 3 priors for beta and keeping the parameters with the lowest RMSE.
+     The arguments are passed as a list so this can be used with
+     multiprocessing.Pool.map.  When the QC needs the value of alpha from
+     the previous window and this is not known (None), None is returned and
+     the caller fits the window again once the previous window is done.
+    Usage:
+     result = pfp_rpLL.get_LL_params_window([n, drivers, NEEsub, rb_prior, E0, D0, previous_alpha])
+     where n is the window number
+           drivers is a dictionary of the Fsd, D and T data for the window
+           NEEsub is the NEE data for the window
+           rb_prior is the prior for rb
+           E0 and D0 are the fixed values of E0 and D0
+           previous_alpha is alpha from the previous window or None
+           result is a dictionary of alpha, beta, k, rb, alpha_low and rb_low
+    Author: PRI
+    Date: October 2026
+    """
+    n, drivers, NEEsub, rb_prior, E0, D0, previous_alpha = args
+    sub_results = {"RMSE":[], "alpha":[], "beta":[], "k":[], "rb":[]}
+    LL_prior = {"rb":rb_prior, "alpha":0.01, "beta":10, "k":0}
+    # alpha and rb from linear fit between NEE and Fsd at low light levels
+    idx = numpy.where(drivers["Fsd"] < 100)[0]
+    if len(idx) >= 2:
+        alpha_low, rb_low = numpy.polyfit(drivers["Fsd"][idx], NEEsub[idx], 1)
+    else:
+        alpha_low, rb_low = numpy.nan, numpy.nan
+    for bm in [0.5, 1,2]:
+        LL_prior["beta"] = numpy.abs(numpy.percentile(NEEsub, 3)-numpy.percentile(NEEsub, 97))
+        LL_prior["beta"] = bm*LL_prior["beta"]
+        p0 = [LL_prior["alpha"],LL_prior["beta"],LL_prior["k"],LL_prior["rb"]]
+        try:
+            fopt = lambda x,alpha,beta,k,rb:NEE_RHLRC_D(x,alpha,beta,k,D0,rb,E0)
+            popt,pcov = curve_fit(fopt,drivers,NEEsub,p0=p0)
+            alpha,beta,k,rb = popt[0],popt[1],popt[2],popt[3]
+            last_alpha_OK = True
+        except RuntimeError:
+            alpha,beta,k,rb = numpy.nan,numpy.nan,numpy.nan,numpy.nan
+            last_alpha_OK = False
+        # QC the parameters
+        # k first
+        if numpy.isnan(k) or k<0 or k>2:
+            k = 0
+            try:
+                p0 = [LL_prior["alpha"],LL_prior["beta"],LL_prior["rb"]]
+                fopt = lambda x,alpha,beta,rb:NEE_RHLRC_D(x,alpha,beta,k,D0,rb,E0)
+                popt,pcov = curve_fit(fopt,drivers,NEEsub,p0=p0)
+                alpha,beta,rb = popt[0],popt[1],popt[2]
+                last_alpha_OK = True
+            except RuntimeError:
+                alpha,beta,k,rb = numpy.nan,numpy.nan,numpy.nan,numpy.nan
+                last_alpha_OK = False
+        # then alpha
+        if numpy.isnan(alpha) or alpha<0 or alpha>0.22:
+            if last_alpha_OK==True:
+                if previous_alpha is None:
+                    # need the alpha from the previous window
+                    return None
+                alpha = previous_alpha
+            else:
+                alpha = 0
+            try:
+                p0 = [LL_prior["beta"],LL_prior["k"],LL_prior["rb"]]
+                fopt = lambda x,beta,k,rb:NEE_RHLRC_D(x,alpha,beta,k,D0,rb,E0)
+                popt,pcov = curve_fit(fopt,drivers,NEEsub,p0=p0)
+                beta,k,rb = popt[0],popt[1],popt[2]
+            except RuntimeError:
+                alpha,beta,k,rb = numpy.nan,numpy.nan,numpy.nan,numpy.nan
+        # then beta
+        if beta<0:
+            beta = 0
+            try:
+                p0 = [LL_prior["alpha"],LL_prior["k"],LL_prior["rb"]]
+                fopt = lambda x,alpha,k,rb:NEE_RHLRC_D(x,alpha,beta,k,D0,rb,E0)
+                popt,pcov = curve_fit(fopt,drivers,NEEsub,p0=p0)
+                alpha,k,rb = popt[0],popt[1],popt[2]
+            except RuntimeError:
+                alpha,beta,k,rb = numpy.nan,numpy.nan,numpy.nan,numpy.nan
+        elif beta>250:
+            alpha,beta,k,rb = numpy.nan,numpy.nan,numpy.nan,numpy.nan
+        # and finally rb
+        if rb<0:
+            alpha,beta,k,rb = numpy.nan,numpy.nan,numpy.nan,numpy.nan
+        # now get the RMSE for this set of parameters
+        if not numpy.isnan(alpha) and not numpy.isnan(beta) and not numpy.isnan(k) and not numpy.isnan(rb):
+            NEEest = NEE_RHLRC_D(drivers,alpha,beta,k,D0,rb,E0)
+            sub_results["RMSE"].append(numpy.sqrt(numpy.mean((NEEsub-NEEest)**2)))
+            sub_results["alpha"].append(alpha)
+            sub_results["beta"].append(beta)
+            sub_results["k"].append(k)
+            sub_results["rb"].append(rb)
+    # now find the minimum RMSE and the set of parameters for the minimum
+    result = {"alpha": numpy.nan, "beta": numpy.nan, "k": numpy.nan, "rb": numpy.nan,
+              "alpha_low": float(-1)*alpha_low, "rb_low": rb_low}
+    if len(sub_results["RMSE"])!=0:
+        min_RMSE = min(sub_results["RMSE"])
+        idx = sub_results["RMSE"].index(min_RMSE)
+        for item in ["alpha", "beta", "k", "rb"]:
+            result[item] = sub_results[item][idx]
+    return result
+
 def get_LT_params(ldt, ER, T, l6_info, output, mode="verbose"):
     """
     Purpose:
@@ -217,31 +325,25 @@ def get_LT_params(ldt, ER, T, l6_info, output, mode="verbose"):
     Usage:
     Author: PRI
     Date: April 2016
+          October 2026 - window indices calculated once and results preallocated
     """
     # local pointers to entries in the info dictionary
     iel = l6_info["ERUsingLasslop"]
     ielo = iel["outputs"]
     ieli = iel["info"]
-    # window and step sizes
-    window_step_size = ielo[output]["window_size_days"]
-    step_size_days = ielo[output]["step_size_days"]
-    # initialise results, missed dates and prior dictionaries
-    mta = numpy.array([])
-    LT_results = {"start_date": mta, "mid_date": mta, "end_date": mta,
-                  "rb": mta, "E0": mta, "rb_prior": mta, "E0_prior": mta}
+    # get the windows and initialise results, missed dates and prior dictionaries
+    windows = get_windows(ldt, ieli["time_step"], ielo[output]["window_size_days"],
+                          ielo[output]["step_size_days"])
+    nwindows = len(windows["start_date"])
+    LT_results = {"start_date": windows["start_date"], "mid_date": windows["mid_date"],
+                  "end_date": windows["end_date"]}
+    for item in ["rb", "E0", "rb_prior", "E0_prior"]:
+        LT_results[item] = numpy.full(nwindows, numpy.nan)
     missed_dates = {"start_date":[], "end_date":[]}
     LT_prior = {"rb": 1.0, "E0": 100}
-    # get the start and end date
-    start_date = ldt[0]
-    last_date = ldt[-1]
-    end_date = start_date+datetime.timedelta(days=ielo[output]["window_size_days"])
     last_E0_OK = False
-    while end_date <= last_date:
-        LT_results["start_date"] = numpy.append(LT_results["start_date"], start_date)
-        LT_results["mid_date"] = numpy.append(LT_results["mid_date"], start_date+(end_date-start_date)/2)
-        LT_results["end_date"] = numpy.append(LT_results["end_date"], end_date)
-        si = pfp_utils.GetDateIndex(ldt, str(start_date), ts=ieli["time_step"])
-        ei = pfp_utils.GetDateIndex(ldt, str(end_date), ts=ieli["time_step"])
+    for n in range(nwindows):
+        si, ei = windows["si"][n], windows["ei"][n]
         Tsub = numpy.ma.compressed(T[si: ei+1])
         ERsub = numpy.ma.compressed(ER[si: ei+1])
         if len(ERsub) >= 10:
@@ -250,12 +352,12 @@ def get_LT_params(ldt, ER, T, l6_info, output, mode="verbose"):
             try:
                 popt, pcov = curve_fit(ER_LloydTaylor, Tsub, ERsub, p0=p0)
             except RuntimeError:
-                missed_dates["start_date"].append(start_date)
-                missed_dates["end_date"].append(end_date)
+                missed_dates["start_date"].append(windows["start_date"][n])
+                missed_dates["end_date"].append(windows["end_date"][n])
             # QC E0 results
             if popt[1] < 50 or popt[1] > 400:
                 if last_E0_OK:
-                    popt[1] = LT_results["E0"][-1]
+                    popt[1] = LT_results["E0"][n-1]
                     last_E0_OK = False
                 else:
                     if popt[1] <50: popt[1] = float(50)
@@ -271,19 +373,10 @@ def get_LT_params(ldt, ER, T, l6_info, output, mode="verbose"):
                 last_E0_OK = True
             # QC rb results
             if popt[0] < 0: popt[0] = float(0)
-            LT_results["rb"] = numpy.append(LT_results["rb"], popt[0])
-            LT_results["E0"] = numpy.append(LT_results["E0"], popt[1])
-            LT_results["rb_prior"] = numpy.append(LT_results["rb_prior"], numpy.mean(ERsub))
-            LT_results["E0_prior"] = numpy.append(LT_results["E0_prior"], LT_prior["E0"])
-        else:
-            LT_results["rb"] = numpy.append(LT_results["rb"], numpy.nan)
-            LT_results["E0"] = numpy.append(LT_results["E0"], numpy.nan)
-            LT_results["rb_prior"] = numpy.append(LT_results["rb_prior"], numpy.nan)
-            LT_results["E0_prior"] = numpy.append(LT_results["E0_prior"], numpy.nan)
-        start_date = start_date+datetime.timedelta(days=ielo[output]["window_size_days"])
-        end_date = start_date+datetime.timedelta(days=ielo[output]["step_size_days"])
-    #    start_date = end_date
-    #    end_date = start_date+dateutil.relativedelta.relativedelta(years=1)
+            LT_results["rb"][n] = popt[0]
+            LT_results["E0"][n] = popt[1]
+            LT_results["rb_prior"][n] = numpy.mean(ERsub)
+            LT_results["E0_prior"][n] = LT_prior["E0"]
     if mode == "verbose":
         if len(missed_dates["start_date"]) != 0:
             msg = " No solution found for the following dates:"
@@ -367,6 +460,7 @@ def rpLL_createdict_info(cf, ds, erll, called_by):
     Author: PRI
     Date: Back in the day
           June 2019 - modified for new l5_info structure
+          October 2026 - added workers
     """
     # reset the return message and code
     ds.returncodes["message"] = "OK"
@@ -399,6 +493,9 @@ def rpLL_createdict_info(cf, ds, erll, called_by):
     nperhr = int(float(60)/time_step + 0.5)
     erll["info"]["nperday"] = int(float(24)*nperhr + 0.5)
     erll["info"]["maxlags"] = int(float(12)*nperhr + 0.5)
+    # number of worker processes for the window fits
+    opt = pfp_utils.get_keyvaluefromcf(cf, ["Options"], "workers", default=1)
+    erll["info"]["workers"] = int(opt)
     # get the plot path
     plot_path = pfp_utils.get_keyvaluefromcf(cf, ["Files"], "plot_path", default="./plots/")
     plot_path = os.path.join(plot_path, level, "")
@@ -81,6 +81,83 @@ def optimise_rb(data_dict, params_dict):
 
     return params, error_state
 
+def optimise_rb_windows(data_dict, window_list, Eo_array, params_dict, min_pct):
+    """
+    Purpose:
+     Fit rb, with Eo fixed, for all windows in one pass.
+     The data are reduced once to a single NaN-free array and each window
+     becomes an index range into that array.  With Eo fixed the model
+     ER = rb*TRF(T, Eo, 1) is linear in rb so the least squares estimate is
+     sum(f*ER)/sum(f*f), and these sums are taken from cumulative sums for
+     every window at once.  Windows where the analytic estimate is not finite
+     fall back to optimise_rb started from the last good value of rb.
+    Usage:
+     rb, error_state = pfp_rpLT.optimise_rb_windows(data_dict, window_list, Eo_array,
+                                                    params_dict, min_pct)
+     where data_dict is the data dictionary from get_data_dict
+           window_list is a list of [start, end] indices (inclusive), one per window
+           Eo_array is the value of Eo to use for each window
+           params_dict is the parameter dictionary (rb_prior used by the fallback)
+           min_pct is the minimum percentage of valid data in a window
+           rb is an array of rb values, one per window
+           error_state is an array of error codes, one per window
+    Author: PRI
+    Date: October 2026
+    """
+    nwindows = len(window_list)
+    rb = numpy.empty(nwindows)
+    rb.fill(numpy.nan)
+    error_state = numpy.zeros(nwindows, dtype=numpy.int32)
+    if nwindows == 0:
+        return rb, error_state
+    # a record is valid if none of the variables are NaN (as subset_nan)
+    valid = numpy.ones(len(data_dict["NEE"]), dtype=bool)
+    for label in data_dict.keys():
+        valid &= ~numpy.isnan(data_dict[label])
+    ok = numpy.flatnonzero(valid)
+    nan_free = {"TempC": data_dict["TempC"][ok], "NEE": data_dict["NEE"][ok]}
+    # window start and end as an index range [lo, hi) into the NaN-free arrays
+    windows = numpy.array(window_list, dtype=numpy.int64).reshape(nwindows, 2)
+    lo = numpy.searchsorted(ok, windows[:, 0])
+    hi = numpy.searchsorted(ok, windows[:, 1] + 1)
+    num_all = windows[:, 1] - windows[:, 0] + 1
+    num_valid = hi - lo
+    # sums of f*ER and f*f for each window, one pass per distinct value of Eo
+    Eo_array = numpy.asarray(Eo_array, dtype=numpy.float64).reshape(nwindows)
+    sum_fy = numpy.empty(nwindows)
+    sum_fy.fill(numpy.nan)
+    sum_ff = sum_fy.copy()
+    for Eo in numpy.unique(Eo_array[~numpy.isnan(Eo_array)]):
+        f = TRF(nan_free, Eo, 1.0)
+        cum_fy = numpy.concatenate(([0.0], numpy.cumsum(f*nan_free["NEE"])))
+        cum_ff = numpy.concatenate(([0.0], numpy.cumsum(f*f)))
+        iw = numpy.where(Eo_array == Eo)[0]
+        sum_fy[iw] = cum_fy[hi[iw]] - cum_fy[lo[iw]]
+        sum_ff[iw] = cum_ff[hi[iw]] - cum_ff[lo[iw]]
+    with numpy.errstate(divide="ignore", invalid="ignore"):
+        rb_ls = sum_fy/sum_ff
+    # apply the data criterion and QC to each window
+    rb_last = params_dict["rb_prior"]
+    for i in range(nwindows):
+        if round(float(num_valid[i])/num_all[i]*100) <= min_pct:
+            error_state[i] = 10
+            continue
+        if numpy.isfinite(rb_ls[i]):
+            params, error_state[i] = [rb_ls[i]], 0
+            if params[0] < 0:
+                error_state[i] = 9
+                params = [numpy.nan]
+        else:
+            # warm start the iterative fit from the last good rb
+            sub_dict = {"TempC": nan_free["TempC"][lo[i]:hi[i]],
+                        "NEE": nan_free["NEE"][lo[i]:hi[i]]}
+            warm_dict = dict(params_dict, Eo_default=Eo_array[i], rb_prior=rb_last)
+            params, error_state[i] = optimise_rb(sub_dict, warm_dict)
+        rb[i] = params[0]
+        if numpy.isfinite(rb[i]):
+            rb_last = rb[i]
+    return rb, error_state
+
 # code from Partition_NEE.py
 def get_dates(datetime_array, configs_dict):
 
@@ -244,11 +244,16 @@ def do_run_l1(cfg=None):
             if len(cfg)==0:
                 logger.info("Quiting L1 processing (no control file)")
                 return
+        outfilename = pfp_io.get_outfilenamefromcf(cfg)
+        if pfp_io.manifest_is_current(cfg, outfilename):
+            logger.info("L1 output is up to date, set ForceReprocess = Yes in [Options] to re-run")
+            logger.info("")
+            return
         ds1 = pfp_levels.l1qc(cfg)
         if ds1.returncodes["value"] == 0:
-            outfilename = pfp_io.get_outfilenamefromcf(cfg)
             ncFile = pfp_io.nc_open_write(outfilename)
-            pfp_io.nc_write_series(ncFile, ds1)
+            pfp_io.nc_write_series(ncFile, ds1, write_options=pfp_io.nc_write_options(cfg))
+            pfp_io.manifest_write(cfg, outfilename)
             logger.info("Finished L1 processing")
         else:
             msg = "An error occurred during L1 processing"
@@ -285,15 +290,20 @@ def do_run_l2(cfg=None):
             in_filename = os.path.split(in_filepath)
             logger.error("File "+in_filename[1]+" not found")
             return
+        out_filepath = pfp_io.get_outfilenamefromcf(cfg)
+        if pfp_io.manifest_is_current(cfg, out_filepath):
+            logger.info("L2 output is up to date, set ForceReprocess = Yes in [Options] to re-run")
+            logger.info("")
+            return
         ds1 = pfp_io.nc_read_series(in_filepath)
         ds2 = pfp_levels.l2qc(cfg, ds1)
         if ds2.returncodes["value"] != 0:
             logger.error("An error occurred during L2 processing")
             logger.error("")
             return
-        out_filepath = pfp_io.get_outfilenamefromcf(cfg)
         nc_file = pfp_io.nc_open_write(out_filepath)
-        pfp_io.nc_write_series(nc_file, ds2)
+        pfp_io.nc_write_series(nc_file, ds2, write_options=pfp_io.nc_write_options(cfg))
+        pfp_io.manifest_write(cfg, out_filepath)
         logger.info("Finished L2 processing")
         if "Plots" in list(cfg.keys()):
             logger.info("Plotting L1 and L2 data")
@@ -339,15 +349,20 @@ def do_run_l3(cfg=None):
             in_filename = os.path.split(in_filepath)
             logger.error("File "+in_filename[1]+" not found")
             return
+        out_filepath = pfp_io.get_outfilenamefromcf(cfg)
+        if pfp_io.manifest_is_current(cfg, out_filepath):
+            logger.info("L3 output is up to date, set ForceReprocess = Yes in [Options] to re-run")
+            logger.info("")
+            return
         ds2 = pfp_io.nc_read_series(in_filepath)
         ds3 = pfp_levels.l3qc(cfg, ds2)
         if ds3.returncodes["value"] != 0:
             logger.error("An error occurred during L3 processing")
             logger.error("")
             return
-        out_filepath = pfp_io.get_outfilenamefromcf(cfg)
         nc_file = pfp_io.nc_open_write(out_filepath)
-        pfp_io.nc_write_series(nc_file, ds3)
+        pfp_io.nc_write_series(nc_file, ds3, write_options=pfp_io.nc_write_options(cfg))
+        pfp_io.manifest_write(cfg, out_filepath)
         logger.info("Finished L3 processing")
         if "Plots" in list(cfg.keys()):
             logger.info("Plotting L3 data")
@@ -393,6 +408,11 @@ def do_run_l4(main_gui, cfg=None):
             in_filename = os.path.split(in_filepath)
             logger.error("File "+in_filename[1]+" not found")
             return
+        out_filepath = pfp_io.get_outfilenamefromcf(cfg)
+        if pfp_io.manifest_is_current(cfg, out_filepath):
+            logger.info("L4 output is up to date, set ForceReprocess = Yes in [Options] to re-run")
+            logger.info("")
+            return
         ds3 = pfp_io.nc_read_series(in_filepath)
         #ds3.globalattributes['controlfile_name'] = cfg['controlfile_name']
         sitename = ds3.globalattributes['site_name']
@@ -404,9 +424,9 @@ def do_run_l4(main_gui, cfg=None):
             logger.info("Quitting L4: " + sitename)
         else:
             logger.info("Finished L4: " + sitename)
-            out_filepath = pfp_io.get_outfilenamefromcf(cfg)
             nc_file = pfp_io.nc_open_write(out_filepath)
-            pfp_io.nc_write_series(nc_file, ds4)         # save the L4 data
+            pfp_io.nc_write_series(nc_file, ds4, write_options=pfp_io.nc_write_options(cfg))         # save the L4 data
+            pfp_io.manifest_write(cfg, out_filepath)
             logger.info("Finished saving L4 gap filled data")
         logger.info("")
     except Exception:
@@ -440,6 +460,11 @@ def do_run_l5(main_gui, cfg=None):
             in_filename = os.path.split(in_filepath)
             logger.error("File "+in_filename[1]+" not found")
             return
+        out_filepath = pfp_io.get_outfilenamefromcf(cfg)
+        if pfp_io.manifest_is_current(cfg, out_filepath):
+            logger.info("L5 output is up to date, set ForceReprocess = Yes in [Options] to re-run")
+            logger.info("")
+            return
         ds4 = pfp_io.nc_read_series(in_filepath)
         #ds4.globalattributes['controlfile_name'] = cfg['controlfile_name']
         sitename = ds4.globalattributes['site_name']
@@ -451,9 +476,9 @@ def do_run_l5(main_gui, cfg=None):
             logger.info("Quitting L5: "+sitename)
         else:
             logger.info("Finished L5: "+sitename)
-            out_filepath = pfp_io.get_outfilenamefromcf(cfg)
             nc_file = pfp_io.nc_open_write(out_filepath)
-            pfp_io.nc_write_series(nc_file, ds5)
+            pfp_io.nc_write_series(nc_file, ds5, write_options=pfp_io.nc_write_options(cfg))
+            pfp_io.manifest_write(cfg, out_filepath)
             logger.info("Finished saving L5 gap filled data")
         logger.info("")
     except Exception:
@@ -487,6 +512,11 @@ def do_run_l6(main_gui, cfg=None):
             in_filename = os.path.split(in_filepath)
             logger.error("File "+in_filename[1]+" not found")
             return
+        out_filepath = pfp_io.get_outfilenamefromcf(cfg)
+        if pfp_io.manifest_is_current(cfg, out_filepath):
+            logger.info("L6 output is up to date, set ForceReprocess = Yes in [Options] to re-run")
+            logger.info("")
+            return
         ds5 = pfp_io.nc_read_series(in_filepath)
         #ds5.globalattributes['controlfile_name'] = cfg['controlfile_name']
         sitename = ds5.globalattributes['site_name']
@@ -499,9 +529,9 @@ def do_run_l6(main_gui, cfg=None):
             logger.info("Quitting L6: "+sitename)
         else:
             logger.info("Finished L6: "+sitename)
-            out_filepath = pfp_io.get_outfilenamefromcf(cfg)
             nc_file = pfp_io.nc_open_write(out_filepath)
-            pfp_io.nc_write_series(nc_file, ds6)
+            pfp_io.nc_write_series(nc_file, ds6, write_options=pfp_io.nc_write_options(cfg))
+            pfp_io.manifest_write(cfg, out_filepath)
             logger.info("Finished saving L6 gap filled data")
         logger.info("")
     except Exception:
@@ -2178,9 +2178,9 @@ def get_synthetic_fsd(ds):
     # get the UTC time from the local time
     ldt_UTC = pfp_utils.get_UTCfromlocaltime(ds)
     # get the solar altitude
-    alt_solar = [pysolar.GetAltitude(lat,lon,dt) for dt in ldt_UTC]
+    alt_solar = pysolar.GetAltitudeArray(lat,lon,ldt_UTC)
     # get the synthetic downwelling shortwave radiation
-    Fsd_syn = [pysolar.GetRadiationDirect(dt,alt) for dt,alt in zip(ldt_UTC,alt_solar)]
+    Fsd_syn = pysolar.GetRadiationDirectArray(ldt_UTC,alt_solar)
     Fsd_syn = numpy.ma.array(Fsd_syn)
     # get the QC flag
     nRecs = len(Fsd_syn)
@@ -2212,68 +2212,75 @@ def InterpolateOverMissing(ds, series='', maxlen=0, int_type="linear"):
      Fills gaps.
     Author: PRI
     Date: September 2014
+          October 2026 - now calls InterpolateOverMissingBatch
+    """
+    InterpolateOverMissingBatch(ds, [series], maxlen=maxlen, int_type=int_type)
+
+def InterpolateOverMissingBatch(ds, labels, maxlen=0, int_type="linear"):
+    """
+    Purpose:
+     Interpolate over gaps of up to maxlen time steps in a list of series.  The
+     interpolation is done on the elapsed time in time steps, calculated once
+     for all of the series, and only the records in the gaps that are filled
+     are interpolated.  Gaps longer than maxlen time steps and gaps at the start
+     or the end of a series are not filled.
+    Usage:
+     pfp_ts.InterpolateOverMissingBatch(ds, labels, maxlen=6, int_type="Akima")
+     where ds is the data structure
+           labels is a list of series labels
+           maxlen is the maximum gap length (time steps) to be filled by interpolation
+           int_type is "linear" or "Akima"
+    Side effects:
+     Fills gaps, the QC flag of the interpolated values is set to 50.
+    Author: PRI
+    Date: October 2026
     """
     # check to see if we need to do anything
     if maxlen==0: return
-    # check that series is in the data structure
-    if series not in ds.series.keys():
-        logger.error("InterpolateOverMissing: series "+series+" not found in data structure")
-        return
-    # convert the Python datetime to a number
-    DateNum = date2num(ds.series['DateTime']['Data'])
-    # get the data
-    data_org,flag_org,attr_org = pfp_utils.GetSeries(ds,series)
-    # number of records
-    nRecs = len(data_org)
-    # index of good values
-    iog = numpy.where(abs(data_org-float(c.missing_value))>c.eps)[0]
-    # index of missing values
-    iom = numpy.where(abs(data_org-float(c.missing_value))<=c.eps)[0]
-    # return if there is not enough data to use
-    if len(iog)<2:
-        logger.info(' InterpolateOverMissing: Less than 2 good points available for series '+str(series))
-        return
-    if int_type == "linear":
-        # linear interpolation function
-        f = interpolate.interp1d(DateNum[iog],data_org[iog],bounds_error=False,fill_value=float(c.missing_value))
-        # interpolate over the whole time series
-        data_int = f(DateNum).astype(numpy.float64)
-    elif int_type == "Akima":
-        int_fn = interpolate.Akima1DInterpolator(DateNum[iog], data_org[iog])
-        data_int = int_fn(DateNum)
-        # trap non-finite values from the Akima 1D interpolator
-        data_int = numpy.where(numpy.isfinite(data_int) == True, data_int, numpy.float(c.missing_value))
-    else:
+    if int_type not in ["linear", "Akima"]:
         msg = " Unrecognised interpolator option (" + int_type + "), skipping ..."
         logger.error(msg)
         return
-    # copy the original flag
-    flag_int = numpy.copy(flag_org)
-    # index of interpolates that are not equal to the missing value
-    index = numpy.where(abs(data_int-float(c.missing_value))>c.eps)[0]
-    # set the flag for these points
-    if len(index)!=0:
-        flag_int[index] = numpy.int32(50)
-    # restore the original good data
-    data_int[iog] = data_org[iog]
-    flag_int[iog] = flag_org[iog]
-    # now replace data in contiguous blocks of length > min with missing data
-    # first, a conditional index, 0 where data is good, 1 where it is missing
-    cond_ind = numpy.zeros(nRecs,dtype=numpy.int32)
-    cond_ind[iom] = 1
-    cond_bool = (cond_ind==1)
-    # start and stop indices of contiguous blocks
-    for start, stop in pfp_utils.contiguous_regions(cond_bool):
-        # code to handle minimum segment length goes here
-        duration = stop - start
-        if duration>maxlen:
-            #data_int[start:stop+1] = numpy.float(c.missing_value)
-            #flag_int[start:stop+1] = flag_org[start:stop+1]
-            data_int[start:stop] = numpy.float64(c.missing_value)
-            flag_int[start:stop] = flag_org[start:stop]
-    # put data_int back into the data structure
-    attr_int = dict(attr_org)
-    pfp_utils.CreateSeries(ds,series,data_int,flag_int,attr_int)
+    # elapsed time in time steps, this is the record index for a regular time step
+    ts = float(ds.globalattributes["time_step"])
+    us = pfp_utils.get_time_index(ds)["DateTime64"].astype(numpy.int64)
+    steps = (us - us[0])/(ts*60*1.0E6)
+    for series in labels:
+        # check that series is in the data structure
+        if series not in ds.series.keys():
+            logger.error("InterpolateOverMissing: series "+series+" not found in data structure")
+            continue
+        data_org,flag_org,attr_org = pfp_utils.GetSeries(ds,series,view=True)
+        # missing values
+        cond_bool = abs(data_org-float(c.missing_value))<=c.eps
+        # return if there is not enough data to use
+        iog = numpy.where(~cond_bool)[0]
+        if len(iog)<2:
+            logger.info(' InterpolateOverMissing: Less than 2 good points available for series '+str(series))
+            continue
+        # gaps no longer than maxlen with good data at both ends
+        gap_index = pfp_utils.GapIndex(cond_bool)
+        gaps = ((gap_index.lengths<=maxlen) & (gap_index.starts>0) &
+                (gap_index.ends<len(data_org)))
+        index = gap_index.records(gaps)
+        if int_type == "linear":
+            # the good values either side of each gap
+            lengths = gap_index.lengths[gaps]
+            left = numpy.repeat(gap_index.starts[gaps]-1, lengths)
+            right = numpy.repeat(gap_index.ends[gaps], lengths)
+            data_int = (data_org[left] + (data_org[right]-data_org[left])*
+                        (steps[index]-steps[left])/(steps[right]-steps[left]))
+        else:
+            int_fn = interpolate.Akima1DInterpolator(steps[iog], data_org[iog])
+            data_int = int_fn(steps[index])
+        # trap non-finite values from the interpolator
+        ok = numpy.isfinite(data_int) & (abs(data_int-float(c.missing_value))>c.eps)
+        data_new = numpy.array(data_org, dtype=numpy.float64)
+        flag_new = numpy.array(flag_org)
+        data_new[index[ok]] = data_int[ok]
+        flag_new[index[ok]] = numpy.int32(50)
+        # put the interpolated data back into the data structure
+        pfp_utils.CreateSeries(ds,series,data_new,flag_new,dict(attr_org))
 
 def MassmanStandard(cf, ds, Ta_in='Ta', Ah_in='Ah', ps_in='ps', u_in="U_SONIC_Av",
                     ustar_in='ustar', ustar_out='ustar', L_in='L', L_out ='L',
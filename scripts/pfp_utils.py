@@ -7,7 +7,9 @@ import logging
 import math
 import numbers
 import os
+import shutil
 import sys
+import tempfile
 import time
 # third party modules
 import cftime
@@ -91,18 +93,19 @@ def CheckQCFlags(ds):
     labels = [label for label in ds.series.keys() if label not in ["DateTime"]]
     # force any values of -9999 with QC flags of 0 to have a QC flag of 8
     for label in labels:
-        var = GetVariable(ds, label)
+        var = GetVariable(ds, label, view=True)
         condition = numpy.ma.getmaskarray(var["Data"]) & (numpy.mod(var["Flag"],10) == 0)
         idx = numpy.ma.where(condition == True)[0]
         if len(idx)!=0:
             msg = " "+label+": "+str(len(idx))+" missing values with flag = 0 (forced to 8)"
             logger.warning(msg)
+            var["Flag"] = numpy.array(var["Flag"])
             var["Flag"][idx] = numpy.int32(8)
-            CreateVariable(ds, var)
+            CreateVariable(ds, var, view=True)
     # force all values != -9999 to have QC flag = 0, 10, 20 etc
     nRecs = int(ds.globalattributes["nc_nrecs"])
     for label in labels:
-        var = GetVariable(ds, label)
+        var = GetVariable(ds, label, view=True)
         condition = (numpy.ma.getmaskarray(var["Data"]) == False) & (numpy.mod(var["Flag"],10) != 0)
         idx = numpy.where(condition == True)[0]
         if len(idx)!=0:
@@ -206,6 +209,130 @@ def contiguous_regions(condition):
     idx.shape = (-1,2)
     return idx
 
+class GapIndex(object):
+    """
+    Purpose:
+     Run-length encoded index of the gaps in a series.  The start, end and
+     length of every gap are found once and the queries below are answered
+     for all gaps at the same time.
+      starts, ends - start index and end index (exclusive) of each gap, as
+                     returned by contiguous_regions()
+      lengths      - number of records in each gap
+      good         - cumulative number of good records, the number of good
+                     records in [i, j) is good[j] - good[i]
+    Usage:
+     gi = pfp_utils.get_gap_index(ds, label)
+     or
+     gi = pfp_utils.GapIndex(mask)
+     where mask is True where the data is missing
+     long_gaps = gi.longer_than(max_length)
+    Author: PRI
+    Date: October 2026
+    """
+    def __init__(self, mask):
+        mask = numpy.asarray(mask, dtype=bool)
+        self.nrecs = len(mask)
+        regions = contiguous_regions(mask) if self.nrecs > 0 else numpy.zeros((0, 2), dtype=int)
+        self.starts = regions[:, 0]
+        self.ends = regions[:, 1]
+        self.lengths = self.ends - self.starts
+        self.good = numpy.concatenate(([0], numpy.cumsum(~mask)))
+        # the data array the index was made from, see get_gap_index()
+        self.source = None
+
+    def count_good(self, starts, ends):
+        """ Number of good records in [starts, ends) for arrays of starts and ends."""
+        return self.good[ends] - self.good[starts]
+
+    def longer_than(self, max_length):
+        """ Start and end indices of the gaps longer than max_length records."""
+        index = numpy.where(self.lengths > max_length)[0]
+        return numpy.column_stack((self.starts[index], self.ends[index]))
+
+    def mask_longer_than(self, max_length):
+        """ Boolean array, True for records in gaps longer than max_length records."""
+        change = numpy.zeros(self.nrecs + 1, dtype=numpy.int32)
+        gaps = self.longer_than(max_length)
+        numpy.add.at(change, gaps[:, 0], 1)
+        numpy.add.at(change, gaps[:, 1], -1)
+        return numpy.cumsum(change[:-1]) > 0
+
+    def records(self, gaps=None):
+        """ Indices of the records in the gaps, gaps is an optional index or boolean array of the gaps to use."""
+        starts, ends = self.starts, self.ends
+        if gaps is not None:
+            starts, ends = starts[gaps], ends[gaps]
+        lengths = ends - starts
+        offsets = starts - numpy.concatenate(([0], numpy.cumsum(lengths)[:-1]))
+        return numpy.arange(numpy.sum(lengths)) + numpy.repeat(offsets, lengths)
+
+    def statistics(self):
+        """ Number of gaps, number of missing records and the longest gap."""
+        longest = int(numpy.max(self.lengths)) if len(self.lengths) > 0 else 0
+        return {"number": len(self.lengths), "missing": int(numpy.sum(self.lengths)),
+                "longest": longest}
+
+def expand_gap_windows(starts, ends, good, step, nrecs, min_percent, min_points=0,
+                       include_end=False, num_good=None, keep=None):
+    """
+    Purpose:
+     Widen a window around each gap by step records either side until the number
+     of good points in the window reaches the minimum required, for all gaps at
+     the same time.  This is the window search used by the SOLO and alternate
+     data auto-complete routines.
+     At each step the window [start, end) (or [start, end] if include_end is True)
+     is widened and clipped to [0, nrecs-1], the minimum number of points is
+     max(int(window length*min_percent/100), min_points) and the number of good
+     points is the largest value of good[:, end] - good[:, start] over the rows of
+     good.
+    Usage:
+     starts, ends, full = pfp_utils.expand_gap_windows(starts, ends, good, step, nrecs,
+                                                       min_percent, min_points=0,
+                                                       include_end=False, num_good=None,
+                                                       keep=None)
+     where starts, ends are the current windows around the gaps
+           good is a 2D array of cumulative good point counts (see GapIndex.good),
+                one row per data series
+           num_good is the number of good points already found for each gap
+           keep is an optional boolean array (rows, gaps), only the rows of good
+                that are True are used for each gap
+           full is True for gaps where the window reached the whole series
+                before enough good points were found
+     Only windows that need to be widened are changed.
+    Author: PRI
+    Date: October 2026
+    """
+    good = numpy.atleast_2d(good)
+    starts = numpy.array(starts, dtype=numpy.int64)
+    ends = numpy.array(ends, dtype=numpy.int64)
+    ngaps = len(starts)
+    if num_good is None:
+        num_good = numpy.zeros(ngaps, dtype=numpy.int64)
+    num_good = numpy.array(num_good, dtype=numpy.int64)
+    extra = 1 if include_end else 0
+    full = numpy.zeros(ngaps, dtype=bool)
+    # gaps still being widened
+    active = num_good < numpy.maximum((((ends - starts) + extra)*min_percent/100).astype(numpy.int64), min_points)
+    while numpy.any(active):
+        index = numpy.where(active)[0]
+        starts[index] = numpy.maximum(0, starts[index] - step)
+        ends[index] = numpy.minimum(nrecs - 1, ends[index] + step)
+        # stop when the window is the whole series
+        at_limits = (starts[index] == 0) & (ends[index] == nrecs - 1)
+        full[index[at_limits]] = True
+        active[index[at_limits]] = False
+        index = index[~at_limits]
+        if len(index) == 0:
+            break
+        counts = good[:, ends[index] + extra] - good[:, starts[index]]
+        if keep is not None:
+            counts = numpy.where(keep[:, index], counts, -1)
+        num_good[index] = numpy.maximum(num_good[index], numpy.max(counts, axis=0))
+        length = ends[index] - starts[index] + extra
+        min_points_now = numpy.maximum((length*min_percent/100).astype(numpy.int64), min_points)
+        active[index] = num_good[index] < min_points_now
+    return starts, ends, full
+
 def ConvertCO2Units(cf, ds, CO2='CO2'):
     if CO2 == None:
         return
@@ -439,8 +566,7 @@ def convert_units_co2(ds, variable, new_units):
         variable["Attr"]["units"] = new_units
     elif old_units in ["mg/m3", "mgCO2/m3"] and new_units=="umol/mol":
         # convert the data
-        ldt = GetVariable(ds, "DateTime")
-        Month = numpy.array([d.month for d in ldt["Data"]])
+        Month = get_time_index(ds)["Month"]
         Ta = GetVariable(ds, "Ta")
         ps = GetVariable(ds, "ps")
         Ta_def = numpy.full(12, numpy.ma.mean(Ta["Data"]))
@@ -496,8 +622,7 @@ def convert_units_co2(ds, variable, new_units):
         # update the variable attributes to the new units
         variable["Attr"]["units"] = new_units
     elif old_units=="umol/mol" and new_units in ["mg/m3","mgCO2/m3"]:
-        ldt = GetVariable(ds, "DateTime")
-        Month = numpy.array([d.month for d in ldt["Data"]])
+        Month = get_time_index(ds)["Month"]
         Ta = GetVariable(ds, "Ta")
         ps = GetVariable(ds, "ps")
         Ta_def = numpy.full(12, numpy.ma.mean(Ta["Data"]))
@@ -1021,6 +1146,7 @@ def CreateSeries(ds,Label,Data,Flag,Attr):
      pfp_utils.CreateSeries(ds,"Fsd",Fsd,flag,attr)
     Author: PRI
     Date: Back in the day
+          October 2026 - drop the cached gap index for the series
     """
     ds.series['_tmp_'] = {}                       # create a temporary series to avoid premature overwrites
     # put the data into the temporary series
@@ -1049,6 +1175,7 @@ def CreateSeries(ds,Label,Data,Flag,Attr):
             ds.series['_tmp_']['Attr'][item] = Attr[item]
     ds.series[unicode(Label)] = ds.series['_tmp_']     # copy temporary series to new series
     del ds.series['_tmp_']                        # delete the temporary series
+    getattr(ds, "gap_index", {}).pop(Label, None) # the series has changed so drop its gap index
 
 def CopyVariable(var):
     """
@@ -1108,7 +1235,7 @@ def CreateEmptyVariable(label, nrecs, datetime=[], out_type="ma", attr=None):
         variable["DateTime"] = datetime
     return variable
 
-def CreateVariable(ds,variable):
+def CreateVariable(ds,variable,view=False):
     """
     Purpose:
      Create a variable in the data structure.
@@ -1123,26 +1250,30 @@ def CreateVariable(ds,variable):
       ... and don't forget to update the QC flag ...
       ... and the attributes ...
      pfp_utils.CreateVariable(ds,Fsd)
+     If view is True, the data and QC flag arrays of the variable are put into the data
+     structure without being copied (read-only arrays are still copied), use this when
+     the variable is not used after it has been put into the data structure.
     Author: PRI
     Date: September 2016
+          October 2026 - added view option, data, flag and attributes copied once
+          October 2026 - drop the cached gap index for the variable
     """
     label = variable["Label"]
-    # create a temporary series to avoid premature overwrites
-    ds.series["_tmp_"] = {}
-    # put the data into the temporary series
-    if numpy.ma.isMA(variable["Data"]):
-        ds.series["_tmp_"]["Data"] = numpy.ma.filled(variable["Data"],
-                                                     float(c.missing_value))
+    data = variable["Data"]
+    if numpy.ma.isMA(data):
+        # filled() only returns a new array when some values are masked
+        data = numpy.ma.filled(data, float(c.missing_value))
+    if view:
+        data = numpy.require(data, requirements=["W"])
+        flag = numpy.require(variable["Flag"], requirements=["W"])
     else:
-        ds.series["_tmp_"]["Data"] = numpy.array(variable["Data"])
-    # copy or make the QC flag
-    ds.series["_tmp_"]["Flag"] = numpy.array(variable["Flag"])
-    # do the attributes
-    ds.series["_tmp_"]["Attr"] = copy.deepcopy(variable["Attr"])
-    # and copy the temporary series back to the original label
-    ds.series[unicode(label)] = copy.deepcopy(ds.series['_tmp_'])
-    # delete the temporary series
-    del ds.series['_tmp_']
+        if (not numpy.ma.isMA(variable["Data"])) or numpy.may_share_memory(data, variable["Data"]):
+            data = numpy.array(data)
+        flag = numpy.array(variable["Flag"])
+    ds.series[unicode(label)] = {"Data": data, "Flag": flag,
+                                 "Attr": copy.deepcopy(variable["Attr"])}
+    # with view=True the data array can be the one the cached gap index was made from
+    getattr(ds, "gap_index", {}).pop(label, None)
 
 def file_exists(filename,mode="verbose"):
     if not os.path.exists(filename):
@@ -1298,11 +1429,12 @@ def FixTimeGaps(ds):
     ts = int(ds.globalattributes["time_step"])
     #ldt_gaps,ldt_flag,ldt_attr = GetSeries(ds,"DateTime")
     ldt_gaps = ds.series["DateTime"]["Data"]
-    # generate a datetime list from the start datetime to the end datetime
-    ldt_start = ldt_gaps[0]
-    ldt_end = ldt_gaps[-1]
-    nogaps = [result for result in perdelta(ldt_start,ldt_end,datetime.timedelta(minutes=ts))]
-    ldt_nogaps = numpy.array(nogaps)
+    # generate a datetime array from the start datetime to the end datetime
+    dt64_gaps = get_time_index(ds)["DateTime64"]
+    delta = numpy.timedelta64(ts, "m")
+    dt64_nogaps = numpy.arange(dt64_gaps[0], dt64_gaps[-1] + delta, delta)
+    dt64_nogaps = dt64_nogaps[dt64_nogaps <= dt64_gaps[-1]]
+    ldt_nogaps = dt64_nogaps.astype(datetime.datetime)
     # update the global attribute containing the number of records
     nRecs = len(ldt_nogaps)
     ds.globalattributes['nc_nrecs'] = nRecs
@@ -1481,6 +1613,131 @@ def GetRangesFromCF(cf,ThisOne,mode="verbose"):
         lower, upper = None
     return lower, upper
 
+class DateIndex(object):
+    """
+    Purpose:
+     Date to index lookup for an array of Python datetimes.  When the datetimes
+     are on a regular time step the nearest index is found by arithmetic on the
+     time step, otherwise a binary search is used.  The match options used by
+     GetDateIndex are resolved by a binary search of the indices of the records
+     that satisfy each option, these are calculated the first time they are used.
+    Usage:
+     di = pfp_utils.get_date_index(ds)
+     or
+     di = pfp_utils.DateIndex(ldt, ts=30)
+     si = di.find(start_date, default=0, match="startnextday")
+     ei = di.find(end_date, default=-1, match="endpreviousday")
+     where ldt is an array of datetime objects
+           ts is the time step in minutes, optional
+           start_date, end_date are datetimes or strings dateutil can parse
+     di can also be passed to GetDateIndex in place of the datetime array.
+    Author: PRI
+    Date: October 2026
+    """
+    def __init__(self, ldt, ts=None, dt64=None):
+        self.ldt = ldt
+        self.nrecs = len(ldt)
+        if dt64 is None:
+            dt64 = numpy.array(ldt, dtype="datetime64[us]")
+        self.dt64 = dt64
+        self.us = dt64.astype(numpy.int64)
+        steps = numpy.diff(self.us)
+        if ts is None:
+            if len(steps) > 0:
+                ts = numpy.median(steps)/float(60*1000000)
+            else:
+                ts = 30
+        self.ts = ts
+        self.step = int(round(float(ts)*60*1000000))
+        self.regular = bool(len(steps) > 0 and numpy.all(steps == self.step))
+        self.matches = {}
+
+    def nearest(self, date):
+        """ Return the index of the datetime nearest to date."""
+        value = numpy.datetime64(date, "us").astype(numpy.int64)
+        if self.regular:
+            i = int((value - self.us[0] + self.step//2)//self.step)
+        else:
+            i = int(numpy.searchsorted(self.us, value, side="right")) - 1
+            if i < self.nrecs-1:
+                if abs(self.us[i+1]-value) <= abs(self.us[i]-value):
+                    i = i + 1
+        return min(max(i, 0), self.nrecs-1)
+
+    def get_matches(self, match):
+        """ Return the indices of the records that satisfy a match option."""
+        if match not in self.matches:
+            ts = int(round(float(self.ts)))
+            minutes = (self.us//60000000) % 1440
+            if match in ["startnextday", "startnextmonth"]:
+                mask = (minutes == ts)
+            elif match in ["endpreviousday", "endpreviousmonth"]:
+                mask = (minutes == 0)
+            elif match == "startnexthour":
+                mask = (minutes % 60 == ts)
+            elif match == "endprevioushour":
+                mask = (minutes % 60 == 0)
+            if match in ["startnextmonth", "endpreviousmonth"]:
+                days = self.dt64.astype("datetime64[D]")
+                months = self.dt64.astype("datetime64[M]")
+                mask = mask & (days == months)
+            self.matches[match] = numpy.where(mask)[0]
+        return self.matches[match]
+
+    def find(self, date, default=0, match="exact"):
+        """ Return the index of date, see GetDateIndex for the arguments."""
+        ldt = self.ldt
+        # trap default values of -1 since -1 + 1 = 0
+        if default == -1:
+            default = self.nrecs-1
+        # is the input date a string?
+        if isinstance(date, basestring):
+            # if so, is it an empty string?
+            if len(date) != 0:
+                # if not empty, see if we can parse it
+                try:
+                    date = dateutil.parser.parse(date)
+                except:
+                    # set to default if parsing date string failed
+                    date = None
+            else:
+                # set to default if date string empty
+                date = None
+        elif not isinstance(date, datetime.datetime):
+            msg = " Unrecognised object passed in as date, returning default index"
+            logger.warning(msg)
+            date = None
+        if (date is not None) and (date>=ldt[0]) and (date<=ldt[-1]):
+            i = self.nearest(date)
+        else:
+            # set to default if not within the datetime range of the data
+            i = default
+        if match == "exact":
+            # if an exact match is required, do nothing
+            pass
+        elif match in ["startnexthour", "endprevioushour"] and int(self.ts) == 60:
+            # with a 60 minute time step every record starts or ends an hour
+            pass
+        elif match in ["startnextday", "startnexthour", "startnextmonth"]:
+            idx = self.get_matches(match)
+            n = numpy.searchsorted(idx, i, side="left")
+            if n < len(idx):
+                i = int(idx[n])
+            else:
+                msg = " DateIndex: no match for " + match + ", returning index unchanged"
+                logger.warning(msg)
+        elif match in ["endpreviousday", "endprevioushour", "endpreviousmonth"]:
+            idx = self.get_matches(match)
+            n = numpy.searchsorted(idx, i, side="right") - 1
+            if n >= 0:
+                i = int(idx[n])
+            else:
+                msg = " DateIndex: no match for " + match + ", returning index unchanged"
+                logger.warning(msg)
+        else:
+            logger.error("DateIndex: Unrecognised match option")
+        return i
+
 def GetDateIndex(ldt,date,ts=30,default=0,match='exact'):
     """
     Purpose:
@@ -1509,9 +1766,13 @@ def GetDateIndex(ldt,date,ts=30,default=0,match='exact'):
                                      in the previous month
                 NOTE: "startnextday" and "endpreviousday" can be used to pick
                     out time periods with an integer number of days
+     ldt can also be a pfp_utils.DateIndex, in which case the lookup is
+     done by the DateIndex and its time step is used for the match options.
     Author: PRI
     Date: Back in the day
     """
+    if isinstance(ldt, DateIndex):
+        return ldt.find(date, default=default, match=match)
     # trap default values of -1 since -1 + 1 = 0
     if default == -1:
         default = len(ldt)-1
@@ -1653,26 +1914,34 @@ def GetPlotVariableNamesFromCF(cf, n):
         logger.warning(msg)
     return SeriesList
 
-def GetSeries(ds,ThisOne,si=0,ei=-1,mode="truncate"):
-    """ Returns the data, QC flag and attributes of a series from the data structure."""
+def GetSeries(ds,ThisOne,si=0,ei=-1,mode="truncate",view=False):
+    """
+    Returns the data, QC flag and attributes of a series from the data structure.
+    The data and QC flag are copies unless view is True, in which case read-only
+    views of the arrays in the data structure are returned where possible.
+    October 2026 - added view option, only the requested part of the series is copied
+    """
     # number of records
     if "nc_nrecs" in ds.globalattributes:
         nRecs = int(ds.globalattributes["nc_nrecs"])
     else:
-        nRecs = len(ds.series[ThisOne]["Data"])
+        nRecs = len(get_series_view(ds, ThisOne))
+    Data, Flag_ds = None, None
     # check the series requested is in the data structure
     if ThisOne in ds.series.keys():
         # series is in the data structure
-        if isinstance(ds.series[ThisOne]['Data'],list):
+        Data = get_series_view(ds, ThisOne)
+        if isinstance(Data,list):
             # return a list if the series is a list
-            Series = list(ds.series[ThisOne]['Data'])
-        elif isinstance(ds.series[ThisOne]['Data'],numpy.ndarray):
-            # return a numpy array if series is an array
-            Series = ds.series[ThisOne]['Data'].copy()
+            Series = list(Data)
+        elif isinstance(Data,numpy.ndarray):
+            # the numpy array is copied after truncating or padding
+            Series = Data
         # now get the QC flag
-        if 'Flag' in ds.series[ThisOne].keys():
+        if 'Flag' in ds.series[ThisOne]:
             # return the QC flag if it exists
-            Flag = ds.series[ThisOne]['Flag'].copy()
+            Flag_ds = get_series_view(ds, ThisOne, "Flag")
+            Flag = Flag_ds
         else:
             # create a QC flag if one does not exist
             Flag = numpy.zeros(nRecs,dtype=numpy.int32)
@@ -1747,8 +2016,48 @@ def GetSeries(ds,ThisOne,si=0,ei=-1,mode="truncate"):
             raise ValueError(msg)
     else:
         raise ValueError("GetSeries: unrecognised mode option "+str(mode))
+    # copy, or make read-only views of, anything still using the arrays in ds
+    Series = get_series_copy(Series, Data, view)
+    Flag = get_series_copy(Flag, Flag_ds, view)
     return Series,Flag,Attr
 
+def get_series_copy(array, array_ds, view):
+    """
+    Purpose:
+     Return a copy of array if it uses the memory of array_ds, an array in the
+     data structure.  If view is True, a read-only view of array is returned
+     instead of a copy.
+    Usage:
+     data = pfp_utils.get_series_copy(data, data_ds, view)
+    Author: PRI
+    Date: October 2026
+    """
+    if isinstance(array_ds, numpy.ndarray) and numpy.may_share_memory(array, array_ds):
+        if view:
+            array = array.view()
+            array.flags.writeable = False
+        else:
+            array = array.copy()
+    return array
+
+def get_series_view(ds, label, key="Data"):
+    """
+    Purpose:
+     Return the "Data" or "Flag" array of a series in the data structure without
+     copying it.  A series that shares its arrays with another data structure
+     (see pfp_io.share_datastructure) is not copied, the returned array must only
+     be used for reading.
+    Usage:
+     data = pfp_utils.get_series_view(ds, label)
+     flag = pfp_utils.get_series_view(ds, label, key="Flag")
+    Author: PRI
+    Date: October 2026
+    """
+    series = ds.series[label]
+    if hasattr(series, "view"):
+        return series.view(key)
+    return series[key]
+
 def MakeEmptySeries(ds,ThisOne):
     nRecs = int(ds.globalattributes['nc_nrecs'])
     Series = float(c.missing_value)*numpy.ones(nRecs,dtype=numpy.float64)
@@ -1756,7 +2065,7 @@ def MakeEmptySeries(ds,ThisOne):
     Attr = MakeAttributeDictionary()
     return Series,Flag,Attr
 
-def GetSeriesasMA(ds,ThisOne,si=0,ei=-1,mode="truncate"):
+def GetSeriesasMA(ds,ThisOne,si=0,ei=-1,mode="truncate",view=False):
     """
     Purpose:
      Returns a data series and the QC flag series from the data structure.
@@ -1767,6 +2076,7 @@ def GetSeriesasMA(ds,ThisOne,si=0,ei=-1,mode="truncate"):
       label - label of the data series in ds (string)
       si    - start index (integer), default 0
       ei    - end index (integer), default -1
+      view  - if True, data and flag are read-only views of the arrays in ds
     and the returned values are;
       data - values for the requested series in ds
              (numpy masked array, float64)
@@ -1780,11 +2090,11 @@ def GetSeriesasMA(ds,ThisOne,si=0,ei=-1,mode="truncate"):
       Fsd,f,a = pfp_utils.GetSeriesasMA(ds,"Fsd")
     Author: PRI
     """
-    Series,Flag,Attr = GetSeries(ds,ThisOne,si=si,ei=ei,mode=mode)
-    Series,WasND = SeriestoMA(Series)
+    Series,Flag,Attr = GetSeries(ds,ThisOne,si=si,ei=ei,mode=mode,view=view)
+    Series,WasND = SeriestoMA(Series,view=view)
     return Series,Flag,Attr
 
-def GetVariable(ds, label, start=0, end=-1, mode="truncate", out_type="ma"):
+def GetVariable(ds, label, start=0, end=-1, mode="truncate", out_type="ma", view=False):
     """
     Purpose:
      Returns a data variable from the data structure as a dictionary.
@@ -1797,6 +2107,8 @@ def GetVariable(ds, label, start=0, end=-1, mode="truncate", out_type="ma"):
       end   - end date or index (integer), default -1
       mode  - truncate or pad the data
       out_type - masked array or ndarray
+      view  - if True, the data and flag are read-only views of the arrays in ds
+              instead of copies, use this when the variable is only read
     and the returned values are;
      The data are returned as a dictionary;
       variable["label"] - variable label in data structure
@@ -1809,18 +2121,19 @@ def GetVariable(ds, label, start=0, end=-1, mode="truncate", out_type="ma"):
       ds = pfp_io.nc_read_series("HowardSprings_2011_L3.nc")
       Fsd = pfp_utils.GetSeriesAsDict(ds,"Fsd")
     Author: PRI
+    Date: October 2026 - added view option
     """
     nrecs = int(ds.globalattributes["nc_nrecs"])
     if end == -1:
         end = nrecs
     ts = int(ds.globalattributes["time_step"])
-    ldt = ds.series["DateTime"]["Data"]
+    ldt = get_series_view(ds, "DateTime")
     si = get_start_index(ldt, start)
     ei = get_end_index(ldt, end)
-    data,flag,attr = GetSeries(ds, label, si=si, ei=ei, mode=mode)
+    data,flag,attr = GetSeries(ds, label, si=si, ei=ei, mode=mode, view=view)
     if isinstance(data, numpy.ndarray) and out_type == "ma":
         # convert to a masked array
-        data, WasND = SeriestoMA(data)
+        data, WasND = SeriestoMA(data, view=view)
     elif isinstance(data, numpy.ndarray) and out_type == "nan":
         # leave as ndarray, convert c.missing_value to NaN
         data = numpy.where(data == c.missing_value, numpy.nan, data)
@@ -1882,7 +2195,8 @@ def get_coverage_individual(ds):
     for ThisOne in ["DateTime","DateTime_UTC"]:
         if ThisOne in SeriesList: SeriesList.remove(ThisOne)
     for ThisOne in SeriesList:
-        num_good = len(numpy.where(abs(ds.series[ThisOne]['Data']-float(c.missing_value))>c.eps)[0])
+        data = get_series_view(ds, ThisOne)
+        num_good = len(numpy.where(abs(data-float(c.missing_value))>c.eps)[0])
         coverage = 100*float(num_good)/float(ds.globalattributes['nc_nrecs'])
         ds.series[ThisOne]['Attr']['coverage_'+level] = str('%d'%coverage)
 
@@ -1960,6 +2274,53 @@ def get_ddoy_from_datetime(dt):
     ddoy = dt.timetuple().tm_yday + float(dt.hour+float(dt.minute+float(dt.second)/60)/60)/24
     return ddoy
 
+def get_diurnalgroups(DecHour, ts, Month=None):
+    """
+    Purpose:
+     Return an array of group numbers for calculating diurnal statistics with
+     pfp_utils.get_groupedstats().  The group number is the time step of the day
+     (0 for 00:00, 1 for 00:30 etc for 30 minute data) or, if Month is given,
+     (Month-1)*number of time steps per day + time step of the day.
+     Records whose decimal hour does not fall on a time step are given the
+     group number -1 and are ignored by get_groupedstats().
+    Usage:
+     group = pfp_utils.get_diurnalgroups(Hdh, ts, Month=Month)
+     where Hdh is the decimal hour of the day
+           ts is the time step in minutes
+           Month is the month, optional
+    Author: PRI
+    Date: October 2026
+    """
+    nInts = 24*int((60/ts)+0.5)
+    DecHour = numpy.ma.filled(numpy.ma.asarray(DecHour, dtype=numpy.float64), float(-1))
+    slot = numpy.round(DecHour*60/float(ts))
+    ok = (abs(DecHour - slot*ts/60.) < c.eps) & (slot >= 0) & (slot < nInts)
+    group = numpy.where(ok, slot, -1).astype(numpy.int64)
+    if Month is not None:
+        Month = numpy.asarray(Month, dtype=numpy.int64)
+        group = numpy.where(ok, (Month-1)*nInts + group, -1)
+    return group
+
+def get_diurnalstats_decimalhour(DecHour, Data, ts):
+    """
+    Purpose:
+     Return the number of points, average, standard deviation, maximum and
+     minimum of the data at each time step of the day.  Masked data and data
+     equal to c.missing_value are ignored.
+    Usage:
+     Num, Hr, Av, Sd, Mx, Mn = pfp_utils.get_diurnalstats_decimalhour(Hdh, data, ts)
+     where Hdh is the decimal hour of the day
+           data is the data
+           ts is the time step in minutes
+    Author: PRI
+    Date: October 2026
+    """
+    nInts = 24*int((60/ts)+0.5)
+    Hr = numpy.ma.array(numpy.arange(nInts)*ts/60., dtype=float)
+    stats = get_groupedstats(get_diurnalgroups(DecHour, ts), Data, nInts)
+    Num = numpy.ma.array(stats["Num"])
+    return Num, Hr, stats["Av"], stats["Sd"], stats["Mx"], stats["Mn"]
+
 def get_diurnalstats(dt,data,info):
     ts = info["time_step"]
     nperday = info["nperday"]
@@ -2019,6 +2380,57 @@ def get_end_index(ldt, end, mode="quiet"):
         ei = len(ldt)
     return ei
 
+def get_groupedstats(group, data, ngroups):
+    """
+    Purpose:
+     Calculate the number of points, mean, standard deviation, maximum and
+     minimum of data for each group in a single pass through the data.  Data
+     that are masked, equal to c.missing_value or whose group number is outside
+     the range 0 to ngroups-1 are ignored.
+    Usage:
+     stats = pfp_utils.get_groupedstats(group, data, ngroups)
+     where group is an integer array, the same length as data, of group numbers
+           data is a numpy array or masked array
+           ngroups is the number of groups
+     and stats is a dictionary with the keys "Num", "Av", "Sd", "Mx" and "Mn",
+     stats["Num"] is an integer array and the others are masked arrays, masked
+     where there are no data in the group, all are of length ngroups.
+    Author: PRI
+    Date: October 2026
+    """
+    values = numpy.ma.filled(numpy.ma.asarray(data, dtype=numpy.float64), float(c.missing_value))
+    group = numpy.asarray(group)
+    ok = (group >= 0) & (group < ngroups) & (abs(values - float(c.missing_value)) > c.eps)
+    g = group[ok].astype(numpy.int64)
+    x = values[ok]
+    Num = numpy.bincount(g, minlength=ngroups)
+    has = (Num > 0)
+    Av = numpy.zeros(ngroups)
+    Av[has] = numpy.bincount(g, weights=x, minlength=ngroups)[has]/Num[has]
+    # second pass for the variance to avoid loss of precision
+    Sd = numpy.zeros(ngroups)
+    ss = numpy.bincount(g, weights=(x - Av[g])**2, minlength=ngroups)
+    Sd[has] = numpy.sqrt(ss[has]/Num[has])
+    # sort by group then value, the first and last values in each group
+    # are then the minimum and maximum
+    order = numpy.lexsort((x, g))
+    gs = g[order]
+    xs = x[order]
+    groups = numpy.arange(ngroups)
+    first = numpy.searchsorted(gs, groups, side="left")
+    last = numpy.searchsorted(gs, groups, side="right") - 1
+    Mx = numpy.zeros(ngroups)
+    Mn = numpy.zeros(ngroups)
+    Mx[has] = xs[last[has]]
+    Mn[has] = xs[first[has]]
+    mask = ~has
+    stats = {"Num": Num,
+             "Av": numpy.ma.array(Av, mask=mask),
+             "Sd": numpy.ma.array(Sd, mask=mask),
+             "Mx": numpy.ma.array(Mx, mask=mask),
+             "Mn": numpy.ma.array(Mn, mask=mask)}
+    return stats
+
 def get_keyvaluefromcf(cf,sections,key,default=None,mode="quiet"):
     """
     Purpose:
@@ -2229,6 +2641,95 @@ def get_timestep(ds):
     dt = numpy.array([(ldt[i]-ldt[i-1]).total_seconds() for i in range(1,len(ldt))])
     return dt
 
+def get_date_index(ds):
+    """
+    Purpose:
+     Return the pfp_utils.DateIndex for the DateTime series in a data structure.
+     The DateIndex is cached with the other time index arrays in ds.time_index
+     and is rebuilt when the DateTime series changes.
+    Usage:
+     di = pfp_utils.get_date_index(ds)
+     si = di.find(start_date, default=0)
+    Author: PRI
+    Date: October 2026
+    """
+    ti = get_time_index(ds)
+    if "DateIndex" not in ti:
+        ts = int(float(ds.globalattributes["time_step"]))
+        ti["DateIndex"] = DateIndex(ds.series["DateTime"]["Data"], ts=ts, dt64=ti["DateTime64"])
+    return ti["DateIndex"]
+
+def get_gap_index(ds, label, rebuild=False):
+    """
+    Purpose:
+     Return the pfp_utils.GapIndex for a series in the data structure.  The
+     index is cached in ds.gap_index, pfp_utils.CreateVariable and CreateSeries
+     drop the cached index and it is rebuilt when the series is replaced by
+     other means, use rebuild=True after changing the data in place.
+    Usage:
+     gi = pfp_utils.get_gap_index(ds, label)
+    Author: PRI
+    Date: October 2026
+    """
+    data = get_series_view(ds, label)
+    cache = getattr(ds, "gap_index", None)
+    if cache is None:
+        cache = ds.gap_index = {}
+    gi = cache.get(label)
+    if rebuild or gi is None or gi.source is not data or gi.nrecs != len(data):
+        gi = GapIndex(abs(data - float(c.missing_value)) < c.eps)
+        gi.source = data
+        cache[label] = gi
+    return gi
+
+def get_time_index(ds):
+    """
+    Purpose:
+     Return a dictionary of numpy arrays derived from the Python datetimes in
+     ds.series["DateTime"]["Data"].  The arrays are calculated once and cached
+     in ds.time_index, the cache is rebuilt when the DateTime series is replaced
+     or changes length.
+     The dictionary contains:
+      "DateTime64" - numpy datetime64[us] array
+      "Year", "Month", "Day", "Hour", "Minute", "Second" - integer arrays
+      "DoY" - integer day of the year, 1 January is 1
+      "Hdh" - decimal hour of the day, hour + minute/60
+      "Slot" - index of the time step in the day, 00:00 is slot 0
+    Usage:
+     ti = pfp_utils.get_time_index(ds)
+     month = ti["Month"]
+     where ds is a data structure
+    Side effects:
+     Creates or updates ds.time_index.
+    Author: PRI
+    Date: October 2026
+    """
+    ldt = ds.series["DateTime"]["Data"]
+    ti = getattr(ds, "time_index", None)
+    if ti is None:
+        ti = ds.time_index = {}
+    if (ti.get("source") is ldt) and (len(ti["DateTime64"]) == len(ldt)):
+        return ti
+    ts = int(float(ds.globalattributes["time_step"]))
+    dt64 = numpy.array(ldt, dtype="datetime64[us]")
+    years = dt64.astype("datetime64[Y]")
+    months = dt64.astype("datetime64[M]")
+    days = dt64.astype("datetime64[D]")
+    seconds = (dt64 - days).astype("timedelta64[s]").astype(numpy.int64)
+    ti.clear()
+    ti["source"] = ldt
+    ti["DateTime64"] = dt64
+    ti["Year"] = years.astype(numpy.int64).astype(numpy.int32) + 1970
+    ti["Month"] = (months.astype(numpy.int64) % 12).astype(numpy.int32) + 1
+    ti["Day"] = (days - months).astype(numpy.int32) + 1
+    ti["DoY"] = (days - years).astype(numpy.int32) + 1
+    ti["Hour"] = (seconds // 3600).astype(numpy.int32)
+    ti["Minute"] = ((seconds % 3600) // 60).astype(numpy.int32)
+    ti["Second"] = (seconds % 60).astype(numpy.int32)
+    ti["Hdh"] = ti["Hour"] + ti["Minute"]/float(60)
+    ti["Slot"] = (seconds // (60*ts)).astype(numpy.int32)
+    return ti
+
 def get_timezone(site_name,prompt="no"):
     """ Return the time zone based on the site name."""
     time_zone = ""
@@ -2349,16 +2850,16 @@ def get_ymdhmsfromdatetime(ds):
     Author: PRI
     '''
     nRecs = int(ds.globalattributes["nc_nrecs"])
-    dt = ds.series["DateTime"]["Data"]
+    ti = get_time_index(ds)
     flag = numpy.zeros(nRecs,dtype=numpy.int32)
-    Year = numpy.array([dt[i].year for i in range(0,nRecs)]).astype(numpy.int32)
-    Month = numpy.array([dt[i].month for i in range(0,nRecs)]).astype(numpy.int32)
-    Day = numpy.array([dt[i].day for i in range(0,nRecs)]).astype(numpy.int32)
-    Hour = numpy.array([dt[i].hour for i in range(0,nRecs)]).astype(numpy.int32)
-    Minute = numpy.array([dt[i].minute for i in range(0,nRecs)]).astype(numpy.int32)
-    Second = numpy.array([dt[i].second for i in range(0,nRecs)]).astype(numpy.int32)
-    Hdh = numpy.array([float(Hour[i])+float(Minute[i])/60. for i in range(0,nRecs)]).astype(numpy.float64)
-    Ddd = numpy.array([(dt[i] - datetime.datetime(Year[i],1,1)).days+1+Hdh[i]/24. for i in range(0,nRecs)]).astype(numpy.float64)
+    Year = numpy.array(ti["Year"])
+    Month = numpy.array(ti["Month"])
+    Day = numpy.array(ti["Day"])
+    Hour = numpy.array(ti["Hour"])
+    Minute = numpy.array(ti["Minute"])
+    Second = numpy.array(ti["Second"])
+    Hdh = numpy.array(ti["Hdh"], dtype=numpy.float64)
+    Ddd = (ti["DoY"] + Hdh/24.).astype(numpy.float64)
     CreateSeries(ds,'Year',Year,flag,MakeAttributeDictionary(long_name='Year',units='none'))
     CreateSeries(ds,'Month',Month,flag,MakeAttributeDictionary(long_name='Month',units='none'))
     CreateSeries(ds,'Day',Day,flag,MakeAttributeDictionary(long_name='Day',units='none'))
@@ -2455,6 +2956,27 @@ def MakeAttributeDictionary(**kwargs):
     attr["missing_value"] = c.missing_value
     return copy.deepcopy(attr)
 
+def make_work_directory(prefix, subdirectories=None):
+    """
+    Purpose:
+     Create a uniquely named temporary working directory, with optional
+     sub-directories, for the files used by the compiled SOLO and MPT
+     programs.  Each run gets its own directory so that runs for different
+     targets, windows or sites can happen at the same time.
+    Usage:
+     work_dir = pfp_utils.make_work_directory("solo_", subdirectories=["inf", "input"])
+     Remove the directory with pfp_utils.remove_work_directory when done, use
+     try/finally so that it is removed when the run fails.
+    Author: PRI
+    Date: October 2026
+    """
+    if subdirectories is None:
+        subdirectories = []
+    work_dir = tempfile.mkdtemp(prefix="pfp_" + prefix)
+    for subdirectory in subdirectories:
+        os.makedirs(os.path.join(work_dir, subdirectory))
+    return work_dir
+
 def make_attribute_dictionary(attr_existing):
     """
     Purpose:
@@ -2646,6 +3168,18 @@ def polyval(p,x):
         y = x*y + p[i]
     return y
 
+def remove_work_directory(work_dir):
+    """
+    Purpose:
+     Remove a temporary working directory created by make_work_directory.
+    Usage:
+     pfp_utils.remove_work_directory(work_dir)
+    Author: PRI
+    Date: October 2026
+    """
+    shutil.rmtree(work_dir, ignore_errors=True)
+    return
+
 def rounddttots(dt,ts=30):
     """
     Purpose:
@@ -2724,13 +3258,14 @@ def r(b, p, alpha):
            (1 / (p ** alpha + 1))
     return r
 
-def SeriestoMA(Series):
+def SeriestoMA(Series, view=False):
     """
     Convert a numpy ndarray to a masked array.
     Useage:
      Series, WasND = SeriestoMA(Series)
      where:
       Series (input)    is the data series to be converted.
+      view   (input)    if True, the masked array uses the data in Series without copying
       WasND  (returned) is a logical, True if the input series was an ndarray
       Series (output)   is the input series convered to a masked array.
     """
@@ -2738,7 +3273,8 @@ def SeriestoMA(Series):
     if Series.dtype == "float64":
         if not numpy.ma.isMA(Series):
             WasND = True
-            Series = numpy.ma.masked_where(abs(Series-numpy.float(c.missing_value)) < c.eps, Series)
+            Series = numpy.ma.masked_where(abs(Series-numpy.float(c.missing_value)) < c.eps, Series,
+                                           copy=not view)
     return Series, WasND
 
 def SetUnitsInds(ds, ThisOne, units):
@@ -24,6 +24,9 @@ This module contains the most important functions for calculation of the positio
 """
 import math
 import datetime
+import time
+
+import numpy
 
 """This file is consists of numerical constants for calculating corrections,
 such as the wiggling ("nutation") of the axis of the earth. It also includes
@@ -799,3 +802,179 @@ def GetRadiationDirect(utc_datetime, altitude_deg):
             return flux * math.exp(-1 * optical_depth * air_mass_ratio) * math.sin(math.radians(altitude_deg))
     else:
             return 0.0
+
+# Vectorised versions of the functions above.  These take a sequence of UTC
+# datetimes and return numpy arrays, the per-record functions above are
+# retained as the reference implementation.  The vectorised functions follow
+# the same order of operations as the per-record functions and agree with them
+# to better than 1E-8 degrees for altitude and azimuth and 1E-8 W/m2 for the
+# direct radiation (see SolarBenchmark).
+
+def GetDateTimeComponents(utc_datetimes):
+    """Returns the year, month, day of month, fractional day and day of year
+    (as used by GetDayOfYear) of a sequence of datetimes as numpy arrays."""
+    components = numpy.array([(dt.year, dt.month, dt.day,
+                               dt.hour*3600.0 + dt.minute*60.0 + dt.second + dt.microsecond/1000000.0,
+                               dt.timetuple().tm_yday - 1) for dt in utc_datetimes], dtype=numpy.float64)
+    components = components.reshape(-1, 5)
+    year = components[:, 0]
+    month = components[:, 1]
+    day = components[:, 2] + components[:, 3]/86400.0
+    day_of_year = components[:, 4]
+    return year, month, day, day_of_year
+
+def GetJulianDayArray(year, month, day):
+    """Vectorised version of GetJulianDay, day is the fractional day of the month."""
+    year = numpy.where(month <= 2.0, year - 1.0, year)
+    month = numpy.where(month <= 2.0, month + 12.0, month)
+    gregorian_offset = 2.0 - (year // 100.0) + ((year // 100.0) // 4.0)
+    julian_day = numpy.floor(365.25 * (year + 4716.0)) + numpy.floor(30.6001 * (month + 1.0)) + day - 1524.5
+    return numpy.where(julian_day <= 2299160.0, julian_day, julian_day + gregorian_offset)
+
+def GetCoefficientArray(jme, constant_array):
+        # loop over the terms rather than broadcasting over them to keep the
+        # memory used proportional to the number of records
+        coefficient = numpy.zeros(len(jme))
+        for a, b, c in constant_array:
+                coefficient += a * numpy.cos(b + (c * jme))
+        return coefficient
+
+def GetNutationArray(jde):
+        abcd = nutation_coefficients
+        y = aberration_sin_terms
+        jce = GetJulianEphemerisCentury(jde)
+        x = PrecalculateAberrations(buildPolyDict(), jce)
+        nutation_long = numpy.zeros(len(jce))
+        nutation_oblique = numpy.zeros(len(jce))
+        for i in range(len(abcd)):
+                sigmaxy = numpy.zeros(len(jce))
+                for j in range(len(x)):
+                        sigmaxy += x[j] * y[i][j]
+                nutation_long += (abcd[i][0] + (abcd[i][1] * jce)) * numpy.sin(numpy.radians(sigmaxy))
+                nutation_oblique += (abcd[i][2] + (abcd[i][3] * jce)) * numpy.cos(numpy.radians(sigmaxy))
+        # 36000000 scales from 0.0001 arcseconds to degrees
+        nutation = {'longitude' : nutation_long/36000000.0, 'obliquity' : nutation_oblique/36000000.0}
+        return nutation
+
+def GetTopocentricPositionArray(latitude_deg, longitude_deg, utc_datetimes, elevation = 0):
+        """Returns the topocentric sun declination and local hour angle for a
+        sequence of UTC datetimes, this is the part of the calculation shared
+        by GetAltitudeArray and GetAzimuthArray."""
+        # location-dependent calculations
+        projected_radial_distance = GetProjectedRadialDistance(elevation, latitude_deg)
+        projected_axial_distance = GetProjectedAxialDistance(elevation, latitude_deg)
+
+        # time-dependent calculations
+        year, month, day, day_of_year = GetDateTimeComponents(utc_datetimes)
+        jd = GetJulianDayArray(year, month, day)
+        jde = GetJulianEphemerisDay(jd, 65)
+        jce = GetJulianEphemerisCentury(jde)
+        jme = GetJulianEphemerisMillenium(jce)
+        b0 = GetCoefficientArray(jme, B0)
+        b1 = GetCoefficientArray(jme, B1)
+        geocentric_latitude = -1 * numpy.degrees((b0 + (b1 * jme)) / 10 ** 8)
+        l0 = GetCoefficientArray(jme, L0)
+        l1 = GetCoefficientArray(jme, L1)
+        l2 = GetCoefficientArray(jme, L2)
+        l3 = GetCoefficientArray(jme, L3)
+        l4 = GetCoefficientArray(jme, L4)
+        l5 = GetCoefficientArray(jme, L5)
+        l = (l0 + l1 * jme + l2 * jme ** 2 + l3 * jme ** 3 + l4 * jme ** 4 + l5 * jme ** 5) / 10 ** 8
+        geocentric_longitude = ((numpy.degrees(l) % 360) + 180) % 360
+        r0 = GetCoefficientArray(jme, R0)
+        r1 = GetCoefficientArray(jme, R1)
+        r2 = GetCoefficientArray(jme, R2)
+        r3 = GetCoefficientArray(jme, R3)
+        r4 = GetCoefficientArray(jme, R4)
+        radius_vector = (r0 + r1 * jme + r2 * jme ** 2 + r3 * jme ** 3 + r4 * jme ** 4) / 10 ** 8
+        aberration_correction = GetAberrationCorrection(radius_vector)
+        equatorial_horizontal_parallax = GetEquatorialHorizontalParallax(radius_vector)
+        nutation = GetNutationArray(jde)
+        true_ecliptic_obliquity = GetTrueEclipticObliquity(jme, nutation)
+        jc = GetJulianCentury(jd)
+        mean_sidereal_time = (280.46061837 + (360.98564736629 * (jd - 2451545.0)) + (0.000387933 * jc ** 2) - (jc ** 3 / 38710000)) % 360
+        apparent_sidereal_time = mean_sidereal_time + nutation['longitude'] * numpy.cos(true_ecliptic_obliquity)
+
+        # calculations dependent on location and time
+        apparent_sun_longitude_rad = numpy.radians(GetApparentSunLongitude(geocentric_longitude, nutation, aberration_correction))
+        true_ecliptic_obliquity_rad = numpy.radians(true_ecliptic_obliquity)
+        geocentric_latitude_rad = numpy.radians(geocentric_latitude)
+        a = numpy.sin(apparent_sun_longitude_rad) * numpy.cos(true_ecliptic_obliquity_rad)
+        b = numpy.tan(geocentric_latitude_rad) * numpy.sin(true_ecliptic_obliquity_rad)
+        c = numpy.cos(apparent_sun_longitude_rad)
+        geocentric_sun_right_ascension = numpy.degrees(numpy.arctan2((a - b), c)) % 360
+        a = numpy.sin(geocentric_latitude_rad) * numpy.cos(true_ecliptic_obliquity_rad)
+        b = numpy.cos(geocentric_latitude_rad) * numpy.sin(true_ecliptic_obliquity_rad) * numpy.sin(apparent_sun_longitude_rad)
+        geocentric_sun_declination = numpy.degrees(numpy.arcsin(a + b))
+        local_hour_angle = GetLocalHourAngle(apparent_sidereal_time, longitude_deg, geocentric_sun_right_ascension)
+        ehp_rad = numpy.radians(equatorial_horizontal_parallax)
+        lha_rad = numpy.radians(local_hour_angle)
+        gsd_rad = numpy.radians(geocentric_sun_declination)
+        a = -1 * projected_radial_distance * numpy.sin(ehp_rad) * numpy.sin(lha_rad)
+        b = numpy.cos(gsd_rad) - projected_radial_distance * numpy.sin(ehp_rad) * numpy.cos(lha_rad)
+        parallax_sun_right_ascension = numpy.degrees(numpy.arctan2(a, b))
+        topocentric_local_hour_angle = GetTopocentricLocalHourAngle(local_hour_angle, parallax_sun_right_ascension)
+        psra_rad = numpy.radians(parallax_sun_right_ascension)
+        a = (numpy.sin(gsd_rad) - projected_axial_distance * numpy.sin(ehp_rad)) * numpy.cos(psra_rad)
+        b = numpy.cos(gsd_rad) - (projected_axial_distance * numpy.sin(ehp_rad) * numpy.cos(lha_rad))
+        topocentric_sun_declination = numpy.degrees(numpy.arctan2(a, b))
+        return topocentric_sun_declination, topocentric_local_hour_angle
+
+def GetAltitudeArray(latitude_deg, longitude_deg, utc_datetimes, elevation = 0, temperature_celsius = 25, pressure_millibars = 1013.25):
+        """Vectorised version of GetAltitude, returns a numpy array."""
+        tsd, tlha = GetTopocentricPositionArray(latitude_deg, longitude_deg, utc_datetimes, elevation=elevation)
+        latitude_rad = math.radians(latitude_deg)
+        tsd_rad = numpy.radians(tsd)
+        tlha_rad = numpy.radians(tlha)
+        tea = numpy.degrees(numpy.arcsin((math.sin(latitude_rad) * numpy.sin(tsd_rad)) + math.cos(latitude_rad) * numpy.cos(tsd_rad) * numpy.cos(tlha_rad)))
+        temperature_kelvin = temperature_celsius + 273.15
+        a = pressure_millibars * 283.0 * 1.02
+        b = 1010.0 * temperature_kelvin * 60.0 * numpy.tan(numpy.radians(tea + (10.3/(tea + 5.11))))
+        return tea + a / b
+
+def GetAzimuthArray(latitude_deg, longitude_deg, utc_datetimes, elevation = 0):
+        """Vectorised version of GetAzimuth, returns a numpy array."""
+        tsd, tlha = GetTopocentricPositionArray(latitude_deg, longitude_deg, utc_datetimes, elevation=elevation)
+        latitude_rad = math.radians(latitude_deg)
+        tsd_rad = numpy.radians(tsd)
+        tlha_rad = numpy.radians(tlha)
+        a = numpy.sin(tlha_rad)
+        b = numpy.cos(tlha_rad) * math.sin(latitude_rad) - numpy.tan(tsd_rad) * math.cos(latitude_rad)
+        return 180 - (180.0 + numpy.degrees(numpy.arctan2(a, b)) % 360)
+
+def GetRadiationDirectArray(utc_datetimes, altitude_deg):
+    """Vectorised version of GetRadiationDirect, returns a numpy array."""
+    altitude_deg = numpy.asarray(altitude_deg, dtype=numpy.float64)
+    year, month, day, day_of_year = GetDateTimeComponents(utc_datetimes)
+    flux = 1160 + (75 * numpy.sin(numpy.radians((360./365) * (day_of_year - 275))))
+    optical_depth = 0.174 + (0.035 * numpy.sin(numpy.radians((360./365) * (day_of_year - 100))))
+    radiation = numpy.zeros(len(altitude_deg))
+    day = altitude_deg > 0
+    sin_altitude = numpy.sin(numpy.radians(altitude_deg[day]))
+    air_mass_ratio = 1/sin_altitude
+    radiation[day] = flux[day] * numpy.exp(-1 * optical_depth[day] * air_mass_ratio) * sin_altitude
+    return radiation
+
+def SolarBenchmark(nyears = 1):
+        """Compares the per-record and vectorised functions for a year of
+        half-hourly datetimes and prints the elapsed times and the maximum
+        absolute differences."""
+        latitude_deg = -34.0
+        longitude_deg = 140.6
+        d = datetime.datetime(2010, 1, 1, 0, 0)
+        thirty_minutes = datetime.timedelta(hours = 0.5)
+        dts = [d + i * thirty_minutes for i in range(nyears * 365 * 48)]
+        t0 = time.time()
+        altitude = numpy.array([GetAltitude(latitude_deg, longitude_deg, dt) for dt in dts])
+        azimuth = numpy.array([GetAzimuth(latitude_deg, longitude_deg, dt) for dt in dts])
+        power = numpy.array([GetRadiationDirect(dt, alt) for dt, alt in zip(dts, altitude)])
+        t1 = time.time()
+        altitude_array = GetAltitudeArray(latitude_deg, longitude_deg, dts)
+        azimuth_array = GetAzimuthArray(latitude_deg, longitude_deg, dts)
+        power_array = GetRadiationDirectArray(dts, altitude_array)
+        t2 = time.time()
+        print "Records:", len(dts)
+        print "Per-record:", round(t1 - t0, 3), "s, vectorised:", round(t2 - t1, 3), "s"
+        print "Max difference altitude:", numpy.max(numpy.abs(altitude - altitude_array))
+        print "Max difference azimuth:", numpy.max(numpy.abs(azimuth - azimuth_array))
+        print "Max difference radiation:", numpy.max(numpy.abs(power - power_array))
@@ -0,0 +1,1230 @@
+"""
+Purpose:
+ Timing comparisons between the original and the optimised versions of
+ PyFluxPro routines.
+Usage:
+ From the utilities directory;
+  python pfp_benchmarks.py nc_write <netCDF file name>
+  python pfp_benchmarks.py date_index <netCDF file name>
+  python pfp_benchmarks.py interpolate [<number of series> [<number of years>]]
+  python pfp_benchmarks.py lasslop [<number of years> [<number of workers>]]
+  python pfp_benchmarks.py l6_summary [<netCDF file name> | synthetic [<number of years>]]
+  python pfp_benchmarks.py cpd_fit <number of strata>
+  python pfp_benchmarks.py csv_read [<number of years> [<number of series>]]
+  python pfp_benchmarks.py mds <netCDF file name> [<target> [<drivers>]]
+  python pfp_benchmarks.py memory <netCDF file name>
+  python pfp_benchmarks.py mpt <netCDF file name> [<number of workers>]
+  python pfp_benchmarks.py solo <netCDF file name>
+  python pfp_benchmarks.py xl_read <Excel file name> [<first data row> [<header row>]]
+Author: PRI
+Date: October 2026
+"""
+# standard modules
+import copy
+import datetime
+import imp
+import logging
+import multiprocessing
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+try:
+    import resource
+except ImportError:
+    # not available on Windows
+    resource = None
+# 3rd party modules
+from configobj import ConfigObj
+import dateutil
+from matplotlib.dates import date2num
+import netCDF4
+import numpy
+import pandas
+from scipy import interpolate
+import xlrd
+# check the scripts directory is present
+if not os.path.exists("../scripts/"):
+    print "pfp_benchmarks: the scripts directory is missing"
+    sys.exit()
+# since the scripts directory is there, try importing the modules
+sys.path.append('../scripts')
+import constants as c
+import pfp_cpd
+import pfp_gfMDS
+import pfp_gfSOLO
+import pfp_io
+import pfp_log
+import pfp_mpt
+import pfp_rp
+import pfp_rpLL
+import pfp_ts
+import pfp_utils
+
+logger = pfp_log.init_logger("pfp_log", "pfp_benchmarks.log", to_file=False, to_screen=True)
+
+def benchmark_cpd_fit(number_strata=200):
+    """
+    Purpose:
+     Compare the time taken to fit the change point models to a set of
+     synthetic year/season/temperature class strata using pfp_cpd.fit,
+     one stratum at a time, and pfp_cpd.fit_batch, all strata at once.
+     Every fourth stratum has ustar rounded to 0.05 so that there are tied
+     ustar values, these give degenerate regressions at some change points.
+    Usage:
+     benchmark_cpd_fit(number_strata)
+    Author: PRI
+    Date: October 2026
+    """
+    number_strata = int(number_strata)
+    numpy.random.seed(0)
+    ustar = numpy.sort(numpy.random.rand(number_strata, 50)*0.8, axis=1)
+    ustar[::4] = numpy.round(ustar[::4]/0.05)*0.05
+    threshold = numpy.random.rand(number_strata)*0.4 + 0.1
+    Fc = numpy.where(ustar < threshold[:, None], 10*ustar, 10*threshold[:, None])
+    Fc = Fc + numpy.random.randn(number_strata, 50)*0.5
+    results = []
+    # original, one stratum at a time
+    start = time.time()
+    lst = []
+    for n in range(number_strata):
+        temp_df = pandas.DataFrame({"ustar": ustar[n], "Fc": Fc[n]})
+        lst.append(pfp_cpd.fit(temp_df))
+    fit_old = numpy.vstack(lst)
+    results.append(["fit, one stratum at a time", time.time() - start])
+    # batched
+    start = time.time()
+    fit_new = pfp_cpd.fit_batch(ustar, Fc)
+    results.append(["fit_batch, all strata", time.time() - start])
+    # change points and thresholds must be the same
+    for col in [0, 4, 5, 12]:
+        if not numpy.array_equal(fit_old[:, col], fit_new[:, col]):
+            print "cpd_fit: fit and fit_batch change points differ"
+    if not numpy.all(numpy.isfinite(fit_new[:, [0, 1, 4, 5, 6, 12]])):
+        print "cpd_fit: fit_batch returned non-finite thresholds or F scores"
+    print "Strata:", number_strata, "(", len(ustar[::4]), "with tied ustar values )"
+    print "Maximum difference:", numpy.max(numpy.abs(fit_old - fit_new))
+    for name, elapsed in results:
+        print "%-36s %8.3f s" % (name, elapsed)
+    return
+
+def csv_read_series_original(cf):
+    """ The original pfp_io.csv_read_series, the file read by numpy.genfromtxt."""
+    ds = pfp_io.DataStructure()
+    info = pfp_io.csv_read_parse_cf(cf)
+    # the columns are sorted here, with dtype=None genfromtxt names the columns
+    # in file order but returns them in usecols order so the original mixed up
+    # the variables when the control file order was not the file order
+    data_array = numpy.genfromtxt(info["csv_filename"], delimiter=info["dialect"].delimiter,
+                                  skip_header=info["skip_header"], names=info["header_line"],
+                                  usecols=sorted(info["col_list"]), missing_values=info["missing_values"],
+                                  filling_values=info["filling_values"], deletechars=info["deletechars"],
+                                  usemask=True, dtype=None)
+    for item in ["DateTime"]:
+        if item in info["var_list"]:
+            info["var_list"].remove(item)
+    for label in info["var_list"]:
+        csv_label = info["csv_varnames"][label]
+        variable = {"Label":label}
+        flag = numpy.zeros(len(data_array[csv_label]), dtype=numpy.int32)
+        try:
+            data = numpy.array(data_array[info["csv_varnames"][label]], dtype=numpy.float64)
+            idx = numpy.where(numpy.isfinite(data) == False)[0]
+            data[idx] = numpy.float64(c.missing_value)
+            flag[idx] = numpy.int32(1)
+        except ValueError:
+            data = data_array[info["csv_varnames"][label]]
+        missing = numpy.full_like(data, c.missing_value)
+        idx = numpy.where(data == missing)[0]
+        flag[idx] = numpy.int32(1)
+        variable["Data"] = data
+        variable["Flag"] = flag
+        variable["Attr"] = {}
+        for attr in cf["Variables"][label]["Attr"].keys():
+            variable["Attr"][attr] = cf["Variables"][label]["Attr"][attr]
+        pfp_utils.CreateVariable(ds, variable)
+    ds.globalattributes['xl_datemode'] = str(0)
+    ds.returncodes = {"value":0,"message":"OK"}
+    return ds
+
+def csv_read_method(cf, method):
+    """
+    Purpose:
+     Read a CSV file using the original reader ("genfromtxt") or
+     pfp_io.csv_read_series ("chunked") and get the DateTime series using
+     the function in the control file.  Run in a separate process by
+     benchmark_csv_read so the peak memory use of each method can be measured.
+    Usage:
+     elapsed, peak, series = csv_read_method(cf, method)
+     where elapsed is the time taken in seconds
+           peak is the peak memory use of the process in MB (None on Windows)
+           series is a dictionary of the data and QC flags keyed by label
+    Author: PRI
+    Date: October 2026
+    """
+    start = time.time()
+    if method == "genfromtxt":
+        ds = csv_read_series_original(cf)
+    else:
+        ds = pfp_io.csv_read_series(cf)
+    pfp_utils.get_datetime(cf, ds)
+    elapsed = time.time() - start
+    peak = None
+    if resource is not None:
+        # ru_maxrss is in kB on Linux and in bytes on macOS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        peak = peak/1.0E6 if platform.system() == "Darwin" else peak/1.0E3
+    series = {}
+    for label in ds.series.keys():
+        series[label] = {"Data": ds.series[label]["Data"], "Flag": ds.series[label]["Flag"]}
+    return elapsed, peak, series
+
+def benchmark_csv_read(number_years=5, number_series=20):
+    """
+    Purpose:
+     Compare the time taken and the peak memory used to read a synthetic
+     half-hourly logger CSV file using the original reader (numpy.genfromtxt)
+     and pfp_io.csv_read_series (read in chunks), and check the data, QC
+     flags and DateTime series are the same.  The comparison is done for each
+     of the DateTime functions that can be used with a CSV file.
+    Usage:
+     benchmark_csv_read(number_years=5, number_series=20)
+    Author: PRI
+    Date: October 2026
+    """
+    number_years, number_series = int(number_years), int(number_series)
+    nrecs = number_years*17520
+    labels = ["Series_" + str(n) for n in range(number_series)]
+    temp_dir = tempfile.mkdtemp()
+    csv_file_name = os.path.join(temp_dir, "L1.csv")
+    # write the CSV file, about 2% of the values are missing
+    numpy.random.seed(0)
+    start_date = datetime.datetime(2010, 1, 1, 0, 30)
+    xl_base_date = datetime.datetime(1899, 12, 30)
+    time_columns = ["TIMESTAMP", "Date", "Time", "Year", "DoY", "Hdh", "xlDate", "xlTime"]
+    csv_file = open(csv_file_name, "wb")
+    csv_file.write(",".join(time_columns + labels) + "\n")
+    csv_file.write(",".join(["units"]*(len(time_columns) + number_series)) + "\n")
+    for i in range(nrecs):
+        values = ["%.4f" % x for x in numpy.random.randn(number_series)]
+        for n in numpy.where(numpy.random.rand(number_series) < 0.02)[0]:
+            values[n] = ["NAN", "", str(c.missing_value)][n % 3]
+        dt = start_date + datetime.timedelta(minutes=30*i)
+        xl_date = dt - xl_base_date
+        times = [dt.strftime("%Y-%m-%d %H:%M:%S"), dt.strftime("%Y-%m-%d"), dt.strftime("%H:%M"),
+                 str(dt.year), str(dt.timetuple().tm_yday), str(dt.hour + dt.minute/60.0),
+                 str(xl_date.days), "%.10f" % (xl_date.seconds/86400.0)]
+        csv_file.write(",".join(times + values) + "\n")
+    csv_file.close()
+    functions = {"DateTimeFromTimeStamp(TimeStamp)": ["TIMESTAMP"],
+                 "DateTimeFromDateAndTimeString(Date,Time)": ["Date", "Time"],
+                 "DateTimeFromDoY(Year,DoY,Hdh)": ["Year", "DoY", "Hdh"],
+                 "DateTimeFromExcelDateAndTime(xlDate,xlTime)": ["xlDate", "xlTime"]}
+    print "Records:", nrecs, "series:", number_series
+    print "%-44s %-10s %10s %14s" % ("DateTime function", "method", "time (s)", "peak RSS (MB)")
+    all_identical = True
+    for function in sorted(functions.keys()):
+        cf = ConfigObj()
+        cf["Files"] = {"in_filename": csv_file_name, "in_headerrow": 1,
+                       "in_firstdatarow": 3, "in_unitsrow": 2}
+        cf["Global"] = {}
+        cf["Variables"] = {"DateTime": {"Function": {"func": function}}}
+        for name in functions[function]:
+            label = "TimeStamp" if name == "TIMESTAMP" else name
+            cf["Variables"][label] = {"csv": {"name": name}, "Attr": {"units": "none"}}
+        for label in labels:
+            cf["Variables"][label] = {"csv": {"name": label}, "Attr": {"units": "units"}}
+        results = []
+        for method in ["genfromtxt", "chunked"]:
+            # a new process for each method so the peak memory use is not shared
+            pool = multiprocessing.Pool(1)
+            results.append([method] + list(pool.apply(csv_read_method, (cf, method))))
+            pool.close()
+            pool.join()
+        old, new = results[0][3], results[1][3]
+        identical = (sorted(old.keys()) == sorted(new.keys()) and
+                     list(old["DateTime"]["Data"]) == list(new["DateTime"]["Data"]))
+        for label in old.keys():
+            if label == "DateTime" or label not in new:
+                continue
+            for item in ["Data", "Flag"]:
+                if not numpy.array_equal(old[label][item], new[label][item]):
+                    print "csv_read: " + function + " " + item + " differs for " + label
+                    identical = False
+        all_identical = all_identical and identical
+        for method, elapsed, peak, series in results:
+            peak = "n/a" if peak is None else "%.1f" % peak
+            print "%-44s %-10s %10.2f %14s" % (function, method, elapsed, peak)
+    os.remove(csv_file_name)
+    os.rmdir(temp_dir)
+    print "Data, QC flags and DateTime identical:", all_identical
+    return
+
+def benchmark_date_index(nc_file_name, window_size_days=15, step_size_days=5):
+    """
+    Purpose:
+     Compare the time taken to find the start and end indices of the moving
+     windows used by pfp_rpLL.get_LT_params and get_LL_params using the original
+     GetDateIndex search on the datetime array and the pfp_utils.DateIndex.
+    Usage:
+     benchmark_date_index(nc_file_name)
+    Author: PRI
+    Date: October 2026
+    """
+    ds = pfp_io.nc_read_series(nc_file_name)
+    ldt = ds.series["DateTime"]["Data"]
+    ts = int(ds.globalattributes["time_step"])
+    window = datetime.timedelta(days=int(window_size_days))
+    step = datetime.timedelta(days=int(step_size_days))
+    start_dates = []
+    start_date = ldt[0]
+    while start_date + window <= ldt[-1]:
+        start_dates.append(start_date)
+        start_date = start_date + step
+    results = []
+    # original, string dates searched in the datetime array
+    start = time.time()
+    indices_old = []
+    for start_date in start_dates:
+        si = pfp_utils.GetDateIndex(ldt, str(start_date), ts=ts)
+        ei = pfp_utils.GetDateIndex(ldt, str(start_date + window), ts=ts)
+        indices_old.append([si, ei])
+    results.append(["GetDateIndex, datetime array", time.time() - start])
+    # DateIndex, including the time taken to build it
+    start = time.time()
+    di = pfp_utils.DateIndex(ldt, ts=ts)
+    indices_new = []
+    for start_date in start_dates:
+        indices_new.append([di.find(start_date), di.find(start_date + window)])
+    results.append(["DateIndex", time.time() - start])
+    if indices_old != indices_new:
+        print "date_index: DateIndex and GetDateIndex results differ"
+    print "Records:", len(ldt), "windows:", len(start_dates)
+    for name, elapsed in results:
+        print "%-36s %8.3f s" % (name, elapsed)
+    return
+
+def benchmark_mds(nc_file_name, target="Fc", drivers="Fsd,Ta,VPD"):
+    """
+    Purpose:
+     Compare the time taken and the output from the MDS gap filling done
+     in-process (pfp_gfMDS.gfMDS_mds) and by the compiled gf_mds program.
+     The gf_mds input files are written with the data array built by
+     pfp_gfMDS.gfMDS_make_data_array, one file per year, and the data are
+     rounded as they are in those files before the native MDS is run.  The
+     native output is rounded to the precision of the gf_mds output file
+     before the maximum differences are printed.  The compiled program is
+     only run if it is present in ../mds/bin.
+    Usage:
+     benchmark_mds(nc_file_name, target="Fc", drivers="Fsd,Ta,VPD")
+    Author: PRI
+    Date: October 2026
+    """
+    ds = pfp_io.nc_read_series(nc_file_name)
+    ts = int(ds.globalattributes["time_step"])
+    info = {"target": target, "drivers": drivers.split(",")}
+    data, _ = pfp_gfMDS.gfMDS_make_data_array(ds, info)
+    # round the data as they are when written to the gf_mds input files
+    data = numpy.array([["%f" % v for v in row] for row in data], dtype=numpy.float64)
+    tolerances = pfp_gfMDS.gfMDS_get_tolerances(info)
+    results = []
+    start = time.time()
+    mds_output = pfp_gfMDS.gfMDS_mds(data, (ts == 60), tolerances)
+    results.append(["native", time.time() - start, mds_output])
+    # compiled program
+    exe = "gf_mds.exe" if platform.system() == "Windows" else "gf_mds"
+    gf_mds = os.path.abspath(os.path.join("..", "mds", "bin", exe))
+    if os.path.isfile(gf_mds):
+        start = time.time()
+        work_dir = pfp_utils.make_work_directory("mds_", subdirectories=["input", "output"])
+        try:
+            # time stamps of the rows in the data array, one file per year
+            first_year = ds.series["DateTime"]["Data"][0].year
+            dt = numpy.datetime64(datetime.datetime(first_year, 1, 1), "m") + ts*numpy.arange(1, len(data)+1)
+            timestamp = numpy.array([s.replace("-", "").replace("T", "").replace(":", "")
+                                     for s in dt.astype(str)], dtype=numpy.int64)
+            # the file for a year runs from 00:00 + ts on 1 January to 00:00 on 1 January of the next year
+            year = (dt - ts).astype("datetime64[Y]").astype(int) + 1970
+            in_file_paths = []
+            for current_year in numpy.unique(year):
+                index = numpy.where(year == current_year)[0]
+                in_file_path = os.path.join(work_dir, "input", str(current_year) + "_MDS.csv")
+                numpy.savetxt(in_file_path, numpy.column_stack([timestamp[index], data[index]]),
+                              header="TIMESTAMP,NEE,SW_IN,TA,VPD", delimiter=",", comments="",
+                              fmt="%12i,%f,%f,%f,%f")
+                in_file_paths.append(in_file_path)
+            cmd = [gf_mds, "-input=" + "+".join(in_file_paths),
+                   "-output=" + os.path.join(work_dir, "output", ""), "-date=TIMESTAMP",
+                   "-rows_min=0", "-tofill=NEE", "-sw_in=SW_IN", "-ta=TA", "-vpd=VPD"]
+            if ts == 60:
+                cmd.append("-hourly")
+            with open(os.devnull, "w") as devnull:
+                subprocess.call(cmd, stdout=devnull)
+            mds_file = numpy.genfromtxt(os.path.join(work_dir, "output", "mds.csv"), delimiter=",",
+                                        names=True, autostrip=True)
+        finally:
+            pfp_utils.remove_work_directory(work_dir)
+        results.append(["gf_mds program", time.time() - start, mds_file])
+    else:
+        print "mds: compiled gf_mds program not found in ../mds/bin, skipping"
+    print "Rows:", len(data), "target:", target, "drivers:", drivers
+    for name, elapsed, _ in results:
+        print "%-36s %8.2f s" % (name, elapsed)
+    if len(results) == 2:
+        native, binary = results[0][2], results[1][2]
+        if len(binary) != len(data):
+            print "mds: gf_mds returned", len(binary), "rows, expected", len(data)
+            return
+        # gf_mds writes its output with %g so the native output is rounded the same way
+        for name in ["FILLED", "QC", "HAT", "SAMPLE", "STDDEV", "METHOD", "QC_HAT", "TIMEWINDOW"]:
+            values = numpy.array(["%g" % v for v in native[name]], dtype=numpy.float64)
+            diff = numpy.abs(values - binary[name])
+            print "%-12s maximum difference %12.6f, %i rows differ" % (name, numpy.max(diff),
+                                                                     numpy.count_nonzero(diff > 1E-6))
+    return
+
+def benchmark_mpt(nc_file_name, workers=1):
+    """
+    Purpose:
+     Compare the time taken and the u* thresholds from the MPT run in-process
+     (pfp_mpt.run_mpt_native) and the compiled ustar_mp program.  The seasonal
+     and temperature class thresholds should agree to the precision of the
+     ustar_mp output file.  The bootstraps use different random numbers so
+     only their means and standard deviations are compared.  The compiled
+     program is only run if it is present in ../mpt/bin.
+    Usage:
+     benchmark_mpt(nc_file_name, workers=1)
+    Author: PRI
+    Date: October 2026
+    """
+    labels = ["Fc", "VPD", "ustar", "Ta", "Fsd", "Fh", "Fe"]
+    ds = pfp_io.nc_read_series(nc_file_name, variable_list=labels)
+    # round the data as they are when written to the ustar_mp input file
+    for label in ["Fc", "ustar", "Ta", "Fsd"]:
+        data = ds.series[label]["Data"]
+        ds.series[label]["Data"] = numpy.array(["%f" % v for v in data], dtype=numpy.float64)
+    cf = {"Options": {"MPTEngine": "native", "workers": int(workers), "Random_seed": 1}}
+    info = pfp_mpt.mpt_get_info(cf)
+    results = []
+    start = time.time()
+    ustar_results = pfp_mpt.run_mpt_native(ds, info)
+    results.append(["native, " + str(info["workers"]) + " worker(s)", time.time() - start, ustar_results])
+    # compiled program, this uses paths relative to the PyFluxPro directory
+    exe = "ustar_mp.exe" if platform.system() == "Windows" else "ustar_mp"
+    if os.path.isfile(os.path.join("..", "mpt", "bin", exe)):
+        os.chdir("..")
+        start = time.time()
+        work_dir = pfp_utils.make_work_directory("mpt_", subdirectories=["input", "output", "log"])
+        try:
+            out_file_paths = pfp_mpt.run_mpt_code(ds, os.path.basename(nc_file_name), work_dir)
+            ustar_results = pfp_mpt.read_mpt_output(out_file_paths)
+        finally:
+            pfp_utils.remove_work_directory(work_dir)
+        results.append(["ustar_mp program", time.time() - start, ustar_results])
+        os.chdir("utilities")
+    else:
+        print "mpt: compiled ustar_mp program not found in ../mpt/bin, skipping"
+    for name, elapsed, ustar_results in results:
+        print "%-36s %8.2f s" % (name, elapsed)
+        for year in sorted(ustar_results["Years"].keys()):
+            ury = ustar_results["Years"][year]
+            line = "  %4i annual %8.3f seasons" % (year, ury["annual"]["value"])
+            for s in sorted(ury["bootstraps"].keys()):
+                values = numpy.ma.masked_values(ury["bootstraps"][s]["values"], -9999)
+                line = line + " %6.3f (%5.3f +- %5.3f)" % (ury["seasonal"]["value"][s],
+                                                           numpy.ma.mean(values), numpy.ma.std(values))
+            print line
+    if len(results) == 2:
+        native, binary = results[0][2]["Years"], results[1][2]["Years"]
+        for year in sorted(set(native.keys()) | set(binary.keys())):
+            if year not in native or year not in binary:
+                print "mpt: results for", year, "only from one of native and ustar_mp"
+                continue
+            values = [[native[year]["temperature_classes"][i]["values"] for i in sorted(native[year]["temperature_classes"])],
+                      [binary[year]["temperature_classes"][i]["values"] for i in sorted(binary[year]["temperature_classes"])]]
+            if (not numpy.allclose(native[year]["seasonal"]["value"], binary[year]["seasonal"]["value"], rtol=1E-5) or
+                not numpy.array_equal(native[year]["seasonal"]["count"], binary[year]["seasonal"]["count"]) or
+                not numpy.allclose(values[0], values[1], rtol=1E-5)):
+                print "mpt: native and ustar_mp thresholds differ for", year
+    return
+
+def interpolate_over_missing_original(ds, series, maxlen, int_type):
+    """ The original pfp_ts.InterpolateOverMissing, one series at a time."""
+    DateNum = date2num(ds.series['DateTime']['Data'])
+    data_org,flag_org,attr_org = pfp_utils.GetSeries(ds,series)
+    nRecs = len(data_org)
+    iog = numpy.where(abs(data_org-float(c.missing_value))>c.eps)[0]
+    iom = numpy.where(abs(data_org-float(c.missing_value))<=c.eps)[0]
+    if len(iog)<2:
+        return
+    if int_type == "linear":
+        f = interpolate.interp1d(DateNum[iog],data_org[iog],bounds_error=False,fill_value=float(c.missing_value))
+        data_int = f(DateNum).astype(numpy.float64)
+    else:
+        int_fn = interpolate.Akima1DInterpolator(DateNum[iog], data_org[iog])
+        data_int = int_fn(DateNum)
+        data_int = numpy.where(numpy.isfinite(data_int) == True, data_int, numpy.float(c.missing_value))
+    flag_int = numpy.copy(flag_org)
+    index = numpy.where(abs(data_int-float(c.missing_value))>c.eps)[0]
+    if len(index)!=0:
+        flag_int[index] = numpy.int32(50)
+    data_int[iog] = data_org[iog]
+    flag_int[iog] = flag_org[iog]
+    cond_ind = numpy.zeros(nRecs,dtype=numpy.int32)
+    cond_ind[iom] = 1
+    cond_bool = (cond_ind==1)
+    for start, stop in pfp_utils.contiguous_regions(cond_bool):
+        duration = stop - start
+        if duration>maxlen:
+            data_int[start:stop] = numpy.float64(c.missing_value)
+            flag_int[start:stop] = flag_org[start:stop]
+    pfp_utils.CreateSeries(ds,series,data_int,flag_int,dict(attr_org))
+
+def benchmark_interpolate(number_series=24, number_years=10, maxlen=6):
+    """
+    Purpose:
+     Compare the time taken to gap fill synthetic half-hourly series by
+     interpolation using the original pfp_ts.InterpolateOverMissing, one
+     series at a time, and pfp_ts.InterpolateOverMissingBatch, all series
+     in one call, for linear and Akima interpolation.
+    Usage:
+     benchmark_interpolate(number_series, number_years)
+    Author: PRI
+    Date: October 2026
+    """
+    number_series, number_years, maxlen = int(number_series), int(number_years), int(maxlen)
+    nrecs = number_years*17520
+    start_date = datetime.datetime(2010, 1, 1, 0, 30)
+    ldt = numpy.array([start_date + datetime.timedelta(minutes=30*i) for i in range(nrecs)])
+    numpy.random.seed(0)
+    hours = numpy.arange(nrecs)/2.0
+    labels = ["Series_" + str(n) for n in range(number_series)]
+    series = {}
+    for label in labels:
+        data = (10*numpy.sin(2*numpy.pi*hours/24 + numpy.random.rand()) +
+                numpy.random.randn(nrecs))
+        # gaps of 1 to 24 records, about 10% of the data missing
+        gap_starts = numpy.random.randint(0, nrecs, size=nrecs//120)
+        for gap_start in gap_starts:
+            data[gap_start:gap_start + numpy.random.randint(1, 25)] = float(c.missing_value)
+        flag = numpy.where(data == float(c.missing_value), 1, 0).astype(numpy.int32)
+        series[label] = {"Data": data, "Flag": flag, "Attr": {"units": "none"}}
+    results = []
+    for int_type in ["linear", "Akima"]:
+        outputs = []
+        for name in ["original", "batch"]:
+            ds = pfp_io.DataStructure()
+            ds.globalattributes = {"nc_nrecs": nrecs, "time_step": 30}
+            ds.series["DateTime"] = {"Data": ldt, "Flag": numpy.zeros(nrecs, dtype=numpy.int32), "Attr": {}}
+            for label in labels:
+                ds.series[label] = {"Data": series[label]["Data"].copy(),
+                                    "Flag": series[label]["Flag"].copy(), "Attr": {"units": "none"}}
+            start = time.time()
+            if name == "original":
+                for label in labels:
+                    interpolate_over_missing_original(ds, label, maxlen, int_type)
+            else:
+                pfp_ts.InterpolateOverMissingBatch(ds, labels, maxlen=maxlen, int_type=int_type)
+            results.append([int_type + ", " + name, time.time() - start])
+            outputs.append(ds)
+        ds_old, ds_new = outputs
+        max_diff = 0.0
+        for label in labels:
+            if not numpy.array_equal(ds_old.series[label]["Flag"], ds_new.series[label]["Flag"]):
+                print "interpolate: " + int_type + " QC flags differ for " + label
+            max_diff = max(max_diff, numpy.max(numpy.abs(ds_old.series[label]["Data"] -
+                                                         ds_new.series[label]["Data"])))
+        print int_type + " maximum difference:", max_diff
+    print "Records:", nrecs, "series:", number_series, "maximum gap:", maxlen
+    for name, elapsed in results:
+        print "%-36s %8.3f s" % (name, elapsed)
+    return
+
+def rpLL_original():
+    """
+    Purpose:
+     Return the original pfp_rpLL module, the one that grew the window results
+     with numpy.append.  This is loaded from the git history, it is the latest
+     commit of scripts/pfp_rpLL.py without get_windows.
+    Usage:
+     original = rpLL_original()
+     where original is None if the git history is not available
+    Author: PRI
+    Date: October 2026
+    """
+    try:
+        revisions = subprocess.check_output(["git", "log", "--format=%H", "--", "scripts/pfp_rpLL.py"],
+                                            cwd="..").split()
+        for revision in revisions:
+            source = subprocess.check_output(["git", "show", revision + ":scripts/pfp_rpLL.py"], cwd="..")
+            if "def get_windows" not in source:
+                original = imp.new_module("pfp_rpLL_original")
+                exec source in original.__dict__
+                return original
+    except (OSError, subprocess.CalledProcessError):
+        pass
+    return None
+
+def benchmark_lasslop(number_years=10, workers=1):
+    """
+    Purpose:
+     Compare the time taken to estimate the Lloyd-Taylor and Lasslop window
+     parameters for a synthetic half-hourly site. The original
+     pfp_rpLL.get_LT_params and get_LL_params (see rpLL_original) grow the
+     results with numpy.append. The current versions preallocate the results
+     and can fit the Lasslop windows in a pool of worker processes.
+    Usage:
+     benchmark_lasslop(number_years, workers)
+    Author: PRI
+    Date: October 2026
+    """
+    number_years, workers = int(number_years), int(workers)
+    nrecs = number_years*17520
+    start_date = datetime.datetime(2010, 1, 1, 0, 30)
+    ldt = numpy.array([start_date + datetime.timedelta(minutes=30*i) for i in range(nrecs)])
+    numpy.random.seed(0)
+    hours = numpy.arange(nrecs)/2.0
+    seasonal = numpy.sin(2*numpy.pi*hours/(24*365.25))
+    Fsd = numpy.maximum(0, 1000*numpy.sin(2*numpy.pi*(hours % 24 - 6)/24)*(0.75 + 0.25*seasonal))
+    T = 15 + 8*seasonal + 5*numpy.sin(2*numpy.pi*(hours % 24 - 9)/24) + numpy.random.randn(nrecs)
+    D = numpy.maximum(0.1, 1 + 0.1*(T - 10) + 0.3*numpy.random.randn(nrecs))
+    drivers = {"Fsd": Fsd, "D": D, "T": T}
+    Fc = pfp_rpLL.NEE_RHLRC_D(drivers, 0.05, 30, 0.1, 1, 2 + seasonal, 150) + numpy.random.randn(nrecs)
+    # about 30% of the data missing, then the day and night filters as in ERUsingLasslop
+    missing = numpy.random.rand(nrecs) < 0.3
+    night = missing | (Fsd >= 10)
+    T_night = numpy.ma.masked_where(night, T)
+    ER = numpy.ma.masked_where(night, Fc)
+    day = missing | (Fsd <= 10)
+    Fsd_day = numpy.ma.masked_where(day, Fsd)
+    D_day = numpy.ma.masked_where(day, D)
+    T_day = numpy.ma.masked_where(day, T)
+    NEE_day = numpy.ma.masked_where(day, Fc)
+    output = "ER_LL"
+    l6_info = {"ERUsingLasslop": {"info": {"time_step": 30, "workers": 1},
+                                  "outputs": {output: {"window_size_days": 15, "step_size_days": 5}}}}
+    original = rpLL_original()
+    if original is None:
+        print "lasslop: the original pfp_rpLL could not be loaded from the git history, skipping it"
+    results = []
+    differences = []
+    # Lloyd-Taylor windows
+    start = time.time()
+    LT_results = pfp_rpLL.get_LT_params(ldt, ER, T_night, l6_info, output, mode="quiet")
+    results.append(["get_LT_params", time.time() - start])
+    if original is not None:
+        start = time.time()
+        LT_old = original.get_LT_params(ldt, ER, T_night, l6_info, output, mode="quiet")
+        results.append(["get_LT_params, original", time.time() - start])
+        differences += [["LT " + item, LT_old[item], LT_results[item]] for item in ["rb", "E0", "rb_prior"]]
+    LT_results["E0_int"] = pfp_rpLL.interp_params(LT_results["E0"])
+    # Lasslop windows
+    if original is not None:
+        start = time.time()
+        LL_old = original.get_LL_params(ldt, Fsd_day, D_day, T_day, NEE_day, ER, LT_results, l6_info, output)
+        results.append(["get_LL_params, original", time.time() - start])
+    for n in sorted(set([1, workers])):
+        l6_info["ERUsingLasslop"]["info"]["workers"] = n
+        start = time.time()
+        LL_new = pfp_rpLL.get_LL_params(ldt, Fsd_day, D_day, T_day, NEE_day, ER, LT_results, l6_info, output)
+        results.append(["get_LL_params, " + str(n) + " workers", time.time() - start])
+        if original is not None:
+            for item in ["alpha", "beta", "k", "rb", "alpha_low", "rb_low", "rb_prior", "E0"]:
+                differences.append(["LL " + item + ", " + str(n) + " workers", LL_old[item], LL_new[item]])
+    print "Records:", nrecs, "LT windows:", len(LT_results["rb"]), "LL windows:", len(LL_new["rb"])
+    for name, elapsed in results:
+        print "%-36s %8.3f s" % (name, elapsed)
+    for name, old, new in differences:
+        if not numpy.array_equal(numpy.isnan(old), numpy.isnan(new)):
+            print "lasslop: missing windows differ for " + name
+        index = numpy.where(~numpy.isnan(old) & ~numpy.isnan(new))[0]
+        if len(index) > 0:
+            print "%-36s maximum difference %g" % (name, numpy.max(numpy.abs(old[index] - new[index])))
+    return
+
+def L6_summary_daily_original(ds, series_dict):
+    """ The original pfp_rp.L6_summary_daily, the flags done one day at a time."""
+    logger.info(" Doing the daily summary (data) at L6")
+    dt = ds.series["DateTime"]["Data"]
+    ts = int(ds.globalattributes["time_step"])
+    si = pfp_utils.GetDateIndex(dt,str(dt[0]),ts=ts,default=0,match="startnextday")
+    ei = pfp_utils.GetDateIndex(dt,str(dt[-1]),ts=ts,default=len(dt)-1,match="endpreviousday")
+    ldt = dt[si:ei+1]
+    ntsInDay = int(24.0*60.0/float(ts))
+    nDays = int(len(ldt))/ntsInDay
+    # create an empty data array and an array of zeros for the flag
+    f0 = numpy.zeros(nDays, dtype=numpy.int32)
+    ldt_daily = [ldt[0]+datetime.timedelta(days=i) for i in range(0,nDays)]
+    # create a dictionary to hold the daily statistics
+    daily_dict = {"globalattributes":{},"variables":{}}
+    # copy the global attributes
+    daily_dict["globalattributes"] = copy.deepcopy(ds.globalattributes)
+    # create the datetime variable
+    daily_dict["variables"]["DateTime"] = {"data":ldt_daily,
+                                           "flag":f0,
+                                           "attr":{"units":"Days","format":"dd/mm/yyyy",
+                                                   "time_step":"Daily"}}
+    series_list = series_dict["daily"].keys()
+    series_list.sort()
+    for item in series_list:
+        if item not in ds.series.keys(): continue
+        daily_dict["variables"][item] = {"data":[],"attr":{}}
+        variable = pfp_utils.GetVariable(ds, item, start=si, end=ei)
+        if item in series_dict["lists"]["co2"]:
+            variable = pfp_utils.convert_units_func(ds, variable, "gC/m2")
+            daily_dict["variables"][item]["attr"]["units"] = "gC/m2"
+        else:
+            daily_dict["variables"][item]["attr"]["units"] = variable["Attr"]["units"]
+        data_2d = variable["Data"].reshape(nDays, ntsInDay)
+        if series_dict["daily"][item]["operator"].lower() == "average":
+            daily_dict["variables"][item]["data"] = numpy.ma.average(data_2d, axis=1)
+        elif series_dict["daily"][item]["operator"].lower() == "sum":
+            daily_dict["variables"][item]["data"] = numpy.ma.sum(data_2d, axis=1)
+            daily_dict["variables"][item]["attr"]["units"] = daily_dict["variables"][item]["attr"]["units"]+"/day"
+        else:
+            msg = "Unrecognised operator ("+series_dict["daily"][item]["operator"]
+            msg = msg+") for series "+item
+            logger.error(msg)
+            continue
+        # add the format to be used
+        daily_dict["variables"][item]["attr"]["format"] = series_dict["daily"][item]["format"]
+        # now do the flag, this is the fraction of data with QC flag = 0 in the day
+        daily_dict["variables"][item]["flag"] = numpy.zeros(nDays, dtype=numpy.float64)
+        flag_2d = variable["Flag"].reshape(nDays, ntsInDay)
+        for i in range(nDays):
+            daily_dict["variables"][item]["flag"][i] = 1-float(numpy.count_nonzero(flag_2d[i,:]))/float(ntsInDay)
+    return daily_dict
+
+def L6_summary_monthly_original(ds,series_dict):
+    """ The original pfp_rp.L6_summary_monthly, one period at a time."""
+    logger.info(" Doing the monthly summaries at L6")
+    dt = ds.series["DateTime"]["Data"]
+    ts = int(ds.globalattributes["time_step"])
+    di = pfp_utils.get_date_index(ds)
+    si = di.find(dt[0], default=0, match="startnextmonth")
+    ldt = dt[si:]
+    monthly_dict = {"globalattributes":{}, "variables":{}}
+    # copy the global attributes
+    monthly_dict["globalattributes"] = copy.deepcopy(ds.globalattributes)
+    monthly_dict["variables"]["DateTime"] = {"data":[],
+                                             "flag":numpy.array([]),
+                                             "attr":{"units":"Months", "format":"dd/mm/yyyy",
+                                                     "time_step":"Monthly"}}
+    # create arrays in monthly_dict
+    series_list = series_dict["monthly"].keys()
+    series_list.sort()
+    # create the data arrays
+    for item in series_list:
+        monthly_dict["variables"][item] = {"data":numpy.ma.array([]),
+                                           "flag":numpy.array([]),
+                                           "attr":{"units":'',"format":''}}
+    # loop over the months in the data file
+    start_date = ldt[0]
+    end_date = start_date+dateutil.relativedelta.relativedelta(months=1)
+    end_date = end_date-dateutil.relativedelta.relativedelta(minutes=ts)
+    last_date = ldt[-1]
+    while start_date<=last_date:
+        # *** The Elise Pendall bug fix ***
+        si = di.find(start_date, default=0)
+        ei = di.find(end_date, default=len(dt)-1)
+        monthly_dict["variables"]["DateTime"]["data"].append(dt[si])
+        for item in series_list:
+            if item not in ds.series.keys(): continue
+            variable = pfp_utils.GetVariable(ds, item, start=si, end=ei)
+            if item in series_dict["lists"]["co2"]:
+                variable = pfp_utils.convert_units_func(ds, variable, "gC/m2")
+                monthly_dict["variables"][item]["attr"]["units"] = "gC/m2"
+            else:
+                monthly_dict["variables"][item]["attr"]["units"] = variable["Attr"]["units"]
+            if series_dict["monthly"][item]["operator"].lower()=="average":
+                monthly_dict["variables"][item]["data"] = numpy.append(monthly_dict["variables"][item]["data"],
+                                                                       numpy.ma.average(variable["Data"]))
+            elif series_dict["monthly"][item]["operator"].lower()=="sum":
+                monthly_dict["variables"][item]["data"] = numpy.append(monthly_dict["variables"][item]["data"],
+                                                                       numpy.ma.sum(variable["Data"]))
+                monthly_dict["variables"][item]["attr"]["units"] = monthly_dict["variables"][item]["attr"]["units"]+"/month"
+            else:
+                msg = "L6_summary_monthly: unrecognised operator"
+                logger.error(msg)
+            monthly_dict["variables"][item]["attr"]["format"] = series_dict["monthly"][item]["format"]
+        start_date = end_date+dateutil.relativedelta.relativedelta(minutes=ts)
+        end_date = start_date+dateutil.relativedelta.relativedelta(months=1)
+        end_date = end_date-dateutil.relativedelta.relativedelta(minutes=ts)
+    return monthly_dict
+
+def L6_summary_annual_original(ds, series_dict):
+    """ The original pfp_rp.L6_summary_annual, one period at a time."""
+    logger.info(" Doing the annual summaries at L6")
+    dt = ds.series["DateTime"]["Data"]
+    ts = int(ds.globalattributes["time_step"])
+    nperDay = int(24/(float(ts)/60.0)+0.5)
+    di = pfp_utils.get_date_index(ds)
+    si = di.find(dt[0], default=0, match="startnextday")
+    ei = di.find(dt[-1], default=len(dt)-1, match="endpreviousday")
+    ldt = dt[si:ei+1]
+    start_year = ldt[0].year
+    end_year = ldt[-1].year
+    year_list = range(start_year, end_year+1, 1)
+    nYears = len(year_list)
+    annual_dict = {"globalattributes":{}, "variables":{}}
+    # copy the global attributes
+    annual_dict["globalattributes"] = copy.deepcopy(ds.globalattributes)
+    annual_dict["variables"]["DateTime"] = {"data":[datetime.datetime(yr,1,1) for yr in year_list],
+                                            "flag":numpy.zeros(nYears, dtype=numpy.int32),
+                                            "attr":{"units":"Years", "format":"dd/mm/yyyy",
+                                                    "time_step":"Annual"}}
+    annual_dict["variables"]["nDays"] = {"data":numpy.full(nYears, c.missing_value, dtype=numpy.float64),
+                                         "flag":numpy.zeros(nYears, dtype=numpy.int32),
+                                         "attr":{"units":"Number of days","format":"0"}}
+    # create arrays in annual_dict
+    series_list = series_dict["annual"].keys()
+    series_list.sort()
+    for item in series_list:
+        annual_dict["variables"][item] = {"data":numpy.ma.array([float(-9999)]*len(year_list)),
+                                          "flag":numpy.zeros(nYears, dtype=numpy.int32),
+                                          "attr":{"units":"Number of days","format":"0"}}
+    for i,year in enumerate(year_list):
+        if ts==30:
+            start_date = str(year)+"-01-01 00:30"
+        elif ts==60:
+            start_date = str(year)+"-01-01 01:00"
+        end_date = str(year+1)+"-01-01 00:00"
+        si = di.find(start_date, default=0)
+        ei = di.find(end_date, default=len(dt)-1)
+        nDays = int((ei-si+1)/nperDay+0.5)
+        annual_dict["variables"]["nDays"]["data"][i] = nDays
+        for item in series_list:
+            if item not in ds.series.keys(): continue
+            variable = pfp_utils.GetVariable(ds, item, start=si, end=ei)
+            if item in series_dict["lists"]["co2"]:
+                variable = pfp_utils.convert_units_func(ds, variable, "gC/m2")
+                annual_dict["variables"][item]["attr"]["units"] = "gC/m2"
+            else:
+                annual_dict["variables"][item]["attr"]["units"] = variable["Attr"]["units"]
+            if series_dict["annual"][item]["operator"].lower()=="average":
+                annual_dict["variables"][item]["data"][i] = numpy.ma.average(variable["Data"])
+            elif series_dict["annual"][item]["operator"].lower()=="sum":
+                annual_dict["variables"][item]["data"][i] = numpy.ma.sum(variable["Data"])
+                annual_dict["variables"][item]["attr"]["units"] = annual_dict["variables"][item]["attr"]["units"]+"/year"
+            else:
+                msg = "L6_summary_annual: unrecognised operator"
+                logger.error(msg)
+            annual_dict["variables"][item]["attr"]["format"] = series_dict["annual"][item]["format"]
+    return annual_dict
+
+def L6_summary_cumulative_original(ds, series_dict):
+    """ The original pfp_rp.L6_summary_cumulative, one period at a time."""
+    logger.info(" Doing the cumulative summaries at L6")
+    dt = ds.series["DateTime"]["Data"]
+    ts = int(ds.globalattributes["time_step"])
+    di = pfp_utils.get_date_index(ds)
+    si = di.find(dt[0], default=0, match="startnextday")
+    ei = di.find(dt[-1], default=len(dt)-1, match="endpreviousday")
+    ldt = dt[si:ei+1]
+    start_year = ldt[0].year
+    end_year = ldt[-1].year
+    year_list = range(start_year, end_year+1, 1)
+    series_list = series_dict["cumulative"].keys()
+    cumulative_dict = {}
+    for year in year_list:
+        cumulative_dict[str(year)] = cdyr = {"globalattributes":{}, "variables":{}}
+        # copy the global attributes
+        cdyr["globalattributes"] = copy.deepcopy(ds.globalattributes)
+        if ts==30:
+            start_date = str(year)+"-01-01 00:30"
+        elif ts==60:
+            start_date = str(year)+"-01-01 01:00"
+        end_date = str(year+1)+"-01-01 00:00"
+        si = di.find(start_date, default=0)
+        ei = di.find(end_date, default=len(dt)-1)
+        ldt = dt[si:ei+1]
+        f0 = numpy.zeros(len(ldt), dtype=numpy.int32)
+        cdyr["variables"]["DateTime"] = {"data":ldt,"flag":f0,
+                                         "attr":{"units":"Year","format":"dd/mm/yyyy HH:MM",
+                                                 "time_step":str(ts)}}
+        for item in series_list:
+            cdyr["variables"][item] = {"data":[],"attr":{}}
+            variable = pfp_utils.GetVariable(ds, item, start=si, end=ei)
+            if item in series_dict["lists"]["co2"]:
+                variable = pfp_utils.convert_units_func(ds, variable, "gC/m2")
+                cdyr["variables"][item]["attr"]["units"] = "gC/m2"
+            else:
+                cdyr["variables"][item]["attr"]["units"] = variable["Attr"]["units"]
+            cdyr["variables"][item]["data"] = numpy.ma.cumsum(variable["Data"])
+            cdyr["variables"][item]["attr"]["format"] = series_dict["cumulative"][item]["format"]
+            cdyr["variables"][item]["attr"]["units"] = cdyr["variables"][item]["attr"]["units"]+"/year"
+    return cumulative_dict
+
+def benchmark_l6_summary(nc_file_name=None, number_years=10):
+    """
+    Purpose:
+     Compare the time taken to do the L6 daily, monthly, annual and
+     cumulative summaries with the original routines, which read and
+     convert the data one period at a time, and with the current routines,
+     which read the data once and use the group codes from
+     pfp_rp.L6_summary_groups.  A synthetic half-hourly L6 data set is used
+     if no netCDF file is given.
+    Usage:
+     benchmark_l6_summary(nc_file_name, number_years)
+    Author: PRI
+    Date: October 2026
+    """
+    if nc_file_name is None or nc_file_name == "synthetic":
+        ds = l6_summary_synthetic(int(number_years))
+    else:
+        ds = pfp_io.nc_read_series(nc_file_name)
+    # a minimal control file with the NEE, GPP and ER sections
+    cf = {"NetEcosystemExchange": {}, "GrossPrimaryProductivity": {}, "EcosystemRespiration": {}}
+    for label in ds.series.keys():
+        for prefix, section in [["NEE", "NetEcosystemExchange"], ["GPP", "GrossPrimaryProductivity"],
+                                ["ER", "EcosystemRespiration"]]:
+            if label.startswith(prefix):
+                cf[section][label] = {}
+    series_dict = pfp_rp.L6_summary_createseriesdict(cf, ds)
+    results = []
+    start = time.time()
+    old = {"daily": L6_summary_daily_original(ds, series_dict),
+           "monthly": L6_summary_monthly_original(ds, series_dict),
+           "annual": L6_summary_annual_original(ds, series_dict),
+           "cumulative": L6_summary_cumulative_original(ds, series_dict)}
+    results.append(["original", time.time() - start])
+    start = time.time()
+    groups = pfp_rp.L6_summary_groups(ds, series_dict)
+    new = {"daily": pfp_rp.L6_summary_daily(ds, series_dict, groups),
+           "monthly": pfp_rp.L6_summary_monthly(ds, series_dict, groups),
+           "annual": pfp_rp.L6_summary_annual(ds, series_dict, groups),
+           "cumulative": pfp_rp.L6_summary_cumulative(ds, series_dict, groups)}
+    results.append(["L6_summary_groups", time.time() - start])
+    # compare the results
+    comparisons = [[name, old[name], new[name]] for name in ["daily", "monthly", "annual"]]
+    for year in sorted(old["cumulative"].keys()):
+        comparisons.append(["cumulative " + year, old["cumulative"][year], new["cumulative"][year]])
+    max_diff = 0.0
+    for name, old_dict, new_dict in comparisons:
+        for label in old_dict["variables"]:
+            if label == "DateTime":
+                if list(old_dict["variables"][label]["data"]) != list(new_dict["variables"][label]["data"]):
+                    print "l6_summary: " + name + " DateTime differs"
+                continue
+            for item in ["data", "flag"]:
+                if item not in old_dict["variables"][label]:
+                    continue
+                old_data = numpy.ma.asarray(old_dict["variables"][label][item])
+                new_data = numpy.ma.asarray(new_dict["variables"][label][item])
+                if (old_data.shape != new_data.shape or
+                    not numpy.array_equal(numpy.ma.getmaskarray(old_data), numpy.ma.getmaskarray(new_data))):
+                    print "l6_summary: " + name + " " + label + " " + item + " differs"
+                    continue
+                diff = numpy.ma.abs(old_data - new_data)/numpy.ma.maximum(numpy.ma.abs(old_data), 1)
+                if numpy.ma.count(diff) > 0:
+                    max_diff = max(max_diff, numpy.ma.max(diff))
+    print "Records:", len(ds.series["DateTime"]["Data"]), "series:", len(groups["variables"])
+    print "Maximum relative difference:", max_diff
+    for name, elapsed in results:
+        print "%-36s %8.3f s" % (name, elapsed)
+    return
+
+def l6_summary_synthetic(number_years):
+    """
+    Purpose:
+     Return a synthetic half-hourly L6 data structure with the variables
+     used by the L6 summaries and about 1% of the data missing.
+    Usage:
+    Author: PRI
+    Date: October 2026
+    """
+    nrecs = number_years*17520
+    start_date = datetime.datetime(2010, 1, 1, 0, 30)
+    ldt = numpy.array([start_date + datetime.timedelta(minutes=30*i) for i in range(nrecs)])
+    ds = pfp_io.DataStructure()
+    ds.globalattributes = {"nc_nrecs": nrecs, "time_step": 30, "latitude": -35.0, "longitude": 148.0}
+    ds.series["DateTime"] = {"Data": ldt, "Flag": numpy.zeros(nrecs, dtype=numpy.int32), "Attr": {}}
+    numpy.random.seed(0)
+    labels = {"NEE_SOLO": "umol/m2/s", "NEP_SOLO": "umol/m2/s", "GPP_SOLO": "umol/m2/s",
+              "ER_SOLO": "umol/m2/s", "ET": "kg/m2/s", "Precip": "mm", "Ah": "g/m3",
+              "Fc": "umol/m2/s", "Fe": "W/m2", "Fh": "W/m2", "Fg": "W/m2", "Fn": "W/m2",
+              "Fsd": "W/m2", "Fsu": "W/m2", "Fld": "W/m2", "Flu": "W/m2", "ps": "kPa",
+              "q": "kg/kg", "RH": "%", "Sws": "m3/m3", "Ta": "C", "Ts": "C", "ustar": "m/s",
+              "Ws": "m/s"}
+    for label in labels:
+        data = numpy.random.randn(nrecs) + 10
+        flag = numpy.where(numpy.random.rand(nrecs) < 0.2, 30, 0).astype(numpy.int32)
+        missing = numpy.random.rand(nrecs) < 0.01
+        data[missing] = float(c.missing_value)
+        flag[missing] = 1
+        ds.series[label] = {"Data": data, "Flag": flag, "Attr": {"units": labels[label]}}
+    return ds
+
+def memory_levels(nc_file_name, method):
+    """
+    Purpose:
+     Make L2 to L6 data structures from a netCDF file, copying each level from
+     the one before using copy.deepcopy ("deepcopy") or pfp_io.share_datastructure
+     ("shared").  At each level the QC flags are checked, the coverage is
+     calculated, 3 new series are created and the level is written to a netCDF
+     file.  All levels are kept, as they are in the GUI.
+     Run in a separate process by benchmark_memory so the peak memory use of
+     each method can be measured.
+    Usage:
+     elapsed, held, peak = memory_levels(nc_file_name, method)
+     where elapsed is the time taken in seconds
+           held is the memory used by the data and QC flag arrays of all levels in MB
+           peak is the peak memory use of the process in MB (None on Windows)
+    Author: PRI
+    Date: October 2026
+    """
+    ds = pfp_io.nc_read_series(nc_file_name)
+    labels = sorted([label for label in ds.series.keys()
+                     if label not in ["DateTime", "DateTime_UTC", "time"]])
+    temp_dir = tempfile.mkdtemp()
+    out_name = os.path.join(temp_dir, "memory.nc")
+    levels = [ds]
+    start = time.time()
+    for level in ["L2", "L3", "L4", "L5", "L6"]:
+        if method == "deepcopy":
+            ds = copy.deepcopy(levels[-1])
+        else:
+            ds = pfp_io.share_datastructure(levels[-1])
+        ds.globalattributes["nc_level"] = level
+        pfp_utils.CheckQCFlags(ds)
+        pfp_utils.get_coverage_individual(ds)
+        for label in labels[:3]:
+            var = pfp_utils.GetVariable(ds, label)
+            var["Label"] = label + "_" + level
+            pfp_utils.CreateVariable(ds, var)
+        nc_file = pfp_io.nc_open_write(out_name)
+        pfp_io.nc_write_series(nc_file, ds)
+        os.remove(out_name)
+        levels.append(ds)
+    elapsed = time.time() - start
+    os.rmdir(temp_dir)
+    # memory used by the data and QC flag arrays, shared arrays are counted once
+    arrays = {}
+    for ds in levels:
+        for label in ds.series.keys():
+            for key in ["Data", "Flag"]:
+                array = pfp_utils.get_series_view(ds, label, key)
+                while isinstance(array.base, numpy.ndarray):
+                    array = array.base
+                arrays[id(array)] = array.nbytes
+    held = sum(arrays.values())/1.0E6
+    peak = None
+    if resource is not None:
+        # ru_maxrss is in kB on Linux and in bytes on macOS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        peak = peak/1.0E6 if platform.system() == "Darwin" else peak/1.0E3
+    return elapsed, held, peak
+
+def benchmark_memory(nc_file_name):
+    """
+    Purpose:
+     Compare the memory used to make the L2 to L6 data structures from a
+     (multi-year) netCDF file when each level is a full copy of the level
+     before (copy.deepcopy) and when each level shares unchanged series with
+     the level before (pfp_io.share_datastructure).
+    Usage:
+     benchmark_memory(nc_file_name)
+    Author: PRI
+    Date: October 2026
+    """
+    results = []
+    for method in ["deepcopy", "shared"]:
+        # a new process for each method so the peak memory use is not shared
+        pool = multiprocessing.Pool(1)
+        results.append([method] + list(pool.apply(memory_levels, (nc_file_name, method))))
+        pool.close()
+        pool.join()
+    ds = pfp_io.nc_read_series(nc_file_name)
+    print "Records:", ds.globalattributes["nc_nrecs"], "variables:", len(ds.series.keys())
+    print "%-10s %10s %16s %14s" % ("method", "time (s)", "L1-L6 arrays (MB)", "peak RSS (MB)")
+    for method, elapsed, held, peak in results:
+        peak = "n/a" if peak is None else "%.1f" % peak
+        print "%-10s %10.2f %16.1f %14s" % (method, elapsed, held, peak)
+    return
+
+def nc_write_var_tolist(ncFile, ds, ThisOne, dim):
+    """ The original nc_write_var, data and flags written as Python lists."""
+    ncVar = ncFile.createVariable(ThisOne, "d", dim)
+    ncVar[:, 0, 0] = ds.series[ThisOne]["Data"].tolist()
+    for item in ds.series[ThisOne]["Attr"]:
+        if item != "_FillValue":
+            ncVar.setncattr(item, str(ds.series[ThisOne]["Attr"][item]))
+    ncVar = ncFile.createVariable(ThisOne+"_QCFlag", "i", dim)
+    ncVar[:, 0, 0] = ds.series[ThisOne]["Flag"].tolist()
+
+def benchmark_nc_write(nc_file_name):
+    """
+    Purpose:
+     Compare the time taken and the file size for writing a netCDF file using
+     the original writer (data converted to lists, no compression) and
+     pfp_io.nc_write_series with and without compression.
+    Usage:
+     benchmark_nc_write(nc_file_name)
+    Author: PRI
+    Date: October 2026
+    """
+    ds = pfp_io.nc_read_series(nc_file_name)
+    nrecs = int(ds.globalattributes["nc_nrecs"])
+    labels = [label for label in ds.series.keys()
+              if label not in ["DateTime", "DateTime_UTC", "time"]]
+    temp_dir = tempfile.mkdtemp()
+    results = []
+    # original writer
+    out_name = os.path.join(temp_dir, "tolist.nc")
+    start = time.time()
+    nc_file = netCDF4.Dataset(out_name, "w", format="NETCDF4")
+    nc_file.createDimension("time", nrecs)
+    nc_file.createDimension("latitude", 1)
+    nc_file.createDimension("longitude", 1)
+    for label in labels:
+        nc_write_var_tolist(nc_file, ds, label, ("time", "latitude", "longitude"))
+    nc_file.close()
+    results.append(["tolist, uncompressed", time.time() - start, os.path.getsize(out_name)])
+    # new writer, with and without compression
+    for zlib, chunksize, name in [(False, 0, "numpy, uncompressed"),
+                                  (True, 0, "numpy, zlib level 4"),
+                                  (True, 17520, "numpy, zlib level 4, 1 year chunks")]:
+        out_name = os.path.join(temp_dir, "numpy.nc")
+        write_options = {"zlib": zlib, "complevel": 4, "shuffle": True, "chunksize": chunksize}
+        start = time.time()
+        nc_file = pfp_io.nc_open_write(out_name)
+        pfp_io.nc_write_series(nc_file, ds, write_options=write_options)
+        results.append([name, time.time() - start, os.path.getsize(out_name)])
+        os.remove(out_name)
+    os.remove(os.path.join(temp_dir, "tolist.nc"))
+    os.rmdir(temp_dir)
+    print "Records:", nrecs, "variables:", len(labels)
+    for name, elapsed, size in results:
+        print "%-36s %8.2f s %10.1f MB" % (name, elapsed, size/1.0E6)
+    return
+
+def benchmark_solo(nc_file_name, target="Fc", drivers="Fn,Fg,q,VPD,Ta,Ts"):
+    """
+    Purpose:
+     Compare the time taken and the fit to the target data for SOLO run
+     in-process (pfp_gfSOLO.gfSOLO_runnative) and SOLO run using the compiled
+     sofm, solo and seqsolo programs.  The compiled programs are only run if
+     they are present in ../solo/bin.
+    Usage:
+     benchmark_solo(nc_file_name, target="Fc", drivers="Fn,Fg,q,VPD,Ta,Ts")
+     where nc_file_name is an L4 or L5 netCDF file with gap filled drivers
+    Author: PRI
+    Date: October 2026
+    """
+    ds = pfp_io.nc_read_series(nc_file_name)
+    nrecs = int(ds.globalattributes["nc_nrecs"])
+    drivers = drivers.split(",")
+    gui = {"nodes_target": len(drivers) + 1, "training": "500", "nda_factor": "5",
+           "learning_rate": "0.001", "iterations": "500"}
+    obs, _, _ = pfp_utils.GetSeries(ds, target)
+    results = []
+    # native
+    ds.series["SOLO_native"] = {"Data": numpy.full(nrecs, float(c.missing_value)),
+                                "Flag": numpy.zeros(nrecs, dtype=numpy.int32), "Attr": {}}
+    start = time.time()
+    pfp_gfSOLO.gfSOLO_runnative(ds, drivers, target, "SOLO_native", nrecs, 30, gui)
+    results.append(["native", time.time() - start, ds.series["SOLO_native"]["Data"]])
+    # compiled programs, these use paths relative to the PyFluxPro directory
+    exe = "sofm.exe" if platform.system() == "Windows" else "sofm"
+    if os.path.isfile(os.path.join("..", "solo", "bin", exe)):
+        ds.series["SOLO_binary"] = {"Data": numpy.full(nrecs, float(c.missing_value)),
+                                    "Flag": numpy.zeros(nrecs, dtype=numpy.int32), "Attr": {}}
+        os.chdir("..")
+        start = time.time()
+        work_dir = pfp_utils.make_work_directory("solo_", subdirectories=["inf", "input", "output", "log"])
+        try:
+            pfp_gfSOLO.gfSOLO_writeinffiles({"gui": gui}, work_dir)
+            pfp_gfSOLO.gfSOLO_runsofm(ds, drivers, target, nrecs, work_dir)
+            pfp_gfSOLO.gfSOLO_runsolo(ds, drivers, target, nrecs, work_dir)
+            pfp_gfSOLO.gfSOLO_runseqsolo(ds, drivers, target, "SOLO_binary", nrecs, 30, work_dir)
+        finally:
+            pfp_utils.remove_work_directory(work_dir)
+        results.append(["sofm, solo and seqsolo programs", time.time() - start,
+                        ds.series["SOLO_binary"]["Data"]])
+        os.chdir("utilities")
+    else:
+        print "solo: compiled SOLO programs not found in ../solo/bin, skipping"
+    print "Records:", nrecs, "target:", target, "drivers:", ",".join(drivers)
+    for name, elapsed, data in results:
+        index = numpy.where((abs(obs - float(c.missing_value)) > c.eps) &
+                            (abs(data - float(c.missing_value)) > c.eps))[0]
+        rmse = numpy.sqrt(numpy.mean((data[index] - obs[index])**2))
+        print "%-36s %8.2f s  RMSE %8.3f" % (name, elapsed, rmse)
+    if len(results) == 2:
+        print "RMS difference native - programs: %8.3f" % numpy.sqrt(numpy.mean((results[0][2] - results[1][2])**2))
+    return
+
+def xl_read_column_original(xl_sheet, xl_col, first_data_row):
+    """ The original column read from pfp_io.xl_read_series, one cell at a time."""
+    last_data_row = int(xl_sheet.nrows)
+    values = xl_sheet.col_values(xl_col)[first_data_row:last_data_row]
+    types = xl_sheet.col_types(xl_col)[first_data_row:last_data_row]
+    nrecs = len(values)
+    data = numpy.ones(nrecs,dtype=numpy.float64)*float(c.missing_value)
+    flag = numpy.ones(nrecs,dtype=numpy.int32)
+    for i in range(nrecs):
+        if (types[i]==3) or (types[i]==2) and (values[i]!=c.missing_value):
+            data[i] = numpy.float64(values[i])
+            flag[i] = numpy.int32(0)
+    return data, flag
+
+def benchmark_xl_read(xl_file_name, first_data_row=3, header_row=2):
+    """
+    Purpose:
+     Compare the time taken to load every column of every sheet in an Excel
+     workbook using the original cell by cell loop and pfp_io.xl_read_column,
+     and check the data and flags are identical.  The row numbers are Excel
+     row numbers, as in the L1 control file.
+    Usage:
+     benchmark_xl_read(xl_file_name, first_data_row=3, header_row=2)
+    Author: PRI
+    Date: October 2026
+    """
+    first_data_row = int(first_data_row) - 1
+    header_row = int(header_row) - 1
+    start = time.time()
+    xl_book = xlrd.open_workbook(xl_file_name)
+    parse_time = time.time() - start
+    times = {"original": 0.0, "xl_read_column": 0.0}
+    ncols, nrecs, identical = 0, 0, True
+    for xl_sheet in xl_book.sheets():
+        if xl_sheet.nrows <= first_data_row:
+            continue
+        for xl_col in range(len(xl_sheet.row_values(header_row))):
+            start = time.time()
+            data0, flag0 = xl_read_column_original(xl_sheet, xl_col, first_data_row)
+            times["original"] += time.time() - start
+            start = time.time()
+            data1, flag1 = pfp_io.xl_read_column(xl_sheet, xl_col, first_data_row)
+            times["xl_read_column"] += time.time() - start
+            if data0.tobytes() != data1.tobytes() or flag0.tobytes() != flag1.tobytes():
+                print "xl_read: sheet " + xl_sheet.name + " column " + str(xl_col) + " differs"
+                identical = False
+            ncols += 1
+            nrecs = max([nrecs, len(data0)])
+    print "Columns:", ncols, "records:", nrecs, "workbook parse: %.2f s" % parse_time
+    for name in ["original", "xl_read_column"]:
+        print "%-16s %8.2f s" % (name, times[name])
+    print "Data and flags identical:", identical
+    return
+
+if (__name__ == '__main__'):
+    benchmarks = {"cpd_fit": benchmark_cpd_fit,
+                  "csv_read": benchmark_csv_read,
+                  "date_index": benchmark_date_index,
+                  "interpolate": benchmark_interpolate,
+                  "l6_summary": benchmark_l6_summary,
+                  "lasslop": benchmark_lasslop,
+                  "mds": benchmark_mds,
+                  "memory": benchmark_memory,
+                  "mpt": benchmark_mpt,
+                  "nc_write": benchmark_nc_write,
+                  "solo": benchmark_solo,
+                  "xl_read": benchmark_xl_read}
+    if len(sys.argv) < 2 or sys.argv[1] not in benchmarks:
+        print "Usage: python pfp_benchmarks.py <benchmark> <argument>"
+        print " where <benchmark> is one of " + ",".join(sorted(benchmarks.keys()))
+        sys.exit()
+    benchmarks[sys.argv[1]](*sys.argv[2:])